@@ -51,8 +51,9 @@ export default function LoginPage() {
         // Extraemos el token de la respuesta (compatible con FastAPI)
         const token = response?.data?.access_token || response?.data?.token || response?.data?.accessToken || response?.data?.token?.access_token;
         if (token) {
-          // Guardar el token usando la función de api.ts (localStorage)
-          setAuthToken(token, true); // true = remember me (usa localStorage)
+          // Guardar el token usando la función de api.ts (localStorage), junto con
+          // el refresh token con el que api.ts lo renueva al vencer
+          setAuthToken(token, true, response?.data?.refresh_token); // true = remember me (usa localStorage)
         }
         router.push('/home/dashboard');
         toast.success('Inicio de sesión exitoso');
@@ -10,6 +10,7 @@ import {
     updateProductoStock,
     getCategorias,
     getTasasImpositivas,
+    uploadFile,
     api
 } from 'app/lib/api';
 import { toast, ToastContainer } from 'react-toastify';
@@ -118,25 +119,9 @@ export default function Products() {
 
     // Subir imagen con empresa_id
     async function uploadImage(file: File, empresaId: string): Promise<string> {
-        const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000/api/v1';
-        const formDataUpload = new FormData();
-        formDataUpload.append('file', file);
-        formDataUpload.append('empresa_id', empresaId);
-        
-        const response = await fetch(`${API_URL}/upload/producto`, {
-            method: 'POST',
-            headers: {
-                'Authorization': `Bearer ${localStorage.getItem('authToken') || sessionStorage.getItem('authToken')}`
-            },
-            body: formDataUpload,
-        });
-        
-        if (!response.ok) {
-            throw new Error('Error al subir imagen');
-        }
-        
-        const data = await response.json();
-        return data.url;
+        // uploadFile renueva el token si venció
+        const response = await uploadFile('/upload/producto', file, { empresa_id: empresaId });
+        return response.data.url;
     }
 
     // Crear nuevo producto
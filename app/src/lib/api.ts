@@ -52,14 +52,26 @@ const getAuthToken = (): string | null => {
 };
 
 /**
- * Store authentication token
+ * Get the refresh token, stored next to the access token
  */
-export const setAuthToken = (token: string, remember: boolean = false): void => {
+const getRefreshToken = (): string | null => {
+  if (typeof window === 'undefined') return null;
+  return localStorage.getItem('refreshToken') || sessionStorage.getItem('refreshToken');
+};
+
+/**
+ * Store authentication token (and the refresh token used to renew it)
+ */
+export const setAuthToken = (
+  token: string,
+  remember: boolean = false,
+  refreshToken?: string
+): void => {
   if (typeof window === 'undefined') return;
-  if (remember) {
-    localStorage.setItem('authToken', token);
-  } else {
-    sessionStorage.setItem('authToken', token);
+  const storage = remember ? localStorage : sessionStorage;
+  storage.setItem('authToken', token);
+  if (refreshToken) {
+    storage.setItem('refreshToken', refreshToken);
   }
 };
 
@@ -70,6 +82,84 @@ export const clearAuthToken = (): void => {
   if (typeof window === 'undefined') return;
   localStorage.removeItem('authToken');
   sessionStorage.removeItem('authToken');
+  localStorage.removeItem('refreshToken');
+  sessionStorage.removeItem('refreshToken');
+};
+
+/**
+ * Access tokens are short-lived: an expired or revoked one gets 401, or 403
+ * with this detail. Other 403s are missing permissions and are not retried.
+ */
+const INVALID_CREDENTIALS = 'Could not validate credentials';
+
+// eslint-disable-next-line @typescript-eslint/no-explicit-any
+const isAuthFailure = (status: number, data: any): boolean =>
+  status === 401 || (status === 403 && data?.detail === INVALID_CREDENTIALS);
+
+let refreshInFlight: Promise<string | null> | null = null;
+
+/**
+ * Exchange the refresh token for a new pair through /login/refresh-token.
+ * The backend rotates the refresh token and revokes the session if an old one
+ * is reused, so concurrent requests share one refresh and tabs take turns
+ * through a Web Lock. Returns the new access token, or null if the session ended.
+ */
+export const refreshAuthToken = (): Promise<string | null> => {
+  if (!refreshInFlight) {
+    refreshInFlight = doRefresh().finally(() => {
+      refreshInFlight = null;
+    });
+  }
+  return refreshInFlight;
+};
+
+const doRefresh = async (): Promise<string | null> => {
+  const used = getRefreshToken();
+  if (!used) return null;
+
+  const run = async (): Promise<string | null> => {
+    // Another tab may have rotated it while this one waited for the lock
+    const current = getRefreshToken();
+    if (current !== used) {
+      return current ? getAuthToken() : null;
+    }
+    try {
+      const response = await fetch(`${API_BASE_URL}/login/refresh-token`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ refresh_token: used }),
+      });
+      if (!response.ok) return null;
+      const data = await response.json();
+      setAuthToken(data.access_token, localStorage.getItem('refreshToken') === used, data.refresh_token);
+      return data.access_token;
+    } catch {
+      return null;
+    }
+  };
+
+  if (typeof navigator !== 'undefined' && navigator.locks) {
+    return navigator.locks.request('authRefresh', run);
+  }
+  return run();
+};
+
+/**
+ * Read-your-writes: the backend returns the time of each successful write in
+ * this header. Sending it back makes the following listings read from the
+ * primary database until the read replica has caught up.
+ */
+const WRITE_HEADER = 'X-Ultima-Escritura';
+const WRITE_STORAGE_KEY = 'ultimaEscritura';
+
+const getLastWrite = (): string | null => {
+  if (typeof window === 'undefined') return null;
+  return localStorage.getItem(WRITE_STORAGE_KEY);
+};
+
+const storeLastWrite = (value: string | null): void => {
+  if (typeof window === 'undefined' || !value) return;
+  localStorage.setItem(WRITE_STORAGE_KEY, value);
 };
 
 /**
@@ -79,7 +169,8 @@ export const clearAuthToken = (): void => {
 // eslint-disable-next-line @typescript-eslint/no-explicit-any
 export async function apiRequest<T = any>(
   endpoint: string,
-  options: RequestOptions = {}
+  options: RequestOptions = {},
+  retried: boolean = false
 ): Promise<ApiResponse<T>> {
   const {
     useAuth = true,
@@ -110,6 +201,12 @@ export async function apiRequest<T = any>(
     }
   }
 
+  // Echo the last write marker (see WRITE_HEADER)
+  const lastWrite = getLastWrite();
+  if (lastWrite) {
+    requestHeaders[WRITE_HEADER] = lastWrite;
+  }
+
   // Create AbortController for timeout
   const controller = new AbortController();
   const timeoutId = setTimeout(() => controller.abort(), timeout);
@@ -122,6 +219,7 @@ export async function apiRequest<T = any>(
     });
 
     clearTimeout(timeoutId);
+    storeLastWrite(response.headers.get(WRITE_HEADER));
 
     // Parse response
     let data;
@@ -135,8 +233,15 @@ export async function apiRequest<T = any>(
 
     // Handle non-OK responses
     if (!response.ok) {
-      // Handle 401 Unauthorized - clear token and redirect to login
-      if (response.status === 401) {
+      // Expired access token - renew it once and repeat the request
+      if (useAuth && !retried && isAuthFailure(response.status, data)) {
+        if (await refreshAuthToken()) {
+          return apiRequest<T>(endpoint, options, true);
+        }
+      }
+
+      // Session ended - clear token and redirect to login
+      if (useAuth && isAuthFailure(response.status, data)) {
         clearAuthToken();
         if (typeof window !== 'undefined') {
           window.location.href = '/auth/login';
@@ -242,7 +347,8 @@ export async function uploadFile(
   file: File | File[],
   // eslint-disable-next-line @typescript-eslint/no-explicit-any
   additionalData?: Record<string, any>,
-  onProgress?: (progress: number) => void
+  onProgress?: (progress: number) => void,
+  retried: boolean = false
 ): Promise<ApiResponse> {
   const formData = new FormData();
 
@@ -274,15 +380,26 @@ export async function uploadFile(
       });
 
       xhr.addEventListener('load', () => {
+        storeLastWrite(xhr.getResponseHeader(WRITE_HEADER));
+        let data;
+        try {
+          data = JSON.parse(xhr.responseText);
+        } catch {
+          data = xhr.responseText;
+        }
         if (xhr.status >= 200 && xhr.status < 300) {
-          try {
-            const data = JSON.parse(xhr.responseText);
-            resolve({ data, status: xhr.status });
-          } catch {
-            resolve({ data: xhr.responseText, status: xhr.status });
-          }
+          resolve({ data, status: xhr.status });
+        } else if (!retried && isAuthFailure(xhr.status, data)) {
+          // Expired access token - renew it once and upload again
+          refreshAuthToken().then((token) => {
+            if (token) {
+              resolve(uploadFile(endpoint, file, additionalData, onProgress, true));
+            } else {
+              reject(new ApiError(`Upload failed with status ${xhr.status}`, xhr.status, data));
+            }
+          });
         } else {
-          reject(new ApiError(`Upload failed with status ${xhr.status}`, xhr.status));
+          reject(new ApiError(`Upload failed with status ${xhr.status}`, xhr.status, data));
         }
       });
 
@@ -296,6 +413,10 @@ export async function uploadFile(
       if (token) {
         xhr.setRequestHeader('Authorization', `Bearer ${token}`);
       }
+      const lastWrite = getLastWrite();
+      if (lastWrite) {
+        xhr.setRequestHeader(WRITE_HEADER, lastWrite);
+      }
 
       xhr.send(formData);
     });
@@ -103,6 +103,11 @@ export const Sidebar: React.FC<SidebarProps> = ({ isOpen, onClose }) => {
       // nada
     }
 
+    // Revocar la sesión en el backend (el token se lee antes de limpiarlo)
+    api.post('/logout').catch(() => {
+      // el token ya no era válido
+    });
+
     // Limpiar token almacenado en local/session storage (si aplica)
     try {
       clearAuthToken();
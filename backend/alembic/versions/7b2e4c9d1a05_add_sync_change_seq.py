@@ -0,0 +1,68 @@
+"""Add sync change_seq and tombstones
+
+Revision ID: 7b2e4c9d1a05
+Revises: 3f6a9d2b7c14
+Create Date: 2026-10-19 14:02:17.540128
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b2e4c9d1a05'
+down_revision: Union[str, Sequence[str], None] = '3f6a9d2b7c14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# tabla -> columnas de alcance del índice de sincronización
+SYNCED = {
+    'restaurante': [],
+    'tasaimpositiva': [],
+    'categoria': ['restaurante_id'],
+    'producto': ['restaurante_id'],
+    'mesarestaurante': ['restaurante_id'],
+    'orden': ['restaurante_id'],
+    'ordenitem': [],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(sa.schema.CreateSequence(sa.Sequence('sync_change_seq')))
+
+    op.create_table('synctombstone',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('tabla', sqlmodel.sql.sqltypes.AutoString(length=50), nullable=False),
+    sa.Column('registro_id', sa.Uuid(), nullable=False),
+    sa.Column('restaurante_id', sa.Uuid(), nullable=True),
+    sa.Column('empresa_id', sa.Uuid(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('change_seq', sa.BigInteger(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_synctombstone_sync', 'synctombstone', ['restaurante_id', 'change_seq'], unique=False)
+    op.create_index('ix_synctombstone_sync_pendiente', 'synctombstone', ['id'], unique=False, postgresql_where=sa.text('change_seq IS NULL'))
+
+    for tabla, scope in SYNCED.items():
+        op.add_column(tabla, sa.Column('change_seq', sa.BigInteger(), nullable=True))
+        # Las filas existentes reciben su número ahora: el primer sync (since=0) las trae todas
+        op.execute(f"UPDATE {tabla} SET change_seq = nextval('sync_change_seq')")
+        op.create_index(f'ix_{tabla}_sync', tabla, [*scope, 'change_seq'], unique=False)
+        op.create_index(f'ix_{tabla}_sync_pendiente', tabla, ['id'], unique=False, postgresql_where=sa.text('change_seq IS NULL'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for tabla in reversed(SYNCED):
+        op.drop_index(f'ix_{tabla}_sync_pendiente', table_name=tabla)
+        op.drop_index(f'ix_{tabla}_sync', table_name=tabla)
+        op.drop_column(tabla, 'change_seq')
+
+    op.drop_index('ix_synctombstone_sync_pendiente', table_name='synctombstone')
+    op.drop_index('ix_synctombstone_sync', table_name='synctombstone')
+    op.drop_table('synctombstone')
+    op.execute(sa.schema.DropSequence(sa.Sequence('sync_change_seq')))
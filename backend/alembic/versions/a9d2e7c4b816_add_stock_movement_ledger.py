@@ -0,0 +1,56 @@
+"""Add stock movement ledger and stock snapshots
+
+Revision ID: a9d2e7c4b816
+Revises: f3a8b61c2d95
+Create Date: 2026-10-20 00:41:27.318406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9d2e7c4b816'
+down_revision: Union[str, Sequence[str], None] = 'f3a8b61c2d95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('movimientostock',
+    sa.Column('producto_id', sa.Uuid(), nullable=False),
+    sa.Column('tipo', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('cantidad', sa.Integer(), nullable=False),
+    sa.Column('orden_id', sa.Uuid(), nullable=True),
+    sa.Column('notas', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('fecha', sa.DateTime(), nullable=False),
+    sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), autoincrement=True, nullable=False),
+    sa.ForeignKeyConstraint(['producto_id'], ['producto.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_movimientostock_producto', 'movimientostock', ['producto_id', 'id'], unique=False)
+    op.create_table('snapshotstock',
+    sa.Column('producto_id', sa.Uuid(), nullable=False),
+    sa.Column('movimiento_id', sa.BigInteger(), nullable=False),
+    sa.Column('stock', sa.Integer(), nullable=False),
+    sa.Column('fecha', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['producto_id'], ['producto.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('producto_id', 'movimiento_id')
+    )
+    # El stock actual de cada producto entra al libro como ajuste inicial, así el
+    # contador coincide con la suma de los movimientos desde el principio
+    op.execute(
+        "INSERT INTO movimientostock (producto_id, tipo, cantidad, notas, fecha)"
+        " SELECT id, 'ajuste', stock, 'Stock inicial', CURRENT_TIMESTAMP FROM producto WHERE stock <> 0"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('snapshotstock')
+    op.drop_index('ix_movimientostock_producto', table_name='movimientostock')
+    op.drop_table('movimientostock')
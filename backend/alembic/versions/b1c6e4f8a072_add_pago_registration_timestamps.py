@@ -0,0 +1,44 @@
+"""Add pago cobrado_en / reembolsado_en for cash register closings
+
+Revision ID: b1c6e4f8a072
+Revises: a9d2e7c4b816
+Create Date: 2026-10-20 09:12:04.552917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b1c6e4f8a072'
+down_revision: Union[str, Sequence[str], None] = 'a9d2e7c4b816'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in ('pago', 'pago_archivo'):
+        op.add_column(table, sa.Column('cobrado_en', sa.DateTime(), nullable=True))
+        op.add_column(table, sa.Column('reembolsado_en', sa.DateTime(), nullable=True))
+        # Para los pagos existentes la mejor aproximación es fecha_pago, que es
+        # con lo que se armaron los cierres anteriores
+        op.execute(
+            f"UPDATE {table} SET cobrado_en = fecha_pago"
+            " WHERE estado IN ('completado', 'reembolsado')"
+        )
+        op.execute(f"UPDATE {table} SET reembolsado_en = fecha_pago WHERE estado = 'reembolsado'")
+    op.create_index('ix_pago_cobrado_en', 'pago', ['cobrado_en'], unique=False)
+    op.create_index('ix_pago_reembolsado_en', 'pago', ['reembolsado_en'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_pago_reembolsado_en', table_name='pago')
+    op.drop_index('ix_pago_cobrado_en', table_name='pago')
+    for table in ('pago_archivo', 'pago'):
+        op.drop_column(table, 'reembolsado_en')
+        op.drop_column(table, 'cobrado_en')
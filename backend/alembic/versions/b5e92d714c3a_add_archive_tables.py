@@ -0,0 +1,116 @@
+"""Add archive tables for closed orders and paid invoices
+
+Revision ID: b5e92d714c3a
+Revises: e8b3c5d27f40
+Create Date: 2026-10-19 21:12:45.308116
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e92d714c3a'
+down_revision: Union[str, Sequence[str], None] = 'e8b3c5d27f40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('articulofactura_archivo',
+    sa.Column('cantidad', sa.Integer(), nullable=False),
+    sa.Column('precio_unitario', sa.Float(), nullable=False),
+    sa.Column('descuento', sa.Float(), nullable=False),
+    sa.Column('impuesto', sa.Float(), nullable=False),
+    sa.Column('subtotal', sa.Float(), nullable=False),
+    sa.Column('total', sa.Float(), nullable=False),
+    sa.Column('descripcion', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('factura_id', sa.Uuid(), nullable=False),
+    sa.Column('producto_id', sa.Uuid(), nullable=False),
+    sa.Column('tasa_impositiva_id', sa.Uuid(), nullable=False),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('archivado_en', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_articulofactura_archivo_factura_id', 'articulofactura_archivo', ['factura_id'], unique=False)
+    op.create_table('pago_archivo',
+    sa.Column('monto', sa.Float(), nullable=False),
+    sa.Column('metodo_pago', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('referencia', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('notas', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('estado', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('factura_id', sa.Uuid(), nullable=False),
+    sa.Column('procesado_por', sa.Uuid(), nullable=True),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('fecha_pago', sa.DateTime(), nullable=False),
+    sa.Column('archivado_en', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_pago_archivo_factura_id', 'pago_archivo', ['factura_id'], unique=False)
+    op.create_table('factura_archivo',
+    sa.Column('numero_factura', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('fecha', sa.DateTime(), nullable=False),
+    sa.Column('subtotal', sa.Float(), nullable=False),
+    sa.Column('impuestos', sa.Float(), nullable=False),
+    sa.Column('total', sa.Float(), nullable=False),
+    sa.Column('estado', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('tipo_factura', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('notas', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('fecha_vencimiento', sa.DateTime(), nullable=True),
+    sa.Column('orden_id', sa.Uuid(), nullable=True),
+    sa.Column('cliente_id', sa.Uuid(), nullable=False),
+    sa.Column('restaurante_id', sa.Uuid(), nullable=False),
+    sa.Column('empresa_id', sa.Uuid(), nullable=True),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('archivado_en', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_factura_archivo_numero_factura', 'factura_archivo', ['numero_factura'], unique=False)
+    op.create_index('ix_factura_archivo_restaurante_id_fecha', 'factura_archivo', ['restaurante_id', 'fecha'], unique=False)
+    op.create_index('ix_factura_archivo_orden_id', 'factura_archivo', ['orden_id'], unique=False)
+    op.create_table('ordenitem_archivo',
+    sa.Column('orden_id', sa.Uuid(), nullable=False),
+    sa.Column('producto_id', sa.Uuid(), nullable=False),
+    sa.Column('cantidad', sa.Integer(), nullable=False),
+    sa.Column('precio_unitario', sa.Float(), nullable=False),
+    sa.Column('notas', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('archivado_en', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_ordenitem_archivo_orden_id', 'ordenitem_archivo', ['orden_id'], unique=False)
+    op.create_table('orden_archivo',
+    sa.Column('fecha', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('total', sa.Float(), nullable=False),
+    sa.Column('estado', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('numero_comensales', sa.Integer(), nullable=True),
+    sa.Column('mesa_id', sa.Uuid(), nullable=True),
+    sa.Column('cliente_id', sa.Uuid(), nullable=False),
+    sa.Column('restaurante_id', sa.Uuid(), nullable=False),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('archivado_en', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_orden_archivo_restaurante_id_fecha', 'orden_archivo', ['restaurante_id', 'fecha'], unique=False)
+    op.create_index('ix_orden_archivo_cliente_id', 'orden_archivo', ['cliente_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_orden_archivo_cliente_id', table_name='orden_archivo')
+    op.drop_index('ix_orden_archivo_restaurante_id_fecha', table_name='orden_archivo')
+    op.drop_table('orden_archivo')
+    op.drop_index('ix_ordenitem_archivo_orden_id', table_name='ordenitem_archivo')
+    op.drop_table('ordenitem_archivo')
+    op.drop_index('ix_factura_archivo_orden_id', table_name='factura_archivo')
+    op.drop_index('ix_factura_archivo_restaurante_id_fecha', table_name='factura_archivo')
+    op.drop_index('ix_factura_archivo_numero_factura', table_name='factura_archivo')
+    op.drop_table('factura_archivo')
+    op.drop_index('ix_pago_archivo_factura_id', table_name='pago_archivo')
+    op.drop_table('pago_archivo')
+    op.drop_index('ix_articulofactura_archivo_factura_id', table_name='articulofactura_archivo')
+    op.drop_table('articulofactura_archivo')
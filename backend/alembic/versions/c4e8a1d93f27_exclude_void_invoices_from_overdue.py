@@ -0,0 +1,41 @@
+"""Exclude annulled and cancelled invoices from the overdue set
+
+Revision ID: c4e8a1d93f27
+Revises: b1c6e4f8a072
+Create Date: 2026-10-20 10:03:41.270583
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8a1d93f27'
+down_revision: Union[str, Sequence[str], None] = 'b1c6e4f8a072'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OLD_WHERE = "estado <> 'pagada' AND fecha_vencimiento IS NOT NULL"
+NEW_WHERE = "estado NOT IN ('pagada', 'anulada', 'cancelada') AND fecha_vencimiento IS NOT NULL"
+
+
+def _recreate_index(where: str) -> None:
+    op.drop_index('ix_factura_vencimiento_pendiente', table_name='factura')
+    op.create_index('ix_factura_vencimiento_pendiente', 'factura', ['fecha_vencimiento'], unique=False, postgresql_where=sa.text(where), sqlite_where=sa.text(where))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _recreate_index(NEW_WHERE)
+    op.execute(
+        "DELETE FROM facturavencida WHERE factura_id IN"
+        " (SELECT id FROM factura WHERE estado IN ('anulada', 'cancelada'))"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _recreate_index(OLD_WHERE)
@@ -0,0 +1,53 @@
+"""Add cierre de caja snapshots and correction approval date
+
+Revision ID: c7d41a9e3f58
+Revises: b5e92d714c3a
+Create Date: 2026-10-19 22:40:11.527904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d41a9e3f58'
+down_revision: Union[str, Sequence[str], None] = 'b5e92d714c3a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('cierrecaja',
+    sa.Column('restaurante_id', sa.Uuid(), nullable=False),
+    sa.Column('numero', sa.Integer(), nullable=False),
+    sa.Column('desde', sa.DateTime(), nullable=False),
+    sa.Column('hasta', sa.DateTime(), nullable=False),
+    sa.Column('cerrado_por', sa.Uuid(), nullable=True),
+    sa.Column('total_pagos', sa.Float(), nullable=False),
+    sa.Column('cantidad_pagos', sa.Integer(), nullable=False),
+    sa.Column('total_reembolsos', sa.Float(), nullable=False),
+    sa.Column('total_facturado', sa.Float(), nullable=False),
+    sa.Column('cantidad_correcciones', sa.Integer(), nullable=False),
+    sa.Column('monto_correcciones', sa.Float(), nullable=False),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('pagos_por_metodo', sa.JSON(), nullable=False),
+    sa.Column('facturas_por_estado', sa.JSON(), nullable=False),
+    sa.Column('correcciones_por_tipo', sa.JSON(), nullable=False),
+    sa.ForeignKeyConstraint(['cerrado_por'], ['user.id'], ),
+    sa.ForeignKeyConstraint(['restaurante_id'], ['restaurante.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('restaurante_id', 'numero', name='uq_cierrecaja_numero')
+    )
+    op.add_column('correccionfactura', sa.Column('fecha_aprobacion', sa.DateTime(), nullable=True))
+    op.create_index('ix_correccionfactura_fecha_aprobacion', 'correccionfactura', ['fecha_aprobacion'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_correccionfactura_fecha_aprobacion', table_name='correccionfactura')
+    op.drop_column('correccionfactura', 'fecha_aprobacion')
+    op.drop_table('cierrecaja')
@@ -0,0 +1,41 @@
+"""Add tenant indexes
+
+Revision ID: d2f7a9c41b83
+Revises: a4d81f3c6e29
+Create Date: 2026-10-19 18:02:11.417530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f7a9c41b83'
+down_revision: Union[str, Sequence[str], None] = 'a4d81f3c6e29'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_orden_restaurante_estado', 'orden', ['restaurante_id', 'estado'], unique=False)
+    op.create_index('ix_ordenitem_orden', 'ordenitem', ['orden_id'], unique=False)
+    op.create_index('ix_mesarestaurante_restaurante_numero', 'mesarestaurante', ['restaurante_id', 'numero_mesa'], unique=False)
+    op.create_index('ix_restaurante_empresa', 'restaurante', ['empresa_id'], unique=False)
+    op.create_index('ix_factura_restaurante_fecha', 'factura', ['restaurante_id', 'fecha'], unique=False)
+    op.create_index('ix_factura_restaurante_estado', 'factura', ['restaurante_id', 'estado'], unique=False)
+    op.create_index('ix_pago_factura_fecha', 'pago', ['factura_id', 'fecha_pago'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_pago_factura_fecha', table_name='pago')
+    op.drop_index('ix_factura_restaurante_estado', table_name='factura')
+    op.drop_index('ix_factura_restaurante_fecha', table_name='factura')
+    op.drop_index('ix_restaurante_empresa', table_name='restaurante')
+    op.drop_index('ix_mesarestaurante_restaurante_numero', table_name='mesarestaurante')
+    op.drop_index('ix_ordenitem_orden', table_name='ordenitem')
+    op.drop_index('ix_orden_restaurante_estado', table_name='orden')
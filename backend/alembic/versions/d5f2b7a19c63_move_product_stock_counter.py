@@ -0,0 +1,42 @@
+"""Move the product stock counter out of the synced producto table
+
+Revision ID: d5f2b7a19c63
+Revises: c4e8a1d93f27
+Create Date: 2026-10-20 11:26:09.813452
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5f2b7a19c63'
+down_revision: Union[str, Sequence[str], None] = 'c4e8a1d93f27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('productostock',
+    sa.Column('producto_id', sa.Uuid(), nullable=False),
+    sa.Column('stock', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['producto_id'], ['producto.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('producto_id')
+    )
+    op.execute("INSERT INTO productostock (producto_id, stock) SELECT id, stock FROM producto")
+    op.drop_column('producto', 'stock')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('producto', sa.Column('stock', sa.Integer(), nullable=True))
+    op.execute(
+        "UPDATE producto SET stock = COALESCE("
+        "(SELECT stock FROM productostock WHERE productostock.producto_id = producto.id), 0)"
+    )
+    op.alter_column('producto', 'stock', nullable=False)
+    op.drop_table('productostock')
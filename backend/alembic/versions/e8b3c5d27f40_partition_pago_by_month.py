@@ -0,0 +1,98 @@
+"""Partition pago by month, brin index on factura.fecha
+
+Revision ID: e8b3c5d27f40
+Revises: d2f7a9c41b83
+Create Date: 2026-10-19 19:40:27.081934
+
+"""
+from datetime import date, datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b3c5d27f40'
+down_revision: Union[str, Sequence[str], None] = 'd2f7a9c41b83'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Meses futuros que se dejan creados (luego los mantiene core.partitions)
+MONTHS_AHEAD = 3
+COLUMNS = (
+    'id, monto, fecha_pago, metodo_pago, referencia, notas, estado, factura_id, procesado_por'
+)
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _pago_columns() -> list[sa.Column]:
+    return [
+        sa.Column('monto', sa.Float(), nullable=False),
+        sa.Column('fecha_pago', sa.DateTime(), nullable=False),
+        sa.Column('metodo_pago', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('referencia', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('notas', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('estado', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('factura_id', sa.Uuid(), nullable=False),
+        sa.Column('procesado_por', sa.Uuid(), nullable=True),
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.ForeignKeyConstraint(['factura_id'], ['factura.id'], ),
+        sa.ForeignKeyConstraint(['procesado_por'], ['user.id'], ),
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # La tabla actual se conserva como origen de los datos hasta copiarlos
+    op.drop_index('ix_pago_factura_fecha', table_name='pago')
+    op.rename_table('pago', 'pago_plano')
+    op.execute('ALTER TABLE pago_plano RENAME CONSTRAINT pago_pkey TO pago_plano_pkey')
+
+    # En una tabla particionada la clave de partición forma parte de la clave primaria
+    op.create_table('pago',
+    *_pago_columns(),
+    sa.PrimaryKeyConstraint('id', 'fecha_pago'),
+    postgresql_partition_by='RANGE (fecha_pago)',
+    )
+    op.create_index('ix_pago_factura_fecha', 'pago', ['factura_id', 'fecha_pago'], unique=False)
+
+    op.execute('CREATE TABLE pago_default PARTITION OF pago DEFAULT')
+    primero = op.get_bind().execute(sa.text('SELECT min(fecha_pago) FROM pago_plano')).scalar()
+    hoy = datetime.utcnow().date()
+    month = date((primero or hoy).year, (primero or hoy).month, 1)
+    last = date(hoy.year, hoy.month, 1)
+    for _ in range(MONTHS_AHEAD):
+        last = _next_month(last)
+    while month <= last:
+        end = _next_month(month)
+        op.execute(
+            f"CREATE TABLE pago_p{month:%Y_%m} PARTITION OF pago"
+            f" FOR VALUES FROM ('{month.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        month = end
+
+    op.execute(f'INSERT INTO pago ({COLUMNS}) SELECT {COLUMNS} FROM pago_plano')
+    op.drop_table('pago_plano')
+
+    op.create_index('ix_factura_fecha_brin', 'factura', ['fecha'], unique=False, postgresql_using='brin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_factura_fecha_brin', table_name='factura', postgresql_using='brin')
+
+    op.create_table('pago_plano',
+    *_pago_columns(),
+    sa.PrimaryKeyConstraint('id', name='pago_plano_pkey'),
+    )
+    op.execute(f'INSERT INTO pago_plano ({COLUMNS}) SELECT {COLUMNS} FROM pago')
+    # Borra también todas las particiones
+    op.drop_table('pago')
+    op.rename_table('pago_plano', 'pago')
+    op.execute('ALTER TABLE pago RENAME CONSTRAINT pago_plano_pkey TO pago_pkey')
+    op.create_index('ix_pago_factura_fecha', 'pago', ['factura_id', 'fecha_pago'], unique=False)
@@ -0,0 +1,49 @@
+"""Add overdue invoice set, scan watermark and partial due-date index
+
+Revision ID: f3a8b61c2d95
+Revises: c7d41a9e3f58
+Create Date: 2026-10-19 23:18:52.604117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a8b61c2d95'
+down_revision: Union[str, Sequence[str], None] = 'c7d41a9e3f58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('facturavencida',
+    sa.Column('factura_id', sa.Uuid(), nullable=False),
+    sa.Column('restaurante_id', sa.Uuid(), nullable=False),
+    sa.Column('fecha_vencimiento', sa.DateTime(), nullable=False),
+    sa.Column('detectada_en', sa.DateTime(), nullable=False),
+    sa.Column('recordatorio_enviado_en', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['factura_id'], ['factura.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('factura_id')
+    )
+    op.create_index('ix_facturavencida_restaurante', 'facturavencida', ['restaurante_id', 'fecha_vencimiento'], unique=False)
+    op.create_table('escaneovencidas',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('hasta', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # La fila de la marca existe siempre: el escaneo solo la bloquea y actualiza
+    op.execute("INSERT INTO escaneovencidas (id, hasta) VALUES (1, NULL)")
+    op.create_index('ix_factura_vencimiento_pendiente', 'factura', ['fecha_vencimiento'], unique=False, postgresql_where=sa.text("estado <> 'pagada' AND fecha_vencimiento IS NOT NULL"), sqlite_where=sa.text("estado <> 'pagada' AND fecha_vencimiento IS NOT NULL"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_factura_vencimiento_pendiente', table_name='factura', postgresql_where=sa.text("estado <> 'pagada' AND fecha_vencimiento IS NOT NULL"), sqlite_where=sa.text("estado <> 'pagada' AND fecha_vencimiento IS NOT NULL"))
+    op.drop_table('escaneovencidas')
+    op.drop_index('ix_facturavencida_restaurante', table_name='facturavencida')
+    op.drop_table('facturavencida')
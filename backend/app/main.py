@@ -1,9 +1,8 @@
-import sentry_sdk
+from typing import Any
+
 from fastapi import FastAPI
 from fastapi.routing import APIRoute
-from starlette.middleware.cors import CORSMiddleware
 
-from app.routes.main import api_router
 from core.config import settings
 
 
@@ -11,46 +10,118 @@ def custom_generate_unique_id(route: APIRoute) -> str:
     return f"{route.tags[0]}-{route.name}"
 
 
-if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
-    sentry_sdk.init(dsn=str(settings.SENTRY_DSN), enable_tracing=True)
-
-app = FastAPI(
-    title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json",
-    generate_unique_id_function=custom_generate_unique_id,
-)
-
-# Set all CORS enabled origins
-origins = settings.all_cors_origins
-
-# In development/staging environments, allow traefik.me domains
-if settings.ENVIRONMENT in ["local", "staging"]:
-    # Allow any traefik.me subdomain for development
-    origins.extend([
-        "http://botogo-frontend-h8eqpk-38b3b4-5-180-149-124.traefik.me",
-        "https://botogo-frontend-h8eqpk-38b3b4-5-180-149-124.traefik.me",
-        "http://botogo-backend-isp9bj-36a1b9-5-180-149-124.traefik.me",
-        "https://botogo-backend-isp9bj-36a1b9-5-180-149-124.traefik.me",
-        "http://localhost:3001",
-        "http://localhost:3000",
-    ])
-
-if origins:
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=origins,
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
+def _cors_origins() -> list[str]:
+    # Set all CORS enabled origins
+    origins = settings.all_cors_origins
+
+    # In development/staging environments, allow traefik.me domains
+    if settings.ENVIRONMENT in ["local", "staging"]:
+        # Allow any traefik.me subdomain for development
+        origins.extend([
+            "http://botogo-frontend-h8eqpk-38b3b4-5-180-149-124.traefik.me",
+            "https://botogo-frontend-h8eqpk-38b3b4-5-180-149-124.traefik.me",
+            "http://botogo-backend-isp9bj-36a1b9-5-180-149-124.traefik.me",
+            "https://botogo-backend-isp9bj-36a1b9-5-180-149-124.traefik.me",
+            "http://localhost:3001",
+            "http://localhost:3000",
+        ])
+    return origins
+
+
+def _configure_threadpool() -> None:
+    # Threadpool de AnyIO donde FastAPI ejecuta los handlers y dependencias `def`
+    import anyio.to_thread
+
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_SIZE
+
+
+def create_app() -> FastAPI:
+    """
+    Construir la aplicación. Importar este módulo no registra rutas, no crea el
+    engine ni toca disco o red: todo ocurre aquí (y la conexión a la base de datos
+    con la primera request que la necesite).
+
+        uvicorn --factory app.main:create_app
+    """
+    import sentry_sdk
+    from fastapi.responses import ORJSONResponse
+    from starlette.middleware.cors import CORSMiddleware
+
+    from app.routes.main import api_router
+    from app.utils import email_queue, send_overdue_reminders
+    from core.db import get_engine
+    from core.images import thumbnail_pool
+    from core.metrics import MetricsMiddleware, metrics_endpoint
+    from core.query_stats import QueryStatsMiddleware
+    from core.replica import WRITE_HEADER, ReadYourWritesMiddleware
+    from core.security import password_hasher
+    from core.storage import get_storage
+    from core.vencidas import OverdueScanner
+
+    if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
+        sentry_sdk.init(dsn=str(settings.SENTRY_DSN), enable_tracing=True)
+
+    app = FastAPI(
+        title=settings.PROJECT_NAME,
+        openapi_url=f"{settings.API_V1_STR}/openapi.json",
+        generate_unique_id_function=custom_generate_unique_id,
+        default_response_class=ORJSONResponse,
     )
 
-app.include_router(api_router, prefix=settings.API_V1_STR)
+    origins = _cors_origins()
+    if origins:
+        app.add_middleware(
+            CORSMiddleware,
+            allow_origins=origins,
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+            # El cliente web lee la marca de escritura para reenviarla (core.replica)
+            expose_headers=[WRITE_HEADER],
+        )
+
+    if settings.SQLALCHEMY_REPLICA_URI:
+        app.add_middleware(ReadYourWritesMiddleware)
+
+    if settings.SQL_INSTRUMENTATION:
+        app.add_middleware(
+            QueryStatsMiddleware, n_plus_one_threshold=settings.SQL_N_PLUS_ONE_THRESHOLD
+        )
+
+    if settings.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+        app.add_route(
+            "/metrics", metrics_endpoint(settings.METRICS_TOKEN), include_in_schema=False
+        )
+
+    app.include_router(api_router, prefix=settings.API_V1_STR)
+    app.add_event_handler("startup", _configure_threadpool)
+    app.add_event_handler("shutdown", password_hasher.shutdown)
+    app.add_event_handler("shutdown", thumbnail_pool.shutdown)
+    app.add_event_handler("shutdown", email_queue.shutdown)
+
+    if settings.OVERDUE_SCAN_SECONDS > 0:
+        # Arranca en cada worker (startup), no en el maestro de gunicorn
+        overdue_scanner = OverdueScanner(
+            engine=get_engine,
+            interval=settings.OVERDUE_SCAN_SECONDS,
+            notify=send_overdue_reminders
+            if settings.OVERDUE_REMINDERS and settings.emails_enabled
+            else None,
+        )
+        app.add_event_handler("startup", overdue_scanner.start)
+        app.add_event_handler("shutdown", overdue_scanner.shutdown)
 
-# Servir archivos estáticos (imágenes)
-from fastapi.staticfiles import StaticFiles
-from pathlib import Path
+    # Servir archivos subidos (imágenes) desde el almacenamiento configurado
+    app.mount("/uploads", get_storage().asgi_app(), name="uploads")
+    return app
 
-uploads_dir = Path(__file__).parent.parent / "uploads"
-uploads_dir.mkdir(exist_ok=True)
 
-app.mount("/uploads", StaticFiles(directory=str(uploads_dir)), name="uploads")
+def __getattr__(name: str) -> Any:
+    # `app.main:app` (uvicorn, Dockerfile, tests) sigue funcionando: la aplicación
+    # se construye una sola vez, la primera vez que se pide.
+    if name == "app":
+        app = create_app()
+        globals()["app"] = app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -8,7 +8,7 @@ Ejecutar con:
 import asyncio
 from sqlmodel import Session, select
 
-from core.db import engine
+from core.db import get_engine
 from models.auth.permiso import Permiso, PermisoCreate
 from app.routes.auth.permisos.permissions import get_all_permissions, get_permission_description
 
@@ -17,7 +17,7 @@ def init_permissions():
     """
     Crear todos los permisos definidos en permissions.py si no existen.
     """
-    with Session(engine) as session:
+    with Session(get_engine()) as session:
         all_permissions = get_all_permissions()
         created_count = 0
         skipped_count = 0
@@ -1,9 +1,13 @@
 import uuid
+from datetime import datetime, timedelta
 from typing import Any
 
-from sqlmodel import Session, select
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import Session, col, select, update
 
-from core.security import get_password_hash, verify_password
+from core.config import settings
+from core.security import get_password_hash, password_hasher, verify_and_update_password
+from models.auth.refreshtoken import RefreshToken
 from models.auth.users import User, UserCreate, UserUpdate
 
 def create_user(*, session: Session, user_create: UserCreate) -> User:
@@ -36,10 +40,103 @@ def get_user_by_email(*, session: Session, email: str) -> User | None:
     return session_user
 
 
+def _rehash_user_password(*, session: Session, db_user: User, new_hash: str) -> None:
+    db_user.hashed_password = new_hash
+    session.add(db_user)
+    session.commit()
+    session.refresh(db_user)
+
+
 def authenticate(*, session: Session, email: str, password: str) -> User | None:
     db_user = get_user_by_email(session=session, email=email)
     if not db_user:
         return None
-    if not verify_password(password, db_user.hashed_password):
+    valid, new_hash = verify_and_update_password(password, db_user.hashed_password)
+    if not valid:
+        return None
+    if new_hash:
+        _rehash_user_password(session=session, db_user=db_user, new_hash=new_hash)
+    return db_user
+
+
+async def authenticate_offloaded(
+    *, session: Session, email: str, password: str
+) -> User | None:
+    """
+    Igual que authenticate, pero la verificación del hash corre en el pool dedicado
+    de password_hasher y solo las consultas a la BD usan el threadpool compartido.
+    Si el hash guardado usa un esquema o rondas obsoletos, se re-hashea de forma transparente.
+    """
+    db_user = await run_in_threadpool(get_user_by_email, session=session, email=email)
+    if not db_user:
+        return None
+    valid, new_hash = await password_hasher.verify_and_update(
+        password, db_user.hashed_password
+    )
+    if not valid:
         return None
-    return db_user
\ No newline at end of file
+    if new_hash:
+        await run_in_threadpool(
+            _rehash_user_password, session=session, db_user=db_user, new_hash=new_hash
+        )
+    return db_user
+
+
+def create_refresh_session(*, session: Session, user_id: uuid.UUID) -> RefreshToken:
+    db_token = RefreshToken(
+        user_id=user_id,
+        expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+    session.add(db_token)
+    session.commit()
+    session.refresh(db_token)
+    return db_token
+
+
+def rotate_refresh_session(*, session: Session, db_token: RefreshToken) -> RefreshToken:
+    """
+    Emitir un nuevo `jti` para la sesión; el refresh token anterior deja de servir.
+    """
+    db_token.jti = uuid.uuid4()
+    db_token.expires_at = datetime.utcnow() + timedelta(
+        days=settings.REFRESH_TOKEN_EXPIRE_DAYS
+    )
+    session.add(db_token)
+    session.commit()
+    session.refresh(db_token)
+    return db_token
+
+
+def revoke_refresh_sessions(
+    *,
+    session: Session,
+    session_id: uuid.UUID | None = None,
+    user_id: uuid.UUID | None = None,
+) -> list[uuid.UUID]:
+    """
+    Revocar una sesión concreta o todas las sesiones activas de un usuario.
+    Retorna los ids revocados para añadirlos a la lista de revocación local.
+    """
+    if session_id is None and user_id is None:
+        raise ValueError("Se requiere session_id o user_id")
+    statement = (
+        update(RefreshToken)
+        .where(col(RefreshToken.revoked_at).is_(None))
+        .values(revoked_at=datetime.utcnow())
+        .returning(RefreshToken.id)
+    )
+    if session_id is not None:
+        statement = statement.where(RefreshToken.id == session_id)
+    if user_id is not None:
+        statement = statement.where(RefreshToken.user_id == user_id)
+    revoked = list(session.exec(statement).scalars())
+    session.commit()
+    return revoked
+
+
+def get_revoked_session_ids(*, session: Session, since: datetime) -> list[uuid.UUID]:
+    """
+    Sesiones revocadas desde `since` (usa el índice sobre `revoked_at`).
+    """
+    statement = select(RefreshToken.id).where(col(RefreshToken.revoked_at) >= since)
+    return list(session.exec(statement).all())
@@ -1,16 +1,28 @@
+import uuid
 from datetime import timedelta
 from typing import Annotated, Any
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import HTMLResponse
 from fastapi.security import OAuth2PasswordRequestForm
+from jwt.exceptions import InvalidTokenError
 
 from app.routes.auth.users import crud
-from app.routes.deps import CurrentUser, SessionDep, get_current_active_superuser
+from app.routes.deps import (
+    CurrentUser,
+    SessionDep,
+    TokenPayloadDep,
+    get_current_active_superuser,
+    revoke_sessions,
+)
 from core import security
 from core.config import settings
+from core.hashing import PasswordHasherBusy
+from core.mailer import EmailQueueFull
 from core.security import get_password_hash
-from models.auth.users import NewPassword, Token, UserPublic
+from models.auth.refreshtoken import RefreshToken
+from models.auth.users import NewPassword, RefreshTokenRequest, Token, User, UserPublic
 from models.config import Message
 from app.utils import (
     generate_password_reset_token,
@@ -23,27 +35,96 @@ router = APIRouter(tags=["login"])
 
 
 @router.post("/login/access-token")
-def login_access_token(
+async def login_access_token(
     session: SessionDep, form_data: Annotated[OAuth2PasswordRequestForm, Depends()]
 ) -> Token:
     """
     OAuth2 compatible token login, get an access token for future requests
     """
-    user = crud.authenticate(
-        session=session, email=form_data.username, password=form_data.password
-    )
+    try:
+        user = await crud.authenticate_offloaded(
+            session=session, email=form_data.username, password=form_data.password
+        )
+    except PasswordHasherBusy:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many login attempts in progress, please retry",
+            headers={"Retry-After": "1"},
+        )
     if not user:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     elif not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
+    db_token = await run_in_threadpool(
+        crud.create_refresh_session, session=session, user_id=user.id
+    )
+    return _issue_tokens(user=user, db_token=db_token)
+
+
+def _issue_tokens(*, user: User, db_token: RefreshToken) -> Token:
+    """
+    Emitir el par access/refresh para una sesión. El access token lleva los claims
+    que necesitan las dependencias de autenticación, así no consultan la BD.
+    """
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    claims = UserPublic.model_validate(user).model_dump(mode="json", exclude={"id"})
+    claims["sid"] = str(db_token.id)
     return Token(
         access_token=security.create_access_token(
-            user.id, expires_delta=access_token_expires
-        )
+            user.id, expires_delta=access_token_expires, claims=claims
+        ),
+        refresh_token=security.create_refresh_token(
+            user.id,
+            session_id=db_token.id,
+            jti=db_token.jti,
+            expires_delta=timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        ),
+        expires_in=int(access_token_expires.total_seconds()),
     )
 
 
+@router.post("/login/refresh-token")
+def refresh_access_token(session: SessionDep, body: RefreshTokenRequest) -> Token:
+    """
+    Obtener un nuevo access token a partir de un refresh token.
+    El refresh token se rota: el anterior queda inválido y, si se vuelve a usar,
+    se revoca la sesión completa.
+    """
+    invalid = HTTPException(status_code=401, detail="Invalid refresh token")
+    try:
+        payload = security.decode_token(body.refresh_token)
+        session_id = uuid.UUID(payload["sid"])
+        jti = uuid.UUID(payload["jti"])
+    except (InvalidTokenError, KeyError, ValueError):
+        raise invalid
+    if payload.get("typ") != "refresh":
+        raise invalid
+
+    db_token = session.get(RefreshToken, session_id)
+    if not db_token or db_token.revoked_at is not None:
+        raise invalid
+    if db_token.jti != jti:
+        # Refresh token ya rotado: posible robo, se cierra la sesión
+        revoke_sessions(session=session, session_id=db_token.id)
+        raise invalid
+
+    user = session.get(User, db_token.user_id)
+    if not user or not user.is_active:
+        revoke_sessions(session=session, session_id=db_token.id)
+        raise invalid
+    db_token = crud.rotate_refresh_session(session=session, db_token=db_token)
+    return _issue_tokens(user=user, db_token=db_token)
+
+
+@router.post("/logout")
+def logout(session: SessionDep, token_data: TokenPayloadDep) -> Message:
+    """
+    Cerrar la sesión actual: revoca su refresh token y los access tokens emitidos con él.
+    """
+    revoke_sessions(session=session, session_id=token_data.sid)
+    return Message(message="Logged out successfully")
+
+
 @router.post("/login/test-token", response_model=UserPublic)
 def test_token(current_user: CurrentUser) -> Any:
     """
@@ -68,11 +149,19 @@ def recover_password(email: str, session: SessionDep) -> Message:
     email_data = generate_reset_password_email(
         email_to=user.email, email=email, token=password_reset_token
     )
-    send_email(
-        email_to=user.email,
-        subject=email_data.subject,
-        html_content=email_data.html_content,
-    )
+    # Solo se encola: el envío SMTP ocurre en segundo plano
+    try:
+        send_email(
+            email_to=user.email,
+            subject=email_data.subject,
+            html_content=email_data.html_content,
+        )
+    except EmailQueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Email service is busy, please retry",
+            headers={"Retry-After": "5"},
+        )
     return Message(message="Password recovery email sent")
 
 
@@ -96,6 +185,7 @@ def reset_password(session: SessionDep, body: NewPassword) -> Message:
     user.hashed_password = hashed_password
     session.add(user)
     session.commit()
+    revoke_sessions(session=session, user_id=user.id)
     return Message(message="Password updated successfully")
 
 
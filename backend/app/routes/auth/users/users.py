@@ -1,5 +1,5 @@
 import uuid
-from typing import Any
+from typing import Annotated, Any
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import col, delete, func, select
@@ -9,8 +9,12 @@ from app.routes.deps import (
     CurrentUser,
     SessionDep,
     get_current_active_superuser,
+    read_from_replica,
+    revoke_sessions,
+    select_fields,
 )
 from core.config import settings
+from core.serialization import fetch_rows, list_response
 from core.security import get_password_hash, verify_password
 from models.auth.users import (
     UpdatePassword,
@@ -31,11 +35,13 @@ router = APIRouter(prefix="/users", tags=["users"])
 
 @router.get(
     "/",
+    dependencies=[Depends(read_from_replica)],
     response_model=UsersPublic,
 )
 def read_users(
     session: SessionDep, 
     current_user: CurrentUser,
+    columns: Annotated[list[Any], Depends(select_fields(UserPublic, User))],
     skip: int = 0, 
     limit: int = 100
 ) -> Any:
@@ -43,24 +49,27 @@ def read_users(
     Retrieve users.
     - Superusuarios: ven todos los usuarios
     - Usuarios normales: solo ven usuarios de su empresa
+    Con `fields` solo se consultan y devuelven las columnas indicadas.
     """
     if current_user.is_superuser:
         # Superadmin sees all users
         count_statement = select(func.count()).select_from(User)
         count = session.exec(count_statement).one()
-        statement = select(User).offset(skip).limit(limit)
-        users = session.exec(statement).all()
+        users = fetch_rows(session=session, columns=columns, skip=skip, limit=limit)
     else:
         # Normal user sees only users from their empresa
         if not current_user.empresa_id:
             return UsersPublic(data=[], count=0)
         
-        statement = select(User).where(User.empresa_id == current_user.empresa_id)
-        users = session.exec(statement).all()
+        users = fetch_rows(
+            session=session,
+            columns=columns,
+            where=[User.empresa_id == current_user.empresa_id],
+            limit=None,
+        )
         count = len(users)
     
-    user_public_list = [UserPublic.model_validate(user) for user in users]
-    return UsersPublic(data=user_public_list, count=count)
+    return list_response(data=users, count=count)
 
 
 @router.post(
@@ -105,11 +114,12 @@ def update_user_me(
                 status_code=409, detail="User with this email already exists"
             )
     user_data = user_in.model_dump(exclude_unset=True)
-    current_user.sqlmodel_update(user_data)
-    session.add(current_user)
+    db_user = session.get(User, current_user.id)
+    db_user.sqlmodel_update(user_data)
+    session.add(db_user)
     session.commit()
-    session.refresh(current_user)
-    return current_user
+    session.refresh(db_user)
+    return db_user
 
 
 @router.patch("/me/password", response_model=Message)
@@ -119,25 +129,28 @@ def update_password_me(
     """
     Update own password.
     """
-    if not verify_password(body.current_password, current_user.hashed_password):
+    db_user = session.get(User, current_user.id)
+    if not verify_password(body.current_password, db_user.hashed_password):
         raise HTTPException(status_code=400, detail="Incorrect password")
     if body.current_password == body.new_password:
         raise HTTPException(
             status_code=400, detail="New password cannot be the same as the current one"
         )
     hashed_password = get_password_hash(body.new_password)
-    current_user.hashed_password = hashed_password
-    session.add(current_user)
+    db_user.hashed_password = hashed_password
+    session.add(db_user)
     session.commit()
+    revoke_sessions(session=session, user_id=db_user.id)
     return Message(message="Password updated successfully")
 
 
 @router.get("/me", response_model=UserPublic)
-def read_user_me(current_user: CurrentUser) -> Any:
+def read_user_me(session: SessionDep, current_user: CurrentUser) -> Any:
     """
     Get current user.
     """
-    return current_user
+    # Los claims del token pueden tener hasta ACCESS_TOKEN_EXPIRE_MINUTES de antigüedad
+    return session.get(User, current_user.id)
 
 
 @router.delete("/me", response_model=Message)
@@ -149,7 +162,8 @@ def delete_user_me(session: SessionDep, current_user: CurrentUser) -> Any:
         raise HTTPException(
             status_code=403, detail="Super users are not allowed to delete themselves"
         )
-    session.delete(current_user)
+    revoke_sessions(session=session, user_id=current_user.id)
+    session.delete(session.get(User, current_user.id))
     session.commit()
     return Message(message="User deleted successfully")
 
@@ -293,7 +307,7 @@ def read_user_by_id(
     Get a specific user by id.
     """
     user = session.get(User, user_id)
-    if user == current_user:
+    if user and user.id == current_user.id:
         return user
     if not current_user.is_superuser:
         raise HTTPException(
@@ -332,6 +346,15 @@ def update_user(
             )
 
     db_user = crud.update_user(session=session, db_user=db_user, user_in=user_in)
+    # Los access tokens llevan estos datos como claims: forzar un nuevo login
+    if user_in.model_fields_set & {
+        "password",
+        "is_active",
+        "is_superuser",
+        "empresa_id",
+        "restaurante_id",
+    }:
+        revoke_sessions(session=session, user_id=db_user.id)
     return db_user
 
 
@@ -345,10 +368,11 @@ def delete_user(
     user = session.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    if user == current_user:
+    if user.id == current_user.id:
         raise HTTPException(
             status_code=403, detail="Super users are not allowed to delete themselves"
         )
+    revoke_sessions(session=session, user_id=user.id)
     session.delete(user)
     session.commit()
     return Message(message="User deleted successfully")
@@ -1,9 +1,16 @@
-from fastapi import APIRouter, Depends
+import os
+
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
 from pydantic.networks import EmailStr
 
 from app.routes.deps import get_current_active_superuser
+from core.config import settings
+from core.profiler import ProfilerBusy, profiler
+from core.security import password_hasher
 from models.config import Message
-from app.utils import generate_test_email, send_email
+from app.utils import email_queue, generate_test_email, send_email
 
 router = APIRouter(prefix="/utils", tags=["utils"])
 
@@ -29,3 +36,81 @@ def test_email(email_to: EmailStr) -> Message:
 @router.get("/health-check/")
 async def health_check() -> bool:
     return True
+
+
+@router.get(
+    "/password-hasher/stats/",
+    dependencies=[Depends(get_current_active_superuser)],
+)
+def password_hasher_stats() -> dict:
+    """
+    Password hashing pool metrics (queue, in flight, accumulated times).
+    """
+    return password_hasher.snapshot()
+
+
+@router.get(
+    "/email-queue/stats/",
+    dependencies=[Depends(get_current_active_superuser)],
+)
+def email_queue_stats() -> dict:
+    """
+    Background email queue metrics (pending, sent, retried, failed).
+    """
+    return email_queue.snapshot()
+
+
+@router.get(
+    "/profiler/",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_class=PlainTextResponse,
+)
+async def capture_profile(
+    seconds: float = Query(default=10.0, gt=0, le=settings.PROFILER_MAX_SECONDS),
+    interval_ms: float = Query(default=10.0, ge=settings.PROFILER_MIN_INTERVAL_MS),
+    include_idle: bool = False,
+) -> PlainTextResponse:
+    """
+    Muestrear durante `seconds` las pilas de todos los hilos de este worker y
+    devolverlas en formato collapsed (flamegraph.pl, speedscope).
+    Los hilos ociosos se omiten salvo con `include_idle`.
+    """
+    if not settings.PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler deshabilitado")
+    try:
+        profile = profiler.start(interval=interval_ms / 1000, include_idle=include_idle)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    try:
+        await anyio.sleep(seconds)
+    finally:
+        await anyio.to_thread.run_sync(profiler.stop, profile)
+    return PlainTextResponse(
+        profile.collapsed(),
+        headers={
+            "X-Profile-Id": profile.id,
+            "X-Profile-Samples": str(profile.samples),
+            "X-Worker-Pid": str(os.getpid()),
+        },
+    )
+
+
+@router.get(
+    "/profiler/{profile_id}",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_class=PlainTextResponse,
+)
+def read_profile(profile_id: str) -> PlainTextResponse:
+    """
+    Pilas de un perfil ya capturado (p. ej. el de una request con `X-Profile`).
+    Solo existe en el worker que atendió la request: mirar `X-Worker-Pid`.
+    """
+    profile = profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Perfil no encontrado")
+    if profile.running:
+        raise HTTPException(status_code=409, detail="El perfil aún se está capturando")
+    return PlainTextResponse(
+        profile.collapsed(),
+        headers={"X-Profile-Samples": str(profile.samples)},
+    )
@@ -7,6 +7,7 @@ from sqlmodel import func, select
 from app.routes.bill.articulofactura import crud
 from app.routes.deps import SessionDep, require_permissions
 from app.routes.auth.permisos.permissions import BILL_READ, BILL_WRITE, BILL_DELETE
+from core.archive import count_archived, list_archived
 from models.bill.articulofactura import (
     ArticuloFactura,
     ArticuloFacturaCreate,
@@ -88,6 +89,10 @@ def read_articulos_by_factura(
         ArticuloFactura.factura_id == factura_id
     )
     count = session.exec(count_statement).one()
+    if not count:
+        # Factura archivada (core.archive): sus articulos se archivaron con ella
+        articulos = list_archived(session, ArticuloFactura, factura_id=factura_id, skip=skip, limit=limit)
+        count = count_archived(session, ArticuloFactura, factura_id=factura_id)
     
     return ArticulosFacturaPublic(data=articulos, count=count)
 
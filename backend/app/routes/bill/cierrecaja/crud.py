@@ -0,0 +1,46 @@
+import uuid
+
+from sqlmodel import Session, col, func, select
+
+from models.bill.cierrecaja import CierreCaja
+
+
+def get_cierre_by_id(*, session: Session, cierre_id: uuid.UUID) -> CierreCaja | None:
+    """
+    Obtener un cierre de caja por su ID.
+    """
+    return session.get(CierreCaja, cierre_id)
+
+
+def get_cierre_by_numero(*, session: Session, restaurante_id: uuid.UUID, numero: int) -> CierreCaja | None:
+    """
+    Obtener un cierre de caja por su número dentro del restaurante.
+    """
+    statement = select(CierreCaja).where(
+        CierreCaja.restaurante_id == restaurante_id,
+        CierreCaja.numero == numero,
+    )
+    return session.exec(statement).first()
+
+
+def get_cierres_by_restaurante(
+    *, session: Session, restaurante_id: uuid.UUID, skip: int = 0, limit: int = 100
+) -> list[CierreCaja]:
+    """
+    Obtener los cierres de caja de un restaurante, del más reciente al más antiguo.
+    """
+    statement = (
+        select(CierreCaja)
+        .where(CierreCaja.restaurante_id == restaurante_id)
+        .order_by(col(CierreCaja.numero).desc())
+        .offset(skip)
+        .limit(limit)
+    )
+    return list(session.exec(statement).all())
+
+
+def count_cierres_by_restaurante(*, session: Session, restaurante_id: uuid.UUID) -> int:
+    statement = select(func.count()).select_from(CierreCaja).where(
+        CierreCaja.restaurante_id == restaurante_id
+    )
+    return session.exec(statement).one()
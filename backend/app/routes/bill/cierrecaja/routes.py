@@ -0,0 +1,117 @@
+import uuid
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.routes.bill.cierrecaja import crud
+from app.routes.deps import SessionDep, CurrentUser, TenantDep, get_tenant, read_from_replica, require_permissions
+from app.routes.auth.permisos.permissions import BILL_READ, BILL_WRITE
+from core.cierrecaja import cerrar_caja
+from models.bill.cierrecaja import CierreCajaPublic, CierresCajaPublic
+
+router = APIRouter(
+    prefix="/cierres-caja",
+    tags=["cierres-caja"],
+    dependencies=[Depends(get_tenant)],
+)
+
+
+@router.get(
+    "/restaurante/{restaurante_id}",
+    dependencies=[Depends(read_from_replica), Depends(require_permissions(BILL_READ))],
+    response_model=CierresCajaPublic,
+)
+def read_cierres_by_restaurante(
+    *,
+    session: SessionDep,
+    restaurante_id: uuid.UUID,
+    skip: int = 0,
+    limit: int = Query(default=100, le=100),
+) -> Any:
+    """
+    Obtener el historial de cierres de caja de un restaurante, del más reciente al más antiguo.
+    Requiere permiso: BILL_READ
+    """
+    cierres = crud.get_cierres_by_restaurante(
+        session=session, restaurante_id=restaurante_id, skip=skip, limit=limit
+    )
+    count = crud.count_cierres_by_restaurante(session=session, restaurante_id=restaurante_id)
+    return CierresCajaPublic(data=cierres, count=count)
+
+
+@router.get(
+    "/restaurante/{restaurante_id}/numero/{numero}",
+    dependencies=[Depends(require_permissions(BILL_READ))],
+    response_model=CierreCajaPublic,
+)
+def read_cierre_by_numero(
+    *,
+    session: SessionDep,
+    restaurante_id: uuid.UUID,
+    numero: int,
+) -> Any:
+    """
+    Obtener un cierre de caja (informe Z) por su número dentro del restaurante.
+    Requiere permiso: BILL_READ
+    """
+    cierre = crud.get_cierre_by_numero(session=session, restaurante_id=restaurante_id, numero=numero)
+    if not cierre:
+        raise HTTPException(
+            status_code=404,
+            detail="El cierre de caja con este número no existe.",
+        )
+    return cierre
+
+
+@router.get(
+    "/{cierre_id}",
+    dependencies=[Depends(require_permissions(BILL_READ))],
+    response_model=CierreCajaPublic,
+)
+def read_cierre(
+    *,
+    session: SessionDep,
+    cierre_id: uuid.UUID,
+) -> Any:
+    """
+    Obtener un cierre de caja (informe Z) por ID.
+    Requiere permiso: BILL_READ
+    """
+    cierre = crud.get_cierre_by_id(session=session, cierre_id=cierre_id)
+    if not cierre:
+        raise HTTPException(
+            status_code=404,
+            detail="El cierre de caja con este ID no existe.",
+        )
+    return cierre
+
+
+@router.post(
+    "/restaurante/{restaurante_id}",
+    dependencies=[Depends(require_permissions(BILL_WRITE))],
+    response_model=CierreCajaPublic,
+)
+def create_cierre(
+    *,
+    session: SessionDep,
+    tenant: TenantDep,
+    current_user: CurrentUser,
+    restaurante_id: uuid.UUID,
+) -> Any:
+    """
+    Cerrar la caja de un restaurante: calcula los totales desde el cierre anterior
+    hasta ahora y guarda el informe Z, que ya no se modifica.
+    Requiere permiso: BILL_WRITE
+    """
+    if not tenant.allows(restaurante_id):
+        raise HTTPException(
+            status_code=403,
+            detail="No tienes permisos para cerrar la caja de este restaurante.",
+        )
+    try:
+        return cerrar_caja(session=session, restaurante_id=restaurante_id, cerrado_por=current_user.id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e),
+        )
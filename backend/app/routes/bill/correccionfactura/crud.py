@@ -2,9 +2,19 @@ import uuid
 from typing import Any
 from datetime import datetime
 
-from sqlmodel import Session, select
+from sqlmodel import Session, col, select
 
-from models.bill.correccionfactura import CorreccionFactura, CorreccionFacturaCreate, CorreccionFacturaUpdate
+from core.vencidas import sincronizar_vencida
+from models.bill.articulofactura import ArticuloFactura
+from models.bill.correccionfactura import (
+    AprobacionCorreccion,
+    CorreccionFactura,
+    CorreccionFacturaCreate,
+    CorreccionFacturaUpdate,
+)
+from models.bill.factura import Factura
+
+TIPOS_CORRECCION = ["anulacion", "devolucion", "ajuste", "nota_credito", "nota_debito"]
 
 
 def create_correccion_factura(*, session: Session, correccion_create: CorreccionFacturaCreate) -> CorreccionFactura:
@@ -127,6 +137,23 @@ def get_all_correcciones(*, session: Session, skip: int = 0, limit: int = 100) -
     return list(session.exec(statement).all())
 
 
+def _facturas_bloqueadas(*, session: Session, factura_ids: set[uuid.UUID]) -> dict[uuid.UUID, Factura]:
+    """
+    Facturas con FOR UPDATE, en orden de ID para que dos aprobaciones
+    simultáneas no se bloqueen mutuamente.
+    """
+    if not factura_ids:
+        return {}
+    statement = (
+        select(Factura)
+        .where(col(Factura.id).in_(factura_ids))
+        .order_by(Factura.id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    return {factura.id: factura for factura in session.exec(statement).all()}
+
+
 def aprobar_correccion(
     *, 
     session: Session, 
@@ -139,25 +166,107 @@ def aprobar_correccion(
     - Cambia el estado a 'aprobada'
     - Asigna el usuario que aprobó
     - Opcionalmente aplica la corrección a la factura (por defecto True)
+    La aprobación y sus efectos sobre la factura se confirman en un solo commit.
     """
-    correccion = session.get(CorreccionFactura, correccion_id)
+    correccion = session.get(CorreccionFactura, correccion_id, with_for_update=True)
     if not correccion:
         return None
-    
+    facturas = _facturas_bloqueadas(session=session, factura_ids={correccion.factura_original_id})
+    _aprobar(
+        session=session,
+        correccion=correccion,
+        factura=facturas.get(correccion.factura_original_id),
+        aprobado_por=aprobado_por,
+        aplicar_correccion=aplicar_correccion,
+    )
+    session.commit()
+    session.refresh(correccion)
+    return correccion
+
+
+def aprobar_correcciones(
+    *,
+    session: Session,
+    correccion_ids: list[uuid.UUID],
+    aprobado_por: uuid.UUID,
+    aplicar_correccion: bool = True,
+) -> list[AprobacionCorreccion]:
+    """
+    Aprobar varias correcciones (cierre del día) en una sola transacción.
+    Las que no existen o no se pueden aprobar se informan en el resultado y no
+    impiden aprobar las demás: se validan antes de modificar nada. Todo lo
+    aprobado se confirma con un único commit.
+    """
+    ids = list(dict.fromkeys(correccion_ids))
+    statement = (
+        select(CorreccionFactura)
+        .where(col(CorreccionFactura.id).in_(ids))
+        .order_by(CorreccionFactura.id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    correcciones = {c.id: c for c in session.exec(statement).all()}
+    facturas = _facturas_bloqueadas(
+        session=session,
+        factura_ids={c.factura_original_id for c in correcciones.values()},
+    )
+
+    resultados: list[AprobacionCorreccion] = []
+    for correccion_id in ids:
+        correccion = correcciones.get(correccion_id)
+        if correccion is None:
+            resultados.append(
+                AprobacionCorreccion(
+                    id=correccion_id,
+                    aprobada=False,
+                    detail="La corrección de factura con este ID no existe.",
+                )
+            )
+            continue
+        try:
+            _aprobar(
+                session=session,
+                correccion=correccion,
+                factura=facturas.get(correccion.factura_original_id),
+                aprobado_por=aprobado_por,
+                aplicar_correccion=aplicar_correccion,
+            )
+        except ValueError as e:
+            resultados.append(AprobacionCorreccion(id=correccion_id, aprobada=False, detail=str(e)))
+            continue
+        resultados.append(
+            AprobacionCorreccion(
+                id=correccion_id,
+                aprobada=True,
+                factura_correccion_id=correccion.factura_correccion_id,
+            )
+        )
+    session.commit()
+    return resultados
+
+
+def _aprobar(
+    *,
+    session: Session,
+    correccion: CorreccionFactura,
+    factura: Factura | None,
+    aprobado_por: uuid.UUID,
+    aplicar_correccion: bool,
+) -> None:
+    """
+    Validar y aprobar una corrección sin confirmar. Si no se puede aprobar lanza
+    ValueError antes de modificar nada.
+    """
     if correccion.estado != "pendiente":
         raise ValueError("Solo se pueden aprobar correcciones en estado pendiente")
-    
+    if aplicar_correccion:
+        if factura is None:
+            raise ValueError("La factura original de la corrección no existe.")
+        _aplicar_correccion_a_factura(session=session, correccion=correccion, factura=factura)
     correccion.estado = "aprobada"
     correccion.aprobado_por = aprobado_por
+    correccion.fecha_aprobacion = datetime.utcnow()
     session.add(correccion)
-    session.commit()
-    session.refresh(correccion)
-    
-    # Aplicar la corrección a la factura si se solicita
-    if aplicar_correccion:
-        _aplicar_correccion_a_factura(session=session, correccion=correccion)
-    
-    return correccion
 
 
 def rechazar_correccion(
@@ -187,52 +296,96 @@ def rechazar_correccion(
     return correccion
 
 
-def _aplicar_correccion_a_factura(*, session: Session, correccion: CorreccionFactura) -> None:
+def _aplicar_correccion_a_factura(
+    *, session: Session, correccion: CorreccionFactura, factura: Factura
+) -> None:
     """
     Aplicar la corrección a la factura original según el tipo de corrección.
-    Esta es una función interna que se llama desde aprobar_correccion.
+    Esta es una función interna que se llama desde _aprobar; no hace commit.
     
     Tipos de corrección y sus efectos:
     - anulacion: Cambia el estado de la factura a 'anulada'
     - devolucion: Ajusta el total de la factura restando el monto de corrección
     - ajuste: Ajusta el total de la factura con el monto de corrección (puede ser positivo o negativo)
-    - nota_credito: Crea una factura de corrección con monto negativo
+    - nota_credito: Crea una factura de corrección con monto negativo. Si el monto
+      es el total de la factura, la nota lleva sus artículos en negativo
     - nota_debito: Crea una factura de corrección con monto positivo
+    Si la corrección ya tiene factura de corrección asociada no se crea otra.
     """
-    from app.routes.bill.factura.crud import get_factura_by_id, update_estado_factura
-    from models.bill.factura import Factura
-    
-    factura = get_factura_by_id(session=session, factura_id=correccion.factura_original_id)
-    if not factura:
-        return
-    
     tipo = correccion.tipo_correccion
+    if tipo not in TIPOS_CORRECCION:
+        raise ValueError(f"Tipo de corrección inválido: {tipo}")
+    if factura.estado == "anulada":
+        raise ValueError("No se pueden aplicar correcciones a una factura anulada")
     
     if tipo == "anulacion":
-        # Anular la factura
-        update_estado_factura(session=session, factura_id=factura.id, nuevo_estado="anulada")
+        # Anular la factura; deja de estar vencida
+        factura.estado = "anulada"
+        sincronizar_vencida(session=session, factura=factura)
     
     elif tipo == "devolucion":
         # Ajustar el total de la factura (restar el monto de devolución)
         factura.total -= correccion.monto_correccion
         factura.total = max(0, factura.total)  # No permitir totales negativos
-        session.add(factura)
-        session.commit()
     
     elif tipo == "ajuste":
         # Ajustar el total de la factura (puede ser positivo o negativo)
         factura.total += correccion.monto_correccion
         factura.total = max(0, factura.total)  # No permitir totales negativos
-        session.add(factura)
-        session.commit()
     
-    elif tipo in ["nota_credito", "nota_debito"]:
-        # Crear una factura de corrección si se especificó
-        if correccion.factura_correccion_id:
-            # Ya existe una factura de corrección asociada, no hacer nada
-            pass
-        # En un caso real, aquí se podría crear una nueva factura automáticamente
-        # pero esto depende de la lógica de negocio específica
+    elif not correccion.factura_correccion_id:
+        nota = _crear_factura_correccion(session=session, correccion=correccion, factura=factura)
+        correccion.factura_correccion_id = nota.id
+    
+    session.add(factura)
+
+
+def _crear_factura_correccion(
+    *, session: Session, correccion: CorreccionFactura, factura: Factura
+) -> Factura:
+    """
+    Crear la nota de crédito o débito de una corrección (sin commit).
+    Los impuestos se reparten en la misma proporción que en la factura original.
+    """
+    signo = -1 if correccion.tipo_correccion == "nota_credito" else 1
+    monto = abs(correccion.monto_correccion)
+    proporcion_impuestos = factura.impuestos / factura.total if factura.total else 0.0
+    sufijo = "NC" if signo < 0 else "ND"
+    nota = Factura(
+        numero_factura=f"{factura.numero_factura}-{sufijo}-{correccion.id.hex[:8].upper()}",
+        subtotal=signo * round(monto * (1 - proporcion_impuestos), 2),
+        impuestos=signo * round(monto * proporcion_impuestos, 2),
+        total=signo * monto,
+        tipo_factura=correccion.tipo_correccion,
+        notas=f"Corrección de la factura {factura.numero_factura}: {correccion.motivo}",
+        orden_id=factura.orden_id,
+        cliente_id=factura.cliente_id,
+        restaurante_id=factura.restaurante_id,
+        empresa_id=factura.empresa_id,
+    )
+    session.add(nota)
+
+    # Nota de crédito por el total: revierte cada artículo de la factura
+    if signo < 0 and abs(monto - factura.total) < 0.005:
+        articulos = session.exec(
+            select(ArticuloFactura).where(ArticuloFactura.factura_id == factura.id)
+        ).all()
+        session.add_all(
+            ArticuloFactura(
+                cantidad=-articulo.cantidad,
+                precio_unitario=articulo.precio_unitario,
+                descuento=-articulo.descuento,
+                impuesto=-articulo.impuesto,
+                subtotal=-articulo.subtotal,
+                total=-articulo.total,
+                descripcion=articulo.descripcion,
+                factura_id=nota.id,
+                producto_id=articulo.producto_id,
+                tasa_impositiva_id=articulo.tasa_impositiva_id,
+            )
+            for articulo in articulos
+        )
+    return nota
 
 
 def delete_correccion_factura(*, session: Session, correccion_id: uuid.UUID) -> bool:
@@ -5,7 +5,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlmodel import func, select
 
 from app.routes.bill.correccionfactura import crud
-from app.routes.deps import SessionDep, CurrentUser, require_permissions
+from app.routes.deps import SessionDep, CurrentUser, get_tenant, require_permissions
 from app.routes.auth.permisos.permissions import BILL_READ, BILL_WRITE, BILL_DELETE
 from models.bill.correccionfactura import (
     CorreccionFactura,
@@ -14,10 +14,26 @@ from models.bill.correccionfactura import (
     CorreccionesFacturaPublic,
     CorreccionFacturaUpdate,
     CorreccionFacturaEstadoUpdate,
+    CorreccionesFacturaAprobar,
+    AprobacionesCorreccionPublic,
 )
 from models.config import Message
 
-router = APIRouter(prefix="/correcciones-factura", tags=["correcciones-factura"])
+router = APIRouter(
+    prefix="/correcciones-factura",
+    tags=["correcciones-factura"],
+    dependencies=[Depends(get_tenant)],
+)
+
+
+def _verificar_factura_original(session: SessionDep, factura_id: uuid.UUID) -> None:
+    # La factura se busca con el filtro por restaurante: la de otro restaurante no existe
+    from app.routes.bill.factura import crud as factura_crud
+    if not factura_crud.get_factura_by_id(session=session, factura_id=factura_id):
+        raise HTTPException(
+            status_code=404,
+            detail="La factura original no existe.",
+        )
 
 
 @router.get(
@@ -109,7 +125,7 @@ def read_correcciones_by_tipo(
     Obtener correcciones por tipo (anulacion, devolucion, ajuste, nota_credito, nota_debito).
     Requiere permiso: BILL_READ
     """
-    tipos_validos = ["anulacion", "devolucion", "ajuste", "nota_credito", "nota_debito"]
+    tipos_validos = crud.TIPOS_CORRECCION
     if tipo_correccion not in tipos_validos:
         raise HTTPException(
             status_code=400,
@@ -233,10 +249,39 @@ def create_correccion(
     Se crea con estado 'pendiente' por defecto.
     Requiere permiso: BILL_WRITE
     """
+    _verificar_factura_original(session, correccion_in.factura_original_id)
     correccion = crud.create_correccion_factura(session=session, correccion_create=correccion_in)
     return correccion
 
 
+@router.post(
+    "/aprobar",
+    dependencies=[Depends(require_permissions(BILL_WRITE))],
+    response_model=AprobacionesCorreccionPublic,
+)
+def aprobar_correcciones(
+    *,
+    session: SessionDep,
+    current_user: CurrentUser,
+    aprobacion_in: CorreccionesFacturaAprobar,
+) -> Any:
+    """
+    Aprobar varias correcciones pendientes de una vez (p. ej. al cierre del día).
+    Todas se aprueban y aplican en una sola transacción; las que no existen o no
+    se pueden aprobar se devuelven con aprobada=false y el motivo en `detail`.
+    Requiere permiso: BILL_WRITE
+    """
+    resultados = crud.aprobar_correcciones(
+        session=session,
+        correccion_ids=aprobacion_in.correccion_ids,
+        aprobado_por=current_user.id,
+        aplicar_correccion=aprobacion_in.aplicar_correccion,
+    )
+    return AprobacionesCorreccionPublic(
+        data=resultados, aprobadas=sum(resultado.aprobada for resultado in resultados)
+    )
+
+
 @router.patch(
     "/{correccion_id}",
     dependencies=[Depends(require_permissions(BILL_WRITE))],
@@ -265,6 +310,8 @@ def update_correccion(
             status_code=400,
             detail="Solo se pueden editar correcciones en estado pendiente.",
         )
+    if correccion_in.factura_original_id is not None:
+        _verificar_factura_original(session, correccion_in.factura_original_id)
     
     correccion = crud.update_correccion_factura(
         session=session, db_correccion=correccion, correccion_in=correccion_in
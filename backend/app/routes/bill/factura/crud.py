@@ -2,9 +2,14 @@ import uuid
 from typing import Any
 from datetime import datetime
 
-from sqlmodel import Session, select
+from sqlmodel import Session, col, func, select
 
-from models.bill.factura import Factura, FacturaCreate, FacturaUpdate
+from core.archive import find_archived
+from core.metrics import invoices_paid
+from core.serialization import fetch_rows
+from core.vencidas import sincronizar_vencida
+from models.bill.factura import ESTADOS_SIN_COBRO, Factura, FacturaCreate, FacturaUpdate
+from models.bill.facturavencida import FacturaVencida
 
 
 def create_factura(*, session: Session, factura_create: FacturaCreate) -> Factura:
@@ -13,6 +18,8 @@ def create_factura(*, session: Session, factura_create: FacturaCreate) -> Factur
     """
     db_obj = Factura.model_validate(factura_create)
     session.add(db_obj)
+    if db_obj.fecha_vencimiento is not None:
+        sincronizar_vencida(session=session, factura=db_obj)
     session.commit()
     session.refresh(db_obj)
     return db_obj
@@ -23,148 +30,150 @@ def update_factura(*, session: Session, db_factura: Factura, factura_in: Factura
     Actualizar una factura existente.
     """
     factura_data = factura_in.model_dump(exclude_unset=True)
+    estado_anterior = db_factura.estado
     db_factura.sqlmodel_update(factura_data)
     session.add(db_factura)
+    if "estado" in factura_data or "fecha_vencimiento" in factura_data:
+        sincronizar_vencida(session=session, factura=db_factura)
     session.commit()
     session.refresh(db_factura)
+    if db_factura.estado == "pagada" and estado_anterior != "pagada":
+        invoices_paid.inc()
     return db_factura
 
 
-def get_factura_by_id(*, session: Session, factura_id: uuid.UUID) -> Factura | None:
+def get_factura_by_id(*, session: Session, factura_id: uuid.UUID, incluir_archivo: bool = False) -> Factura | None:
     """
     Obtener una factura por su ID.
+    Con incluir_archivo, si no está entre las activas se busca en el archivo
+    (core.archive); la factura archivada es de solo lectura.
     """
-    return session.get(Factura, factura_id)
+    factura = session.get(Factura, factura_id)
+    if factura is None and incluir_archivo:
+        factura = find_archived(session, Factura, id=factura_id)
+    return factura
 
 
-def get_factura_by_numero(*, session: Session, numero_factura: str) -> Factura | None:
+def get_factura_by_numero(*, session: Session, numero_factura: str, incluir_archivo: bool = False) -> Factura | None:
     """
     Obtener una factura por su número de factura.
+    Con incluir_archivo, si no está entre las activas se busca en el archivo.
     """
     statement = select(Factura).where(Factura.numero_factura == numero_factura)
-    return session.exec(statement).first()
-
-
-def get_facturas_by_restaurante(*, session: Session, restaurante_id: uuid.UUID, skip: int = 0, limit: int = 100) -> list[Factura]:
-    """
-    Obtener todas las facturas de un restaurante con paginación.
-    """
-    statement = select(Factura).where(
-        Factura.restaurante_id == restaurante_id
-    ).offset(skip).limit(limit)
-    return list(session.exec(statement).all())
-
-
-def get_facturas_by_cliente(*, session: Session, cliente_id: uuid.UUID, skip: int = 0, limit: int = 100) -> list[Factura]:
-    """
-    Obtener todas las facturas de un cliente con paginación.
-    """
-    statement = select(Factura).where(
-        Factura.cliente_id == cliente_id
-    ).offset(skip).limit(limit)
-    return list(session.exec(statement).all())
-
-
-def get_facturas_by_empresa(*, session: Session, empresa_id: uuid.UUID, skip: int = 0, limit: int = 100) -> list[Factura]:
-    """
-    Obtener todas las facturas de una empresa con paginación.
-    """
-    statement = select(Factura).where(
-        Factura.empresa_id == empresa_id
-    ).offset(skip).limit(limit)
-    return list(session.exec(statement).all())
+    factura = session.exec(statement).first()
+    if factura is None and incluir_archivo:
+        factura = find_archived(session, Factura, numero_factura=numero_factura)
+    return factura
 
 
-def get_facturas_by_estado(*, session: Session, estado: str, restaurante_id: uuid.UUID | None = None, skip: int = 0, limit: int = 100) -> list[Factura]:
+def _filtros_facturas(
+    *,
+    restaurante_id: uuid.UUID | None = None,
+    cliente_id: uuid.UUID | None = None,
+    empresa_id: uuid.UUID | None = None,
+    estado: str | None = None,
+    tipo_factura: str | None = None,
+    fecha_inicio: datetime | None = None,
+    fecha_fin: datetime | None = None,
+) -> list[Any]:
     """
-    Obtener todas las facturas por estado con paginación.
-    Opcionalmente filtradas por restaurante.
-    Estados: pendiente, pagada, cancelada, anulada
+    Condiciones sobre factura para los filtros indicados (los None se ignoran).
     """
+    filtros: list[Any] = []
     if restaurante_id:
-        statement = select(Factura).where(
-            Factura.estado == estado,
-            Factura.restaurante_id == restaurante_id
-        ).offset(skip).limit(limit)
-    else:
-        statement = select(Factura).where(
-            Factura.estado == estado
-        ).offset(skip).limit(limit)
-    return list(session.exec(statement).all())
+        filtros.append(Factura.restaurante_id == restaurante_id)
+    if cliente_id:
+        filtros.append(Factura.cliente_id == cliente_id)
+    if empresa_id:
+        filtros.append(Factura.empresa_id == empresa_id)
+    if estado:
+        filtros.append(Factura.estado == estado)
+    if tipo_factura:
+        filtros.append(Factura.tipo_factura == tipo_factura)
+    if fecha_inicio:
+        filtros.append(Factura.fecha >= fecha_inicio)
+    if fecha_fin:
+        filtros.append(Factura.fecha <= fecha_fin)
+    return filtros
+
+
+def get_facturas(
+    *,
+    session: Session,
+    columns: list[Any],
+    skip: int = 0,
+    limit: int = 100,
+    **filtros: Any,
+) -> list[dict[str, Any]]:
+    """
+    Obtener facturas con paginación, filtradas por restaurante, cliente,
+    empresa, estado, tipo o rango de fechas.
+    Solo se consultan las columnas de `columns`; cada fila es un diccionario.
+    """
+    return fetch_rows(
+        session=session,
+        columns=columns,
+        where=_filtros_facturas(**filtros),
+        skip=skip,
+        limit=limit,
+    )
 
 
-def get_facturas_by_tipo(*, session: Session, tipo_factura: str, restaurante_id: uuid.UUID | None = None, skip: int = 0, limit: int = 100) -> list[Factura]:
+def count_facturas(*, session: Session, **filtros: Any) -> int:
     """
-    Obtener todas las facturas por tipo con paginación.
-    Opcionalmente filtradas por restaurante.
-    Tipos: venta, compra
+    Contar las facturas que cumplen los mismos filtros que `get_facturas`.
     """
-    if restaurante_id:
-        statement = select(Factura).where(
-            Factura.tipo_factura == tipo_factura,
-            Factura.restaurante_id == restaurante_id
-        ).offset(skip).limit(limit)
-    else:
-        statement = select(Factura).where(
-            Factura.tipo_factura == tipo_factura
-        ).offset(skip).limit(limit)
-    return list(session.exec(statement).all())
+    statement = select(func.count()).select_from(Factura).where(*_filtros_facturas(**filtros))
+    return session.exec(statement).one()
 
 
-def get_facturas_by_fecha_range(
-    *, 
-    session: Session, 
-    fecha_inicio: datetime, 
-    fecha_fin: datetime, 
+def get_facturas_vencidas(
+    *,
+    session: Session,
+    columns: list[Any],
     restaurante_id: uuid.UUID | None = None,
-    skip: int = 0, 
-    limit: int = 100
-) -> list[Factura]:
+    skip: int = 0,
+    limit: int = 100,
+) -> list[dict[str, Any]]:
     """
-    Obtener facturas dentro de un rango de fechas.
+    Obtener facturas vencidas sin pagar, de la más antigua a la más reciente.
+    Se leen del conjunto que mantiene core.vencidas.
     Opcionalmente filtradas por restaurante.
-    """
-    if restaurante_id:
-        statement = select(Factura).where(
-            Factura.fecha >= fecha_inicio,
-            Factura.fecha <= fecha_fin,
-            Factura.restaurante_id == restaurante_id
-        ).offset(skip).limit(limit)
-    else:
-        statement = select(Factura).where(
-            Factura.fecha >= fecha_inicio,
-            Factura.fecha <= fecha_fin
-        ).offset(skip).limit(limit)
-    return list(session.exec(statement).all())
+    Solo se consultan las columnas de `columns`; cada fila es un diccionario.
+    """
+    return fetch_rows(
+        session=session,
+        columns=columns,
+        join=(FacturaVencida, col(FacturaVencida.factura_id) == Factura.id),
+        where=_filtros_vencidas(restaurante_id),
+        order_by=(FacturaVencida.fecha_vencimiento, FacturaVencida.factura_id),
+        skip=skip,
+        limit=limit,
+    )
 
 
-def get_facturas_vencidas(*, session: Session, restaurante_id: uuid.UUID | None = None, skip: int = 0, limit: int = 100) -> list[Factura]:
+def count_facturas_vencidas(*, session: Session, restaurante_id: uuid.UUID | None = None) -> int:
     """
-    Obtener facturas vencidas (fecha_vencimiento < hoy y estado != pagada).
-    Opcionalmente filtradas por restaurante.
+    Contar las facturas vencidas sin pagar, con el mismo filtro que `get_facturas_vencidas`.
     """
-    ahora = datetime.utcnow()
-    
-    if restaurante_id:
-        statement = select(Factura).where(
-            Factura.fecha_vencimiento < ahora,
-            Factura.estado != "pagada",
-            Factura.restaurante_id == restaurante_id
-        ).offset(skip).limit(limit)
-    else:
-        statement = select(Factura).where(
-            Factura.fecha_vencimiento < ahora,
-            Factura.estado != "pagada"
-        ).offset(skip).limit(limit)
-    return list(session.exec(statement).all())
+    statement = (
+        select(func.count())
+        .select_from(FacturaVencida)
+        .join(Factura, col(Factura.id) == FacturaVencida.factura_id)
+        .where(*_filtros_vencidas(restaurante_id))
+    )
+    return session.exec(statement).one()
 
 
-def get_all_facturas(*, session: Session, skip: int = 0, limit: int = 100) -> list[Factura]:
+def _filtros_vencidas(restaurante_id: uuid.UUID | None = None) -> list[Any]:
     """
-    Obtener todas las facturas con paginación.
+    Condiciones sobre facturavencida unida con factura. El estado se vuelve a
+    mirar por si la factura se pagó, anuló o canceló después del último escaneo.
     """
-    statement = select(Factura).offset(skip).limit(limit)
-    return list(session.exec(statement).all())
+    filtros: list[Any] = [col(Factura.estado).not_in(ESTADOS_SIN_COBRO)]
+    if restaurante_id:
+        filtros.append(FacturaVencida.restaurante_id == restaurante_id)
+    return filtros
 
 
 def update_estado_factura(*, session: Session, factura_id: uuid.UUID, nuevo_estado: str) -> Factura | None:
@@ -175,10 +184,15 @@ def update_estado_factura(*, session: Session, factura_id: uuid.UUID, nuevo_esta
     factura = session.get(Factura, factura_id)
     if not factura:
         return None
+    estado_anterior = factura.estado
     factura.estado = nuevo_estado
     session.add(factura)
+    if factura.fecha_vencimiento is not None:
+        sincronizar_vencida(session=session, factura=factura)
     session.commit()
     session.refresh(factura)
+    if nuevo_estado == "pagada" and estado_anterior != "pagada":
+        invoices_paid.inc()
     return factura
 
 
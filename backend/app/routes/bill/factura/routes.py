@@ -1,13 +1,21 @@
 import uuid
-from typing import Any
+from typing import Annotated, Any
 from datetime import datetime
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlmodel import func, select
+from sqlalchemy.exc import IntegrityError
 
 from app.routes.bill.factura import crud
-from app.routes.deps import SessionDep, require_permissions
+from app.routes.deps import (
+    SessionDep,
+    TenantDep,
+    get_tenant,
+    read_from_replica,
+    require_permissions,
+    select_fields,
+)
 from app.routes.auth.permisos.permissions import BILL_READ, BILL_WRITE, BILL_DELETE
+from core.serialization import list_response
 from models.bill.factura import (
     Factura,
     FacturaCreate,
@@ -18,29 +26,31 @@ from models.bill.factura import (
 )
 from models.config import Message
 
-router = APIRouter(prefix="/facturas", tags=["facturas"])
+router = APIRouter(prefix="/facturas", tags=["facturas"], dependencies=[Depends(get_tenant)])
+
+FacturaColumns = Annotated[list[Any], Depends(select_fields(FacturaPublic, Factura))]
 
 
 @router.get(
     "/",
-    dependencies=[Depends(require_permissions(BILL_READ))],
+    dependencies=[Depends(read_from_replica), Depends(require_permissions(BILL_READ))],
     response_model=FacturasPublic,
 )
 def read_facturas(
     session: SessionDep,
+    columns: FacturaColumns,
     skip: int = 0,
     limit: int = Query(default=100, le=100),
 ) -> Any:
     """
-    Obtener todas las facturas con paginación.
+    Obtener todas las facturas de los restaurantes del usuario con paginación.
+    Con `fields` solo se consultan y devuelven las columnas indicadas.
     Requiere permiso: BILL_READ
     """
-    facturas = crud.get_all_facturas(session=session, skip=skip, limit=limit)
+    facturas = crud.get_facturas(session=session, columns=columns, skip=skip, limit=limit)
+    count = crud.count_facturas(session=session)
     
-    count_statement = select(func.count()).select_from(Factura)
-    count = session.exec(count_statement).one()
-    
-    return FacturasPublic(data=facturas, count=count)
+    return list_response(data=facturas, count=count)
 
 
 @router.get(
@@ -57,7 +67,7 @@ def read_factura(
     Obtener una factura específica por ID.
     Requiere permiso: BILL_READ
     """
-    factura = crud.get_factura_by_id(session=session, factura_id=factura_id)
+    factura = crud.get_factura_by_id(session=session, factura_id=factura_id, incluir_archivo=True)
     if not factura:
         raise HTTPException(
             status_code=404,
@@ -80,7 +90,9 @@ def read_factura_by_numero(
     Obtener una factura específica por número de factura.
     Requiere permiso: BILL_READ
     """
-    factura = crud.get_factura_by_numero(session=session, numero_factura=numero_factura)
+    factura = crud.get_factura_by_numero(
+        session=session, numero_factura=numero_factura, incluir_archivo=True
+    )
     if not factura:
         raise HTTPException(
             status_code=404,
@@ -91,13 +103,14 @@ def read_factura_by_numero(
 
 @router.get(
     "/restaurante/{restaurante_id}",
-    dependencies=[Depends(require_permissions(BILL_READ))],
+    dependencies=[Depends(read_from_replica), Depends(require_permissions(BILL_READ))],
     response_model=FacturasPublic,
 )
 def read_facturas_by_restaurante(
     *,
     session: SessionDep,
     restaurante_id: uuid.UUID,
+    columns: FacturaColumns,
     skip: int = 0,
     limit: int = Query(default=100, le=100),
 ) -> Any:
@@ -105,27 +118,24 @@ def read_facturas_by_restaurante(
     Obtener todas las facturas de un restaurante específico.
     Requiere permiso: BILL_READ
     """
-    facturas = crud.get_facturas_by_restaurante(
-        session=session, restaurante_id=restaurante_id, skip=skip, limit=limit
-    )
-    
-    count_statement = select(func.count()).select_from(Factura).where(
-        Factura.restaurante_id == restaurante_id
+    facturas = crud.get_facturas(
+        session=session, columns=columns, restaurante_id=restaurante_id, skip=skip, limit=limit
     )
-    count = session.exec(count_statement).one()
+    count = crud.count_facturas(session=session, restaurante_id=restaurante_id)
     
-    return FacturasPublic(data=facturas, count=count)
+    return list_response(data=facturas, count=count)
 
 
 @router.get(
     "/cliente/{cliente_id}",
-    dependencies=[Depends(require_permissions(BILL_READ))],
+    dependencies=[Depends(read_from_replica), Depends(require_permissions(BILL_READ))],
     response_model=FacturasPublic,
 )
 def read_facturas_by_cliente(
     *,
     session: SessionDep,
     cliente_id: uuid.UUID,
+    columns: FacturaColumns,
     skip: int = 0,
     limit: int = Query(default=100, le=100),
 ) -> Any:
@@ -133,27 +143,24 @@ def read_facturas_by_cliente(
     Obtener todas las facturas de un cliente específico.
     Requiere permiso: BILL_READ
     """
-    facturas = crud.get_facturas_by_cliente(
-        session=session, cliente_id=cliente_id, skip=skip, limit=limit
-    )
-    
-    count_statement = select(func.count()).select_from(Factura).where(
-        Factura.cliente_id == cliente_id
+    facturas = crud.get_facturas(
+        session=session, columns=columns, cliente_id=cliente_id, skip=skip, limit=limit
     )
-    count = session.exec(count_statement).one()
+    count = crud.count_facturas(session=session, cliente_id=cliente_id)
     
-    return FacturasPublic(data=facturas, count=count)
+    return list_response(data=facturas, count=count)
 
 
 @router.get(
     "/empresa/{empresa_id}",
-    dependencies=[Depends(require_permissions(BILL_READ))],
+    dependencies=[Depends(read_from_replica), Depends(require_permissions(BILL_READ))],
     response_model=FacturasPublic,
 )
 def read_facturas_by_empresa(
     *,
     session: SessionDep,
     empresa_id: uuid.UUID,
+    columns: FacturaColumns,
     skip: int = 0,
     limit: int = Query(default=100, le=100),
 ) -> Any:
@@ -161,27 +168,24 @@ def read_facturas_by_empresa(
     Obtener todas las facturas de una empresa específica.
     Requiere permiso: BILL_READ
     """
-    facturas = crud.get_facturas_by_empresa(
-        session=session, empresa_id=empresa_id, skip=skip, limit=limit
-    )
-    
-    count_statement = select(func.count()).select_from(Factura).where(
-        Factura.empresa_id == empresa_id
+    facturas = crud.get_facturas(
+        session=session, columns=columns, empresa_id=empresa_id, skip=skip, limit=limit
     )
-    count = session.exec(count_statement).one()
+    count = crud.count_facturas(session=session, empresa_id=empresa_id)
     
-    return FacturasPublic(data=facturas, count=count)
+    return list_response(data=facturas, count=count)
 
 
 @router.get(
     "/estado/{estado}",
-    dependencies=[Depends(require_permissions(BILL_READ))],
+    dependencies=[Depends(read_from_replica), Depends(require_permissions(BILL_READ))],
     response_model=FacturasPublic,
 )
 def read_facturas_by_estado(
     *,
     session: SessionDep,
     estado: str,
+    columns: FacturaColumns,
     restaurante_id: uuid.UUID | None = None,
     skip: int = 0,
     limit: int = Query(default=100, le=100),
@@ -198,33 +202,24 @@ def read_facturas_by_estado(
             detail=f"Estado inválido. Estados válidos: {', '.join(estados_validos)}",
         )
     
-    facturas = crud.get_facturas_by_estado(
-        session=session, estado=estado, restaurante_id=restaurante_id, skip=skip, limit=limit
+    facturas = crud.get_facturas(
+        session=session, columns=columns, estado=estado, restaurante_id=restaurante_id, skip=skip, limit=limit
     )
+    count = crud.count_facturas(session=session, estado=estado, restaurante_id=restaurante_id)
     
-    if restaurante_id:
-        count_statement = select(func.count()).select_from(Factura).where(
-            Factura.estado == estado,
-            Factura.restaurante_id == restaurante_id
-        )
-    else:
-        count_statement = select(func.count()).select_from(Factura).where(
-            Factura.estado == estado
-        )
-    count = session.exec(count_statement).one()
-    
-    return FacturasPublic(data=facturas, count=count)
+    return list_response(data=facturas, count=count)
 
 
 @router.get(
     "/tipo/{tipo_factura}",
-    dependencies=[Depends(require_permissions(BILL_READ))],
+    dependencies=[Depends(read_from_replica), Depends(require_permissions(BILL_READ))],
     response_model=FacturasPublic,
 )
 def read_facturas_by_tipo(
     *,
     session: SessionDep,
     tipo_factura: str,
+    columns: FacturaColumns,
     restaurante_id: uuid.UUID | None = None,
     skip: int = 0,
     limit: int = Query(default=100, le=100),
@@ -234,72 +229,53 @@ def read_facturas_by_tipo(
     Opcionalmente filtradas por restaurante.
     Requiere permiso: BILL_READ
     """
-    tipos_validos = ["venta", "compra"]
+    tipos_validos = ["venta", "compra", "nota_credito", "nota_debito"]
     if tipo_factura not in tipos_validos:
         raise HTTPException(
             status_code=400,
             detail=f"Tipo inválido. Tipos válidos: {', '.join(tipos_validos)}",
         )
     
-    facturas = crud.get_facturas_by_tipo(
-        session=session, tipo_factura=tipo_factura, restaurante_id=restaurante_id, skip=skip, limit=limit
+    facturas = crud.get_facturas(
+        session=session, columns=columns, tipo_factura=tipo_factura, restaurante_id=restaurante_id, skip=skip, limit=limit
     )
+    count = crud.count_facturas(session=session, tipo_factura=tipo_factura, restaurante_id=restaurante_id)
     
-    if restaurante_id:
-        count_statement = select(func.count()).select_from(Factura).where(
-            Factura.tipo_factura == tipo_factura,
-            Factura.restaurante_id == restaurante_id
-        )
-    else:
-        count_statement = select(func.count()).select_from(Factura).where(
-            Factura.tipo_factura == tipo_factura
-        )
-    count = session.exec(count_statement).one()
-    
-    return FacturasPublic(data=facturas, count=count)
+    return list_response(data=facturas, count=count)
 
 
 @router.get(
     "/vencidas/",
-    dependencies=[Depends(require_permissions(BILL_READ))],
+    dependencies=[Depends(read_from_replica), Depends(require_permissions(BILL_READ))],
     response_model=FacturasPublic,
 )
 def read_facturas_vencidas(
     *,
     session: SessionDep,
+    columns: FacturaColumns,
     restaurante_id: uuid.UUID | None = None,
     skip: int = 0,
     limit: int = Query(default=100, le=100),
 ) -> Any:
     """
-    Obtener facturas vencidas (fecha_vencimiento < hoy y estado != pagada).
+    Obtener facturas vencidas (fecha_vencimiento < hoy y estado != pagada),
+    de la más antigua a la más reciente. Se leen del conjunto de vencidas que
+    mantiene core.vencidas: una factura aparece como mucho OVERDUE_SCAN_SECONDS
+    después de vencer.
     Opcionalmente filtradas por restaurante.
     Requiere permiso: BILL_READ
     """
     facturas = crud.get_facturas_vencidas(
-        session=session, restaurante_id=restaurante_id, skip=skip, limit=limit
+        session=session, columns=columns, restaurante_id=restaurante_id, skip=skip, limit=limit
     )
+    count = crud.count_facturas_vencidas(session=session, restaurante_id=restaurante_id)
     
-    ahora = datetime.utcnow()
-    if restaurante_id:
-        count_statement = select(func.count()).select_from(Factura).where(
-            Factura.fecha_vencimiento < ahora,
-            Factura.estado != "pagada",
-            Factura.restaurante_id == restaurante_id
-        )
-    else:
-        count_statement = select(func.count()).select_from(Factura).where(
-            Factura.fecha_vencimiento < ahora,
-            Factura.estado != "pagada"
-        )
-    count = session.exec(count_statement).one()
-    
-    return FacturasPublic(data=facturas, count=count)
+    return list_response(data=facturas, count=count)
 
 
 @router.get(
     "/fecha/rango",
-    dependencies=[Depends(require_permissions(BILL_READ))],
+    dependencies=[Depends(read_from_replica), Depends(require_permissions(BILL_READ))],
     response_model=FacturasPublic,
 )
 def read_facturas_by_fecha_range(
@@ -307,6 +283,7 @@ def read_facturas_by_fecha_range(
     session: SessionDep,
     fecha_inicio: datetime,
     fecha_fin: datetime,
+    columns: FacturaColumns,
     restaurante_id: uuid.UUID | None = None,
     skip: int = 0,
     limit: int = Query(default=100, le=100),
@@ -316,29 +293,12 @@ def read_facturas_by_fecha_range(
     Opcionalmente filtradas por restaurante.
     Requiere permiso: BILL_READ
     """
-    facturas = crud.get_facturas_by_fecha_range(
-        session=session,
-        fecha_inicio=fecha_inicio,
-        fecha_fin=fecha_fin,
-        restaurante_id=restaurante_id,
-        skip=skip,
-        limit=limit
+    facturas = crud.get_facturas(
+        session=session, columns=columns, fecha_inicio=fecha_inicio, fecha_fin=fecha_fin, restaurante_id=restaurante_id, skip=skip, limit=limit
     )
+    count = crud.count_facturas(session=session, fecha_inicio=fecha_inicio, fecha_fin=fecha_fin, restaurante_id=restaurante_id)
     
-    if restaurante_id:
-        count_statement = select(func.count()).select_from(Factura).where(
-            Factura.fecha >= fecha_inicio,
-            Factura.fecha <= fecha_fin,
-            Factura.restaurante_id == restaurante_id
-        )
-    else:
-        count_statement = select(func.count()).select_from(Factura).where(
-            Factura.fecha >= fecha_inicio,
-            Factura.fecha <= fecha_fin
-        )
-    count = session.exec(count_statement).one()
-    
-    return FacturasPublic(data=facturas, count=count)
+    return list_response(data=facturas, count=count)
 
 
 @router.post(
@@ -349,21 +309,38 @@ def read_facturas_by_fecha_range(
 def create_factura(
     *,
     session: SessionDep,
+    tenant: TenantDep,
     factura_in: FacturaCreate,
 ) -> Any:
     """
     Crear una nueva factura.
     Requiere permiso: BILL_WRITE
     """
-    # Verificar si ya existe una factura con ese número
-    existing_factura = crud.get_factura_by_numero(session=session, numero_factura=factura_in.numero_factura)
+    if not tenant.allows(factura_in.restaurante_id):
+        raise HTTPException(
+            status_code=403,
+            detail="No tienes permisos para crear facturas en este restaurante.",
+        )
+
+    # Verificar si ya existe una factura con ese número (también entre las archivadas)
+    existing_factura = crud.get_factura_by_numero(
+        session=session, numero_factura=factura_in.numero_factura, incluir_archivo=True
+    )
     if existing_factura:
         raise HTTPException(
             status_code=400,
             detail="Ya existe una factura con este número.",
         )
     
-    factura = crud.create_factura(session=session, factura_create=factura_in)
+    try:
+        factura = crud.create_factura(session=session, factura_create=factura_in)
+    except IntegrityError:
+        # El número es único en todo el sistema, no solo en los restaurantes visibles
+        session.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail="Ya existe una factura con este número.",
+        )
     return factura
 
 
@@ -375,6 +352,7 @@ def create_factura(
 def update_factura(
     *,
     session: SessionDep,
+    tenant: TenantDep,
     factura_id: uuid.UUID,
     factura_in: FacturaUpdate,
 ) -> Any:
@@ -388,17 +366,31 @@ def update_factura(
             status_code=404,
             detail="La factura con este ID no existe.",
         )
+    if factura_in.restaurante_id and not tenant.allows(factura_in.restaurante_id):
+        raise HTTPException(
+            status_code=403,
+            detail="No tienes permisos para mover la factura a este restaurante.",
+        )
     
     # Si se actualiza el número de factura, verificar que no exista otro con ese número
     if factura_in.numero_factura and factura_in.numero_factura != factura.numero_factura:
-        existing_factura = crud.get_factura_by_numero(session=session, numero_factura=factura_in.numero_factura)
+        existing_factura = crud.get_factura_by_numero(
+            session=session, numero_factura=factura_in.numero_factura, incluir_archivo=True
+        )
         if existing_factura:
             raise HTTPException(
                 status_code=400,
                 detail="Ya existe una factura con este número.",
             )
     
-    factura = crud.update_factura(session=session, db_factura=factura, factura_in=factura_in)
+    try:
+        factura = crud.update_factura(session=session, db_factura=factura, factura_in=factura_in)
+    except IntegrityError:
+        session.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail="Ya existe una factura con este número.",
+        )
     return factura
 
 
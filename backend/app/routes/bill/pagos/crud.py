@@ -4,6 +4,7 @@ from datetime import datetime
 
 from sqlmodel import Session, select
 
+from core.metrics import record_payment
 from models.bill.pagos import Pago, PagoCreate, PagoUpdate
 
 
@@ -53,6 +54,7 @@ def create_pago(*, session: Session, pago_create: PagoCreate) -> Pago:
     session.add(db_obj)
     session.commit()
     session.refresh(db_obj)
+    record_payment(db_obj.metodo_pago, db_obj.monto)
     
     # Actualizar estado de factura si corresponde
     if db_obj.estado == "completado":
@@ -6,8 +6,10 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlmodel import func, select
 
 from app.routes.bill.pagos import crud
-from app.routes.deps import SessionDep, CurrentUser, require_permissions
+from app.routes.deps import SessionDep, CurrentUser, get_tenant, read_from_replica, require_permissions
 from app.routes.auth.permisos.permissions import BILL_READ, BILL_WRITE, BILL_DELETE
+from core.archive import count_archived, list_archived
+from core.idempotency import IdempotentRoute
 from models.bill.pagos import (
     Pago,
     PagoCreate,
@@ -18,12 +20,17 @@ from models.bill.pagos import (
 )
 from models.config import Message
 
-router = APIRouter(prefix="/pagos", tags=["pagos"])
+router = APIRouter(
+    prefix="/pagos",
+    tags=["pagos"],
+    route_class=IdempotentRoute,
+    dependencies=[Depends(get_tenant)],
+)
 
 
 @router.get(
     "/",
-    dependencies=[Depends(require_permissions(BILL_READ))],
+    dependencies=[Depends(read_from_replica), Depends(require_permissions(BILL_READ))],
     response_model=PagosPublic,
 )
 def read_pagos(
@@ -68,7 +75,7 @@ def read_pago(
 
 @router.get(
     "/factura/{factura_id}",
-    dependencies=[Depends(require_permissions(BILL_READ))],
+    dependencies=[Depends(read_from_replica), Depends(require_permissions(BILL_READ))],
     response_model=PagosPublic,
 )
 def read_pagos_by_factura(
@@ -90,13 +97,17 @@ def read_pagos_by_factura(
         Pago.factura_id == factura_id
     )
     count = session.exec(count_statement).one()
+    if not count:
+        # Factura archivada (core.archive): sus pagos se archivaron con ella
+        pagos = list_archived(session, Pago, factura_id=factura_id, skip=skip, limit=limit)
+        count = count_archived(session, Pago, factura_id=factura_id)
     
     return PagosPublic(data=pagos, count=count)
 
 
 @router.get(
     "/factura/{factura_id}/total",
-    dependencies=[Depends(require_permissions(BILL_READ))],
+    dependencies=[Depends(read_from_replica), Depends(require_permissions(BILL_READ))],
 )
 def read_total_pagos_factura(
     *,
@@ -121,7 +132,7 @@ def read_total_pagos_factura(
 
 @router.get(
     "/metodo/{metodo_pago}",
-    dependencies=[Depends(require_permissions(BILL_READ))],
+    dependencies=[Depends(read_from_replica), Depends(require_permissions(BILL_READ))],
     response_model=PagosPublic,
 )
 def read_pagos_by_metodo(
@@ -156,7 +167,7 @@ def read_pagos_by_metodo(
 
 @router.get(
     "/estado/{estado}",
-    dependencies=[Depends(require_permissions(BILL_READ))],
+    dependencies=[Depends(read_from_replica), Depends(require_permissions(BILL_READ))],
     response_model=PagosPublic,
 )
 def read_pagos_by_estado(
@@ -191,7 +202,7 @@ def read_pagos_by_estado(
 
 @router.get(
     "/fecha/rango",
-    dependencies=[Depends(require_permissions(BILL_READ))],
+    dependencies=[Depends(read_from_replica), Depends(require_permissions(BILL_READ))],
     response_model=PagosPublic,
 )
 def read_pagos_by_fecha_range(
@@ -225,7 +236,7 @@ def read_pagos_by_fecha_range(
 
 @router.get(
     "/procesador/{procesador_id}",
-    dependencies=[Depends(require_permissions(BILL_READ))],
+    dependencies=[Depends(read_from_replica), Depends(require_permissions(BILL_READ))],
     response_model=PagosPublic,
 )
 def read_pagos_by_procesador(
@@ -1,11 +1,12 @@
 import uuid
-from typing import Any
+from typing import Annotated, Any
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import func, select
 
 from app.routes.company.empresa import crud
-from app.routes.deps import CurrentUser, SessionDep, get_current_active_superuser
+from app.routes.deps import CurrentUser, SessionDep, get_current_active_superuser, select_fields
+from core.serialization import fetch_rows, list_response
 from models.company.empresa import (
     Empresa,
     EmpresaCreate,
@@ -25,6 +26,7 @@ router = APIRouter(prefix="/empresas", tags=["empresas"])
 def read_empresas(
     session: SessionDep, 
     current_user: CurrentUser,
+    columns: Annotated[list[Any], Depends(select_fields(EmpresaPublic, Empresa))],
     skip: int = 0, 
     limit: int = 100
 ) -> Any:
@@ -32,24 +34,27 @@ def read_empresas(
     Obtener empresas.
     - Superusuarios: ven todas las empresas
     - Usuarios normales: solo ven su propia empresa
+    Con `fields` solo se consultan y devuelven las columnas indicadas.
     """
     if current_user.is_superuser:
         # Superadmin sees all
         count_statement = select(func.count()).select_from(Empresa)
         count = session.exec(count_statement).one()
-        statement = select(Empresa).offset(skip).limit(limit)
-        empresas = session.exec(statement).all()
+        empresas = fetch_rows(session=session, columns=columns, skip=skip, limit=limit)
     else:
         # Normal user sees only their empresa
         if not current_user.empresa_id:
             return EmpresasPublic(data=[], count=0)
         
-        statement = select(Empresa).where(Empresa.id == current_user.empresa_id)
-        empresas = session.exec(statement).all()
+        empresas = fetch_rows(
+            session=session,
+            columns=columns,
+            where=[Empresa.id == current_user.empresa_id],
+            limit=None,
+        )
         count = len(empresas)
     
-    empresas_public = [EmpresaPublic.model_validate(empresa) for empresa in empresas]
-    return EmpresasPublic(data=empresas_public, count=count)
+    return list_response(data=empresas, count=count)
 
 
 @router.post(
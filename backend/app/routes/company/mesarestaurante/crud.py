@@ -1,7 +1,7 @@
 import uuid
 from typing import Any
 
-from sqlmodel import Session, select
+from sqlmodel import Session, select, update
 
 from models.company.mesarestaurante import MesaRestaurante, MesaRestauranteCreate, MesaRestauranteUpdate
 
@@ -134,3 +134,181 @@ def delete_mesa(*, session: Session, mesa_id: uuid.UUID) -> bool:
     session.delete(mesa)
     session.commit()
     return True
+
+
+ESTADOS_ORDEN_ACTIVOS = ["pendiente", "en_proceso", "completada"]
+
+
+def _bloquear_mesas(
+    *, session: Session, mesa_ids: list[uuid.UUID]
+) -> dict[uuid.UUID, MesaRestaurante]:
+    """
+    Bloquear (SELECT ... FOR UPDATE) las mesas indicadas dentro de la transacción actual.
+    Se ordenan por ID para que dos operaciones concurrentes no se bloqueen mutuamente.
+    """
+    statement = (
+        select(MesaRestaurante)
+        .where(MesaRestaurante.id.in_(mesa_ids))
+        .order_by(MesaRestaurante.id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    return {mesa.id: mesa for mesa in session.exec(statement).all()}
+
+
+def _mover_ordenes_activas(
+    *, session: Session, origen: MesaRestaurante, destino: MesaRestaurante
+) -> None:
+    """
+    Mover las órdenes activas y el estado de ocupación de una mesa a otra, sin hacer commit.
+    Función interna usada por transferir_mesa y unir_mesas.
+    """
+    from models.product.orden import Orden
+
+    session.exec(
+        update(Orden)
+        .where(
+            Orden.mesa_id == origen.id,
+            Orden.estado.in_(ESTADOS_ORDEN_ACTIVOS),
+        )
+        .values(mesa_id=destino.id)
+    )
+
+    destino.orden_activa_id = origen.orden_activa_id
+    destino.numero_comensales = origen.numero_comensales
+    destino.estado = "ocupada"
+
+    origen.orden_activa_id = None
+    origen.numero_comensales = None
+    origen.estado = "disponible"
+
+
+def transferir_mesa(
+    *,
+    session: Session,
+    mesa_origen_id: uuid.UUID,
+    mesa_destino_id: uuid.UUID,
+) -> MesaRestaurante | None:
+    """
+    Transferir los comensales y las órdenes activas de una mesa a otra mesa disponible.
+    Las órdenes se mueven con un único UPDATE y el estado de ambas mesas
+    se actualiza en la misma transacción (un solo commit).
+    Retorna la mesa destino, o None si alguna de las mesas no existe.
+    """
+    mesas = _bloquear_mesas(session=session, mesa_ids=[mesa_origen_id, mesa_destino_id])
+    origen = mesas.get(mesa_origen_id)
+    destino = mesas.get(mesa_destino_id)
+    if not origen or not destino:
+        session.rollback()
+        return None
+
+    if origen.restaurante_id != destino.restaurante_id:
+        session.rollback()
+        raise ValueError("Las mesas deben pertenecer al mismo restaurante")
+    if origen.estado != "ocupada" or not origen.orden_activa_id:
+        session.rollback()
+        raise ValueError("La mesa de origen no tiene una orden activa")
+    if destino.estado != "disponible" or destino.orden_activa_id:
+        session.rollback()
+        raise ValueError("La mesa de destino no está disponible")
+
+    _mover_ordenes_activas(session=session, origen=origen, destino=destino)
+
+    session.add(origen)
+    session.add(destino)
+    session.commit()
+    session.refresh(destino)
+    return destino
+
+
+def unir_mesas(
+    *,
+    session: Session,
+    mesa_origen_id: uuid.UUID,
+    mesa_destino_id: uuid.UUID,
+) -> MesaRestaurante | None:
+    """
+    Unir la mesa de origen a la mesa de destino.
+    - Los items de la orden activa de origen se re-asignan (en bloque) a la orden activa de destino
+    - El total y los comensales se suman en la orden de destino
+    - La orden de origen queda 'cancelada' con total 0 y la mesa de origen se libera
+    Si la mesa de destino no tiene orden activa, equivale a una transferencia.
+    Todo se aplica con un solo commit.
+    Retorna la mesa destino, o None si alguna de las mesas no existe.
+    """
+    from models.product.orden import Orden
+    from models.product.ordenitem import OrdenItem
+
+    mesas = _bloquear_mesas(session=session, mesa_ids=[mesa_origen_id, mesa_destino_id])
+    origen = mesas.get(mesa_origen_id)
+    destino = mesas.get(mesa_destino_id)
+    if not origen or not destino:
+        session.rollback()
+        return None
+
+    if origen.restaurante_id != destino.restaurante_id:
+        session.rollback()
+        raise ValueError("Las mesas deben pertenecer al mismo restaurante")
+    if origen.estado != "ocupada" or not origen.orden_activa_id:
+        session.rollback()
+        raise ValueError("La mesa de origen no tiene una orden activa")
+    if destino.estado == "reservada":
+        session.rollback()
+        raise ValueError("La mesa de destino está reservada")
+
+    if not destino.orden_activa_id:
+        _mover_ordenes_activas(session=session, origen=origen, destino=destino)
+        session.add(origen)
+        session.add(destino)
+        session.commit()
+        session.refresh(destino)
+        return destino
+
+    orden_origen = session.get(
+        Orden, origen.orden_activa_id, with_for_update=True, populate_existing=True
+    )
+    orden_destino = session.get(
+        Orden, destino.orden_activa_id, with_for_update=True, populate_existing=True
+    )
+    if not orden_origen or not orden_destino:
+        session.rollback()
+        raise ValueError("No se encontraron las órdenes activas de las mesas")
+
+    # Re-asignar todos los items en un solo UPDATE
+    session.exec(
+        update(OrdenItem)
+        .where(OrdenItem.orden_id == orden_origen.id)
+        .values(orden_id=orden_destino.id)
+    )
+    # Las demás órdenes activas de la mesa de origen también pasan a la mesa de destino
+    session.exec(
+        update(Orden)
+        .where(
+            Orden.mesa_id == origen.id,
+            Orden.id != orden_origen.id,
+            Orden.estado.in_(ESTADOS_ORDEN_ACTIVOS),
+        )
+        .values(mesa_id=destino.id)
+    )
+
+    orden_destino.total += orden_origen.total
+    orden_destino.numero_comensales = (orden_destino.numero_comensales or 0) + (
+        orden_origen.numero_comensales or 0
+    )
+    orden_origen.total = 0
+    orden_origen.estado = "cancelada"
+
+    destino.numero_comensales = (destino.numero_comensales or 0) + (
+        origen.numero_comensales or 0
+    )
+    origen.orden_activa_id = None
+    origen.numero_comensales = None
+    origen.estado = "disponible"
+
+    session.add(orden_origen)
+    session.add(orden_destino)
+    session.add(origen)
+    session.add(destino)
+    session.commit()
+    session.refresh(destino)
+    return destino
@@ -1,11 +1,18 @@
 import uuid
-from typing import Any
+from typing import Annotated, Any
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import func, select
 
 from app.routes.company.mesarestaurante import crud
-from app.routes.deps import CurrentUser, SessionDep, get_current_active_superuser
+from app.routes.deps import (
+    SessionDep,
+    TenantDep,
+    get_current_active_superuser,
+    get_tenant,
+    select_fields,
+)
+from core.serialization import fetch_rows, list_response
 from models.company.mesarestaurante import (
     MesaRestaurante,
     MesaRestauranteCreate,
@@ -16,7 +23,7 @@ from models.company.mesarestaurante import (
 from models.company.restaurante import Restaurante
 from models.config import Message
 
-router = APIRouter(prefix="/mesas", tags=["mesas"])
+router = APIRouter(prefix="/mesas", tags=["mesas"], dependencies=[Depends(get_tenant)])
 
 
 @router.get(
@@ -24,19 +31,28 @@ router = APIRouter(prefix="/mesas", tags=["mesas"])
     dependencies=[Depends(get_current_active_superuser)],
     response_model=MesaRestaurantesPublic,
 )
-def read_mesas(session: SessionDep, skip: int = 0, limit: int = 100) -> Any:
+def read_mesas(
+    session: SessionDep,
+    columns: Annotated[list[Any], Depends(select_fields(MesaRestaurantePublic, MesaRestaurante))],
+    skip: int = 0,
+    limit: int = 100,
+) -> Any:
     """
     Obtener todas las mesas de restaurante.
+    Con `fields` solo se consultan y devuelven las columnas indicadas.
     Solo accesible para superusuarios.
     """
     count_statement = select(func.count()).select_from(MesaRestaurante)
     count = session.exec(count_statement).one()
 
-    statement = select(MesaRestaurante).offset(skip).limit(limit)
-    mesas = session.exec(statement).all()
-    mesas_public = [MesaRestaurantePublic.model_validate(mesa) for mesa in mesas]
+    mesas = fetch_rows(
+        session=session,
+        columns=columns,
+        skip=skip,
+        limit=limit,
+    )
 
-    return MesaRestaurantesPublic(data=mesas_public, count=count)
+    return list_response(data=mesas, count=count)
 
 
 @router.post(
@@ -44,7 +60,7 @@ def read_mesas(session: SessionDep, skip: int = 0, limit: int = 100) -> Any:
     response_model=MesaRestaurantePublic,
 )
 def create_mesa(
-    *, session: SessionDep, mesa_in: MesaRestauranteCreate, current_user: CurrentUser
+    *, session: SessionDep, mesa_in: MesaRestauranteCreate, tenant: TenantDep
 ) -> Any:
     """
     Crear una nueva mesa de restaurante.
@@ -58,13 +74,12 @@ def create_mesa(
             detail="El restaurante con este ID no existe en el sistema.",
         )
 
-    # Verificar permisos: superusuarios o usuarios del mismo restaurante
-    if not current_user.is_superuser:
-        if current_user.restaurante_id != mesa_in.restaurante_id:
-            raise HTTPException(
-                status_code=403,
-                detail="No tienes permisos para crear mesas en este restaurante.",
-            )
+    # Verificar que el restaurante sea uno de los del usuario
+    if not tenant.allows(mesa_in.restaurante_id):
+        raise HTTPException(
+            status_code=403,
+            detail="No tienes permisos para crear mesas en este restaurante.",
+        )
 
     # Verificar que no exista una mesa con el mismo número en el restaurante
     existing_mesa = crud.get_mesa_by_numero(
@@ -85,7 +100,7 @@ def create_mesa(
     response_model=MesaRestaurantePublic,
 )
 def read_mesa_by_id(
-    mesa_id: uuid.UUID, session: SessionDep, current_user: CurrentUser
+    mesa_id: uuid.UUID, session: SessionDep
 ) -> Any:
     """
     Obtener una mesa por su ID.
@@ -97,14 +112,6 @@ def read_mesa_by_id(
             detail="La mesa con este ID no existe en el sistema.",
         )
 
-    # Verificar permisos: superusuarios o usuarios del mismo restaurante
-    if not current_user.is_superuser:
-        if current_user.restaurante_id != mesa.restaurante_id:
-            raise HTTPException(
-                status_code=403,
-                detail="No tienes permisos para acceder a esta mesa.",
-            )
-
     return mesa
 
 
@@ -115,7 +122,7 @@ def read_mesa_by_id(
 def read_mesas_by_restaurante(
     restaurante_id: uuid.UUID,
     session: SessionDep,
-    current_user: CurrentUser,
+    tenant: TenantDep,
     skip: int = 0,
     limit: int = 100,
 ) -> Any:
@@ -131,13 +138,12 @@ def read_mesas_by_restaurante(
             detail="El restaurante con este ID no existe en el sistema.",
         )
 
-    # Verificar permisos: superusuarios o usuarios del mismo restaurante
-    if not current_user.is_superuser:
-        if current_user.restaurante_id != restaurante_id:
-            raise HTTPException(
-                status_code=403,
-                detail="No tienes permisos para ver las mesas de este restaurante.",
-            )
+    # Verificar que el restaurante sea uno de los del usuario
+    if not tenant.allows(restaurante_id):
+        raise HTTPException(
+            status_code=403,
+            detail="No tienes permisos para ver las mesas de este restaurante.",
+        )
 
     mesas = crud.get_mesas_by_restaurante(
         session=session, restaurante_id=restaurante_id, skip=skip, limit=limit
@@ -170,7 +176,7 @@ def update_mesa(
     session: SessionDep,
     mesa_id: uuid.UUID,
     mesa_in: MesaRestauranteUpdate,
-    current_user: CurrentUser,
+    tenant: TenantDep,
 ) -> Any:
     """
     Actualizar una mesa de restaurante.
@@ -183,14 +189,6 @@ def update_mesa(
             detail="La mesa con este ID no existe en el sistema.",
         )
 
-    # Verificar permisos: superusuarios o usuarios del mismo restaurante
-    if not current_user.is_superuser:
-        if current_user.restaurante_id != mesa.restaurante_id:
-            raise HTTPException(
-                status_code=403,
-                detail="No tienes permisos para actualizar esta mesa.",
-            )
-
     # Si se está actualizando el restaurante, verificar que existe y que el usuario tiene acceso
     if mesa_in.restaurante_id and mesa_in.restaurante_id != mesa.restaurante_id:
         restaurante = session.get(Restaurante, mesa_in.restaurante_id)
@@ -201,12 +199,11 @@ def update_mesa(
             )
 
         # Verificar permisos en el nuevo restaurante
-        if not current_user.is_superuser:
-            if current_user.restaurante_id != mesa_in.restaurante_id:
-                raise HTTPException(
-                    status_code=403,
-                    detail="No tienes permisos para mover esta mesa a otro restaurante.",
-                )
+        if not tenant.allows(mesa_in.restaurante_id):
+            raise HTTPException(
+                status_code=403,
+                detail="No tienes permisos para mover esta mesa a otro restaurante.",
+            )
 
     # Si se está actualizando el número de mesa, verificar que no exista otra con el mismo número
     if mesa_in.numero_mesa and mesa_in.numero_mesa != mesa.numero_mesa:
@@ -234,7 +231,6 @@ def asignar_orden_a_mesa(
     mesa_id: uuid.UUID,
     orden_id: uuid.UUID,
     numero_comensales: int,
-    current_user: CurrentUser,
 ) -> Any:
     """
     Asignar una orden activa a una mesa y cambiar su estado a 'ocupada'.
@@ -246,14 +242,6 @@ def asignar_orden_a_mesa(
             detail="La mesa con este ID no existe en el sistema.",
         )
 
-    # Verificar permisos
-    if not current_user.is_superuser:
-        if current_user.restaurante_id != mesa.restaurante_id:
-            raise HTTPException(
-                status_code=403,
-                detail="No tienes permisos para asignar órdenes a esta mesa.",
-            )
-
     # Verificar que la mesa esté disponible
     if mesa.estado == "ocupada" and mesa.orden_activa_id:
         raise HTTPException(
@@ -282,7 +270,7 @@ def asignar_orden_a_mesa(
     response_model=MesaRestaurantePublic,
 )
 def liberar_mesa(
-    mesa_id: uuid.UUID, session: SessionDep, current_user: CurrentUser
+    mesa_id: uuid.UUID, session: SessionDep
 ) -> Any:
     """
     Liberar una mesa, eliminar la orden asociada y cambiar su estado a 'disponible'.
@@ -294,14 +282,6 @@ def liberar_mesa(
             detail="La mesa con este ID no existe en el sistema.",
         )
 
-    # Verificar permisos
-    if not current_user.is_superuser:
-        if current_user.restaurante_id != mesa.restaurante_id:
-            raise HTTPException(
-                status_code=403,
-                detail="No tienes permisos para liberar esta mesa.",
-            )
-
     mesa = crud.liberar_mesa(session=session, mesa_id=mesa_id)
     
     if not mesa:
@@ -322,7 +302,6 @@ def cambiar_estado_mesa(
     session: SessionDep,
     mesa_id: uuid.UUID,
     nuevo_estado: str,
-    current_user: CurrentUser,
 ) -> Any:
     """
     Cambiar el estado de una mesa.
@@ -342,14 +321,6 @@ def cambiar_estado_mesa(
             detail="La mesa con este ID no existe en el sistema.",
         )
 
-    # Verificar permisos
-    if not current_user.is_superuser:
-        if current_user.restaurante_id != mesa.restaurante_id:
-            raise HTTPException(
-                status_code=403,
-                detail="No tienes permisos para cambiar el estado de esta mesa.",
-            )
-
     mesa = crud.cambiar_estado_mesa(
         session=session, mesa_id=mesa_id, nuevo_estado=nuevo_estado
     )
@@ -363,12 +334,106 @@ def cambiar_estado_mesa(
     return mesa
 
 
+@router.patch(
+    "/{mesa_id}/transferir",
+    response_model=MesaRestaurantePublic,
+)
+def transferir_mesa(
+    *,
+    session: SessionDep,
+    mesa_id: uuid.UUID,
+    mesa_destino_id: uuid.UUID,
+) -> Any:
+    """
+    Transferir los comensales y las órdenes activas de una mesa a otra mesa disponible.
+    La mesa de origen queda 'disponible' y la de destino 'ocupada' en una sola transacción.
+    Retorna la mesa de destino.
+    """
+    if mesa_id == mesa_destino_id:
+        raise HTTPException(
+            status_code=400,
+            detail="La mesa de origen y la de destino deben ser distintas.",
+        )
+
+    mesa = crud.get_mesa_by_id(session=session, mesa_id=mesa_id)
+    if not mesa:
+        raise HTTPException(
+            status_code=404,
+            detail="La mesa con este ID no existe en el sistema.",
+        )
+
+    try:
+        mesa_destino = crud.transferir_mesa(
+            session=session, mesa_origen_id=mesa_id, mesa_destino_id=mesa_destino_id
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e),
+        )
+
+    if not mesa_destino:
+        raise HTTPException(
+            status_code=404,
+            detail="La mesa de destino no existe en el sistema.",
+        )
+
+    return mesa_destino
+
+
+@router.patch(
+    "/{mesa_id}/unir",
+    response_model=MesaRestaurantePublic,
+)
+def unir_mesas(
+    *,
+    session: SessionDep,
+    mesa_id: uuid.UUID,
+    mesa_destino_id: uuid.UUID,
+) -> Any:
+    """
+    Unir una mesa a otra: los items de la orden activa de origen pasan a la orden
+    activa de destino y la mesa de origen se libera, todo en una sola transacción.
+    Retorna la mesa de destino.
+    """
+    if mesa_id == mesa_destino_id:
+        raise HTTPException(
+            status_code=400,
+            detail="La mesa de origen y la de destino deben ser distintas.",
+        )
+
+    mesa = crud.get_mesa_by_id(session=session, mesa_id=mesa_id)
+    if not mesa:
+        raise HTTPException(
+            status_code=404,
+            detail="La mesa con este ID no existe en el sistema.",
+        )
+
+    try:
+        mesa_destino = crud.unir_mesas(
+            session=session, mesa_origen_id=mesa_id, mesa_destino_id=mesa_destino_id
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e),
+        )
+
+    if not mesa_destino:
+        raise HTTPException(
+            status_code=404,
+            detail="La mesa de destino no existe en el sistema.",
+        )
+
+    return mesa_destino
+
+
 @router.delete(
     "/{mesa_id}",
     response_model=Message,
 )
 def delete_mesa(
-    mesa_id: uuid.UUID, session: SessionDep, current_user: CurrentUser
+    mesa_id: uuid.UUID, session: SessionDep
 ) -> Any:
     """
     Eliminar una mesa de restaurante.
@@ -381,14 +446,6 @@ def delete_mesa(
             detail="La mesa con este ID no existe en el sistema.",
         )
 
-    # Verificar permisos: superusuarios o usuarios del mismo restaurante
-    if not current_user.is_superuser:
-        if current_user.restaurante_id != mesa.restaurante_id:
-            raise HTTPException(
-                status_code=403,
-                detail="No tienes permisos para eliminar esta mesa.",
-            )
-
     # Verificar que la mesa no tenga una orden activa
     if mesa.orden_activa_id:
         raise HTTPException(
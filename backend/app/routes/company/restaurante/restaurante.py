@@ -1,11 +1,12 @@
 import uuid
-from typing import Any
+from typing import Annotated, Any
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import func, select
 
 from app.routes.company.restaurante import crud
-from app.routes.deps import CurrentUser, SessionDep, get_current_active_superuser
+from app.routes.deps import CurrentUser, SessionDep, get_current_active_superuser, select_fields
+from core.serialization import fetch_rows, list_response
 from models.company.restaurante import (
     Restaurante,
     RestauranteCreate,
@@ -26,6 +27,7 @@ router = APIRouter(prefix="/restaurantes", tags=["restaurantes"])
 def read_restaurantes(
     session: SessionDep, 
     current_user: CurrentUser,
+    columns: Annotated[list[Any], Depends(select_fields(RestaurantePublic, Restaurante))],
     skip: int = 0, 
     limit: int = 100
 ) -> Any:
@@ -33,24 +35,27 @@ def read_restaurantes(
     Obtener restaurantes.
     - Superusuarios: ven todos los restaurantes
     - Usuarios normales: solo ven restaurantes de su empresa
+    Con `fields` solo se consultan y devuelven las columnas indicadas.
     """
     if current_user.is_superuser:
         # Superadmin sees all
         count_statement = select(func.count()).select_from(Restaurante)
         count = session.exec(count_statement).one()
-        statement = select(Restaurante).offset(skip).limit(limit)
-        restaurantes = session.exec(statement).all()
+        restaurantes = fetch_rows(session=session, columns=columns, skip=skip, limit=limit)
     else:
         # Normal user sees only restaurantes from their empresa
         if not current_user.empresa_id:
             return RestaurantesPublic(data=[], count=0)
         
-        statement = select(Restaurante).where(Restaurante.empresa_id == current_user.empresa_id)
-        restaurantes = session.exec(statement).all()
+        restaurantes = fetch_rows(
+            session=session,
+            columns=columns,
+            where=[Restaurante.empresa_id == current_user.empresa_id],
+            limit=None,
+        )
         count = len(restaurantes)
     
-    restaurantes_public = [RestaurantePublic.model_validate(rest) for rest in restaurantes]
-    return RestaurantesPublic(data=restaurantes_public, count=count)
+    return list_response(data=restaurantes, count=count)
 
 
 @router.post(
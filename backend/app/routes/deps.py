@@ -1,25 +1,44 @@
+import os
+import uuid
 from collections.abc import Generator
-from typing import Annotated, Callable
+from datetime import datetime, timedelta
+from typing import Annotated, Any, Callable
 
-import jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
 from pydantic import ValidationError
-from sqlmodel import Session
+from sqlmodel import Session, SQLModel
 
+from app.routes.auth.users import crud as users_crud
 from core import security
 from core.config import settings
-from core.db import engine
-from models.auth.users import TokenPayload, User
+from core.db import get_engine
+from core.idempotency import shared_session
+from core.profiler import ProfilerBusy, profiler
+from core.replica import WRITE_COOKIE, WRITE_HEADER, RoutingSession, use_replica
+from core.revocation import RevocationList
+from core.serialization import select_columns
+from core.tenant import TenantScope, tenant_scope, use_tenant
+from models.auth.users import AccessTokenPayload, UserPublic
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/login/access-token"
 )
 
 
-def get_db() -> Generator[Session, None, None]:
-    with Session(engine) as session:
+def get_db(request: Request) -> Generator[Session, None, None]:
+    # Dentro de /sync/replay todas las operaciones comparten la sesión del lote
+    shared = shared_session()
+    if shared is not None:
+        yield shared
+        return
+    with RoutingSession(get_engine()) as session:
+        # Clave de idempotencia de la operación (core.idempotency): se confirma
+        # con el primer commit del endpoint
+        claim = getattr(request.state, "idempotency_claim", None)
+        if claim is not None:
+            session.add(claim)
         yield session
 
 
@@ -27,29 +46,111 @@ SessionDep = Annotated[Session, Depends(get_db)]
 TokenDep = Annotated[str, Depends(reusable_oauth2)]
 
 
-def get_current_user(session: SessionDep, token: TokenDep) -> User:
+def _load_revoked_sessions(since: datetime) -> list[uuid.UUID]:
+    with Session(get_engine()) as session:
+        return users_crud.get_revoked_session_ids(session=session, since=since)
+
+
+# Sesiones revocadas dentro de la vida máxima de un access token
+revoked_sessions = RevocationList(
+    loader=_load_revoked_sessions,
+    window=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+    refresh_seconds=settings.TOKEN_REVOCATION_REFRESH_SECONDS,
+)
+
+
+def revoke_sessions(
+    *,
+    session: Session,
+    session_id: uuid.UUID | None = None,
+    user_id: uuid.UUID | None = None,
+) -> None:
+    """
+    Revocar sesiones en la BD y aplicarlo de inmediato en la lista de este proceso.
+    """
+    revoked = users_crud.revoke_refresh_sessions(
+        session=session, session_id=session_id, user_id=user_id
+    )
+    revoked_sessions.add(revoked)
+
+
+def get_token_payload(token: TokenDep) -> AccessTokenPayload:
+    """
+    Validar el access token solo con su firma y la lista de revocación en memoria.
+    """
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
-        )
-        token_data = TokenPayload(**payload)
+        payload = security.decode_token(token)
+        token_data = AccessTokenPayload(**payload)
     except (InvalidTokenError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = session.get(User, token_data.sub)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    if not user.is_active:
+    if token_data.typ != "access" or revoked_sessions.is_revoked(token_data.sid):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Could not validate credentials",
+        )
+    return token_data
+
+
+TokenPayloadDep = Annotated[AccessTokenPayload, Depends(get_token_payload)]
+
+
+def get_current_user(token_data: TokenPayloadDep) -> UserPublic:
+    """
+    Usuario autenticado construido a partir de los claims del token, sin consultar la BD.
+    Los endpoints que necesitan la fila completa (p. ej. el hash de la contraseña)
+    deben cargarla con `session.get(User, current_user.id)`.
+    """
+    if not token_data.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    return user
+    return UserPublic(
+        id=token_data.sub,
+        email=token_data.email,
+        full_name=token_data.full_name,
+        is_active=token_data.is_active,
+        is_superuser=token_data.is_superuser,
+        restaurante_id=token_data.restaurante_id,
+        empresa_id=token_data.empresa_id,
+    )
 
 
-CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentUser = Annotated[UserPublic, Depends(get_current_user)]
+
+
+def get_tenant(session: SessionDep, current_user: CurrentUser) -> TenantScope:
+    """
+    Limitar las consultas de la request a los restaurantes del usuario (ver core.tenant).
+    Se declara en el router para que aplique a todos sus endpoints:
+
+        router = APIRouter(..., dependencies=[Depends(get_tenant)])
+
+    Los endpoints que crean o mueven registros comprueban el restaurante de
+    destino con `tenant.allows(restaurante_id)`.
+    """
+    scope = tenant_scope(session=session, user=current_user)
+    use_tenant(session, scope)
+    return scope
+
 
+TenantDep = Annotated[TenantScope, Depends(get_tenant)]
 
-def get_current_active_superuser(current_user: CurrentUser) -> User:
+
+def read_from_replica(request: Request, session: SessionDep) -> None:
+    """
+    Leer de la réplica en los listados e informes (ver core.replica), salvo que
+    no esté al día o el cliente acabe de escribir:
+
+        @router.get("/", dependencies=[Depends(read_from_replica), ...])
+    """
+    use_replica(
+        session,
+        last_write=request.headers.get(WRITE_HEADER) or request.cookies.get(WRITE_COOKIE),
+    )
+
+
+def get_current_active_superuser(current_user: CurrentUser) -> UserPublic:
     if not current_user.is_superuser:
         raise HTTPException(
             status_code=403, detail="The user doesn't have enough privileges"
@@ -57,8 +158,38 @@ def get_current_active_superuser(current_user: CurrentUser) -> User:
     return current_user
 
 
+def profile_request(request: Request, response: Response) -> Generator[None, None, None]:
+    """
+    Perfilar la request si trae la cabecera `X-Profile` (solo superusuarios).
+    La respuesta lleva `X-Profile-Id`; las pilas se obtienen después con
+    `GET /utils/profiler/{profile_id}`. Sin la cabecera no hace nada.
+    """
+    if not settings.PROFILER_ENABLED or "x-profile" not in request.headers:
+        yield
+        return
+
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    get_current_active_superuser(get_current_user(get_token_payload(token)))
+
+    try:
+        profile = profiler.start(interval=settings.PROFILER_MIN_INTERVAL_MS / 1000)
+    except ProfilerBusy:
+        response.headers["X-Profile"] = "busy"
+        yield
+        return
+
+    response.headers["X-Profile-Id"] = profile.id
+    response.headers["X-Worker-Pid"] = str(os.getpid())
+    try:
+        yield
+    finally:
+        profiler.stop(profile)
+
+
 def check_user_permissions(
-    session: Session, user: User, required_permissions: list[str]
+    session: Session, user: UserPublic, required_permissions: list[str]
 ) -> bool:
     """
     Verificar si un usuario tiene todos los permisos requeridos.
@@ -94,7 +225,7 @@ def require_permissions(*required_permissions: str) -> Callable:
         Una función que verifica los permisos
     """
 
-    def permission_checker(session: SessionDep, current_user: CurrentUser) -> User:
+    def permission_checker(session: SessionDep, current_user: CurrentUser) -> UserPublic:
         if not check_user_permissions(
             session=session, user=current_user, required_permissions=list(required_permissions)
         ):
@@ -123,7 +254,7 @@ def require_any_permission(*required_permissions: str) -> Callable:
         Una función que verifica los permisos
     """
 
-    def permission_checker(session: SessionDep, current_user: CurrentUser) -> User:
+    def permission_checker(session: SessionDep, current_user: CurrentUser) -> UserPublic:
         # Los superusuarios tienen todos los permisos
         if current_user.is_superuser:
             return current_user
@@ -143,3 +274,35 @@ def require_any_permission(*required_permissions: str) -> Callable:
         return current_user
 
     return permission_checker
+
+
+def select_fields(public_model: type[SQLModel], table_model: type[SQLModel]) -> Callable:
+    """
+    Dependencia de FastAPI para el parámetro opcional `fields` de los listados.
+
+    Uso:
+        @router.get("/", response_model=FacturasPublic)
+        def read_facturas(columns: Annotated[list, Depends(select_fields(FacturaPublic, Factura))]):
+            ...
+
+    Args:
+        public_model: Modelo público cuyos campos se pueden solicitar
+        table_model: Modelo de tabla del que salen las columnas
+
+    Returns:
+        Una función que devuelve las columnas a seleccionar
+    """
+
+    def fields_parser(
+        fields: str | None = Query(
+            default=None,
+            description="Campos a devolver separados por coma (p. ej. `id,nombre,precio`). "
+            "Por defecto se devuelven todos los campos públicos.",
+        ),
+    ) -> list[Any]:
+        try:
+            return select_columns(public_model, table_model, fields)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    return fields_parser
@@ -1,4 +1,4 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
 from app.routes.auth.users import login, private, users, utils
 from app.routes.auth.roles import roles, user_roles
@@ -13,13 +13,16 @@ from app.routes.product.orden import routes as orden_routes
 from app.routes.product.ordenitem import routes as ordenitem_routes
 from app.routes.bill.factura import routes as factura_routes
 from app.routes.bill.pagos import routes as pago_routes
-from app.routes.bill.factura import routes as cobro_routes
 from app.routes.bill.correccionfactura import routes as correccion_factura_routes
 from app.routes.bill.articulofactura import routes as articulo_factura_routes
+from app.routes.bill.cierrecaja import routes as cierre_caja_routes
+from app.routes.sync import routes as sync_routes
 from app.routes import upload
+from app.routes.deps import profile_request
 from core.config import settings
 
-api_router = APIRouter()
+# `X-Profile` en cualquier request de la API la perfila (ver deps.profile_request)
+api_router = APIRouter(dependencies=[Depends(profile_request)])
 
 # Rutas de autenticación existentes
 api_router.include_router(login.router)
@@ -51,9 +54,12 @@ api_router.include_router(ordenitem_routes.router)
 # Rutas de facturación y pagos
 api_router.include_router(factura_routes.router)
 api_router.include_router(pago_routes.router)
-api_router.include_router(cobro_routes.router)
 api_router.include_router(correccion_factura_routes.router)
 api_router.include_router(articulo_factura_routes.router)
+api_router.include_router(cierre_caja_routes.router)
+
+# Sincronización incremental de la app móvil
+api_router.include_router(sync_routes.router)
 
 # Rutas de upload
 api_router.include_router(upload.router)
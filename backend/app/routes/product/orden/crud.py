@@ -3,6 +3,8 @@ from typing import Any
 
 from sqlmodel import Session, select
 
+from core.archive import count_archived, find_archived, list_archived
+from core.metrics import orders_created
 from models.product.orden import Orden, OrdenCreate, OrdenUpdate
 
 
@@ -13,6 +15,7 @@ def create_orden(*, session: Session, orden_create: OrdenCreate) -> Orden:
     db_obj = Orden.model_validate(orden_create)
     session.add(db_obj)
     session.commit()
+    orders_created.inc()
     session.refresh(db_obj)
     return db_obj
 
@@ -29,11 +32,16 @@ def update_orden(*, session: Session, db_orden: Orden, orden_in: OrdenUpdate) ->
     return db_orden
 
 
-def get_orden_by_id(*, session: Session, orden_id: uuid.UUID) -> Orden | None:
+def get_orden_by_id(*, session: Session, orden_id: uuid.UUID, incluir_archivo: bool = False) -> Orden | None:
     """
     Obtener una orden por su ID.
+    Con incluir_archivo, si no está entre las activas se busca en el archivo
+    (core.archive); la orden archivada es de solo lectura.
     """
-    return session.get(Orden, orden_id)
+    orden = session.get(Orden, orden_id)
+    if orden is None and incluir_archivo:
+        orden = find_archived(session, Orden, id=orden_id)
+    return orden
 
 
 def get_ordenes_by_restaurante(*, session: Session, restaurante_id: uuid.UUID, skip: int = 0, limit: int = 100) -> list[Orden]:
@@ -83,6 +91,21 @@ def get_ordenes_by_estado(*, session: Session, estado: str, restaurante_id: uuid
     return list(session.exec(statement).all())
 
 
+def get_ordenes_archivadas(*, session: Session, skip: int = 0, limit: int = 100, **filtros: Any) -> list[Orden]:
+    """
+    Obtener órdenes del archivo (completadas o canceladas hace más de
+    ARCHIVE_HORIZON_DAYS días) filtradas por columna, con paginación.
+    """
+    return list_archived(session, Orden, skip=skip, limit=limit, **filtros)
+
+
+def count_ordenes_archivadas(*, session: Session, **filtros: Any) -> int:
+    """
+    Contar las órdenes del archivo filtradas por columna.
+    """
+    return count_archived(session, Orden, **filtros)
+
+
 def get_all_ordenes(*, session: Session, skip: int = 0, limit: int = 100) -> list[Orden]:
     """
     Obtener todas las órdenes con paginación.
@@ -5,8 +5,10 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import func, select
 
 from app.routes.product.orden import crud
-from app.routes.deps import SessionDep, require_permissions
+from app.routes.deps import SessionDep, TenantDep, get_tenant, require_permissions
 from app.routes.auth.permisos.permissions import ORDER_READ, ORDER_WRITE, ORDER_DELETE
+from core.archive import ESTADOS_ORDEN_ARCHIVABLES
+from core.idempotency import IdempotentRoute
 from models.product.orden import (
     Orden,
     OrdenCreate,
@@ -17,7 +19,12 @@ from models.product.orden import (
 )
 from models.config import Message
 
-router = APIRouter(prefix="/ordenes", tags=["ordenes"])
+router = APIRouter(
+    prefix="/ordenes",
+    tags=["ordenes"],
+    route_class=IdempotentRoute,
+    dependencies=[Depends(get_tenant)],
+)
 
 
 @router.get(
@@ -41,10 +48,17 @@ def read_ordenes(
     - cliente_id: órdenes de un cliente específico
     - mesa_id: órdenes de una mesa específica
     - estado: órdenes con un estado específico (pendiente, en_proceso, completada, cancelada)
-    Si no se proporciona ningún filtro, devuelve todas las órdenes.
+    Si no se proporciona ningún filtro, devuelve todas las órdenes de los
+    restaurantes del usuario.
+    Las órdenes archivadas (core.archive) van a continuación de las activas: las
+    páginas que pasan del final de las activas siguen con el historial archivado.
     Requiere permiso: ORDER_READ
     """
+    filtros: dict[str, Any]
     if estado:
+        filtros = {"estado": estado}
+        if restaurante_id:
+            filtros["restaurante_id"] = restaurante_id
         ordenes = crud.get_ordenes_by_estado(
             session=session, 
             estado=estado,
@@ -62,6 +76,7 @@ def read_ordenes(
                 Orden.estado == estado
             )
     elif restaurante_id:
+        filtros = {"restaurante_id": restaurante_id}
         ordenes = crud.get_ordenes_by_restaurante(
             session=session, 
             restaurante_id=restaurante_id, 
@@ -72,6 +87,7 @@ def read_ordenes(
             Orden.restaurante_id == restaurante_id
         )
     elif cliente_id:
+        filtros = {"cliente_id": cliente_id}
         ordenes = crud.get_ordenes_by_cliente(
             session=session, 
             cliente_id=cliente_id, 
@@ -82,6 +98,7 @@ def read_ordenes(
             Orden.cliente_id == cliente_id
         )
     elif mesa_id:
+        filtros = {"mesa_id": mesa_id}
         ordenes = crud.get_ordenes_by_mesa(
             session=session, 
             mesa_id=mesa_id, 
@@ -92,10 +109,23 @@ def read_ordenes(
             Orden.mesa_id == mesa_id
         )
     else:
+        filtros = {}
         ordenes = crud.get_all_ordenes(session=session, skip=skip, limit=limit)
         count_statement = select(func.count()).select_from(Orden)
     
     count = session.exec(count_statement).one()
+
+    # En el archivo solo hay órdenes completadas o canceladas
+    if not estado or estado in ESTADOS_ORDEN_ARCHIVABLES:
+        archivadas = crud.count_ordenes_archivadas(session=session, **filtros)
+        if archivadas and len(ordenes) < limit:
+            ordenes += crud.get_ordenes_archivadas(
+                session=session,
+                skip=max(skip - count, 0),
+                limit=limit - len(ordenes),
+                **filtros,
+            )
+        count += archivadas
     ordenes_public = [OrdenPublic.model_validate(orden) for orden in ordenes]
     
     return OrdenesPublic(data=ordenes_public, count=count)
@@ -109,12 +139,18 @@ def read_ordenes(
 def create_orden(
     *, 
     session: SessionDep, 
+    tenant: TenantDep,
     orden_in: OrdenCreate
 ) -> Any:
     """
     Crear una nueva orden.
     Requiere permiso: ORDER_WRITE
     """
+    if not tenant.allows(orden_in.restaurante_id):
+        raise HTTPException(
+            status_code=403,
+            detail="No tienes permisos para crear órdenes en este restaurante.",
+        )
     orden = crud.create_orden(session=session, orden_create=orden_in)
     return orden
 
@@ -132,7 +168,7 @@ def read_orden_by_id(
     Obtener una orden por su ID.
     Requiere permiso: ORDER_READ
     """
-    orden = crud.get_orden_by_id(session=session, orden_id=orden_id)
+    orden = crud.get_orden_by_id(session=session, orden_id=orden_id, incluir_archivo=True)
     if not orden:
         raise HTTPException(
             status_code=404,
@@ -150,6 +186,7 @@ def read_orden_by_id(
 def update_orden(
     *,
     session: SessionDep,
+    tenant: TenantDep,
     orden_id: uuid.UUID,
     orden_in: OrdenUpdate,
 ) -> Any:
@@ -163,6 +200,11 @@ def update_orden(
             status_code=404,
             detail="La orden con este ID no existe.",
         )
+    if orden_in.restaurante_id and not tenant.allows(orden_in.restaurante_id):
+        raise HTTPException(
+            status_code=403,
+            detail="No tienes permisos para mover la orden a este restaurante.",
+        )
 
     orden = crud.update_orden(session=session, db_orden=orden, orden_in=orden_in)
     return orden
@@ -215,14 +257,16 @@ def read_orden_items(
     """
     from app.routes.product.ordenitem import crud as ordenitem_crud
     
-    orden = crud.get_orden_by_id(session=session, orden_id=orden_id)
+    orden = crud.get_orden_by_id(session=session, orden_id=orden_id, incluir_archivo=True)
     if not orden:
         raise HTTPException(
             status_code=404,
             detail="La orden con este ID no existe.",
         )
     
-    items = ordenitem_crud.get_orden_items_by_orden(session=session, orden_id=orden_id)
+    items = ordenitem_crud.get_orden_items_by_orden(
+        session=session, orden_id=orden_id, incluir_archivo=True
+    )
     return {"data": items, "count": len(items)}
 
 
@@ -3,6 +3,8 @@ from typing import Any
 
 from sqlmodel import Session, select
 
+from core.archive import list_archived
+from core.metrics import order_items_added
 from models.product.ordenitem import OrdenItem, OrdenItemCreate, OrdenItemUpdate
 
 
@@ -13,6 +15,7 @@ def create_orden_item(*, session: Session, orden_item_create: OrdenItemCreate) -
     db_obj = OrdenItem.model_validate(orden_item_create)
     session.add(db_obj)
     session.commit()
+    order_items_added.inc()
     session.refresh(db_obj)
     return db_obj
 
@@ -36,12 +39,17 @@ def get_orden_item_by_id(*, session: Session, orden_item_id: uuid.UUID) -> Orden
     return session.get(OrdenItem, orden_item_id)
 
 
-def get_orden_items_by_orden(*, session: Session, orden_id: uuid.UUID) -> list[OrdenItem]:
+def get_orden_items_by_orden(*, session: Session, orden_id: uuid.UUID, incluir_archivo: bool = False) -> list[OrdenItem]:
     """
     Obtener todos los items de una orden.
+    Con incluir_archivo, si no hay items activos se buscan en el archivo: los
+    items de una orden archivada se archivan con ella.
     """
     statement = select(OrdenItem).where(OrdenItem.orden_id == orden_id)
-    return list(session.exec(statement).all())
+    items = list(session.exec(statement).all())
+    if not items and incluir_archivo:
+        items = list_archived(session, OrdenItem, limit=None, orden_id=orden_id)
+    return items
 
 
 def get_orden_items_by_producto(*, session: Session, producto_id: uuid.UUID, skip: int = 0, limit: int = 100) -> list[OrdenItem]:
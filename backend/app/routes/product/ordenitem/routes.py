@@ -5,8 +5,9 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import func, select
 
 from app.routes.product.ordenitem import crud
-from app.routes.deps import SessionDep, require_permissions
+from app.routes.deps import SessionDep, get_tenant, require_permissions
 from app.routes.auth.permisos.permissions import ORDER_READ, ORDER_WRITE, ORDER_DELETE
+from core.idempotency import IdempotentRoute
 from models.product.ordenitem import (
     OrdenItem,
     OrdenItemCreate,
@@ -14,9 +15,40 @@ from models.product.ordenitem import (
     OrdenItemsPublic,
     OrdenItemUpdate,
 )
+from models.product.movimientostock import MovimientoStock
 from models.config import Message
 
-router = APIRouter(prefix="/orden-items", tags=["orden-items"])
+router = APIRouter(
+    prefix="/orden-items",
+    tags=["orden-items"],
+    route_class=IdempotentRoute,
+    dependencies=[Depends(get_tenant)],
+)
+
+
+def _mover_stock(session: SessionDep, movimientos: list[MovimientoStock]) -> None:
+    """
+    Registrar los movimientos de stock de un cambio en los items, sin commit: se
+    confirman con el commit del propio cambio (ver producto.crud.mover_stock).
+    """
+    from app.routes.product.producto import crud as producto_crud
+    try:
+        producto_crud.mover_stock(session=session, movimientos=movimientos)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e),
+        )
+
+
+def _movimiento_por_diferencia(orden_item: OrdenItem, diferencia: int) -> MovimientoStock:
+    """Venta si el item aumenta, devolución si disminuye."""
+    return MovimientoStock(
+        producto_id=orden_item.producto_id,
+        tipo="venta" if diferencia > 0 else "devolucion",
+        cantidad=-diferencia,
+        orden_id=orden_item.orden_id,
+    )
 
 
 @router.get(
@@ -32,7 +64,7 @@ def read_orden_items_by_orden(
     Obtener todos los items de una orden específica.
     Requiere permiso: ORDER_READ
     """
-    items = crud.get_orden_items_by_orden(session=session, orden_id=orden_id)
+    items = crud.get_orden_items_by_orden(session=session, orden_id=orden_id, incluir_archivo=True)
     count = len(items)
     items_public = [OrdenItemPublic.model_validate(item) for item in items]
     
@@ -101,19 +133,20 @@ def create_orden_item(
             detail="El producto especificado no existe.",
         )
     
-    # Verificar que hay stock suficiente
-    if producto.stock < orden_item_in.cantidad:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Stock insuficiente. Disponible: {producto.stock}, solicitado: {orden_item_in.cantidad}",
-        )
-    
-    # Crear el item
+    # Descontar el stock (falla si no alcanza) y crear el item en la misma transacción
+    _mover_stock(
+        session,
+        [
+            MovimientoStock(
+                producto_id=orden_item_in.producto_id,
+                tipo="venta",
+                cantidad=-orden_item_in.cantidad,
+                orden_id=orden_item_in.orden_id,
+            )
+        ],
+    )
     orden_item = crud.create_orden_item(session=session, orden_item_create=orden_item_in)
     
-    # Actualizar el stock del producto
-    producto_crud.update_stock(session=session, producto_id=orden_item_in.producto_id, cantidad=-orden_item_in.cantidad)
-    
     return orden_item
 
 
@@ -163,28 +196,10 @@ def update_orden_item(
             detail="El item de orden con este ID no existe.",
         )
     
-    # Si se actualiza la cantidad, ajustar el stock
+    # Si se actualiza la cantidad, ajustar el stock (falla si no alcanza)
     if orden_item_in.cantidad is not None and orden_item_in.cantidad != orden_item.cantidad:
-        from app.routes.product.producto import crud as producto_crud
-        
         diferencia = orden_item_in.cantidad - orden_item.cantidad
-        producto = producto_crud.get_producto_by_id(session=session, producto_id=orden_item.producto_id)
-        
-        if not producto:
-            raise HTTPException(
-                status_code=404,
-                detail="El producto asociado no existe.",
-            )
-        
-        # Verificar que hay stock suficiente si se aumenta la cantidad
-        if diferencia > 0 and producto.stock < diferencia:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Stock insuficiente. Disponible: {producto.stock}, adicional requerido: {diferencia}",
-            )
-        
-        # Actualizar stock (negativo si aumenta la cantidad, positivo si disminuye)
-        producto_crud.update_stock(session=session, producto_id=orden_item.producto_id, cantidad=-diferencia)
+        _mover_stock(session, [_movimiento_por_diferencia(orden_item, diferencia)])
 
     orden_item = crud.update_orden_item(session=session, db_orden_item=orden_item, orden_item_in=orden_item_in)
     return orden_item
@@ -219,26 +234,10 @@ def update_orden_item_cantidad(
             detail="El item de orden con este ID no existe.",
         )
     
-    from app.routes.product.producto import crud as producto_crud
-    
+    # Ajustar el stock (falla si no alcanza) y la cantidad en la misma transacción
     diferencia = nueva_cantidad - orden_item.cantidad
-    producto = producto_crud.get_producto_by_id(session=session, producto_id=orden_item.producto_id)
-    
-    if not producto:
-        raise HTTPException(
-            status_code=404,
-            detail="El producto asociado no existe.",
-        )
-    
-    # Verificar que hay stock suficiente si se aumenta la cantidad
-    if diferencia > 0 and producto.stock < diferencia:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Stock insuficiente. Disponible: {producto.stock}, adicional requerido: {diferencia}",
-        )
-    
-    # Actualizar stock
-    producto_crud.update_stock(session=session, producto_id=orden_item.producto_id, cantidad=-diferencia)
+    if diferencia:
+        _mover_stock(session, [_movimiento_por_diferencia(orden_item, diferencia)])
     
     # Actualizar cantidad
     orden_item = crud.update_cantidad_item(session=session, orden_item_id=orden_item_id, nueva_cantidad=nueva_cantidad)
@@ -266,9 +265,8 @@ def delete_orden_item(
             detail="El item de orden con este ID no existe.",
         )
     
-    # Restaurar stock
-    from app.routes.product.producto import crud as producto_crud
-    producto_crud.update_stock(session=session, producto_id=orden_item.producto_id, cantidad=orden_item.cantidad)
+    # Restaurar stock (devolución), se confirma al eliminar el item
+    _mover_stock(session, [_movimiento_por_diferencia(orden_item, -orden_item.cantidad)])
     
     # Eliminar item
     success = crud.delete_orden_item(session=session, orden_item_id=orden_item_id)
@@ -304,10 +302,9 @@ def delete_orden_items_by_orden(
             detail="No se encontraron items para esta orden.",
         )
     
-    # Restaurar stock de cada producto
-    from app.routes.product.producto import crud as producto_crud
-    for item in items:
-        producto_crud.update_stock(session=session, producto_id=item.producto_id, cantidad=item.cantidad)
+    # Restaurar el stock de todos los items en un solo lote (una actualización por
+    # producto), confirmado junto con el borrado
+    _mover_stock(session, [_movimiento_por_diferencia(item, -item.cantidad) for item in items])
     
     # Eliminar todos los items
     count = crud.delete_orden_items_by_orden(session=session, orden_id=orden_id)
@@ -1,17 +1,36 @@
 import uuid
+from collections import defaultdict
 from typing import Any
 
-from sqlmodel import Session, select
+from sqlalchemy import insert, update
+from sqlmodel import Session, col, func, select
 
-from models.product.producto import Producto, ProductoCreate, ProductoUpdate
+from core.serialization import fetch_rows
+from models.product.movimientostock import TIPOS_MOVIMIENTO, MovimientoStock
+from models.product.producto import Producto, ProductoCreate, ProductoStock, ProductoUpdate
 
 
 def create_producto(*, session: Session, producto_create: ProductoCreate) -> Producto:
     """
-    Crear un nuevo producto.
+    Crear un nuevo producto con su contador de stock.
+    El stock inicial queda en el libro de movimientos como un ajuste.
     """
     db_obj = Producto.model_validate(producto_create)
     session.add(db_obj)
+    session.flush()
+    session.add(ProductoStock(producto_id=db_obj.id, stock=producto_create.stock))
+    if producto_create.stock:
+        _insertar_movimientos(
+            session=session,
+            movimientos=[
+                MovimientoStock(
+                    producto_id=db_obj.id,
+                    tipo="ajuste",
+                    cantidad=producto_create.stock,
+                    notas="Stock inicial",
+                )
+            ],
+        )
     session.commit()
     session.refresh(db_obj)
     return db_obj
@@ -20,8 +39,28 @@ def create_producto(*, session: Session, producto_create: ProductoCreate) -> Pro
 def update_producto(*, session: Session, db_producto: Producto, producto_in: ProductoUpdate) -> Producto:
     """
     Actualizar un producto existente.
+    Un cambio de stock se registra como ajuste por la diferencia con el stock actual.
+    Lanza ValueError si el stock pedido es negativo.
     """
     producto_data = producto_in.model_dump(exclude_unset=True)
+    stock = producto_data.pop("stock", None)
+    if stock is not None:
+        # Leer el stock actual con el contador bloqueado: la diferencia no se
+        # pierde aunque entre tanto se venda
+        actual = session.exec(
+            select(ProductoStock.stock)
+            .where(ProductoStock.producto_id == db_producto.id)
+            .with_for_update()
+        ).one()
+        if stock != actual:
+            mover_stock(
+                session=session,
+                movimientos=[
+                    MovimientoStock(
+                        producto_id=db_producto.id, tipo="ajuste", cantidad=stock - actual
+                    )
+                ],
+            )
     db_producto.sqlmodel_update(producto_data)
     session.add(db_producto)
     session.commit()
@@ -44,58 +83,167 @@ def get_producto_by_id(*, session: Session, producto_id: uuid.UUID) -> Producto
     return session.get(Producto, producto_id)
 
 
-def get_productos_by_restaurante(*, session: Session, restaurante_id: uuid.UUID, skip: int = 0, limit: int = 100) -> list[Producto]:
+def _filtros_productos(
+    *,
+    restaurante_id: uuid.UUID | None = None,
+    categoria_id: uuid.UUID | None = None,
+    empresa_id: uuid.UUID | None = None,
+) -> list[Any]:
     """
-    Obtener todos los productos de un restaurante con paginación.
+    Condición sobre producto: se aplica el primer filtro indicado, en el orden
+    restaurante, categoría, empresa. Sin filtros no hay condición.
     """
-    statement = select(Producto).where(
-        Producto.restaurante_id == restaurante_id
-    ).offset(skip).limit(limit)
-    return list(session.exec(statement).all())
+    if restaurante_id:
+        return [Producto.restaurante_id == restaurante_id]
+    if categoria_id:
+        return [Producto.categoria_id == categoria_id]
+    if empresa_id:
+        return [Producto.empresa_id == empresa_id]
+    return []
 
 
-def get_productos_by_categoria(*, session: Session, categoria_id: uuid.UUID, skip: int = 0, limit: int = 100) -> list[Producto]:
+def get_productos(
+    *,
+    session: Session,
+    columns: list[Any],
+    restaurante_id: uuid.UUID | None = None,
+    categoria_id: uuid.UUID | None = None,
+    empresa_id: uuid.UUID | None = None,
+    skip: int = 0,
+    limit: int = 100,
+) -> list[dict[str, Any]]:
     """
-    Obtener todos los productos de una categoría con paginación.
+    Obtener productos con paginación, filtrados por restaurante, categoría o empresa.
+    Solo se consultan las columnas de `columns`; cada fila es un diccionario.
     """
-    statement = select(Producto).where(
-        Producto.categoria_id == categoria_id
-    ).offset(skip).limit(limit)
-    return list(session.exec(statement).all())
+    filtros = _filtros_productos(
+        restaurante_id=restaurante_id, categoria_id=categoria_id, empresa_id=empresa_id
+    )
+    return fetch_rows(session=session, columns=columns, where=filtros, skip=skip, limit=limit)
 
 
-def get_productos_by_empresa(*, session: Session, empresa_id: uuid.UUID, skip: int = 0, limit: int = 100) -> list[Producto]:
+def count_productos(
+    *,
+    session: Session,
+    restaurante_id: uuid.UUID | None = None,
+    categoria_id: uuid.UUID | None = None,
+    empresa_id: uuid.UUID | None = None,
+) -> int:
     """
-    Obtener todos los productos de una empresa con paginación.
+    Contar los productos que cumplen los mismos filtros que `get_productos`.
     """
-    statement = select(Producto).where(
-        Producto.empresa_id == empresa_id
-    ).offset(skip).limit(limit)
-    return list(session.exec(statement).all())
+    filtros = _filtros_productos(
+        restaurante_id=restaurante_id, categoria_id=categoria_id, empresa_id=empresa_id
+    )
+    statement = select(func.count()).select_from(Producto).where(*filtros)
+    return session.exec(statement).one()
+
 
+def _insertar_movimientos(*, session: Session, movimientos: list[MovimientoStock]) -> None:
+    invalidos = {m.tipo for m in movimientos} - set(TIPOS_MOVIMIENTO)
+    if invalidos:
+        raise ValueError(f"Tipo de movimiento inválido: {', '.join(sorted(invalidos))}")
+    # Un solo INSERT con todas las filas (executemany / insertmanyvalues)
+    session.execute(
+        insert(MovimientoStock),
+        [m.model_dump(exclude={"id"}) for m in movimientos],
+    )
 
-def get_all_productos(*, session: Session, skip: int = 0, limit: int = 100) -> list[Producto]:
+
+def mover_stock(*, session: Session, movimientos: list[MovimientoStock]) -> dict[uuid.UUID, int]:
     """
-    Obtener todos los productos con paginación.
+    Registrar movimientos de stock y actualizar el contador de cada producto
+    (ProductoStock), sin commit: se confirman junto con el cambio que los origina
+    (item de orden, ajuste...).
+    Cada contador se actualiza una sola vez con la suma de sus movimientos
+    (`stock = stock + n`, en orden de ID y sin leer la fila antes) y los
+    movimientos se insertan juntos al final, así que el contador queda bloqueado
+    lo mínimo. La fila de producto no se toca: una venta no la renumera en /sync
+    ni toma el lock de numeración de core.sync.
+    Lanza ValueError si un producto no existe o quedaría con stock negativo; quien
+    llama debe descartar la transacción.
+    Devuelve el stock resultante de cada producto.
     """
-    statement = select(Producto).offset(skip).limit(limit)
-    return list(session.exec(statement).all())
+    variaciones: dict[uuid.UUID, int] = defaultdict(int)
+    for movimiento in movimientos:
+        variaciones[movimiento.producto_id] += movimiento.cantidad
+
+    resultado: dict[uuid.UUID, int] = {}
+    for producto_id in sorted(variaciones):
+        variacion = variaciones[producto_id]
+        statement = (
+            update(ProductoStock)
+            .where(col(ProductoStock.producto_id) == producto_id)
+            .values(stock=ProductoStock.stock + variacion)
+            .returning(ProductoStock.stock)
+        )
+        if variacion < 0:
+            statement = statement.where(ProductoStock.stock >= -variacion)
+        stock = session.execute(
+            statement, execution_options={"synchronize_session": "fetch"}
+        ).scalar_one_or_none()
+        if stock is None:
+            disponible = session.execute(
+                select(ProductoStock.stock).where(ProductoStock.producto_id == producto_id)
+            ).scalar_one_or_none()
+            if disponible is None:
+                raise ValueError("El producto especificado no existe.")
+            raise ValueError(
+                f"Stock insuficiente. Disponible: {disponible}, solicitado: {-variacion}"
+            )
+        resultado[producto_id] = stock
+
+    _insertar_movimientos(session=session, movimientos=movimientos)
+    return resultado
 
 
-def update_stock(*, session: Session, producto_id: uuid.UUID, cantidad: int) -> Producto | None:
+def update_stock(
+    *,
+    session: Session,
+    producto_id: uuid.UUID,
+    cantidad: int,
+    tipo: str = "ajuste",
+    notas: str | None = None,
+) -> Producto | None:
     """
-    Actualizar el stock de un producto.
+    Ajuste o reposición manual del stock de un producto.
+    Lanza ValueError si el stock quedaría negativo.
     """
     producto = session.get(Producto, producto_id)
     if not producto:
         return None
-    producto.stock += cantidad
-    session.add(producto)
+    mover_stock(
+        session=session,
+        movimientos=[MovimientoStock(producto_id=producto_id, tipo=tipo, cantidad=cantidad, notas=notas)],
+    )
     session.commit()
     session.refresh(producto)
     return producto
 
 
+def get_movimientos_by_producto(
+    *, session: Session, producto_id: uuid.UUID, skip: int = 0, limit: int = 100
+) -> list[MovimientoStock]:
+    """
+    Obtener los movimientos de stock de un producto, del más reciente al más antiguo.
+    """
+    statement = (
+        select(MovimientoStock)
+        .where(MovimientoStock.producto_id == producto_id)
+        .order_by(col(MovimientoStock.id).desc())
+        .offset(skip)
+        .limit(limit)
+    )
+    return list(session.exec(statement).all())
+
+
+def count_movimientos_by_producto(*, session: Session, producto_id: uuid.UUID) -> int:
+    statement = select(func.count()).select_from(MovimientoStock).where(
+        MovimientoStock.producto_id == producto_id
+    )
+    return session.exec(statement).one()
+
+
 def delete_producto(*, session: Session, producto_id: uuid.UUID) -> bool:
     """
     Eliminar un producto.
@@ -1,12 +1,12 @@
 import uuid
-from typing import Any
+from typing import Annotated, Any, Literal
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import func, select
+from fastapi import APIRouter, Depends, HTTPException, Query
 
 from app.routes.product.producto import crud
-from app.routes.deps import SessionDep, require_permissions
+from app.routes.deps import SessionDep, require_permissions, select_fields
 from app.routes.auth.permisos.permissions import PRODUCT_READ, PRODUCT_WRITE, PRODUCT_DELETE
+from core.serialization import list_response
 from models.product.producto import (
     Producto,
     ProductoCreate,
@@ -14,6 +14,7 @@ from models.product.producto import (
     ProductosPublic,
     ProductoUpdate,
 )
+from models.product.movimientostock import MovimientosStockPublic
 from models.config import Message
 
 router = APIRouter(prefix="/productos", tags=["productos"])
@@ -26,6 +27,7 @@ router = APIRouter(prefix="/productos", tags=["productos"])
 )
 def read_productos(
     session: SessionDep, 
+    columns: Annotated[list[Any], Depends(select_fields(ProductoPublic, Producto))],
     restaurante_id: uuid.UUID | None = None,
     categoria_id: uuid.UUID | None = None,
     empresa_id: uuid.UUID | None = None,
@@ -39,46 +41,26 @@ def read_productos(
     - categoria_id: productos de una categoría específica
     - empresa_id: productos de una empresa específica
     Si no se proporciona ningún filtro, devuelve todos los productos.
+    Con `fields` solo se consultan y devuelven las columnas indicadas.
     Requiere permiso: PRODUCT_READ
     """
-    if restaurante_id:
-        productos = crud.get_productos_by_restaurante(
-            session=session, 
-            restaurante_id=restaurante_id, 
-            skip=skip, 
-            limit=limit
-        )
-        count_statement = select(func.count()).select_from(Producto).where(
-            Producto.restaurante_id == restaurante_id
-        )
-    elif categoria_id:
-        productos = crud.get_productos_by_categoria(
-            session=session, 
-            categoria_id=categoria_id, 
-            skip=skip, 
-            limit=limit
-        )
-        count_statement = select(func.count()).select_from(Producto).where(
-            Producto.categoria_id == categoria_id
-        )
-    elif empresa_id:
-        productos = crud.get_productos_by_empresa(
-            session=session, 
-            empresa_id=empresa_id, 
-            skip=skip, 
-            limit=limit
-        )
-        count_statement = select(func.count()).select_from(Producto).where(
-            Producto.empresa_id == empresa_id
-        )
-    else:
-        productos = crud.get_all_productos(session=session, skip=skip, limit=limit)
-        count_statement = select(func.count()).select_from(Producto)
-    
-    count = session.exec(count_statement).one()
-    productos_public = [ProductoPublic.model_validate(producto) for producto in productos]
+    productos = crud.get_productos(
+        session=session,
+        columns=columns,
+        restaurante_id=restaurante_id,
+        categoria_id=categoria_id,
+        empresa_id=empresa_id,
+        skip=skip,
+        limit=limit,
+    )
+    count = crud.count_productos(
+        session=session,
+        restaurante_id=restaurante_id,
+        categoria_id=categoria_id,
+        empresa_id=empresa_id,
+    )
     
-    return ProductosPublic(data=productos_public, count=count)
+    return list_response(data=productos, count=count)
 
 
 @router.post(
@@ -162,7 +144,13 @@ def update_producto(
                 detail="Ya existe otro producto con este nombre.",
             )
 
-    producto = crud.update_producto(session=session, db_producto=producto, producto_in=producto_in)
+    try:
+        producto = crud.update_producto(session=session, db_producto=producto, producto_in=producto_in)
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail="El stock no puede ser negativo.",
+        )
     return producto
 
 
@@ -176,28 +164,67 @@ def update_producto_stock(
     session: SessionDep,
     producto_id: uuid.UUID,
     cantidad: int,
+    tipo: Literal["ajuste", "reposicion"] = "ajuste",
+    notas: str | None = None,
 ) -> Any:
     """
     Actualizar el stock de un producto.
     La cantidad puede ser positiva (agregar stock) o negativa (reducir stock).
+    Queda registrada en el libro de movimientos como ajuste o reposición.
     Requiere permiso: PRODUCT_WRITE
     """
-    producto = crud.update_stock(session=session, producto_id=producto_id, cantidad=cantidad)
-    if not producto:
+    if tipo == "reposicion" and cantidad <= 0:
         raise HTTPException(
-            status_code=404,
-            detail="El producto con este ID no existe.",
+            status_code=400,
+            detail="Una reposición debe tener cantidad positiva.",
         )
-    
-    if producto.stock < 0:
+    try:
+        producto = crud.update_stock(
+            session=session, producto_id=producto_id, cantidad=cantidad, tipo=tipo, notas=notas
+        )
+    except ValueError:
         raise HTTPException(
             status_code=400,
             detail="El stock no puede ser negativo.",
         )
+    if not producto:
+        raise HTTPException(
+            status_code=404,
+            detail="El producto con este ID no existe.",
+        )
     
     return producto
 
 
+@router.get(
+    "/{producto_id}/movimientos",
+    dependencies=[Depends(require_permissions(PRODUCT_READ))],
+    response_model=MovimientosStockPublic,
+)
+def read_movimientos_producto(
+    *,
+    session: SessionDep,
+    producto_id: uuid.UUID,
+    skip: int = 0,
+    limit: int = Query(default=100, le=100),
+) -> Any:
+    """
+    Obtener los movimientos de stock de un producto (ventas, devoluciones,
+    ajustes y reposiciones), del más reciente al más antiguo.
+    Requiere permiso: PRODUCT_READ
+    """
+    if not crud.get_producto_by_id(session=session, producto_id=producto_id):
+        raise HTTPException(
+            status_code=404,
+            detail="El producto con este ID no existe.",
+        )
+    movimientos = crud.get_movimientos_by_producto(
+        session=session, producto_id=producto_id, skip=skip, limit=limit
+    )
+    count = crud.count_movimientos_by_producto(session=session, producto_id=producto_id)
+    return MovimientosStockPublic(data=movimientos, count=count)
+
+
 @router.delete(
     "/{producto_id}",
     dependencies=[Depends(require_permissions(PRODUCT_DELETE))],
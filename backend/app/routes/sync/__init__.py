@@ -0,0 +1 @@
+# Sincronización incremental (app móvil)
@@ -0,0 +1,128 @@
+import uuid
+from typing import Any
+
+from sqlalchemy import ColumnElement, and_, or_
+from sqlmodel import Session, SQLModel, select
+
+from core.serialization import public_columns
+from core.sync import SYNCED_TABLES
+from models.company.mesarestaurante import MesaRestaurantePublic
+from models.company.restaurante import Restaurante, RestaurantePublic
+from models.company.tasaimpositiva import TasaImpositivaPublic
+from models.product.categoria import CategoriaPublic
+from models.product.orden import Orden, OrdenPublic
+from models.product.ordenitem import OrdenItem, OrdenItemPublic
+from models.product.producto import Producto, ProductoPublic
+from models.sync import SyncTombstone
+
+SYNC_PUBLIC_MODELS: dict[str, type[SQLModel]] = {
+    "restaurantes": RestaurantePublic,
+    "tasas_impositivas": TasaImpositivaPublic,
+    "categorias": CategoriaPublic,
+    "productos": ProductoPublic,
+    "mesas": MesaRestaurantePublic,
+    "ordenes": OrdenPublic,
+    "orden_items": OrdenItemPublic,
+}
+
+
+def _scope(nombre: str, restaurante: Restaurante) -> list[ColumnElement[bool]]:
+    """
+    Filtro de las filas de una tabla que le corresponden a un restaurante.
+    """
+    model = SYNCED_TABLES[nombre]
+    if model is Restaurante:
+        return [Restaurante.id == restaurante.id]
+    if model is Producto:
+        # Productos del restaurante y los comunes a toda la empresa
+        return [
+            or_(
+                Producto.restaurante_id == restaurante.id,
+                and_(
+                    Producto.restaurante_id.is_(None),
+                    Producto.empresa_id == restaurante.empresa_id,
+                ),
+            )
+        ]
+    if model is OrdenItem:
+        return [
+            OrdenItem.orden_id.in_(
+                select(Orden.id).where(Orden.restaurante_id == restaurante.id)
+            )
+        ]
+    if hasattr(model, "restaurante_id"):
+        return [model.restaurante_id == restaurante.id]
+    # Catálogos globales (tasas impositivas)
+    return []
+
+
+def get_changes(
+    *, session: Session, restaurante: Restaurante, since: int = 0, limit: int = 500
+) -> dict[str, Any]:
+    """
+    Cambios de las tablas sincronizadas de un restaurante con `change_seq > since`,
+    en orden de commit y como máximo `limit` filas (incluidas las lápidas).
+
+    Las filas van en formato columnar (`columns` + `rows`) para no repetir los
+    nombres de los campos en cada fila. Con since=0 se devuelve el estado completo
+    y no hace falta enviar lápidas antiguas, así que se omiten.
+    """
+    # Hasta limit + 1 filas por tabla: si al juntarlas sobra alguna, hay más lotes
+    pending: list[tuple[int, str, tuple[Any, ...]]] = []
+    for nombre, model in SYNCED_TABLES.items():
+        statement = (
+            select(model.change_seq, *public_columns(SYNC_PUBLIC_MODELS[nombre], model))
+            .where(model.change_seq > since, *_scope(nombre, restaurante))
+            .order_by(model.change_seq)
+            .limit(limit + 1)
+        )
+        pending.extend((row[0], nombre, tuple(row[1:])) for row in session.exec(statement))
+
+    if since > 0:
+        statement = (
+            select(SyncTombstone.change_seq, SyncTombstone.tabla, SyncTombstone.registro_id)
+            .where(
+                SyncTombstone.change_seq > since,
+                or_(
+                    SyncTombstone.restaurante_id == restaurante.id,
+                    and_(
+                        SyncTombstone.restaurante_id.is_(None),
+                        or_(
+                            SyncTombstone.empresa_id == restaurante.empresa_id,
+                            SyncTombstone.empresa_id.is_(None),
+                        ),
+                    ),
+                ),
+            )
+            .order_by(SyncTombstone.change_seq)
+            .limit(limit + 1)
+        )
+        pending.extend(
+            (seq, "", (tabla, registro_id)) for seq, tabla, registro_id in session.exec(statement)
+        )
+
+    pending.sort(key=lambda change: change[0])
+    batch = pending[:limit]
+
+    changes: dict[str, dict[str, Any]] = {}
+    deleted: dict[str, list[uuid.UUID]] = {}
+    for _, nombre, row in batch:
+        if not nombre:
+            tabla, registro_id = row
+            deleted.setdefault(tabla, []).append(registro_id)
+            continue
+        if nombre not in changes:
+            changes[nombre] = {
+                "columns": list(SYNC_PUBLIC_MODELS[nombre].model_fields),
+                "rows": [],
+            }
+        changes[nombre]["rows"].append(list(row))
+
+    return {
+        "since": since,
+        "next": batch[-1][0] if batch else since,
+        "has_more": len(pending) > limit,
+        # En el orden de SYNCED_TABLES: el cliente aplica primero las referencias
+        "changes": {nombre: changes[nombre] for nombre in SYNCED_TABLES if nombre in changes},
+        "deleted": deleted,
+    }
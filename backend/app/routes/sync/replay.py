@@ -0,0 +1,176 @@
+"""
+Reproducción de la cola offline de un dispositivo en una sola petición.
+
+Cada operación se despacha al endpoint real (mismas validaciones, permisos y
+respuesta que en línea) con su `Idempotency-Key`, pero todas comparten la sesión
+del lote (`core.idempotency.deferred_commits`): se aplican en orden, cada una en
+su SAVEPOINT, y se confirman juntas con un único commit al final. Una operación
+que falla se deshace sola y el resto del lote sigue; las que dependen de ella
+(por "$<key>") fallan con 424.
+"""
+from typing import Any
+from urllib.parse import quote
+
+import orjson
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import Session
+from starlette.middleware.exceptions import ExceptionMiddleware
+from starlette.requests import Request
+from starlette.routing import Match
+from starlette.types import Message
+
+from core.config import settings
+from core.idempotency import (
+    IDEMPOTENCY_HEADER,
+    MUTATING_METHODS,
+    REPLAYED_HEADER,
+    IdempotentRoute,
+    deferred_commits,
+)
+from models.sync import ReplayOperation
+
+# Cabeceras del lote que se pasan a cada operación
+_FORWARDED_HEADERS = (b"authorization", b"user-agent", b"x-request-id")
+
+
+class _UnresolvedReference(Exception):
+    pass
+
+
+def _resolve(value: Any, created: dict[str, Any]) -> Any:
+    if isinstance(value, str) and value.startswith("$"):
+        if value[1:] not in created:
+            raise _UnresolvedReference(value[1:])
+        return created[value[1:]]
+    if isinstance(value, list):
+        return [_resolve(item, created) for item in value]
+    if isinstance(value, dict):
+        return {k: _resolve(v, created) for k, v in value.items()}
+    return value
+
+
+def _resolve_path(path: str, created: dict[str, Any]) -> tuple[str, bytes]:
+    path, _, query = path.partition("?")
+    segments = [quote(str(_resolve(segment, created))) for segment in path.split("/")]
+    return "/".join(segments), query.encode()
+
+
+def _scope(
+    request: Request, op: ReplayOperation, path: str, query: bytes, body: bytes
+) -> dict[str, Any]:
+    headers = [(k, v) for k, v in request.scope["headers"] if k in _FORWARDED_HEADERS]
+    headers += [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+        (IDEMPOTENCY_HEADER.lower().encode(), op.key.encode()),
+    ]
+    full_path = settings.API_V1_STR + path
+    return {
+        "type": "http",
+        "asgi": request.scope.get("asgi", {"version": "3.0"}),
+        "http_version": request.scope.get("http_version", "1.1"),
+        "scheme": request.scope.get("scheme", "http"),
+        "server": request.scope.get("server"),
+        "client": request.scope.get("client"),
+        "root_path": request.scope.get("root_path", ""),
+        "app": request.app,
+        "method": op.method.upper(),
+        "path": full_path,
+        "raw_path": full_path.encode(),
+        "query_string": query,
+        "headers": headers,
+        "state": {},
+    }
+
+
+def _route_for(request: Request, scope: dict[str, Any]) -> Any:
+    for route in request.app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route
+    return None
+
+
+async def _dispatch(app: Any, scope: dict[str, Any], body: bytes) -> tuple[int, bytes, bool]:
+    status_code = 500
+    replayed = False
+    chunks: list[bytes] = []
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message: Message) -> None:
+        nonlocal status_code, replayed
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+            replayed = any(
+                k.decode().lower() == REPLAYED_HEADER.lower() for k, _ in message.get("headers", [])
+            )
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status_code, b"".join(chunks), replayed
+
+
+async def replay_operations(
+    *, request: Request, session: Session, operations: list[ReplayOperation]
+) -> dict[str, Any]:
+    """
+    Aplicar `operations` en orden dentro de la transacción de `session` y
+    confirmarlas con un único commit. Devuelve el resultado de cada operación.
+    """
+    # Mismos manejadores de errores que la app (HTTPException, validación...)
+    dispatcher = ExceptionMiddleware(
+        request.app.router, handlers=request.app.exception_handlers
+    )
+    created: dict[str, Any] = {}
+    results: list[dict[str, Any]] = []
+
+    with deferred_commits(session) as begin_savepoint:
+        for op in operations:
+            try:
+                path, query = _resolve_path(op.path, created)
+                body = b"" if op.body is None else orjson.dumps(_resolve(op.body, created))
+            except _UnresolvedReference as e:
+                results.append({
+                    "key": op.key,
+                    "status_code": 424,
+                    "body": {"detail": f"La operación {e} no se aplicó"},
+                    "replayed": False,
+                })
+                continue
+
+            scope = _scope(request, op, path, query, body)
+            if scope["method"] not in MUTATING_METHODS or not isinstance(
+                _route_for(request, scope), IdempotentRoute
+            ):
+                results.append({
+                    "key": op.key,
+                    "status_code": 400,
+                    "body": {"detail": f"Operación no admitida: {op.method} {op.path}"},
+                    "replayed": False,
+                })
+                continue
+
+            savepoint = await run_in_threadpool(begin_savepoint)
+            status_code, content, replayed = await _dispatch(dispatcher, scope, body)
+            if savepoint.is_active:
+                if status_code >= 400:
+                    await run_in_threadpool(savepoint.rollback)
+                else:
+                    await run_in_threadpool(savepoint.commit)
+
+            result = orjson.loads(content) if content else None
+            if status_code < 400 and isinstance(result, dict) and "id" in result:
+                created[op.key] = result["id"]
+            results.append({
+                "key": op.key,
+                "status_code": status_code,
+                "body": result,
+                "replayed": replayed,
+            })
+
+    await run_in_threadpool(session.commit)
+    applied = sum(1 for r in results if r["status_code"] < 400 and not r["replayed"])
+    return {"applied": applied, "results": results}
@@ -0,0 +1,97 @@
+import uuid
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.exc import IntegrityError
+
+from app.routes.auth.permisos.permissions import MESA_READ, ORDER_READ, PRODUCT_READ
+from app.routes.deps import CurrentUser, SessionDep, require_permissions
+from app.routes.sync import crud
+from app.routes.sync.replay import replay_operations
+from core.config import settings
+from models.company.restaurante import Restaurante
+from models.sync import ReplayRequest, ReplayResponse, SyncBatch
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+
+@router.get(
+    "/",
+    dependencies=[Depends(require_permissions(MESA_READ, ORDER_READ, PRODUCT_READ))],
+    response_model=SyncBatch,
+)
+def read_changes(
+    session: SessionDep,
+    current_user: CurrentUser,
+    since: int = Query(default=0, ge=0, description="Marca `next` de la última sincronización"),
+    restaurante_id: uuid.UUID | None = None,
+    limit: int = Query(default=500, ge=1, le=5000),
+) -> Any:
+    """
+    Cambios desde la marca `since` de restaurantes, tasas impositivas, categorías,
+    productos, mesas, órdenes e items de orden de un restaurante.
+
+    - since=0 devuelve el estado completo; después se envía el `next` recibido
+    - Si `has_more` es verdadero, pedir el siguiente lote con el nuevo `next`
+    - `deleted` lista los IDs borrados por tabla desde la marca
+    - Sin `restaurante_id` se usa el restaurante del usuario
+
+    Requiere permisos: MESA_READ, ORDER_READ, PRODUCT_READ
+    """
+    restaurante_id = restaurante_id or current_user.restaurante_id
+    if not restaurante_id:
+        raise HTTPException(status_code=400, detail="Indique el restaurante a sincronizar")
+
+    restaurante = session.get(Restaurante, restaurante_id)
+    if not restaurante:
+        raise HTTPException(status_code=404, detail="Restaurante no encontrado")
+    if not current_user.is_superuser and restaurante_id != current_user.restaurante_id and (
+        not current_user.empresa_id or restaurante.empresa_id != current_user.empresa_id
+    ):
+        raise HTTPException(status_code=403, detail="No tiene acceso a este restaurante")
+
+    batch = crud.get_changes(
+        session=session, restaurante=restaurante, since=since, limit=limit
+    )
+    return ORJSONResponse(content=batch)
+
+
+@router.post(
+    "/replay",
+    response_model=ReplayResponse,
+)
+async def replay(
+    request: Request,
+    session: SessionDep,
+    current_user: CurrentUser,
+    replay_in: ReplayRequest,
+) -> Any:
+    """
+    Aplicar la cola de operaciones de un dispositivo que vuelve a estar en línea,
+    en orden y en una sola transacción.
+
+    - Se admiten las operaciones de escritura de órdenes, items de orden y pagos,
+      con los mismos permisos que cada endpoint
+    - `key` es la clave de idempotencia de cada operación: reenviar el lote (o una
+      operación ya enviada en línea) devuelve el resultado guardado sin repetirla
+    - Cada operación devuelve su propio `status_code`; las fallidas se deshacen
+      sin afectar al resto
+    """
+    if len(replay_in.operations) > settings.REPLAY_MAX_OPERATIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Máximo {settings.REPLAY_MAX_OPERATIONS} operaciones por lote",
+        )
+    try:
+        result = await replay_operations(
+            request=request, session=session, operations=replay_in.operations
+        )
+    except IntegrityError:
+        # Otra petición aplicó a la vez alguna de las claves: reintentar el lote
+        # devuelve los resultados guardados
+        raise HTTPException(
+            status_code=409,
+            detail="Alguna operación del lote se está aplicando en otra petición",
+        )
+    return ORJSONResponse(content=result)
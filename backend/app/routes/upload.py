@@ -1,100 +1,325 @@
+import hashlib
+import mimetypes
 import os
+import re
+import shutil
+import tempfile
 import uuid
+from collections.abc import AsyncGenerator, Callable, Coroutine
 from typing import Any
-from fastapi import APIRouter, File, Form, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.routing import APIRoute
 from pathlib import Path
+from starlette.requests import Request
+from starlette.responses import Response
+from sqlmodel import Session, func, select
 
-router = APIRouter(prefix="/upload", tags=["upload"])
-
-# Directorio base para uploads
-UPLOAD_DIR = Path(__file__).parent.parent.parent / "uploads"
-PRODUCTOS_DIR = UPLOAD_DIR / "productos"
-
-# Crear directorio base si no existe
-PRODUCTOS_DIR.mkdir(parents=True, exist_ok=True)
+from app.routes.auth.permisos.permissions import PRODUCT_WRITE
+from app.routes.deps import CurrentUser, SessionDep, require_permissions
+from core.images import THUMBNAIL_WIDTHS, schedule_thumbnails, thumbnail_key
+from core.storage import get_storage
+from models.auth.users import UserPublic
+from models.company.restaurante import Restaurante
+from models.product.producto import Producto
 
 # Extensiones permitidas
 ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
+# Cuerpo completo de la request: el archivo más los otros campos y las cabeceras del multipart
+MAX_BODY_SIZE = MAX_FILE_SIZE + 64 * 1024
+CHUNK_SIZE = 256 * 1024  # Tamaño de bloque al copiar el archivo a disco
+SHA256_HEX = re.compile(r"^[0-9a-f]{64}$")
 
 
-@router.post("/producto", response_model=dict)
-async def upload_producto_image(
-    file: UploadFile = File(...),
-    empresa_id: str = Form(...)
-) -> Any:
-    """
-    Subir imagen de producto organizada por empresa.
-    Retorna la URL relativa de la imagen subida.
-    """
-    # Validar extensión
-    if not file.filename:
+def _validate_extension(filename: str | None) -> str:
+    if not filename:
         raise HTTPException(status_code=400, detail="Nombre de archivo no válido")
-    
-    file_ext = os.path.splitext(file.filename)[1].lower()
+
+    file_ext = os.path.splitext(filename)[1].lower()
     if file_ext not in ALLOWED_EXTENSIONS:
         raise HTTPException(
             status_code=400,
             detail=f"Tipo de archivo no permitido. Use: {', '.join(ALLOWED_EXTENSIONS)}",
         )
+    return file_ext
 
-    # Leer y validar tamaño
-    contents = await file.read()
-    if len(contents) > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=400,
-            detail=f"El archivo es demasiado grande. Máximo: {MAX_FILE_SIZE / 1024 / 1024}MB",
-        )
 
-    # Crear directorio de la empresa si no existe
-    empresa_dir = PRODUCTOS_DIR / empresa_id
-    empresa_dir.mkdir(parents=True, exist_ok=True)
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=400,
+        detail=f"El archivo es demasiado grande. Máximo: {MAX_FILE_SIZE / 1024 / 1024}MB",
+    )
+
+
+def _check_empresa(session: Session, current_user: UserPublic, empresa_id: uuid.UUID) -> None:
+    """
+    Las imágenes de una empresa solo las gestionan sus usuarios (los de la
+    empresa o los de uno de sus restaurantes) y los superusuarios.
+    """
+    if current_user.is_superuser or current_user.empresa_id == empresa_id:
+        return
+    if current_user.restaurante_id:
+        restaurante = session.get(Restaurante, current_user.restaurante_id)
+        if restaurante and restaurante.empresa_id == empresa_id:
+            return
+    raise HTTPException(
+        status_code=403,
+        detail="No tienes permisos para gestionar imágenes de esta empresa.",
+    )
+
+
+class _LimitedRequest(Request):
+    """Request cuyo cuerpo se corta en cuanto supera MAX_BODY_SIZE."""
+
+    async def stream(self) -> AsyncGenerator[bytes, None]:
+        received = 0
+        async for chunk in super().stream():
+            received += len(chunk)
+            if received > MAX_BODY_SIZE:
+                raise _too_large()
+            yield chunk
 
-    # Generar nombre único
-    unique_filename = f"{uuid.uuid4()}{file_ext}"
-    file_path = empresa_dir / unique_filename
 
-    # Guardar archivo
+class LimitedBodyRoute(APIRoute):
+    """
+    Ruta que limita el cuerpo a MAX_BODY_SIZE antes de que FastAPI lo lea.
+    Starlette vuelca el multipart completo a disco al parsear el formulario,
+    así que el límite se aplica al leer la request: con un Content-Length
+    mayor se rechaza sin leer nada y, si no lo trae, se corta al superarlo.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def limited_handler(request: Request) -> Response:
+            length = request.headers.get("content-length", "")
+            if length.isdigit() and int(length) > MAX_BODY_SIZE:
+                raise _too_large()
+            return await handler(_LimitedRequest(request.scope, request.receive))
+
+        return limited_handler
+
+
+router = APIRouter(prefix="/upload", tags=["upload"], route_class=LimitedBodyRoute)
+
+
+def _producto_key(empresa_id: uuid.UUID, filename: str) -> str:
+    return f"productos/{empresa_id}/{filename}"
+
+
+def _upload_response(key: str, size: int | None, deduplicated: bool) -> dict[str, Any]:
+    storage = get_storage()
+    return {
+        "filename": os.path.basename(key),
+        "url": storage.public_url(key),
+        "size": size,
+        "deduplicated": deduplicated,
+        "thumbnails": {
+            str(width): storage.public_url(thumbnail_key(key, width))
+            for width in THUMBNAIL_WIDTHS
+        },
+    }
+
+
+async def _copy_to_disk(file: UploadFile) -> tuple[Path, str, int]:
+    """
+    Copiar el archivo ya recibido a un temporal propio por bloques, calculando el
+    SHA-256 y comprobando MAX_FILE_SIZE (el cuerpo ya se limitó en LimitedBodyRoute,
+    esto acota solo el archivo). Las escrituras van al threadpool.
+    """
+    fd, tmp_name = await run_in_threadpool(tempfile.mkstemp, suffix=".part")
+    tmp_path = Path(tmp_name)
+    digest = hashlib.sha256()
+    size = 0
+    f = await run_in_threadpool(os.fdopen, fd, "wb")
     try:
-        with open(file_path, "wb") as f:
-            f.write(contents)
+        while chunk := await file.read(CHUNK_SIZE):
+            size += len(chunk)
+            if size > MAX_FILE_SIZE:
+                raise _too_large()
+            digest.update(chunk)
+            await run_in_threadpool(f.write, chunk)
+    except BaseException:
+        await run_in_threadpool(f.close)
+        await run_in_threadpool(tmp_path.unlink, missing_ok=True)
+        raise
+    await run_in_threadpool(f.close)
+    return tmp_path, digest.hexdigest(), size
+
+
+def _store_content_addressed(tmp_path: Path, key: str, content_type: str | None) -> bool:
+    """
+    Guardar el temporal bajo su clave definitiva (hash del contenido).
+    Retorna True si ya existía una imagen idéntica y se reutiliza.
+    El temporal queda en disco para generar las miniaturas.
+    """
+    storage = get_storage()
+    if storage.exists(key):
+        return True
+    # El driver puede mover el archivo: se guarda una copia y se conserva el temporal
+    copy = tmp_path.with_name(f"{tmp_path.name}.store")
+    try:
+        os.link(tmp_path, copy)
+    except OSError:
+        shutil.copyfile(tmp_path, copy)
+    storage.save_file(key, copy, content_type)
+    return False
+
+
+@router.post(
+    "/producto",
+    dependencies=[Depends(require_permissions(PRODUCT_WRITE))],
+    response_model=dict,
+)
+async def upload_producto_image(
+    session: SessionDep,
+    current_user: CurrentUser,
+    file: UploadFile = File(...),
+    empresa_id: uuid.UUID = Form(...)
+) -> Any:
+    """
+    Subir imagen de producto organizada por empresa.
+    El archivo se guarda con el hash de su contenido como nombre, así las imágenes
+    idénticas se almacenan una sola vez. Las miniaturas WebP se generan en segundo plano.
+    Retorna la URL relativa de la imagen subida.
+    Requiere permiso: PRODUCT_WRITE sobre la empresa indicada
+    """
+    await run_in_threadpool(_check_empresa, session, current_user, empresa_id)
+    file_ext = _validate_extension(file.filename)
+
+    # Copiar por bloques calculando el hash y validando el tamaño
+    tmp_path = None
+    try:
+        tmp_path, content_hash, size = await _copy_to_disk(file)
+        key = _producto_key(empresa_id, f"{content_hash}{file_ext}")
+        deduplicated = await run_in_threadpool(
+            _store_content_addressed, tmp_path, key, mimetypes.guess_type(key)[0]
+        )
+    except HTTPException:
+        raise
     except Exception as e:
+        if tmp_path is not None:
+            tmp_path.unlink(missing_ok=True)
         raise HTTPException(
             status_code=500,
             detail=f"Error al guardar archivo: {str(e)}",
         )
 
-    # Retornar URL relativa
-    return {
-        "filename": unique_filename,
-        "url": f"/uploads/productos/{empresa_id}/{unique_filename}",
-        "size": len(contents),
-    }
+    # Las miniaturas se generan desde la copia local, que se borra al terminar
+    schedule_thumbnails(get_storage(), key, tmp_path)
+
+    return _upload_response(key, size, deduplicated)
+
+
+@router.post(
+    "/producto/presign",
+    dependencies=[Depends(require_permissions(PRODUCT_WRITE))],
+    response_model=dict,
+)
+def presign_producto_upload(
+    session: SessionDep,
+    current_user: CurrentUser,
+    empresa_id: uuid.UUID = Form(...),
+    filename: str = Form(...),
+    size: int = Form(..., gt=0),
+    sha256: str = Form(..., description="SHA-256 del archivo en hexadecimal"),
+) -> Any:
+    """
+    Obtener una URL prefirmada para subir la imagen directamente al almacenamiento,
+    sin pasar los bytes por la API. Tipo, tamaño y hash quedan firmados.
+    Si ya existe una imagen idéntica no hace falta subirla (`upload` es null).
+    Tras subirla, llamar a `/upload/producto/{empresa_id}/{filename}/confirmar`.
+    Requiere permiso: PRODUCT_WRITE sobre la empresa indicada
+    """
+    _check_empresa(session, current_user, empresa_id)
+    file_ext = _validate_extension(filename)
+    if size > MAX_FILE_SIZE:
+        raise _too_large()
+    sha256 = sha256.lower()
+    if not SHA256_HEX.match(sha256):
+        raise HTTPException(status_code=400, detail="Hash SHA-256 no válido")
+
+    storage = get_storage()
+    if not storage.supports_presigned_upload:
+        raise HTTPException(
+            status_code=400,
+            detail="El almacenamiento configurado no admite subidas directas",
+        )
+    key = _producto_key(empresa_id, f"{sha256}{file_ext}")
+    if storage.exists(key):
+        return {**_upload_response(key, size, True), "upload": None}
+    upload = storage.presigned_upload(
+        key,
+        content_type=mimetypes.guess_type(key)[0] or "application/octet-stream",
+        content_length=size,
+        sha256_hex=sha256,
+    )
+    return {**_upload_response(key, size, False), "upload": upload}
 
 
-@router.delete("/producto/{empresa_id}/{filename}", response_model=dict)
-async def delete_producto_image(empresa_id: str, filename: str) -> Any:
+@router.post(
+    "/producto/{empresa_id}/{filename}/confirmar",
+    dependencies=[Depends(require_permissions(PRODUCT_WRITE))],
+    response_model=dict,
+)
+def confirm_producto_upload(
+    session: SessionDep, current_user: CurrentUser, empresa_id: uuid.UUID, filename: str
+) -> Any:
     """
-    Eliminar imagen de producto de una empresa específica.
+    Confirmar una subida directa: verifica que el archivo existe y encola sus miniaturas.
+    Requiere permiso: PRODUCT_WRITE sobre la empresa indicada
     """
-    file_path = PRODUCTOS_DIR / empresa_id / filename
+    _check_empresa(session, current_user, empresa_id)
+    if Path(filename).name != filename:
+        raise HTTPException(status_code=400, detail="Nombre de archivo no válido")
+    key = _producto_key(empresa_id, filename)
+    storage = get_storage()
+    if not storage.exists(key):
+        raise HTTPException(status_code=404, detail="Imagen no encontrada")
+    schedule_thumbnails(storage, key)
+    return _upload_response(key, None, False)
 
-    if not file_path.exists():
+
+@router.delete(
+    "/producto/{empresa_id}/{filename}",
+    dependencies=[Depends(require_permissions(PRODUCT_WRITE))],
+    response_model=dict,
+)
+def delete_producto_image(
+    session: SessionDep, current_user: CurrentUser, empresa_id: uuid.UUID, filename: str
+) -> Any:
+    """
+    Eliminar imagen de producto de una empresa específica, junto con sus miniaturas.
+    Como las imágenes idénticas se comparten, no se elimina si algún producto la usa.
+    Requiere permiso: PRODUCT_WRITE sobre la empresa indicada
+    """
+    _check_empresa(session, current_user, empresa_id)
+    if Path(filename).name != filename:
+        raise HTTPException(status_code=400, detail="Nombre de archivo no válido")
+    storage = get_storage()
+    key = _producto_key(empresa_id, filename)
+
+    if not storage.exists(key):
         raise HTTPException(
             status_code=404,
             detail="Imagen no encontrada",
         )
 
+    url = storage.public_url(key)
+    en_uso = session.exec(
+        select(func.count()).select_from(Producto).where(Producto.imagen == url)
+    ).one()
+    if en_uso:
+        raise HTTPException(
+            status_code=409,
+            detail=f"La imagen está en uso por {en_uso} producto(s)",
+        )
+
     try:
-        file_path.unlink()
-        
-        # Intentar eliminar el directorio de la empresa si está vacío
-        empresa_dir = PRODUCTOS_DIR / empresa_id
-        try:
-            empresa_dir.rmdir()  # Solo elimina si está vacío
-        except OSError:
-            pass  # El directorio no está vacío o no se puede eliminar
-        
+        for width in THUMBNAIL_WIDTHS:
+            storage.delete(thumbnail_key(key, width))
+        storage.delete(key)
         return {"message": "Imagen eliminada exitosamente"}
     except Exception as e:
         raise HTTPException(
@@ -4,17 +4,42 @@ from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any
 
-import emails  # type: ignore
 import jwt
-from jinja2 import Template
+from jinja2 import Environment, FileSystemLoader
 from jwt.exceptions import InvalidTokenError
 
 from core import security
 from core.config import settings
+from core.mailer import EmailQueue, EmailQueueFull, SMTPConfig
+from core.vencidas import RecordatorioVencida
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Las plantillas se compilan una vez y quedan en memoria (auto_reload desactivado)
+email_templates = Environment(
+    loader=FileSystemLoader(Path(__file__).parent / "email-templates" / "build"),
+    autoescape=False,
+    auto_reload=False,
+)
+
+email_queue = EmailQueue(
+    smtp=SMTPConfig(
+        host=settings.SMTP_HOST or "",
+        port=settings.SMTP_PORT,
+        use_tls=settings.SMTP_TLS,
+        use_ssl=settings.SMTP_SSL,
+        user=settings.SMTP_USER,
+        password=settings.SMTP_PASSWORD,
+        timeout=settings.SMTP_TIMEOUT_SECONDS,
+    ),
+    mail_from=(str(settings.EMAILS_FROM_NAME), str(settings.EMAILS_FROM_EMAIL)),
+    max_size=settings.EMAIL_QUEUE_MAX_SIZE,
+    max_retries=settings.EMAIL_MAX_RETRIES,
+    backoff_seconds=settings.EMAIL_RETRY_BACKOFF_SECONDS,
+    idle_seconds=settings.SMTP_IDLE_SECONDS,
+)
+
 
 @dataclass
 class EmailData:
@@ -23,10 +48,7 @@ class EmailData:
 
 
 def render_email_template(*, template_name: str, context: dict[str, Any]) -> str:
-    template_str = (
-        Path(__file__).parent / "email-templates" / "build" / template_name
-    ).read_text()
-    html_content = Template(template_str).render(context)
+    html_content = email_templates.get_template(template_name).render(context)
     return html_content
 
 
@@ -36,23 +58,11 @@ def send_email(
     subject: str = "",
     html_content: str = "",
 ) -> None:
+    """
+    Encolar el correo; lo envía en segundo plano el hilo de `email_queue`.
+    """
     assert settings.emails_enabled, "no provided configuration for email variables"
-    message = emails.Message(
-        subject=subject,
-        html=html_content,
-        mail_from=(settings.EMAILS_FROM_NAME, settings.EMAILS_FROM_EMAIL),
-    )
-    smtp_options = {"host": settings.SMTP_HOST, "port": settings.SMTP_PORT}
-    if settings.SMTP_TLS:
-        smtp_options["tls"] = True
-    elif settings.SMTP_SSL:
-        smtp_options["ssl"] = True
-    if settings.SMTP_USER:
-        smtp_options["user"] = settings.SMTP_USER
-    if settings.SMTP_PASSWORD:
-        smtp_options["password"] = settings.SMTP_PASSWORD
-    response = message.send(to=email_to, smtp=smtp_options)
-    logger.info(f"send email result: {response}")
+    email_queue.enqueue(email_to=email_to, subject=subject, html_content=html_content)
 
 
 def generate_test_email(email_to: str) -> EmailData:
@@ -100,6 +110,40 @@ def generate_new_account_email(
     return EmailData(html_content=html_content, subject=subject)
 
 
+def generate_overdue_invoice_email(recordatorio: RecordatorioVencida) -> EmailData:
+    project_name = settings.PROJECT_NAME
+    subject = f"{project_name} - Factura {recordatorio.numero_factura} vencida"
+    html_content = render_email_template(
+        template_name="factura_vencida.html",
+        context={
+            "project_name": settings.PROJECT_NAME,
+            "numero_factura": recordatorio.numero_factura,
+            "fecha_vencimiento": f"{recordatorio.fecha_vencimiento:%d/%m/%Y}",
+            "total": f"{recordatorio.total:.2f}",
+            "link": settings.FRONTEND_HOST,
+        },
+    )
+    return EmailData(html_content=html_content, subject=subject)
+
+
+def send_overdue_reminders(recordatorios: list[RecordatorioVencida]) -> None:
+    """
+    Encolar un recordatorio por factura vencida (core.vencidas). Si la cola se
+    llena se deja de encolar: las que quedaron se descartan, como cualquier aviso.
+    """
+    for recordatorio in recordatorios:
+        email_data = generate_overdue_invoice_email(recordatorio)
+        try:
+            send_email(
+                email_to=recordatorio.email,
+                subject=email_data.subject,
+                html_content=email_data.html_content,
+            )
+        except EmailQueueFull:
+            logger.warning("Cola de correos llena: recordatorios de vencidas descartados")
+            return
+
+
 def generate_password_reset_token(email: str) -> str:
     delta = timedelta(hours=settings.EMAIL_RESET_TOKEN_EXPIRE_HOURS)
     now = datetime.now(timezone.utc)
@@ -0,0 +1,98 @@
+"""
+Benchmark: ráfaga de logins con bcrypt en el threadpool vs. pool dedicado.
+
+Simula N logins concurrentes y, en paralelo, un "health check" que cada 10 ms
+ejecuta una tarea trivial en el threadpool compartido de AnyIO (lo mismo que
+hace FastAPI con cualquier endpoint `def`). Se compara:
+
+- threadpool: `verify_and_update` de passlib dentro de `run_in_threadpool`
+  (el comportamiento anterior de /login/access-token, que era `def`).
+- pool dedicado: `core.hashing.PasswordHasher` con procesos propios.
+
+Se reporta el tiempo total de la ráfaga y la latencia del health check.
+
+Uso (desde backend/):
+    python -m benchmarks.login --logins 80 --rounds 12 --workers 2
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from fastapi.concurrency import run_in_threadpool
+
+from core.hashing import PasswordHasher, build_crypt_context
+
+PASSWORD = "changethis-benchmark"
+
+
+async def _health_checks(stop: asyncio.Event) -> list[float]:
+    latencias = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await run_in_threadpool(lambda: None)
+        latencias.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.01)
+    return latencias
+
+
+async def _storm(login, logins: int) -> tuple[float, list[float]]:
+    stop = asyncio.Event()
+    health = asyncio.create_task(_health_checks(stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    total = time.perf_counter() - start
+    stop.set()
+    return total, await health
+
+
+def _report(nombre: str, total: float, latencias: list[float]) -> None:
+    latencias.sort()
+    p99 = latencias[max(int(len(latencias) * 0.99) - 1, 0)]
+    print(
+        f"  {nombre:<14} ráfaga {total:7.2f} s"
+        f"   health mediana {statistics.median(latencias):8.2f} ms"
+        f"   p99 {p99:8.2f} ms   max {latencias[-1]:8.2f} ms"
+    )
+
+
+async def _main(args: argparse.Namespace) -> None:
+    schemes = ("bcrypt",)
+    context = build_crypt_context(schemes, args.rounds)
+    hashed = context.hash(PASSWORD)
+
+    async def login_threadpool() -> None:
+        await run_in_threadpool(context.verify_and_update, PASSWORD, hashed)
+
+    hasher = PasswordHasher(
+        schemes=schemes,
+        bcrypt_rounds=args.rounds,
+        workers=args.workers,
+        queue_limit=args.logins,
+    )
+
+    async def login_dedicado() -> None:
+        await hasher.verify_and_update(PASSWORD, hashed)
+
+    await hasher.verify_and_update(PASSWORD, hashed)  # arrancar los procesos
+
+    print(
+        f"{args.logins} logins concurrentes, bcrypt {args.rounds} rondas,"
+        f" {args.workers} workers"
+    )
+    _report("threadpool", *await _storm(login_threadpool, args.logins))
+    _report("pool dedicado", *await _storm(login_dedicado, args.logins))
+    hasher.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=80)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
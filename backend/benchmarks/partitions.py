@@ -0,0 +1,212 @@
+"""
+Benchmark: poda de particiones en los informes mensuales de pagos.
+
+Crea las tablas de la app en un PostgreSQL vacío y dedicado (`pago` particionada
+por mes, ver core.partitions), siembra `--meses` meses de historia con
+`--pagos-por-mes` pagos cada uno (en orden de fecha, como llegan en producción)
+y copia los mismos datos a `pago_plano`, una tabla sin particionar con índices
+por fecha y por factura.
+
+Para cada informe típico de un mes (el del medio de la historia) se reporta,
+en las dos tablas, cuántas particiones lee el plan, los bloques que toca
+(EXPLAIN ANALYZE BUFFERS) y la latencia p50/p95. Con la poda, el informe de un
+mes cuesta lo mismo con 3 meses de historia que con 36.
+
+Requiere PostgreSQL 13+ (gen_random_uuid). Las tablas se crean en la base de
+datos indicada: usar una dedicada.
+
+Uso (desde backend/):
+    python -m benchmarks.partitions --database-url postgresql+psycopg://u:p@localhost/bench
+    python -m benchmarks.partitions --database-url ... --meses 36 --pagos-por-mes 50000
+"""
+import argparse
+import statistics
+import sys
+import time
+import uuid
+from datetime import date
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlmodel import Session, SQLModel, create_engine
+
+import models  # noqa: F401
+from core.partitions import ensure_partitions, month_start, next_month
+from models.auth.users import User
+from models.bill.factura import Factura
+from models.company.empresa import Empresa
+from models.company.restaurante import Restaurante
+
+METODOS_PAGO = ["efectivo", "tarjeta_credito", "tarjeta_debito", "transferencia"]
+
+# Informes de un mes: (nombre, SQL con {tabla}, :inicio, :fin y :factura)
+INFORMES = [
+    (
+        "resumen por método",
+        "SELECT metodo_pago, count(*), sum(monto) FROM {tabla}"
+        " WHERE fecha_pago >= :inicio AND fecha_pago < :fin AND estado = 'completado'"
+        " GROUP BY metodo_pago",
+    ),
+    (
+        "total por día",
+        "SELECT date_trunc('day', fecha_pago) AS dia, sum(monto) FROM {tabla}"
+        " WHERE fecha_pago >= :inicio AND fecha_pago < :fin GROUP BY dia ORDER BY dia",
+    ),
+    (
+        "pagos de una factura",
+        "SELECT id, monto, fecha_pago FROM {tabla}"
+        " WHERE factura_id = :factura AND fecha_pago >= :inicio AND fecha_pago < :fin",
+    ),
+]
+
+
+def _add_months(month: date, n: int) -> date:
+    for _ in range(n):
+        month = next_month(month)
+    return month
+
+
+def _seed_parents(engine: Any, n_facturas: int) -> list[uuid.UUID]:
+    with Session(engine) as session:
+        empresa = Empresa(
+            nombre=f"Bench {uuid.uuid4().hex[:8]}", direccion="-", ciudad="-", email="b@b.com"
+        )
+        session.add(empresa)
+        session.flush()
+        restaurante = Restaurante(nombre="Bench", empresa_id=empresa.id)
+        cliente = User(email=f"{uuid.uuid4().hex[:8]}@bench.com", hashed_password="-")
+        session.add_all([restaurante, cliente])
+        session.flush()
+        facturas = [
+            Factura(
+                numero_factura=f"B-{uuid.uuid4().hex[:12]}",
+                subtotal=0,
+                impuestos=0,
+                total=0,
+                cliente_id=cliente.id,
+                restaurante_id=restaurante.id,
+            )
+            for _ in range(n_facturas)
+        ]
+        session.add_all(facturas)
+        session.commit()
+        return [f.id for f in facturas]
+
+
+def _seed_pagos(
+    connection: Connection, inicio: date, meses: int, por_mes: int, facturas: list[uuid.UUID]
+) -> None:
+    fin = _add_months(inicio, meses)
+    connection.execute(
+        text(
+            "INSERT INTO pago (id, monto, fecha_pago, metodo_pago, estado, factura_id)"
+            " SELECT gen_random_uuid(), round((random() * 100)::numeric, 2), fecha,"
+            "  (CAST(:metodos AS varchar[]))[1 + floor(random() * :n_metodos)::int],"
+            "  CASE WHEN random() < 0.9 THEN 'completado' ELSE 'pendiente' END,"
+            "  (CAST(:facturas AS uuid[]))[1 + floor(random() * :n_facturas)::int]"
+            " FROM (SELECT CAST(:inicio AS timestamp)"
+            "        + random() * (CAST(:fin AS timestamp) - CAST(:inicio AS timestamp)) AS fecha"
+            "       FROM generate_series(1, :total) ORDER BY fecha) AS s"
+        ),
+        {
+            "metodos": METODOS_PAGO,
+            "n_metodos": len(METODOS_PAGO),
+            "facturas": facturas,
+            "n_facturas": len(facturas),
+            "inicio": inicio,
+            "fin": fin,
+            "total": meses * por_mes,
+        },
+    )
+    connection.exec_driver_sql("DROP TABLE IF EXISTS pago_plano")
+    connection.exec_driver_sql(
+        "CREATE TABLE pago_plano AS SELECT * FROM pago ORDER BY fecha_pago"
+    )
+    connection.exec_driver_sql("ALTER TABLE pago_plano ADD PRIMARY KEY (id)")
+    connection.exec_driver_sql(
+        "CREATE INDEX ix_pago_plano_factura_fecha ON pago_plano (factura_id, fecha_pago)"
+    )
+    connection.exec_driver_sql("CREATE INDEX ix_pago_plano_fecha ON pago_plano (fecha_pago)")
+    connection.exec_driver_sql("ANALYZE pago")
+    connection.exec_driver_sql("ANALYZE pago_plano")
+
+
+def _plan_stats(plan: dict[str, Any]) -> tuple[set[str], int]:
+    """Tablas (particiones) leídas y bloques tocados por un plan de EXPLAIN JSON."""
+    relaciones: set[str] = set()
+    if "Relation Name" in plan:
+        relaciones.add(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        relaciones |= _plan_stats(child)[0]
+    bloques = plan.get("Shared Hit Blocks", 0) + plan.get("Shared Read Blocks", 0)
+    return relaciones, bloques
+
+
+def _measure(
+    connection: Connection, sql: str, params: dict[str, Any], repeticiones: int
+) -> tuple[int, int, float, float]:
+    plan = connection.execute(
+        text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"), params
+    ).scalar()
+    relaciones, bloques = _plan_stats(plan[0]["Plan"])
+    latencias = []
+    for _ in range(repeticiones):
+        start = time.perf_counter()
+        connection.execute(text(sql), params).all()
+        latencias.append((time.perf_counter() - start) * 1000)
+    latencias.sort()
+    p95 = latencias[max(int(len(latencias) * 0.95) - 1, 0)]
+    return len(relaciones), bloques, statistics.median(latencias), p95
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--database-url", required=True, help="PostgreSQL vacío y dedicado")
+    parser.add_argument("--meses", type=int, default=24, help="meses de historia")
+    parser.add_argument("--pagos-por-mes", type=int, default=20000)
+    parser.add_argument("--facturas", type=int, default=500)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    if engine.dialect.name != "postgresql":
+        sys.exit("El particionado nativo solo existe en PostgreSQL: indicar --database-url")
+    SQLModel.metadata.create_all(engine)
+
+    # Historia de `--meses` meses que termina en el mes actual
+    hoy = month_start(date.today())
+    inicio = hoy
+    for _ in range(args.meses - 1):
+        inicio = date(inicio.year - (inicio.month == 1), (inicio.month - 2) % 12 + 1, 1)
+
+    print(f"Sembrando {args.meses} meses x {args.pagos_por_mes} pagos desde {inicio:%Y-%m}...")
+    facturas = _seed_parents(engine, args.facturas)
+    with engine.begin() as connection:
+        creadas = ensure_partitions(connection, months_ahead=1, since=inicio)
+        _seed_pagos(connection, inicio, args.meses, args.pagos_por_mes, facturas)
+    print(f"  {len(creadas)} particiones creadas")
+
+    mes = _add_months(inicio, args.meses // 2)
+    params = {"inicio": mes, "fin": next_month(mes), "factura": facturas[0]}
+    print(f"\nInforme del mes {mes:%Y-%m} ({args.repeticiones} repeticiones)\n")
+    print(
+        f"  {'informe':<22} {'tabla':<12} {'tablas leídas':>13} {'bloques':>9}"
+        f" {'p50 ms':>9} {'p95 ms':>9}"
+    )
+    with engine.connect() as connection:
+        for nombre, sql in INFORMES:
+            for tabla in ("pago", "pago_plano"):
+                leidas, bloques, p50, p95 = _measure(
+                    connection, sql.format(tabla=tabla), params, args.repeticiones
+                )
+                print(
+                    f"  {nombre:<22} {tabla:<12} {leidas:>13} {bloques:>9}"
+                    f" {p50:>9.2f} {p95:>9.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
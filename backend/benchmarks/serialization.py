@@ -0,0 +1,109 @@
+"""
+Benchmark: serialización de listados con `response_model` vs. fast-path orjson.
+
+Compara, para una página de N filas de `Producto`, el camino actual
+(entidades ORM -> `ProductoPublic.model_validate` -> validación de `response_model`
+-> JSONResponse) contra `core.serialization` (SELECT proyectado -> dicts -> orjson).
+
+Uso (desde backend/):
+    python -m benchmarks.serialization --rows 1000 --repeat 50
+"""
+import argparse
+import statistics
+import time
+import uuid
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from core.serialization import fetch_rows, list_response, public_columns
+from models.product.producto import Producto, ProductoPublic, ProductosPublic, ProductoStock
+
+
+def _seed(session: Session, rows: int) -> None:
+    tasa_id, categoria_id = uuid.uuid4(), uuid.uuid4()
+    productos = [
+        Producto(
+            nombre=f"Producto {i}",
+            descripcion="Descripción de prueba para el benchmark",
+            precio=10.5 + i,
+            imagen=f"/uploads/productos/{i}.webp",
+            tasa_impositiva_id=tasa_id,
+            categoria_id=categoria_id,
+        )
+        for i in range(rows)
+    ]
+    session.add_all(productos)
+    session.flush()
+    session.add_all(ProductoStock(producto_id=p.id, stock=100) for p in productos)
+    session.commit()
+
+
+def _response_model_path(session: Session, rows: int, adapter: TypeAdapter) -> bytes:
+    productos = session.exec(select(Producto).limit(rows)).all()
+    productos_public = [ProductoPublic.model_validate(p) for p in productos]
+    payload = ProductosPublic(data=productos_public, count=rows)
+    # Lo que hace FastAPI con response_model: validar de nuevo y codificar
+    validated = adapter.validate_python(payload, from_attributes=True)
+    content = jsonable_encoder(adapter.dump_python(validated, mode="json"))
+    session.expunge_all()
+    return JSONResponse(content=content).body
+
+
+def _fast_path(session: Session, rows: int) -> bytes:
+    data = fetch_rows(
+        session=session,
+        columns=public_columns(ProductoPublic, Producto),
+        limit=rows,
+    )
+    return list_response(data=data, count=rows).body
+
+
+def _measure(fn, repeat: int) -> list[float]:
+    fn()  # calentamiento
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine, tables=[Producto.__table__, ProductoStock.__table__])
+    adapter = TypeAdapter(ProductosPublic)
+
+    with Session(engine) as session:
+        _seed(session, args.rows)
+        resultados = {
+            "response_model": _measure(
+                lambda: _response_model_path(session, args.rows, adapter), args.repeat
+            ),
+            "orjson fast-path": _measure(
+                lambda: _fast_path(session, args.rows), args.repeat
+            ),
+        }
+
+    print(f"{args.rows} filas, {args.repeat} repeticiones")
+    for nombre, timings in resultados.items():
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        print(
+            f"  {nombre:<18} mediana {statistics.median(timings):8.2f} ms"
+            f"   p95 {p95:8.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
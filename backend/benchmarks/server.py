@@ -0,0 +1,216 @@
+"""
+Benchmark: modo desarrollo (un proceso uvicorn --reload) vs. modo producción
+(gunicorn.conf.py: varios workers uvicorn con la app precargada).
+
+Cada modo se arranca como subproceso en un puerto libre; cuando responde el
+health check se lanza una carga HTTP con `--concurrency` clientes durante
+`--duration` segundos, repartida en turno entre las rutas de `--path`. Se
+reporta throughput, latencia p50/p99, errores y la memoria del árbol de
+procesos (PSS: la memoria compartida copy-on-write entre workers cuenta una
+sola vez, repartida entre ellos; requiere Linux).
+
+Las rutas por defecto no tocan la base de datos. Para medir handlers `def` con
+SessionDep (threadpool + pool de conexiones) añadir rutas autenticadas con
+`--path` y `--token`, con la base de datos del .env disponible.
+
+Uso (desde backend/):
+    python -m benchmarks.server --duration 15 --concurrency 64
+    python -m benchmarks.server --mode production --workers 4
+    python -m benchmarks.server --path /api/v1/users/me --token "$TOKEN"
+"""
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+from core.config import settings
+
+BACKEND_DIR = Path(__file__).parent.parent
+DEFAULT_PATHS = (
+    f"{settings.API_V1_STR}/utils/health-check/",
+    f"{settings.API_V1_STR}/openapi.json",
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _command(mode: str, port: int) -> list[str]:
+    if mode == "reload":
+        return [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port), "--reload",
+        ]
+    return [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app.main:app"]
+
+
+def _start(mode: str, port: int, workers: int | None) -> subprocess.Popen[bytes]:
+    env = {**os.environ, "PORT": str(port)}
+    env.pop("PROMETHEUS_MULTIPROC_DIR", None)
+    if workers:
+        env["WEB_CONCURRENCY"] = str(workers)
+    return subprocess.Popen(
+        _command(mode, port),
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def _wait_ready(base_url: str, proc: subprocess.Popen[bytes], timeout: float) -> float:
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if proc.poll() is not None:
+            raise RuntimeError(f"el servidor terminó al arrancar (código {proc.returncode})")
+        try:
+            httpx.get(base_url + DEFAULT_PATHS[0], timeout=1).raise_for_status()
+            return time.perf_counter() - start
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError(f"el servidor no respondió en {timeout:.0f} s")
+
+
+def _stop(proc: subprocess.Popen[bytes]) -> None:
+    # SIGTERM al grupo: gunicorn/uvicorn hacen el apagado ordenado de sus hijos
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=35)
+    except ProcessLookupError:
+        pass
+    except subprocess.TimeoutExpired:
+        os.killpg(proc.pid, signal.SIGKILL)
+        proc.wait()
+
+
+def _process_tree(pid: int) -> list[int]:
+    pids = [pid]
+    for task in Path(f"/proc/{pid}/task").glob("*/children"):
+        for child in task.read_text().split():
+            pids.extend(_process_tree(int(child)))
+    return pids
+
+
+def _memory_mb(pid: int) -> tuple[int, float, float]:
+    """Número de procesos, PSS y RSS totales (MB) del árbol de `pid`."""
+    pids = _process_tree(pid)
+    pss = rss = 0
+    for p in pids:
+        try:
+            for line in Path(f"/proc/{p}/smaps_rollup").read_text().splitlines():
+                if line.startswith("Pss:"):
+                    pss += int(line.split()[1])
+                elif line.startswith("Rss:"):
+                    rss += int(line.split()[1])
+        except OSError:
+            continue
+    return len(pids), pss / 1024, rss / 1024
+
+
+async def _load(
+    base_url: str, paths: list[str], token: str | None, concurrency: int, duration: float
+) -> tuple[list[float], int, float]:
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    latencias: list[float] = []
+    errores = 0
+
+    async with httpx.AsyncClient(
+        base_url=base_url, headers=headers, limits=limits, timeout=30
+    ) as client:
+        deadline = time.perf_counter() + duration
+
+        async def cliente(n: int) -> None:
+            nonlocal errores
+            i = n
+            while time.perf_counter() < deadline:
+                path = paths[i % len(paths)]
+                i += 1
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    ok = response.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                latencias.append((time.perf_counter() - start) * 1000)
+                errores += not ok
+
+        start = time.perf_counter()
+        await asyncio.gather(*(cliente(n) for n in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return latencias, errores, elapsed
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    return sorted_values[max(int(len(sorted_values) * q) - 1, 0)]
+
+
+def _run_mode(mode: str, args: argparse.Namespace) -> None:
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    proc = _start(mode, port, args.workers)
+    try:
+        ready = _wait_ready(base_url, proc, args.startup_timeout)
+        # Calentar: openapi.json se genera con la primera petición de cada worker
+        asyncio.run(_load(base_url, args.path, args.token, args.concurrency, 1.0))
+        latencias, errores, elapsed = asyncio.run(
+            _load(base_url, args.path, args.token, args.concurrency, args.duration)
+        )
+        procesos, pss, rss = _memory_mb(proc.pid)
+    finally:
+        _stop(proc)
+
+    latencias.sort()
+    print(
+        f"  {mode:<10} {len(latencias) / elapsed:9.0f} req/s"
+        f"   p50 {statistics.median(latencias):7.1f} ms"
+        f"   p99 {_percentile(latencias, 0.99):7.1f} ms"
+        f"   errores {errores:5d}"
+        f"   {procesos} procesos, PSS {pss:6.0f} MB (RSS {rss:6.0f} MB)"
+        f"   listo en {ready:4.1f} s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--mode", choices=("reload", "production", "both"), default="both"
+    )
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument(
+        "--workers", type=int, help="WEB_CONCURRENCY del modo producción (por defecto, según CPUs)"
+    )
+    parser.add_argument(
+        "--path", action="append", help="ruta a consultar (repetible)"
+    )
+    parser.add_argument("--token", help="access token para rutas autenticadas")
+    parser.add_argument("--startup-timeout", type=float, default=60.0)
+    args = parser.parse_args()
+    args.path = args.path or list(DEFAULT_PATHS)
+
+    modes = ("reload", "production") if args.mode == "both" else (args.mode,)
+    print(
+        f"{args.concurrency} clientes durante {args.duration:.0f} s,"
+        f" {os.cpu_count()} CPUs, rutas: {', '.join(args.path)}"
+    )
+    for mode in modes:
+        _run_mode(mode, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,531 @@
+"""
+Benchmark: turno de servicio de un restaurante contra la API completa.
+
+Siembra empresas, restaurantes, mesas, categorías, productos y meseros (con un
+rol de operación, así que se ejercitan también las comprobaciones de permisos)
+y reproduce un turno: por cada servicio se sienta una mesa, se pide, se editan
+ítems, cocina consulta las órdenes activas, se factura, se paga en varias partes
+y, a veces, se corrige la factura. Las requests pasan por la aplicación real
+(middlewares, dependencias, serialización) dentro del proceso.
+
+Reporta throughput y, por endpoint (unique id de la operación), p50/p95/p99 y
+el número de consultas SQL (de la cabecera Server-Timing de QueryStatsMiddleware).
+Con `--save` se guarda el resultado y con `--compare` se contrasta con uno
+anterior: el proceso sale con código 1 si algún endpoint empeora más de
+`--tolerance` en p95 o hace más consultas que antes.
+
+Por defecto usa SQLite en memoria (un solo hilo). Para medir de verdad, apuntar
+`--database-url` a un PostgreSQL vacío y dedicado (se crean las tablas) y subir
+`--concurrency`.
+
+Uso (desde backend/):
+    python -m benchmarks.shift --restaurantes 2 --mesas 20 --servicios 200
+    python -m benchmarks.shift --save shift-baseline.json
+    python -m benchmarks.shift --compare shift-baseline.json --tolerance 0.25
+    python -m benchmarks.shift --database-url postgresql+psycopg://u:p@localhost/bench --concurrency 8
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+import models
+from app.main import app
+from app.routes.auth.permisos.permissions import (
+    ORDER_DELETE,
+    RESTAURANT_OPERATION_PERMISSIONS,
+)
+from core import security
+from core.config import settings
+from core.db import set_engine
+from core.query_stats import instrument_engine
+from models.auth.roluser import RolUser
+from models.auth.users import UserPublic
+
+API = settings.API_V1_STR
+METODOS_PAGO = ["efectivo", "tarjeta_credito", "tarjeta_debito", "transferencia"]
+_SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+@dataclass
+class EndpointStats:
+    latencies: list[float] = field(default_factory=list)
+    queries: list[int] = field(default_factory=list)
+    errors: int = 0
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.endpoints: dict[str, EndpointStats] = defaultdict(EndpointStats)
+        self.error_samples: list[str] = []
+        self._lock = threading.Lock()
+
+    def record(self, operation: str, elapsed: float, response) -> None:  # type: ignore[no-untyped-def]
+        match = _SERVER_TIMING_QUERIES.search(response.headers.get("server-timing", ""))
+        with self._lock:
+            stats = self.endpoints[operation]
+            stats.latencies.append(elapsed * 1000)
+            if match:
+                stats.queries.append(int(match.group(1)))
+            if response.status_code >= 400:
+                stats.errors += 1
+                if len(self.error_samples) < 5:
+                    self.error_samples.append(
+                        f"{operation} {response.status_code}: {response.text[:200]}"
+                    )
+
+
+@dataclass
+class Restaurante:
+    id: uuid.UUID
+    empresa_id: uuid.UUID
+    mesas: list[uuid.UUID]
+    productos: list[tuple[uuid.UUID, float]]
+    meseros: list[uuid.UUID]
+
+
+# --- Siembra ---------------------------------------------------------------
+
+
+def _seed(session: Session, args: argparse.Namespace) -> tuple[list[Restaurante], uuid.UUID]:
+    run = uuid.uuid4().hex[:8]  # permite sembrar varias veces en la misma BD
+    admin = models.User(
+        email=f"admin-{run}@bench.example.com",
+        hashed_password="!",
+        full_name="Admin benchmark",
+        is_superuser=True,
+    )
+    tasa = models.TasaImpositiva(nombre=f"IVA {run}", porcentaje=19)
+    rol = models.Rol(nombre=f"operacion-{run}", descripcion="Meseros del benchmark")
+    session.add_all([admin, tasa, rol])
+    session.flush()
+    for nombre in [*RESTAURANT_OPERATION_PERMISSIONS, ORDER_DELETE]:
+        permiso = session.exec(
+            select(models.Permiso).where(models.Permiso.nombre == nombre)
+        ).first()
+        if permiso is None:
+            permiso = models.Permiso(nombre=nombre)
+            session.add(permiso)
+            session.flush()
+        session.add(models.PermisoRol(permiso_id=permiso.id, rol_id=rol.id, assigned_by=admin.id))
+
+    restaurantes = []
+    for e in range(args.empresas):
+        empresa = models.Empresa(
+            nombre=f"Empresa {run}-{e}", direccion="Calle 1", ciudad="Bogotá", email=f"e{e}-{run}@bench.example.com"
+        )
+        session.add(empresa)
+        session.flush()
+        for r in range(args.restaurantes):
+            restaurante = models.Restaurante(nombre=f"Restaurante {run}-{e}-{r}", empresa_id=empresa.id)
+            session.add(restaurante)
+            session.flush()
+            mesas = [
+                models.MesaRestaurante(numero_mesa=n + 1, capacidad=4, restaurante_id=restaurante.id)
+                for n in range(args.mesas)
+            ]
+            categorias = [
+                models.Categoria(nombre=f"Categoría {c}", restaurante_id=restaurante.id)
+                for c in range(args.categorias)
+            ]
+            session.add_all(mesas + categorias)
+            session.flush()
+            productos = [
+                models.Producto(
+                    nombre=f"Producto {run}-{e}-{r}-{p}",
+                    precio=round(random.uniform(3, 40), 2),
+                    empresa_id=empresa.id,
+                    restaurante_id=restaurante.id,
+                    tasa_impositiva_id=tasa.id,
+                    categoria_id=categorias[p % len(categorias)].id,
+                )
+                for p in range(args.productos)
+            ]
+            meseros = [
+                models.User(
+                    email=f"mesero-{run}-{e}-{r}-{m}@bench.example.com",
+                    hashed_password="!",
+                    full_name=f"Mesero {m}",
+                    empresa_id=empresa.id,
+                    restaurante_id=restaurante.id,
+                )
+                for m in range(args.meseros)
+            ]
+            session.add_all(productos + meseros)
+            session.flush()
+            session.add_all(
+                RolUser(user_id=u.id, rol_id=rol.id, assigned_by=admin.id) for u in meseros
+            )
+            session.add_all(models.ProductoStock(producto_id=p.id, stock=10_000) for p in productos)
+            restaurantes.append(
+                Restaurante(
+                    id=restaurante.id,
+                    empresa_id=empresa.id,
+                    mesas=[m.id for m in mesas],
+                    productos=[(p.id, p.precio) for p in productos],
+                    meseros=[u.id for u in meseros],
+                )
+            )
+    session.commit()
+    return restaurantes, tasa.id
+
+
+def _tokens(session: Session, user_ids: list[uuid.UUID]) -> dict[uuid.UUID, str]:
+    """
+    Access tokens con los mismos claims que emite /login/access-token.
+    """
+    tokens = {}
+    for user_id in user_ids:
+        user = session.get(models.User, user_id)
+        claims = UserPublic.model_validate(user).model_dump(mode="json", exclude={"id"})
+        claims["sid"] = str(uuid.uuid4())
+        tokens[user_id] = security.create_access_token(
+            user_id, expires_delta=timedelta(hours=2), claims=claims
+        )
+    return tokens
+
+
+# --- Turno -----------------------------------------------------------------
+
+
+class Shift:
+    def __init__(
+        self,
+        client: TestClient,
+        recorder: Recorder,
+        tasa_id: uuid.UUID,
+        tokens: dict[uuid.UUID, str],
+        args: argparse.Namespace,
+        seed: int,
+    ) -> None:
+        self.client = client
+        self.recorder = recorder
+        self.tasa_id = tasa_id
+        self.tokens = tokens
+        self.args = args
+        self.rng = random.Random(seed)
+        self.requests = 0
+
+    def call(self, operation: str, method: str, path: str, mesero: uuid.UUID, **kwargs):  # type: ignore[no-untyped-def]
+        headers = {"Authorization": f"Bearer {self.tokens[mesero]}"}
+        start = time.perf_counter()
+        response = self.client.request(method, f"{API}{path}", headers=headers, **kwargs)
+        self.recorder.record(operation, time.perf_counter() - start, response)
+        self.requests += 1
+        if self.requests % self.args.poll_every == 0:
+            self.kitchen_poll(self.restaurante, mesero)
+        return response
+
+    def kitchen_poll(self, restaurante: Restaurante, mesero: uuid.UUID) -> None:
+        headers = {"Authorization": f"Bearer {self.tokens[mesero]}"}
+        start = time.perf_counter()
+        response = self.client.get(
+            f"{API}/ordenes/activas/restaurante/{restaurante.id}", headers=headers
+        )
+        self.recorder.record("ordenes-read_ordenes_activas", time.perf_counter() - start, response)
+
+    def service(self, restaurante: Restaurante, mesa_id: uuid.UUID) -> None:
+        """
+        Un servicio completo de una mesa: sentar, pedir, editar, cobrar y liberar.
+        """
+        rng = self.rng
+        self.restaurante = restaurante
+        mesero = rng.choice(restaurante.meseros)
+        comensales = rng.randint(1, 4)
+
+        # Sentar
+        self.call("mesas-read_mesas_by_restaurante", "GET", f"/mesas/restaurante/{restaurante.id}", mesero)
+        orden = self.call(
+            "ordenes-create_orden", "POST", "/ordenes/", mesero,
+            json={
+                "fecha": time.strftime("%Y-%m-%d"),
+                "total": 0,
+                "numero_comensales": comensales,
+                "mesa_id": str(mesa_id),
+                "cliente_id": str(mesero),
+                "restaurante_id": str(restaurante.id),
+            },
+        ).json()
+        if "id" not in orden:
+            return
+        self.call(
+            "mesas-asignar_orden_a_mesa", "PATCH", f"/mesas/{mesa_id}/asignar-orden", mesero,
+            params={"orden_id": orden["id"], "numero_comensales": comensales},
+        )
+
+        # Pedir (en una o dos rondas) y editar
+        items = []
+        for _ in range(rng.randint(comensales, comensales * 3)):
+            producto_id, precio = rng.choice(restaurante.productos)
+            item = self.call(
+                "orden-items-create_orden_item", "POST", "/orden-items/", mesero,
+                json={
+                    "orden_id": orden["id"],
+                    "producto_id": str(producto_id),
+                    "cantidad": rng.randint(1, 2),
+                    "precio_unitario": precio,
+                    "notas": "",
+                },
+            ).json()
+            if "id" in item:
+                items.append(item)
+        for item in rng.sample(items, k=min(len(items), rng.randint(0, 2))):
+            item["cantidad"] += 1
+            self.call(
+                "orden-items-update_orden_item_cantidad", "PATCH",
+                f"/orden-items/{item['id']}/cantidad", mesero,
+                params={"nueva_cantidad": item["cantidad"]},
+            )
+        if len(items) > 1 and rng.random() < self.args.cancelaciones:
+            item = items.pop(rng.randrange(len(items)))
+            self.call("orden-items-delete_orden_item", "DELETE", f"/orden-items/{item['id']}", mesero)
+        self.call("ordenes-read_orden_items", "GET", f"/ordenes/{orden['id']}/items", mesero)
+        self.call(
+            "ordenes-update_orden_estado", "PATCH", f"/ordenes/{orden['id']}/estado", mesero,
+            json={"estado": "completada"},
+        )
+
+        # Cobrar
+        subtotal = round(sum(i["cantidad"] * i["precio_unitario"] for i in items), 2)
+        factura = self.call(
+            "facturas-create_factura", "POST", "/facturas/", mesero,
+            json={
+                "numero_factura": f"B-{uuid.uuid4().hex[:12]}",
+                "subtotal": 0,
+                "impuestos": 0,
+                "total": 0,
+                "orden_id": orden["id"],
+                "cliente_id": str(mesero),
+                "restaurante_id": str(restaurante.id),
+                "empresa_id": str(restaurante.empresa_id),
+            },
+        ).json()
+        if "id" not in factura:
+            return
+        for item in items:
+            base = round(item["cantidad"] * item["precio_unitario"], 2)
+            impuesto = round(base * 0.19, 2)
+            self.call(
+                "articulos-factura-create_articulo_factura", "POST", "/articulos-factura/", mesero,
+                json={
+                    "cantidad": item["cantidad"],
+                    "precio_unitario": item["precio_unitario"],
+                    "impuesto": impuesto,
+                    "subtotal": base,
+                    "total": round(base + impuesto, 2),
+                    "factura_id": factura["id"],
+                    "producto_id": item["producto_id"],
+                    "tasa_impositiva_id": str(self.tasa_id),
+                },
+            )
+        factura = self.call(
+            "facturas-recalcular_totales_factura", "PATCH",
+            f"/facturas/{factura['id']}/recalcular-totales", mesero,
+        ).json()
+
+        # Pago dividido entre 1..comensales personas
+        total = factura.get("total", round(subtotal * 1.19, 2))
+        partes = rng.randint(1, comensales)
+        pagado = 0.0
+        for parte in range(partes):
+            # La última parte salda exactamente lo que queda (sin redondeo) para no
+            # pasarse del saldo pendiente por centésimas
+            monto = total - pagado if parte == partes - 1 else int(total / partes * 100) / 100
+            pagado += monto
+            self.call(
+                "pagos-create_pago", "POST", "/pagos/", mesero,
+                json={
+                    "monto": monto,
+                    "metodo_pago": rng.choice(METODOS_PAGO),
+                    "factura_id": factura["id"],
+                },
+            )
+
+        # Correcciones ocasionales
+        if rng.random() < self.args.correcciones:
+            correccion = self.call(
+                "correcciones-factura-create_correccion", "POST", "/correcciones-factura/", mesero,
+                json={
+                    "motivo": "Producto devuelto",
+                    "tipo_correccion": "ajuste",
+                    "monto_correccion": round(min(total, 5.0), 2),
+                    "factura_original_id": factura["id"],
+                    "realizado_por": str(mesero),
+                },
+            ).json()
+            if "id" in correccion:
+                self.call(
+                    "correcciones-factura-aprobar_correccion", "PATCH",
+                    f"/correcciones-factura/{correccion['id']}/aprobar", mesero,
+                )
+
+        self.call("mesas-liberar_mesa", "PATCH", f"/mesas/{mesa_id}/liberar", mesero)
+
+
+def _worker(
+    index: int,
+    mesas: list[tuple[Restaurante, uuid.UUID]],
+    servicios: int,
+    recorder: Recorder,
+    tasa_id: uuid.UUID,
+    tokens: dict[uuid.UUID, str],
+    args: argparse.Namespace,
+) -> None:
+    # Cada hilo atiende sus propias mesas: no hay dos servicios a la vez en la misma
+    with TestClient(app) as client:
+        shift = Shift(client, recorder, tasa_id, tokens, args, seed=args.seed + index)
+        for n in range(servicios):
+            restaurante, mesa_id = mesas[n % len(mesas)]
+            shift.service(restaurante, mesa_id)
+
+
+# --- Reporte ---------------------------------------------------------------
+
+
+def _percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+def _summary(recorder: Recorder) -> dict[str, dict[str, float]]:
+    summary = {}
+    for operation, stats in sorted(recorder.endpoints.items()):
+        summary[operation] = {
+            "n": len(stats.latencies),
+            "errors": stats.errors,
+            "p50": round(_percentile(stats.latencies, 0.50), 2),
+            "p95": round(_percentile(stats.latencies, 0.95), 2),
+            "p99": round(_percentile(stats.latencies, 0.99), 2),
+            "queries_mean": round(sum(stats.queries) / len(stats.queries), 1) if stats.queries else 0,
+            "queries_max": max(stats.queries, default=0),
+        }
+    return summary
+
+
+def _print(summary: dict[str, dict[str, float]], total: float, servicios: int) -> None:
+    requests = sum(s["n"] for s in summary.values())
+    print(
+        f"{servicios} servicios, {requests} requests en {total:.2f} s:"
+        f" {requests / total:.1f} req/s, {servicios / total:.2f} servicios/s\n"
+    )
+    print(f"  {'endpoint':<46} {'n':>6} {'err':>4} {'p50':>8} {'p95':>8} {'p99':>8} {'sql':>6} {'max':>4}")
+    for operation, s in summary.items():
+        print(
+            f"  {operation:<46} {s['n']:>6} {s['errors']:>4} {s['p50']:>8.2f}"
+            f" {s['p95']:>8.2f} {s['p99']:>8.2f} {s['queries_mean']:>6} {s['queries_max']:>4}"
+        )
+
+
+def _compare(summary: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for operation, base in baseline["endpoints"].items():
+        current = summary.get(operation)
+        if current is None:
+            continue
+        # Con pocas muestras el p95 es ruido; igual que las variaciones de menos de 1 ms
+        if (
+            min(current["n"], base["n"]) >= 20
+            and current["p95"] > base["p95"] * (1 + tolerance)
+            and current["p95"] - base["p95"] > 1
+        ):
+            regressions.append(f"{operation}: p95 {base['p95']} -> {current['p95']} ms")
+        if current["queries_max"] > base["queries_max"]:
+            regressions.append(
+                f"{operation}: consultas {base['queries_max']} -> {current['queries_max']}"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--database-url", default="sqlite://")
+    parser.add_argument("--empresas", type=int, default=1)
+    parser.add_argument("--restaurantes", type=int, default=2, help="por empresa")
+    parser.add_argument("--mesas", type=int, default=20, help="por restaurante")
+    parser.add_argument("--categorias", type=int, default=8, help="por restaurante")
+    parser.add_argument("--productos", type=int, default=120, help="por restaurante")
+    parser.add_argument("--meseros", type=int, default=4, help="por restaurante")
+    parser.add_argument("--servicios", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--poll-every", type=int, default=5, help="requests entre consultas de cocina")
+    parser.add_argument("--cancelaciones", type=float, default=0.2)
+    parser.add_argument("--correcciones", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", help="guardar el resultado en este JSON")
+    parser.add_argument("--compare", help="JSON de una ejecución anterior")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.database_url.startswith("sqlite"):
+        engine = create_engine(
+            args.database_url, connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        if args.concurrency > 1:
+            print("SQLite en memoria comparte una sola conexión: se usa --concurrency 1")
+            args.concurrency = 1
+    else:
+        engine = create_engine(args.database_url, pool_size=args.concurrency + 2)
+    SQLModel.metadata.create_all(engine)
+    instrument_engine(engine)
+    set_engine(engine)
+
+    random.seed(args.seed)
+    with Session(engine) as session:
+        restaurantes, tasa_id = _seed(session, args)
+        tokens = _tokens(session, [m for r in restaurantes for m in r.meseros])
+
+    mesas = [(r, m) for r in restaurantes for m in r.mesas]
+    random.shuffle(mesas)
+    recorder = Recorder()
+    threads = []
+    per_thread = args.servicios // args.concurrency
+    for i in range(args.concurrency):
+        own = mesas[i :: args.concurrency]
+        servicios = per_thread + (1 if i < args.servicios % args.concurrency else 0)
+        threads.append(
+            threading.Thread(
+                target=_worker, args=(i, own, servicios, recorder, tasa_id, tokens, args)
+            )
+        )
+
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    total = time.perf_counter() - start
+
+    summary = _summary(recorder)
+    _print(summary, total, args.servicios)
+    for sample in recorder.error_samples:
+        print(f"  ! {sample}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"args": vars(args), "endpoints": summary}, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = _compare(summary, json.load(f), args.tolerance)
+        if regressions:
+            print("\nRegresiones respecto a la línea base:")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print("\nSin regresiones respecto a la línea base")
+
+
+if __name__ == "__main__":
+    main()
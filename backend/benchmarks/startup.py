@@ -0,0 +1,149 @@
+"""
+Benchmark: tiempo de arranque de un worker.
+
+Cada medición corre en un intérprete nuevo (como un worker recién escalado) y
+separa tres fases:
+
+- import: `import app.main` (no debería construir nada).
+- create_app: registrar rutas, middlewares y montajes.
+- primera request: la primera llamada a la API con el engine aún sin crear.
+
+Con `--history` se añade el resultado (medianas, versión y commit) a un archivo
+JSON Lines y se compara con la entrada anterior, para seguir la evolución entre
+releases. `--importtime N` muestra los N módulos que más tardan en importarse.
+
+Uso (desde backend/):
+    python -m benchmarks.startup --runs 7
+    python -m benchmarks.startup --history benchmarks/startup-history.jsonl
+    python -m benchmarks.startup --importtime 20
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tomllib
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent.parent
+PHASES = ("import", "create_app", "first_request", "total")
+
+_PROBE = """
+import json, time
+t0 = time.perf_counter()
+import app.main
+t1 = time.perf_counter()
+application = app.main.create_app()
+t2 = time.perf_counter()
+from fastapi.testclient import TestClient
+from core.config import settings
+TestClient(application).get(f"{settings.API_V1_STR}/utils/health-check/")
+t3 = time.perf_counter()
+print(json.dumps({
+    "import": (t1 - t0) * 1000,
+    "create_app": (t2 - t1) * 1000,
+    "first_request": (t3 - t2) * 1000,
+    "total": (t3 - t0) * 1000,
+}))
+"""
+
+
+def _run_probe() -> dict[str, float]:
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _importtime(top: int) -> None:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main; app.main.create_app()"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line[13:]:
+            continue
+        self_us, cumulative_us, module = (part.strip() for part in line[12:].split("|"))
+        if self_us.isdigit():
+            rows.append((int(self_us), int(cumulative_us), module.strip()))
+    print(f"\n  {'módulo':<60} {'propio ms':>10} {'acumulado ms':>13}")
+    for self_us, cumulative_us, module in sorted(rows, reverse=True)[:top]:
+        print(f"  {module:<60} {self_us / 1000:>10.1f} {cumulative_us / 1000:>13.1f}")
+
+
+def _version() -> dict[str, str]:
+    with open(BACKEND_DIR / "pyproject.toml", "rb") as f:
+        version = tomllib.load(f)["project"]["version"]
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = "desconocido"
+    return {"version": version, "commit": commit}
+
+
+def _record(path: Path, medians: dict[str, float]) -> None:
+    previous = None
+    if path.exists():
+        lines = [line for line in path.read_text().splitlines() if line.strip()]
+        previous = json.loads(lines[-1]) if lines else None
+
+    entry = {
+        **_version(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "cpus": os.cpu_count(),
+        "ms": {phase: round(value, 1) for phase, value in medians.items()},
+    }
+    with path.open("a") as f:
+        f.write(json.dumps(entry) + "\n")
+
+    if previous:
+        print(f"\n  vs {previous['version']} ({previous['commit']}, {previous['date']}):")
+        for phase in PHASES:
+            before, now = previous["ms"].get(phase), entry["ms"][phase]
+            if before:
+                print(f"  {phase:<14} {before:9.1f} -> {now:9.1f} ms ({(now - before) / before:+.0%})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--history", type=Path, help="archivo JSON Lines con el histórico")
+    parser.add_argument("--importtime", type=int, default=0, metavar="N")
+    args = parser.parse_args()
+
+    _run_probe()  # calentar la caché de bytecode y del sistema de archivos
+    runs = [_run_probe() for _ in range(args.runs)]
+    medians = {phase: statistics.median(r[phase] for r in runs) for phase in PHASES}
+
+    print(f"Arranque de un worker, mediana de {args.runs} procesos:")
+    for phase in PHASES:
+        values = [r[phase] for r in runs]
+        print(
+            f"  {phase:<14} {medians[phase]:9.1f} ms"
+            f"   (min {min(values):8.1f}, max {max(values):8.1f})"
+        )
+
+    if args.history:
+        _record(args.history, medians)
+    if args.importtime:
+        _importtime(args.importtime)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Archivo de órdenes cerradas y facturas pagadas (models.archive).
+
+Las facturas pagadas y las órdenes completadas o canceladas con más de
+ARCHIVE_HORIZON_DAYS días se mueven a las tablas `*_archivo` junto con sus
+artículos, pagos e items, para que las tablas e índices que se usan durante el
+servicio no crezcan sin límite. Se mueven de a ARCHIVE_BATCH_SIZE filas, cada
+lote en su propia transacción (INSERT ... SELECT y DELETE), así que el job se
+puede interrumpir en cualquier momento y no bloquea las tablas mucho tiempo.
+Se programa con cron, p. ej. cada noche:
+
+    python -m core.archive
+    python -m core.archive --max-lotes 20   # como máximo 20 lotes por tabla
+
+No se archiva lo que todavía está referenciado desde las tablas activas: facturas
+con correcciones, órdenes con factura sin archivar o que siguen como orden activa
+de una mesa. Las órdenes se archivan después de las facturas, de modo que una
+orden facturada sale en la misma pasada que su factura.
+
+Las lecturas por ID o número (`find_archived`) y los listados del historial
+(`list_archived`, `count_archived`) consultan el archivo cuando el registro ya
+no está en las tablas activas, con el mismo filtro por restaurante que
+core.tenant aplica a las activas.
+"""
+import argparse
+import logging
+import uuid
+from collections.abc import Callable
+from datetime import date, datetime, timedelta
+from typing import Any, TypeVar
+
+from sqlalchemy import (
+    ColumnElement,
+    DateTime,
+    Select,
+    Table,
+    create_engine,
+    delete,
+    exists,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+)
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import Session, SQLModel
+
+from core.config import settings
+from core.tenant import current_tenant
+from models.archive import ARCHIVE_TABLES, ARCHIVED_AT
+from models.bill.articulofactura import ArticuloFactura
+from models.bill.correccionfactura import CorreccionFactura
+from models.bill.factura import Factura
+from models.bill.pagos import Pago
+from models.company.mesarestaurante import MesaRestaurante
+from models.product.orden import Orden
+from models.product.ordenitem import OrdenItem
+
+logger = logging.getLogger(__name__)
+
+ModelT = TypeVar("ModelT", bound=SQLModel)
+
+# Estados de orden que ya no cambian
+ESTADOS_ORDEN_ARCHIVABLES = ("completada", "cancelada")
+
+
+def archive_cutoff(today: date | None = None) -> date:
+    """Fecha límite: se archiva lo anterior a este día."""
+    return (today or datetime.utcnow().date()) - timedelta(days=settings.ARCHIVE_HORIZON_DAYS)
+
+
+def _facturas_archivables(cutoff: date) -> Select[Any]:
+    factura = Factura.__table__
+    correccion = CorreccionFactura.__table__
+    return select(factura.c.id).where(
+        factura.c.estado == "pagada",
+        factura.c.fecha < datetime.combine(cutoff, datetime.min.time()),
+        ~exists().where(
+            or_(
+                correccion.c.factura_original_id == factura.c.id,
+                correccion.c.factura_correccion_id == factura.c.id,
+            )
+        ),
+    )
+
+
+def _ordenes_archivables(cutoff: date) -> Select[Any]:
+    orden = Orden.__table__
+    factura = Factura.__table__
+    mesa = MesaRestaurante.__table__
+    return select(orden.c.id).where(
+        orden.c.estado.in_(ESTADOS_ORDEN_ARCHIVABLES),
+        # `fecha` es texto ISO 8601 (la app envía toISOString), que ordena igual
+        # que la fecha: "2026-04-21T13:05:00.000Z" < "2026-04-22"
+        orden.c.fecha < cutoff.isoformat(),
+        ~exists().where(factura.c.orden_id == orden.c.id),
+        ~exists().where(mesa.c.orden_activa_id == orden.c.id),
+    )
+
+
+# (modelo, consulta de los IDs archivables, [(modelo hijo, columna hacia el padre)])
+_JOBS: list[
+    tuple[type[SQLModel], Callable[[date], Select[Any]], list[tuple[type[SQLModel], str]]]
+] = [
+    (Factura, _facturas_archivables, [(ArticuloFactura, "factura_id"), (Pago, "factura_id")]),
+    (Orden, _ordenes_archivables, [(OrdenItem, "orden_id")]),
+]
+
+
+def _move(
+    connection: Connection, model: type[SQLModel], where: ColumnElement[bool], now: datetime
+) -> int:
+    hot: Table = model.__table__  # type: ignore[attr-defined]
+    cold = ARCHIVE_TABLES[model]
+    names = [column.name for column in cold.columns if column.name != ARCHIVED_AT]
+    connection.execute(
+        insert(cold).from_select(
+            [*names, ARCHIVED_AT],
+            select(*(hot.c[name] for name in names), literal(now, DateTime())).where(where),
+        )
+    )
+    return connection.execute(delete(hot).where(where)).rowcount
+
+
+def archive(
+    engine: Engine,
+    *,
+    cutoff: date,
+    batch_size: int,
+    max_batches: int | None = None,
+) -> dict[str, int]:
+    """
+    Mover al archivo lo cerrado antes de `cutoff`. Devuelve las filas archivadas
+    por tabla principal (facturas y órdenes, sin contar sus hijos).
+    """
+    moved: dict[str, int] = {}
+    for model, archivables, children in _JOBS:
+        hot: Table = model.__table__  # type: ignore[attr-defined]
+        total = batches = 0
+        while max_batches is None or batches < max_batches:
+            with engine.begin() as connection:
+                if connection.dialect.name == "postgresql":
+                    connection.exec_driver_sql("SET LOCAL lock_timeout = '5s'")
+                # SKIP LOCKED: las filas que alguien está modificando quedan para otra pasada
+                ids: list[uuid.UUID] = list(
+                    connection.execute(
+                        archivables(cutoff)
+                        .limit(batch_size)
+                        .with_for_update(of=hot, skip_locked=True)
+                    ).scalars()
+                )
+                if not ids:
+                    break
+                now = datetime.utcnow()
+                for child, column in children:
+                    child_table: Table = child.__table__  # type: ignore[attr-defined]
+                    _move(connection, child, child_table.c[column].in_(ids), now)
+                total += _move(connection, model, hot.c.id.in_(ids), now)
+            batches += 1
+            logger.debug("Lote archivado de %s: %d filas", hot.name, len(ids))
+        moved[hot.name] = total
+    return moved
+
+
+def _visible(session: Session, table: Table) -> ColumnElement[bool] | None:
+    """Filtro por restaurante de core.tenant sobre una tabla de archivo."""
+    scope = current_tenant(session)
+    if scope.unrestricted:
+        return None
+    if "restaurante_id" in table.c:
+        return scope.restaurante_filter(table.c.restaurante_id)
+    # Items, artículos y pagos se archivan siempre junto con su orden / factura
+    parent_model, column = (Orden, "orden_id") if "orden_id" in table.c else (Factura, "factura_id")
+    parent = ARCHIVE_TABLES[parent_model]
+    return table.c[column].in_(
+        select(parent.c.id).where(scope.restaurante_filter(parent.c.restaurante_id))
+    )
+
+
+def _where(session: Session, model: type[SQLModel], filters: dict[str, Any]) -> list[Any]:
+    table = ARCHIVE_TABLES[model]
+    conditions: list[Any] = [table.c[name] == value for name, value in filters.items()]
+    visible = _visible(session, table)
+    if visible is not None:
+        conditions.append(visible)
+    return conditions
+
+
+def _select(session: Session, model: type[SQLModel], filters: dict[str, Any]) -> Select[Any]:
+    table = ARCHIVE_TABLES[model]
+    columns = [column for column in table.columns if column.name != ARCHIVED_AT]
+    return select(*columns).where(*_where(session, model, filters))
+
+
+def find_archived(session: Session, model: type[ModelT], **filters: Any) -> ModelT | None:
+    """
+    Registro archivado de `model` con los valores de `filters`, como instancia
+    del modelo fuera de la sesión (solo lectura), o None.
+    """
+    row = session.execute(_select(session, model, filters).limit(1)).first()
+    return model.model_validate(dict(row._mapping)) if row else None
+
+
+def list_archived(
+    session: Session,
+    model: type[ModelT],
+    *,
+    skip: int = 0,
+    limit: int | None = 100,
+    **filters: Any,
+) -> list[ModelT]:
+    """Registros archivados de `model` con los valores de `filters`, paginados."""
+    statement = _select(session, model, filters).offset(skip).limit(limit)
+    return [model.model_validate(dict(row._mapping)) for row in session.execute(statement)]
+
+
+def count_archived(session: Session, model: type[SQLModel], **filters: Any) -> int:
+    statement = (
+        select(func.count())
+        .select_from(ARCHIVE_TABLES[model])
+        .where(*_where(session, model, filters))
+    )
+    return session.execute(statement).scalar_one()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Archivar órdenes cerradas y facturas pagadas")
+    parser.add_argument("--max-lotes", type=int, default=None, help="lotes como máximo por tabla")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    cutoff = archive_cutoff()
+    engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI), poolclass=NullPool)
+    try:
+        moved = archive(
+            engine,
+            cutoff=cutoff,
+            batch_size=settings.ARCHIVE_BATCH_SIZE,
+            max_batches=args.max_lotes,
+        )
+    finally:
+        engine.dispose()
+    for table, count in moved.items():
+        logger.info("%s: %d filas archivadas (anteriores a %s)", table, count, cutoff)
+
+
+if __name__ == "__main__":
+    main()
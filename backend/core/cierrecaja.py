@@ -0,0 +1,217 @@
+"""
+Cierre de caja por restaurante (informe Z, models.bill.cierrecaja).
+
+Cada cierre cubre desde el cierre anterior del restaurante hasta el momento en
+que se cierra, así que los periodos son consecutivos y no se solapan (el primer
+cierre de un restaurante empieza al inicio de ese día). Al cerrar se calculan una
+sola vez:
+
+- los pagos cobrados y los reembolsos registrados en el periodo, por método de
+  pago;
+- las facturas emitidas en el periodo por estado y el total facturado;
+- las correcciones aprobadas en el periodo por tipo.
+
+El resultado se guarda y no se vuelve a tocar: el historial de cierres se lee
+tal cual, sin recorrer pagos ni facturas. Los pagos se asignan al periodo en que
+el servidor registró el cobro (`Pago.cobrado_en`) o el reembolso
+(`Pago.reembolsado_en`), no por `fecha_pago`. Un pago sin conexión sincronizado
+tarde, o el reembolso de un pago de un día ya cerrado, entra en el cierre
+siguiente en lugar de perderse.
+
+Se cierra desde la API (POST /cierres-caja/restaurante/{id}) o con cron al final
+del día para todos los restaurantes, cada uno en su propia transacción:
+
+    python -m core.cierrecaja
+    python -m core.cierrecaja --restaurante <uuid>
+"""
+import argparse
+import logging
+import uuid
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.pool import NullPool
+from sqlmodel import Session, col, select
+
+import models  # noqa: F401  registra todas las tablas en el metadata
+from core.config import settings
+from models.bill.cierrecaja import CierreCaja
+from models.bill.correccionfactura import CorreccionFactura
+from models.bill.factura import Factura
+from models.bill.pagos import Pago
+from models.company.restaurante import Restaurante
+
+logger = logging.getLogger(__name__)
+
+# Facturas que no suman al total facturado
+ESTADOS_FACTURA_SIN_TOTAL = ("anulada", "cancelada")
+
+
+def ultimo_cierre(*, session: Session, restaurante_id: uuid.UUID) -> CierreCaja | None:
+    statement = (
+        select(CierreCaja)
+        .where(CierreCaja.restaurante_id == restaurante_id)
+        .order_by(col(CierreCaja.numero).desc())
+        .limit(1)
+    )
+    return session.exec(statement).first()
+
+
+def _resumen_pagos(
+    session: Session, restaurante_id: uuid.UUID, desde: datetime, hasta: datetime
+) -> dict[str, Any]:
+    # Cobros del periodo, aunque después se hayan reembolsado: el reembolso se
+    # descuenta en el cierre en que se registra
+    cobros = (
+        select(Pago.metodo_pago, func.sum(Pago.monto), func.count())
+        .join(Factura, col(Factura.id) == Pago.factura_id)
+        .where(
+            Factura.restaurante_id == restaurante_id,
+            col(Pago.cobrado_en) > desde,
+            col(Pago.cobrado_en) <= hasta,
+            col(Pago.estado).in_(("completado", "reembolsado")),
+        )
+        .group_by(Pago.metodo_pago)
+    )
+    reembolsos_periodo = (
+        select(func.sum(Pago.monto))
+        .join(Factura, col(Factura.id) == Pago.factura_id)
+        .where(
+            Factura.restaurante_id == restaurante_id,
+            col(Pago.reembolsado_en) > desde,
+            col(Pago.reembolsado_en) <= hasta,
+            Pago.estado == "reembolsado",
+        )
+    )
+    por_metodo: dict[str, dict[str, Any]] = {}
+    total = 0.0
+    cantidad = 0
+    for metodo, monto, n in session.exec(cobros).all():
+        por_metodo[metodo] = {"monto": round(monto, 2), "cantidad": n}
+        total += monto
+        cantidad += n
+    reembolsos = session.exec(reembolsos_periodo).one() or 0.0
+    return {
+        "pagos_por_metodo": por_metodo,
+        "total_pagos": round(total, 2),
+        "cantidad_pagos": cantidad,
+        "total_reembolsos": round(reembolsos, 2),
+    }
+
+
+def _resumen_facturas(
+    session: Session, restaurante_id: uuid.UUID, desde: datetime, hasta: datetime
+) -> dict[str, Any]:
+    statement = (
+        select(Factura.estado, func.count(), func.sum(Factura.total))
+        .where(
+            Factura.restaurante_id == restaurante_id,
+            Factura.fecha > desde,
+            Factura.fecha <= hasta,
+        )
+        .group_by(Factura.estado)
+    )
+    por_estado: dict[str, int] = {}
+    total = 0.0
+    for estado, n, monto in session.exec(statement).all():
+        por_estado[estado] = n
+        if estado not in ESTADOS_FACTURA_SIN_TOTAL:
+            total += monto
+    return {"facturas_por_estado": por_estado, "total_facturado": round(total, 2)}
+
+
+def _resumen_correcciones(
+    session: Session, restaurante_id: uuid.UUID, desde: datetime, hasta: datetime
+) -> dict[str, Any]:
+    statement = (
+        select(CorreccionFactura.tipo_correccion, func.count(), func.sum(CorreccionFactura.monto_correccion))
+        .join(Factura, col(Factura.id) == CorreccionFactura.factura_original_id)
+        .where(
+            Factura.restaurante_id == restaurante_id,
+            CorreccionFactura.estado == "aprobada",
+            col(CorreccionFactura.fecha_aprobacion) > desde,
+            col(CorreccionFactura.fecha_aprobacion) <= hasta,
+        )
+        .group_by(CorreccionFactura.tipo_correccion)
+    )
+    por_tipo: dict[str, float] = {}
+    cantidad = 0
+    for tipo, n, monto in session.exec(statement).all():
+        por_tipo[tipo] = round(monto, 2)
+        cantidad += n
+    return {
+        "correcciones_por_tipo": por_tipo,
+        "cantidad_correcciones": cantidad,
+        "monto_correcciones": round(sum(por_tipo.values()), 2),
+    }
+
+
+def cerrar_caja(
+    *,
+    session: Session,
+    restaurante_id: uuid.UUID,
+    cerrado_por: uuid.UUID | None = None,
+    hasta: datetime | None = None,
+) -> CierreCaja:
+    """
+    Cerrar la caja de un restaurante hasta `hasta` (ahora por defecto) y guardar
+    el informe Z. Los cierres de un mismo restaurante se serializan bloqueando
+    su fila, así que dos cierres simultáneos no cubren el mismo periodo.
+    """
+    restaurante = session.get(Restaurante, restaurante_id, with_for_update=True)
+    if restaurante is None:
+        raise ValueError("El restaurante con este ID no existe.")
+    hasta = hasta or datetime.utcnow()
+    anterior = ultimo_cierre(session=session, restaurante_id=restaurante_id)
+    desde = anterior.hasta if anterior else datetime.combine(hasta.date(), datetime.min.time())
+    if hasta <= desde:
+        raise ValueError("Ya hay un cierre de caja hasta esa fecha")
+
+    cierre = CierreCaja(
+        restaurante_id=restaurante_id,
+        numero=anterior.numero + 1 if anterior else 1,
+        desde=desde,
+        hasta=hasta,
+        cerrado_por=cerrado_por,
+        **_resumen_pagos(session, restaurante_id, desde, hasta),
+        **_resumen_facturas(session, restaurante_id, desde, hasta),
+        **_resumen_correcciones(session, restaurante_id, desde, hasta),
+    )
+    session.add(cierre)
+    session.commit()
+    session.refresh(cierre)
+    return cierre
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cerrar la caja de los restaurantes")
+    parser.add_argument("--restaurante", type=uuid.UUID, default=None, help="solo este restaurante")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI), poolclass=NullPool)
+    hasta = datetime.utcnow()
+    try:
+        with Session(engine) as session:
+            ids = [args.restaurante] if args.restaurante else list(session.exec(select(Restaurante.id)))
+        for restaurante_id in ids:
+            with Session(engine) as session:
+                try:
+                    cierre = cerrar_caja(session=session, restaurante_id=restaurante_id, hasta=hasta)
+                except ValueError as e:
+                    logger.warning("Restaurante %s: %s", restaurante_id, e)
+                    continue
+            logger.info(
+                "Restaurante %s: cierre %d, %.2f en %d pagos",
+                restaurante_id,
+                cierre.numero,
+                cierre.total_pagos,
+                cierre.cantidad_pagos,
+            )
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
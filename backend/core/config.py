@@ -32,8 +32,35 @@ class Settings(BaseSettings):
     )
     API_V1_STR: str = "/api/v1"
     SECRET_KEY: str = secrets.token_urlsafe(32)
-    # 60 minutes * 24 hours * 8 days = 8 days
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    # Los access tokens se validan solo con la firma, sin consultar la BD: sus
+    # claims pueden quedar desactualizados hasta que vencen. Los clientes web y
+    # móvil los renuevan con /login/refresh-token al recibir 401/403
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    # La sesión (refresh token) dura 8 días y se renueva en cada rotación
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 8
+    # Cada cuánto recarga cada worker la lista de sesiones revocadas
+    TOKEN_REVOCATION_REFRESH_SECONDS: int = 30
+    # El primer esquema se usa para hashes nuevos; los demás solo se aceptan y se
+    # re-hashean en el siguiente login (p. ej. ["argon2", "bcrypt"], requiere argon2-cffi)
+    PASSWORD_HASH_SCHEMES: list[str] = ["bcrypt"]
+    BCRYPT_ROUNDS: int = 12
+    # Procesos dedicados a hashing (0 = un hilo dedicado) y máximo de solicitudes en cola
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_LIMIT: int = 64
+    # Hilos dedicados a generar miniaturas de imágenes de productos
+    THUMBNAIL_WORKERS: int = 2
+    # Almacenamiento de uploads: "local" (UPLOAD_DIR, por defecto backend/uploads)
+    # o "s3" (cualquier servicio compatible: AWS, MinIO...; requiere el extra "s3")
+    STORAGE_BACKEND: Literal["local", "s3"] = "local"
+    UPLOAD_DIR: str | None = None
+    S3_BUCKET: str = "crossfood-uploads"
+    S3_ENDPOINT_URL: str | None = None
+    S3_REGION: str | None = None
+    S3_ACCESS_KEY_ID: str | None = None
+    S3_SECRET_ACCESS_KEY: str | None = None
+    # URL pública del bucket o CDN; sin ella las lecturas usan URLs prefirmadas
+    S3_PUBLIC_URL: str | None = None
+    PRESIGNED_URL_EXPIRE_SECONDS: int = 900
     FRONTEND_HOST: str = "http://localhost:5173"
     ENVIRONMENT: Literal["local", "staging", "production"] = "local"
 
@@ -56,6 +83,58 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str = ""
     POSTGRES_DB: str = ""
 
+    # Réplica de lectura (core.replica), mismo usuario y base de datos que el
+    # primario. Sin POSTGRES_REPLICA_SERVER todo va al primario. Los listados solo
+    # leen de la réplica mientras su retraso no supere REPLICA_MAX_LAG_SECONDS
+    # (medido cada REPLICA_LAG_CHECK_SECONDS)
+    POSTGRES_REPLICA_SERVER: str | None = None
+    POSTGRES_REPLICA_PORT: int = 5432
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_LAG_CHECK_SECONDS: float = 2.0
+
+    # Conexiones por worker. Cada handler `def` con SessionDep ocupa un hilo del
+    # threadpool y una conexión, así que THREADPOOL_SIZE no debería superar
+    # DB_POOL_SIZE + DB_MAX_OVERFLOW (los hilos sobrantes esperarían conexión)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 15
+    THREADPOOL_SIZE: int = 20
+
+    # Métricas de consultas por request (Server-Timing y logs de posibles N+1)
+    SQL_INSTRUMENTATION: bool = True
+    SQL_N_PLUS_ONE_THRESHOLD: int = 5
+
+    # Endpoint /metrics en formato Prometheus; con METRICS_TOKEN exige
+    # `Authorization: Bearer <token>`
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: str | None = None
+
+    # Profiler por muestreo bajo demanda (solo superusuarios): duración máxima de
+    # una captura e intervalo mínimo entre muestras
+    PROFILER_ENABLED: bool = True
+    PROFILER_MAX_SECONDS: float = 30.0
+    PROFILER_MIN_INTERVAL_MS: float = 5.0
+
+    # Claves de idempotencia (cabecera Idempotency-Key) en órdenes, items y pagos:
+    # cuánto se recuerda una respuesta y máximo de operaciones por /sync/replay
+    IDEMPOTENCY_TTL_HOURS: int = 24
+    REPLAY_MAX_OPERATIONS: int = 200
+
+    # Tablas particionadas por mes (core.partitions): meses futuros que se
+    # mantienen creados por delante del actual
+    PARTITION_MONTHS_AHEAD: int = 3
+
+    # Archivo (core.archive): órdenes cerradas y facturas pagadas con más de
+    # ARCHIVE_HORIZON_DAYS días pasan a las tablas *_archivo, de a lotes
+    ARCHIVE_HORIZON_DAYS: int = 180
+    ARCHIVE_BATCH_SIZE: int = 500
+
+    # Facturas vencidas (core.vencidas): cada OVERDUE_SCAN_SECONDS cada worker
+    # marca las que vencieron desde el último escaneo (0 = sin escaneo en segundo
+    # plano, p. ej. si se programa `python -m core.vencidas` con cron). Con
+    # OVERDUE_REMINDERS se avisa por correo al cliente de cada factura nueva vencida
+    OVERDUE_SCAN_SECONDS: float = 60.0
+    OVERDUE_REMINDERS: bool = False
+
     @computed_field  # type: ignore[prop-decorator]
     @property
     def SQLALCHEMY_DATABASE_URI(self) -> PostgresDsn:
@@ -68,6 +147,20 @@ class Settings(BaseSettings):
             path=self.POSTGRES_DB,
         )
 
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def SQLALCHEMY_REPLICA_URI(self) -> PostgresDsn | None:
+        if not self.POSTGRES_REPLICA_SERVER:
+            return None
+        return PostgresDsn.build(
+            scheme="postgresql+psycopg",
+            username=self.POSTGRES_USER,
+            password=self.POSTGRES_PASSWORD,
+            host=self.POSTGRES_REPLICA_SERVER,
+            port=self.POSTGRES_REPLICA_PORT,
+            path=self.POSTGRES_DB,
+        )
+
     SMTP_TLS: bool = True
     SMTP_SSL: bool = False
     SMTP_PORT: int = 587
@@ -84,6 +177,13 @@ class Settings(BaseSettings):
         return self
 
     EMAIL_RESET_TOKEN_EXPIRE_HOURS: int = 48
+    # Cola de envío en segundo plano: tamaño máximo, reintentos con backoff
+    # exponencial y segundos sin uso tras los que se cierra la conexión SMTP
+    EMAIL_QUEUE_MAX_SIZE: int = 1000
+    EMAIL_MAX_RETRIES: int = 5
+    EMAIL_RETRY_BACKOFF_SECONDS: float = 2.0
+    SMTP_IDLE_SECONDS: float = 30.0
+    SMTP_TIMEOUT_SECONDS: float = 10.0
 
     @computed_field  # type: ignore[prop-decorator]
     @property
@@ -1,10 +1,87 @@
+import threading
+
+from sqlalchemy.engine import Engine
 from sqlmodel import Session, create_engine, select
 
-from app.routes.auth.users import crud
 from core.config import settings
+from core.metrics import register_pool
+from core.query_stats import instrument_engine
+from core.sync import install_change_tracking
+from core.tenant import install_tenant_filters
 from models.auth.users import User, UserCreate
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+# Engine compartido por todo el proceso (requests, lista de revocación, scripts).
+# Se crea con el primer uso y no al importar: importar la app no abre nada ni
+# carga el driver de la base de datos.
+_engine: Engine | None = None
+_replica_engine: Engine | None = None
+_engine_lock = threading.Lock()
+
+
+def _configure(engine: Engine) -> Engine:
+    install_change_tracking()
+    install_tenant_filters()
+    if settings.SQL_INSTRUMENTATION:
+        instrument_engine(engine)
+    if settings.METRICS_ENABLED:
+        register_pool(engine.pool)
+    return engine
+
+
+def get_engine() -> Engine:
+    """
+    Engine de la aplicación; lo crea la primera vez que se pide.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _configure(
+                    create_engine(
+                        str(settings.SQLALCHEMY_DATABASE_URI),
+                        pool_size=settings.DB_POOL_SIZE,
+                        max_overflow=settings.DB_MAX_OVERFLOW,
+                    )
+                )
+    return _engine
+
+
+def set_engine(engine: Engine) -> None:
+    """
+    Usar `engine` como engine de la aplicación (tests, benchmarks).
+    """
+    global _engine
+    with _engine_lock:
+        _engine = _configure(engine)
+
+
+def get_replica_engine() -> Engine | None:
+    """
+    Engine de la réplica de lectura (core.replica), o None si no hay réplica
+    configurada. Las conexiones son de solo lectura.
+    """
+    global _replica_engine
+    if _replica_engine is None and settings.SQLALCHEMY_REPLICA_URI:
+        with _engine_lock:
+            if _replica_engine is None:
+                _replica_engine = _configure(
+                    create_engine(
+                        str(settings.SQLALCHEMY_REPLICA_URI),
+                        pool_size=settings.DB_POOL_SIZE,
+                        max_overflow=settings.DB_MAX_OVERFLOW,
+                        execution_options={"postgresql_readonly": True},
+                    )
+                )
+    return _replica_engine
+
+
+def set_replica_engine(engine: Engine) -> None:
+    """
+    Usar `engine` como réplica de lectura (tests, benchmarks).
+    """
+    global _replica_engine
+    with _engine_lock:
+        _replica_engine = _configure(engine)
 
 
 # make sure all SQLModel models are imported (app.models) before initializing DB
@@ -19,7 +96,7 @@ def init_db(session: Session) -> None:
     # from sqlmodel import SQLModel
 
     # This works because the models are already imported and registered from app.models
-    # SQLModel.metadata.create_all(engine)
+    # SQLModel.metadata.create_all(get_engine())
 
     user = session.exec(
         select(User).where(User.email == settings.FIRST_SUPERUSER)
@@ -31,4 +108,6 @@ def init_db(session: Session) -> None:
             password=settings.FIRST_SUPERUSER_PASSWORD,
             is_superuser=True,
         )
+        from app.routes.auth.users import crud
+
         user = crud.create_user(session=session, user_create=user_in)
@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Any, Callable
+
+from passlib.context import CryptContext
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache
+def build_crypt_context(schemes: tuple[str, ...], bcrypt_rounds: int) -> CryptContext:
+    """
+    Construir el CryptContext de contraseñas.
+    El primer esquema es el que se usa para hashes nuevos; el resto se aceptan
+    pero quedan marcados como obsoletos, igual que los bcrypt con menos rondas.
+    """
+    return CryptContext(
+        schemes=list(schemes),
+        deprecated="auto",
+        bcrypt__default_rounds=bcrypt_rounds,
+        bcrypt__min_rounds=bcrypt_rounds,
+    )
+
+
+# Funciones ejecutadas dentro de los procesos del pool (deben ser picklables)
+
+
+def _hash(password: str, schemes: tuple[str, ...], bcrypt_rounds: int) -> str:
+    return build_crypt_context(schemes, bcrypt_rounds).hash(password)
+
+
+def _verify_and_update(
+    password: str, hashed_password: str, schemes: tuple[str, ...], bcrypt_rounds: int
+) -> tuple[bool, str | None]:
+    return build_crypt_context(schemes, bcrypt_rounds).verify_and_update(
+        password, hashed_password
+    )
+
+
+class PasswordHasherBusy(Exception):
+    """La cola de hashing está llena; el cliente debe reintentar más tarde."""
+
+
+@dataclass
+class PasswordHasherStats:
+    workers: int
+    queue_limit: int
+    in_flight: int = 0
+    waiting: int = 0
+    completed: int = 0
+    rejected: int = 0
+    total_wait_seconds: float = 0.0
+    total_hash_seconds: float = 0.0
+
+
+class PasswordHasher:
+    """
+    Pool dedicado para hashear y verificar contraseñas fuera del threadpool compartido.
+
+    - Con `workers > 0` usa un ProcessPoolExecutor (spawn) de ese tamaño.
+    - Con `workers == 0` usa un único hilo propio (útil en desarrollo y benchmarks).
+    Como mucho `workers` operaciones se ejecutan a la vez; hasta `queue_limit`
+    esperan turno y, por encima de eso, se lanza PasswordHasherBusy.
+    """
+
+    def __init__(
+        self,
+        *,
+        schemes: tuple[str, ...],
+        bcrypt_rounds: int,
+        workers: int,
+        queue_limit: int,
+    ) -> None:
+        self.schemes = schemes
+        self.bcrypt_rounds = bcrypt_rounds
+        self.stats = PasswordHasherStats(workers=workers, queue_limit=queue_limit)
+        self._executor: Executor | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.stats.workers > 0:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.stats.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="password-hasher"
+                )
+        return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(max(self.stats.workers, 1))
+        return self._semaphore
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self.stats.waiting >= self.stats.queue_limit:
+            self.stats.rejected += 1
+            raise PasswordHasherBusy("Demasiadas solicitudes de autenticación en cola")
+
+        self.stats.waiting += 1
+        queued_at = time.perf_counter()
+        try:
+            await self._get_semaphore().acquire()
+        finally:
+            self.stats.waiting -= 1
+
+        started_at = time.perf_counter()
+        self.stats.total_wait_seconds += started_at - queued_at
+        self.stats.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._get_executor(), fn, *args, self.schemes, self.bcrypt_rounds
+            )
+        finally:
+            self.stats.in_flight -= 1
+            self.stats.completed += 1
+            self.stats.total_hash_seconds += time.perf_counter() - started_at
+            self._get_semaphore().release()
+
+    async def hash(self, password: str) -> str:
+        """
+        Generar el hash de una contraseña con el esquema por defecto.
+        """
+        return await self._run(_hash, password)
+
+    async def verify_and_update(
+        self, password: str, hashed_password: str
+    ) -> tuple[bool, str | None]:
+        """
+        Verificar una contraseña.
+        Retorna (válida, nuevo_hash); nuevo_hash no es None cuando el hash guardado
+        usa un esquema o un número de rondas obsoleto y debe reemplazarse.
+        """
+        return await self._run(_verify_and_update, password, hashed_password)
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Métricas actuales del pool (cola, en curso, tiempos acumulados).
+        """
+        return asdict(self.stats)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,227 @@
+"""
+Idempotencia de las operaciones de escritura de órdenes, items y pagos.
+
+Con la cabecera `Idempotency-Key` una operación se aplica una sola vez: los
+reintentos (red inestable, cola offline del dispositivo) reciben la respuesta
+guardada con la cabecera `Idempotent-Replayed: true` en lugar de crear otra
+orden o descontar stock dos veces.
+
+La clave se registra en la misma sesión que usa el endpoint (ver deps.get_db),
+así que se confirma con el primer commit de la operación: si la operación no
+llegó a confirmarse, no queda clave y el reintento la ejecuta de nuevo. Dos
+intentos simultáneos chocan en la clave primaria y el segundo recibe 409.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections.abc import Callable, Coroutine, Iterator, Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from typing import Any
+
+import orjson
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import APIRoute
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+from starlette.requests import Request
+from starlette.responses import Response
+
+from core.config import settings
+from core.db import get_engine
+from models.idempotency import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 64
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+_PURGE_INTERVAL = 300.0
+
+# Sesión compartida durante /sync/replay: todas las operaciones del lote (y sus
+# claves) van en una sola transacción
+_shared_session: ContextVar[Session | None] = ContextVar("idempotency_shared_session", default=None)
+
+_purge_lock = threading.Lock()
+_last_purge = 0.0
+
+
+def operation_name(route: APIRoute) -> str:
+    # Igual que el operationId de OpenAPI (app.main.custom_generate_unique_id)
+    return f"{route.tags[0]}-{route.name}"
+
+
+def fingerprint(operation: str, params: Mapping[str, Any]) -> str:
+    """
+    Huella de una operación: nombre y parámetros de ruta/query (no el cuerpo,
+    para que un reintento con un JSON serializado distinto siga coincidiendo).
+    """
+    canonical = json.dumps(
+        [operation, sorted((k, str(v)) for k, v in params.items())], separators=(",", ":")
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()[:32]
+
+
+def shared_session() -> Session | None:
+    return _shared_session.get()
+
+
+@contextmanager
+def _session() -> Iterator[Session]:
+    shared = _shared_session.get()
+    if shared is not None:
+        yield shared
+        return
+    with Session(get_engine()) as session:
+        yield session
+
+
+@contextmanager
+def deferred_commits(session: Session) -> Iterator[Callable[[], Any]]:
+    """
+    Ejecutar varias operaciones sobre `session` en una sola transacción.
+
+    Mientras dure el bloque, `get_db` entrega esta sesión a los endpoints y sus
+    `commit()` se convierten en `flush()`. Devuelve una función que abre un
+    SAVEPOINT por operación; un `rollback()` dentro de la operación deshace solo
+    ese SAVEPOINT. El commit real lo hace quien llama, al salir del bloque.
+    """
+    nested: list[Any] = []
+
+    def begin() -> Any:
+        savepoint = session.begin_nested()
+        nested[:] = [savepoint]
+        return savepoint
+
+    def rollback() -> None:
+        if nested and nested[0].is_active:
+            nested[0].rollback()
+
+    session.commit = session.flush  # type: ignore[method-assign]
+    session.rollback = rollback  # type: ignore[method-assign]
+    token = _shared_session.set(session)
+    try:
+        yield begin
+    finally:
+        _shared_session.reset(token)
+        del session.commit
+        del session.rollback
+
+
+def new_claim(key: str, huella: str) -> IdempotencyKey:
+    return IdempotencyKey(
+        key=key,
+        huella=huella,
+        expires_at=datetime.utcnow() + timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS),
+    )
+
+
+def _lookup(key: str) -> tuple[str, int | None, bytes | None] | None:
+    with _session() as session:
+        record = session.get(IdempotencyKey, key)
+        if record is None:
+            return None
+        if record.expires_at <= datetime.utcnow():
+            # Caducada: se libera la clave para que el reintento se ejecute
+            session.delete(record)
+            session.commit()
+            return None
+        return record.huella, record.status_code, record.response
+
+
+def _store(key: str, status_code: int, body: bytes) -> None:
+    global _last_purge
+    with _session() as session:
+        session.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.key == key)
+            .values(status_code=status_code, response=body)
+        )
+        now = time.monotonic()
+        with _purge_lock:
+            purge = now - _last_purge >= _PURGE_INTERVAL
+            if purge:
+                _last_purge = now
+        if purge:
+            session.execute(
+                delete(IdempotencyKey).where(IdempotencyKey.expires_at < datetime.utcnow())
+            )
+        session.commit()
+
+
+def _replay(stored: tuple[str, int | None, bytes | None], huella: str) -> Response:
+    stored_huella, status_code, body = stored
+    if stored_huella != huella:
+        return ORJSONResponse(
+            status_code=422,
+            content={"detail": "La clave de idempotencia ya se usó para otra operación"},
+        )
+    if status_code is None:
+        return ORJSONResponse(
+            status_code=409,
+            content={"detail": "La operación con esta clave de idempotencia sigue en curso"},
+        )
+    return Response(
+        content=body,
+        status_code=status_code,
+        media_type="application/json",
+        headers={REPLAYED_HEADER: "true"},
+    )
+
+
+class IdempotentRoute(APIRoute):
+    """
+    Ruta que acepta `Idempotency-Key` en POST/PUT/PATCH/DELETE.
+    Se activa por router: `APIRouter(..., route_class=IdempotentRoute)`.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+        if not self.methods & MUTATING_METHODS:
+            return handler
+        operation = operation_name(self)
+
+        async def idempotent_handler(request: Request) -> Response:
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if key is None:
+                return await handler(request)
+            if not key or len(key) > MAX_KEY_LENGTH:
+                detail = f"{IDEMPOTENCY_HEADER} debe tener entre 1 y {MAX_KEY_LENGTH} caracteres"
+                return ORJSONResponse(status_code=400, content={"detail": detail})
+
+            huella = fingerprint(operation, {**request.query_params, **request.path_params})
+            stored = await run_in_threadpool(_lookup, key)
+            if stored is not None:
+                return _replay(stored, huella)
+
+            claim = new_claim(key, huella)
+            shared = _shared_session.get()
+            if shared is not None:
+                shared.add(claim)
+            else:
+                request.state.idempotency_claim = claim
+            try:
+                response = await handler(request)
+            except HTTPException as exc:
+                # Si la operación ya había confirmado algo, el reintento debe
+                # recibir este mismo error (sin clave confirmada no se guarda nada)
+                body = orjson.dumps({"detail": exc.detail})
+                await run_in_threadpool(_store, key, exc.status_code, body)
+                raise
+            except IntegrityError:
+                if shared is not None:
+                    shared.rollback()
+                stored = await run_in_threadpool(_lookup, key)
+                if stored is None:
+                    raise
+                return _replay(stored, huella)
+
+            if response.status_code < 500:
+                await run_in_threadpool(_store, key, response.status_code, bytes(response.body))
+            return response
+
+        return idempotent_handler
@@ -0,0 +1,93 @@
+import logging
+import posixpath
+import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from PIL import Image, ImageOps
+
+from core.config import settings
+
+if TYPE_CHECKING:
+    from core.storage import StorageBackend
+
+logger = logging.getLogger(__name__)
+
+# Anchos de las miniaturas WebP generadas para cada imagen de producto
+THUMBNAIL_WIDTHS = (160, 480)
+
+# Pillow libera el GIL al redimensionar y codificar, así que basta con hilos
+thumbnail_pool = ThreadPoolExecutor(
+    max_workers=settings.THUMBNAIL_WORKERS, thread_name_prefix="thumbnails"
+)
+
+
+def thumbnail_key(key: str, width: int) -> str:
+    """
+    Clave de la miniatura de `key` ("productos/e/abc.jpg" -> "productos/e/abc_160.webp").
+    """
+    stem = posixpath.splitext(key)[0]
+    return f"{stem}_{width}.webp"
+
+
+def generate_thumbnails(
+    storage: "StorageBackend",
+    key: str,
+    source: Path | None = None,
+    widths: tuple[int, ...] = THUMBNAIL_WIDTHS,
+) -> list[str]:
+    """
+    Generar y guardar en `storage` las miniaturas WebP que falten para `key`.
+    `source` es una copia local del original; si no se pasa, se descarga.
+    """
+    pending = [w for w in widths if not storage.exists(thumbnail_key(key, w))]
+    if not pending:
+        return []
+
+    with tempfile.TemporaryDirectory(prefix="thumbnails-") as tmp_dir:
+        if source is None:
+            source = Path(tmp_dir) / "original"
+            storage.download(key, source)
+
+        generated = []
+        with Image.open(source) as image:
+            image = ImageOps.exif_transpose(image)
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA")
+            for width in pending:
+                if image.width > width:
+                    height = max(round(image.height * width / image.width), 1)
+                    resized = image.resize((width, height), Image.Resampling.LANCZOS)
+                else:
+                    resized = image
+                target = Path(tmp_dir) / f"{width}.webp"
+                resized.save(target, format="WEBP", quality=80, method=4)
+                storage.save_file(thumbnail_key(key, width), target, "image/webp")
+                generated.append(thumbnail_key(key, width))
+    return generated
+
+
+def _process_upload(storage: "StorageBackend", key: str, source: Path | None) -> None:
+    try:
+        generate_thumbnails(storage, key, source)
+    finally:
+        if source is not None:
+            source.unlink(missing_ok=True)
+
+
+def _log_thumbnail_errors(future: Future) -> None:
+    if exc := future.exception():
+        logger.error("Error al generar miniaturas", exc_info=exc)
+
+
+def schedule_thumbnails(
+    storage: "StorageBackend", key: str, source: Path | None = None
+) -> Future:
+    """
+    Encolar la generación de miniaturas sin esperar a que termine.
+    Si se pasa `source` (copia local temporal del original), se borra al terminar.
+    """
+    future = thumbnail_pool.submit(_process_upload, storage, key, source)
+    future.add_done_callback(_log_thumbnail_errors)
+    return future
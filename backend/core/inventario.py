@@ -0,0 +1,140 @@
+"""
+Fotos periódicas del libro de movimientos de stock (models.product.movimientostock).
+
+Cada cambio de stock agrega una fila a `movimientostock` y actualiza el contador
+del producto (`productostock`, que se lee como `Producto.stock`) en la misma
+transacción (app.routes.product.producto.crud.mover_stock):
+el stock actual se lee del contador y el libro guarda la historia. Para no sumar
+el libro desde el principio, `tomar_snapshots` guarda por producto el stock tras
+su último movimiento: la foto anterior más los movimientos que la siguen. Cada
+vuelta lee solo los movimientos nuevos.
+
+Solo entran movimientos con más de MARGEN de antigüedad: los ids se asignan al
+insertar, así que una transacción que todavía no confirmó puede tener un id
+menor que el de una foto ya tomada.
+
+`verificar` compara el contador con la última foto más los movimientos
+posteriores y devuelve los productos en los que no coinciden. Se programa con
+cron:
+
+    python -m core.inventario
+    python -m core.inventario --verificar
+"""
+import argparse
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import DateTime, and_, create_engine, func, insert, literal, or_
+from sqlalchemy.pool import NullPool
+from sqlmodel import Session, col, select
+
+import models  # noqa: F401  registra todas las tablas en el metadata
+from core.config import settings
+from models.product.movimientostock import MovimientoStock, SnapshotStock
+from models.product.producto import ProductoStock
+
+logger = logging.getLogger(__name__)
+
+# Antigüedad mínima de un movimiento para entrar en una foto
+MARGEN = timedelta(minutes=5)
+
+
+def _ultimas_fotos() -> Any:
+    """Última foto de cada producto (producto_id, movimiento_id, stock)."""
+    ultima = (
+        select(SnapshotStock.producto_id, func.max(SnapshotStock.movimiento_id).label("movimiento_id"))
+        .group_by(SnapshotStock.producto_id)
+        .subquery()
+    )
+    return (
+        select(SnapshotStock.producto_id, SnapshotStock.movimiento_id, SnapshotStock.stock)
+        .join(
+            ultima,
+            and_(
+                col(SnapshotStock.producto_id) == ultima.c.producto_id,
+                col(SnapshotStock.movimiento_id) == ultima.c.movimiento_id,
+            ),
+        )
+        .subquery()
+    )
+
+
+def _stock_segun_libro(hasta: datetime | None = None) -> Any:
+    """
+    Por producto con movimientos posteriores a su última foto: el id del último
+    movimiento y el stock resultante. Con `hasta`, solo movimientos anteriores.
+    """
+    foto = _ultimas_fotos()
+    statement = (
+        select(
+            MovimientoStock.producto_id,
+            func.max(MovimientoStock.id).label("movimiento_id"),
+            (func.coalesce(func.max(foto.c.stock), 0) + func.sum(MovimientoStock.cantidad)).label("stock"),
+        )
+        .outerjoin(foto, foto.c.producto_id == MovimientoStock.producto_id)
+        .where(or_(foto.c.movimiento_id.is_(None), col(MovimientoStock.id) > foto.c.movimiento_id))
+        .group_by(MovimientoStock.producto_id)
+    )
+    if hasta is not None:
+        statement = statement.where(col(MovimientoStock.fecha) < hasta)
+    return statement
+
+
+def tomar_snapshots(*, session: Session, now: datetime | None = None) -> int:
+    """
+    Guardar una foto de cada producto con movimientos nuevos (anteriores a
+    `now - MARGEN`). Devuelve cuántas fotos se tomaron.
+    """
+    now = now or datetime.utcnow()
+    nuevas = _stock_segun_libro(now - MARGEN).subquery()
+    statement = insert(SnapshotStock).from_select(
+        ["producto_id", "movimiento_id", "stock", "fecha"],
+        select(nuevas.c.producto_id, nuevas.c.movimiento_id, nuevas.c.stock, literal(now, DateTime())),
+    )
+    tomadas = session.execute(statement).rowcount
+    session.commit()
+    return tomadas
+
+
+def verificar(*, session: Session) -> list[tuple[uuid.UUID, int, int]]:
+    """
+    Productos cuyo contador no coincide con el libro: (producto_id, contador,
+    stock según la última foto y los movimientos posteriores).
+    """
+    libro = _stock_segun_libro().subquery()
+    foto = _ultimas_fotos()
+    esperado = func.coalesce(libro.c.stock, foto.c.stock, 0)
+    statement = (
+        select(ProductoStock.producto_id, ProductoStock.stock, esperado)
+        .outerjoin(libro, libro.c.producto_id == ProductoStock.producto_id)
+        .outerjoin(foto, foto.c.producto_id == ProductoStock.producto_id)
+        .where(col(ProductoStock.stock) != esperado)
+    )
+    return [tuple(row) for row in session.exec(statement).all()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Tomar fotos del stock de los productos")
+    parser.add_argument(
+        "--verificar", action="store_true", help="comparar además el contador con el libro"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI), poolclass=NullPool)
+    try:
+        with Session(engine) as session:
+            logger.info("Fotos de stock tomadas: %d", tomar_snapshots(session=session))
+            if args.verificar:
+                for producto_id, contador, libro in verificar(session=session):
+                    logger.warning(
+                        "Producto %s: stock %d, según el libro %d", producto_id, contador, libro
+                    )
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
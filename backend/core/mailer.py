@@ -0,0 +1,216 @@
+import heapq
+import itertools
+import logging
+import smtplib
+import threading
+import time
+from dataclasses import asdict, dataclass
+from email.message import EmailMessage
+from email.utils import formataddr, make_msgid
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SMTPConfig:
+    host: str
+    port: int
+    use_tls: bool
+    use_ssl: bool
+    user: str | None
+    password: str | None
+    timeout: float
+
+
+@dataclass
+class EmailQueueStats:
+    queued: int = 0
+    sent: int = 0
+    retried: int = 0
+    failed: int = 0
+    dropped: int = 0
+    connections_opened: int = 0
+
+
+class EmailQueueFull(Exception):
+    """La cola de correos alcanzó su tamaño máximo."""
+
+
+class EmailQueue:
+    """
+    Cola de correos en memoria atendida por un hilo propio.
+
+    - El hilo mantiene abierta una conexión SMTP y la reutiliza entre mensajes;
+      la cierra tras `idle_seconds` sin trabajo y la reabre si el servidor la corta.
+    - Los errores transitorios (4xx, desconexiones, timeouts) se reintentan hasta
+      `max_retries` veces con backoff exponencial; los 5xx se descartan.
+    - El hilo arranca con el primer mensaje, no al importar el módulo.
+    Los correos pendientes se pierden si el proceso muere: es para avisos
+    (recuperación de contraseña, altas), no para mensajes que deban garantizarse.
+    """
+
+    def __init__(
+        self,
+        *,
+        smtp: SMTPConfig,
+        mail_from: tuple[str, str],
+        max_size: int,
+        max_retries: int,
+        backoff_seconds: float,
+        idle_seconds: float,
+    ) -> None:
+        self.smtp = smtp
+        self.mail_from = mail_from
+        self.max_size = max_size
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.idle_seconds = idle_seconds
+        self.stats = EmailQueueStats()
+        # (listo_en, secuencia, mensaje, intento)
+        self._heap: list[tuple[float, int, EmailMessage, int]] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._stopping = False
+        self._connection: smtplib.SMTP | None = None
+
+    # --- API pública -----------------------------------------------------
+
+    def enqueue(self, *, email_to: str, subject: str, html_content: str) -> None:
+        """
+        Encolar un correo HTML y volver de inmediato.
+        Lanza EmailQueueFull si la cola está llena.
+        """
+        message = EmailMessage()
+        message["Subject"] = subject
+        message["From"] = formataddr(self.mail_from)
+        message["To"] = email_to
+        message["Message-ID"] = make_msgid()
+        message.set_content(html_content, subtype="html")
+
+        with self._cond:
+            if len(self._heap) >= self.max_size:
+                self.stats.dropped += 1
+                raise EmailQueueFull("La cola de correos está llena")
+            self._push(message, attempt=0, delay=0)
+            self.stats.queued += 1
+            self._ensure_worker()
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._cond:
+            return {**asdict(self.stats), "pending": len(self._heap)}
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """
+        Esperar (hasta `timeout`) a que se envíe lo pendiente y detener el hilo.
+        """
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        with self._cond:
+            self._thread = None
+            self._stopping = False
+
+    # --- Hilo de envío ---------------------------------------------------
+
+    def _push(self, message: EmailMessage, *, attempt: int, delay: float) -> None:
+        heapq.heappush(
+            self._heap, (time.monotonic() + delay, next(self._seq), message, attempt)
+        )
+        self._cond.notify()
+
+    def _ensure_worker(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="email-queue", daemon=True
+            )
+            self._thread.start()
+
+    def _next_message(self) -> tuple[EmailMessage, int] | None:
+        with self._cond:
+            while True:
+                if self._heap:
+                    ready_at, _, message, attempt = self._heap[0]
+                    delay = ready_at - time.monotonic()
+                    if delay <= 0 or self._stopping:
+                        heapq.heappop(self._heap)
+                        return message, attempt
+                    self._cond.wait(delay)
+                elif self._stopping:
+                    return None
+                elif not self._cond.wait(self.idle_seconds):
+                    self._disconnect()
+
+    def _run(self) -> None:
+        while (item := self._next_message()) is not None:
+            message, attempt = item
+            self._deliver(message, attempt)
+        self._disconnect()
+
+    def _deliver(self, message: EmailMessage, attempt: int) -> None:
+        try:
+            self._connect().send_message(message)
+        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused) as e:
+            self._fail(message, e)
+        except smtplib.SMTPResponseException as e:
+            if e.smtp_code >= 500:
+                self._fail(message, e)
+            else:
+                self._retry(message, attempt, e)
+        except (smtplib.SMTPException, OSError) as e:
+            self._disconnect()
+            self._retry(message, attempt, e)
+        else:
+            with self._cond:
+                self.stats.sent += 1
+            logger.info(f"send email result: sent to {message['To']}")
+
+    def _retry(self, message: EmailMessage, attempt: int, error: Exception) -> None:
+        if attempt >= self.max_retries or self._stopping:
+            self._fail(message, error)
+            return
+        delay = self.backoff_seconds * 2**attempt
+        logger.warning(
+            f"Error enviando correo a {message['To']} ({error}); reintento en {delay:.0f}s"
+        )
+        with self._cond:
+            self.stats.retried += 1
+            self._push(message, attempt=attempt + 1, delay=delay)
+
+    def _fail(self, message: EmailMessage, error: Exception) -> None:
+        with self._cond:
+            self.stats.failed += 1
+        logger.error(f"No se pudo enviar el correo a {message['To']}: {error}")
+
+    def _connect(self) -> smtplib.SMTP:
+        if self._connection is not None:
+            try:
+                if self._connection.noop()[0] == 250:
+                    return self._connection
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._disconnect()
+
+        cfg = self.smtp
+        smtp_class = smtplib.SMTP_SSL if cfg.use_ssl else smtplib.SMTP
+        connection = smtp_class(cfg.host, cfg.port, timeout=cfg.timeout)
+        if cfg.use_tls and not cfg.use_ssl:
+            connection.starttls()
+        if cfg.user and cfg.password:
+            connection.login(cfg.user, cfg.password)
+        self._connection = connection
+        self.stats.connections_opened += 1
+        return connection
+
+    def _disconnect(self) -> None:
+        if self._connection is None:
+            return
+        try:
+            self._connection.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+        self._connection = None
@@ -0,0 +1,219 @@
+import os
+import secrets
+import time
+from typing import Any
+
+import anyio.to_thread
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy.pool import Pool, QueuePool
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Con varios workers (uvicorn --workers, gunicorn) hay que definir
+# PROMETHEUS_MULTIPROC_DIR apuntando a un directorio vacío y compartido por todos:
+# cada proceso escribe sus valores en archivos mmap propios, sin coordinarse con
+# los demás, y `/metrics` los suma al exponerlos. Sin la variable cada proceso
+# publica solo lo suyo.
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+# Latencias típicas de la API: de pocos ms (lecturas) a segundos (login, subidas)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# --- HTTP ----------------------------------------------------------------
+
+http_request_duration = Histogram(
+    "crossfood_http_request_duration_seconds",
+    "Duración de las requests HTTP por ruta (unique id de la operación)",
+    ["route", "method", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+http_requests_in_progress = Gauge(
+    "crossfood_http_requests_in_progress",
+    "Requests HTTP en curso",
+    multiprocess_mode="livesum",
+)
+
+# --- Threadpool y pool de conexiones -------------------------------------
+
+threadpool_busy = Gauge(
+    "crossfood_threadpool_busy_threads",
+    "Hilos del threadpool de AnyIO ocupados (handlers def, I/O bloqueante)",
+    multiprocess_mode="livesum",
+)
+threadpool_size = Gauge(
+    "crossfood_threadpool_size_threads",
+    "Tamaño máximo del threadpool de AnyIO",
+    multiprocess_mode="livesum",
+)
+db_pool_checked_out = Gauge(
+    "crossfood_db_pool_checked_out_connections",
+    "Conexiones a la base de datos en uso",
+    multiprocess_mode="livesum",
+)
+db_pool_size = Gauge(
+    "crossfood_db_pool_size_connections",
+    "Tamaño configurado del pool de conexiones (sin overflow)",
+    multiprocess_mode="livesum",
+)
+db_pool_overflow = Gauge(
+    "crossfood_db_pool_overflow_connections",
+    "Conexiones abiertas por encima del tamaño del pool",
+    multiprocess_mode="livesum",
+)
+
+# --- Negocio -------------------------------------------------------------
+
+orders_created = Counter(
+    "crossfood_orders_created", "Órdenes creadas"
+)
+order_items_added = Counter(
+    "crossfood_order_items_added", "Ítems añadidos a órdenes"
+)
+invoices_paid = Counter(
+    "crossfood_invoices_paid", "Facturas que pasaron a estado pagada"
+)
+payments = Counter(
+    "crossfood_payments", "Pagos registrados por método de pago", ["metodo"]
+)
+payments_amount = Counter(
+    "crossfood_payments_amount", "Importe de los pagos registrados por método de pago", ["metodo"]
+)
+
+# Valores libres en Pago.metodo_pago: lo desconocido se agrupa como "otro"
+PAYMENT_METHODS = {"efectivo", "tarjeta_credito", "tarjeta_debito", "transferencia", "otro"}
+
+
+def record_payment(metodo: str, monto: float) -> None:
+    metodo = metodo if metodo in PAYMENT_METHODS else "otro"
+    payments.labels(metodo).inc()
+    payments_amount.labels(metodo).inc(monto)
+
+
+_pools: list[Pool] = []
+
+
+def register_pool(pool: Pool) -> None:
+    """
+    Publicar las estadísticas de `pool` (pool del engine de la aplicación).
+    """
+    if pool not in _pools:
+        _pools.append(pool)
+
+
+def _sample_pools() -> None:
+    checked_out = size = overflow = 0
+    for pool in _pools:
+        # Solo QueuePool lleva estos contadores (p. ej. sqlite en memoria usa StaticPool)
+        if isinstance(pool, QueuePool):
+            checked_out += pool.checkedout()
+            size += pool.size()
+            overflow += max(pool.overflow(), 0)
+    db_pool_checked_out.set(checked_out)
+    db_pool_size.set(size)
+    db_pool_overflow.set(overflow)
+
+
+def _sample_threadpool() -> None:
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    threadpool_busy.set(limiter.borrowed_tokens)
+    threadpool_size.set(limiter.total_tokens)
+
+
+def _route_label(scope: Scope) -> str:
+    # FastAPI deja la APIRoute resuelta en el scope; su unique_id es el mismo
+    # `{tag}-{nombre}` que identifica la operación en el OpenAPI
+    route = scope.get("route")
+    if route is not None and hasattr(route, "unique_id"):
+        return route.unique_id
+    endpoint = scope.get("endpoint")
+    if endpoint is not None:
+        # Rutas de Starlette (/metrics) por nombre; montajes (/uploads) agrupados
+        return getattr(endpoint, "__name__", "static")
+    # Rutas inexistentes agrupadas para no disparar la cardinalidad
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mide cada request: latencia por ruta, requests en curso y
+    ocupación del threadpool y del pool de conexiones al terminar.
+    Todo el trabajo por request son unas pocas sumas en memoria.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_progress.inc()
+        _sample_threadpool()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_progress.dec()
+            http_request_duration.labels(
+                _route_label(scope), scope["method"], str(status)
+            ).observe(time.perf_counter() - start)
+            _sample_threadpool()
+            _sample_pools()
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """
+    Texto de exposición de Prometheus con las métricas de este proceso o, en modo
+    multiproceso, agregadas de todos los workers.
+    """
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def metrics_endpoint(token: str | None) -> Any:
+    """
+    Endpoint `/metrics`. Si `token` está definido exige `Authorization: Bearer <token>`.
+    """
+
+    async def metrics(request: Request) -> Response:
+        if token:
+            scheme, _, credentials = request.headers.get("authorization", "").partition(" ")
+            if scheme.lower() != "bearer" or not secrets.compare_digest(credentials, token):
+                return PlainTextResponse("Unauthorized", status_code=401)
+        _sample_threadpool()
+        _sample_pools()
+        body, content_type = render_metrics()
+        return Response(body, media_type=content_type)
+
+    return metrics
+
+
+def mark_process_dead(pid: int) -> None:
+    """
+    Limpiar los gauges de un worker que terminó (hook `child_exit` de gunicorn).
+    """
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,159 @@
+"""
+Mantenimiento de las tablas particionadas por mes (models.partitions).
+
+Cada tabla tiene una partición por mes (`pago_p2026_10` = octubre de 2026) y una
+DEFAULT que recoge lo que no cae en ninguna, para que un INSERT nunca falle por
+falta de partición. `ensure_partitions` crea las del mes actual y las
+PARTITION_MONTHS_AHEAD siguientes; se ejecuta al arrancar gunicorn (ver
+gunicorn.conf.py) y se puede programar con cron:
+
+    python -m core.partitions
+
+Si una fila llegó a la DEFAULT (p. ej. un pago con fecha de dentro de un año),
+al crear la partición de su mes se mueve a ella.
+
+Las consultas con rango sobre la columna de particionado (informes mensuales,
+`get_pagos_by_fecha_range`) solo leen las particiones de esos meses.
+"""
+import logging
+from datetime import date, datetime
+
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.pool import NullPool
+from sqlmodel import SQLModel
+
+import models  # noqa: F401  registra todas las tablas en el metadata
+from core.config import settings
+from models.partitions import MONTHLY_PARTITION
+
+logger = logging.getLogger(__name__)
+
+# Clave del advisory lock que serializa el mantenimiento (arbitraria, fija)
+_PARTITIONS_LOCK_KEY = 0x5C_0002
+
+
+def partitioned_tables() -> dict[str, str]:
+    """Tabla -> columna de particionado de las tablas particionadas por mes."""
+    return {
+        table.name: table.info[MONTHLY_PARTITION]
+        for table in SQLModel.metadata.sorted_tables
+        if MONTHLY_PARTITION in table.info
+    }
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+
+def _existing_partitions(connection: Connection, table: str) -> set[str]:
+    return set(
+        connection.execute(
+            text(
+                "SELECT c.relname FROM pg_inherits i"
+                " JOIN pg_class c ON c.oid = i.inhrelid"
+                " JOIN pg_class p ON p.oid = i.inhparent"
+                " WHERE p.relname = :table"
+            ),
+            {"table": table},
+        ).scalars()
+    )
+
+
+def _create_partition(
+    connection: Connection, table: str, column: str, name: str, month: date
+) -> None:
+    end = next_month(month)
+    default = f"{table}_default"
+    # Se crea suelta y se adjunta al final: ATTACH comprueba que la DEFAULT no
+    # tenga filas del rango, así que antes se mueven las que hubieran caído ahí
+    connection.exec_driver_sql(
+        f'CREATE TABLE "{name}" (LIKE "{table}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+    )
+    rango = {"start": month, "end": end}
+    connection.execute(
+        text(
+            f'INSERT INTO "{name}" SELECT * FROM "{default}"'
+            f' WHERE "{column}" >= :start AND "{column}" < :end'
+        ),
+        rango,
+    )
+    connection.execute(
+        text(f'DELETE FROM "{default}" WHERE "{column}" >= :start AND "{column}" < :end'),
+        rango,
+    )
+    connection.exec_driver_sql(
+        f'ALTER TABLE "{table}" ATTACH PARTITION "{name}"'
+        f" FOR VALUES FROM ('{month.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+
+def ensure_partitions(
+    connection: Connection,
+    *,
+    months_ahead: int,
+    since: date | None = None,
+    today: date | None = None,
+) -> list[str]:
+    """
+    Crear la DEFAULT y las particiones mensuales que falten, desde el mes de
+    `since` (por defecto el actual) hasta `months_ahead` meses después del
+    actual. Devuelve los nombres de las particiones creadas.
+
+    Debe llamarse dentro de una transacción. En bases de datos que no son
+    PostgreSQL no hace nada.
+    """
+    if connection.dialect.name != "postgresql":
+        return []
+    connection.execute(select(func.pg_advisory_xact_lock(_PARTITIONS_LOCK_KEY)))
+    # No quedarse esperando detrás de una transacción larga sobre la tabla
+    connection.exec_driver_sql("SET LOCAL lock_timeout = '5s'")
+
+    current = month_start(today or datetime.utcnow().date())
+    last = current
+    for _ in range(months_ahead):
+        last = next_month(last)
+
+    created: list[str] = []
+    for table, column in partitioned_tables().items():
+        connection.exec_driver_sql(
+            f'CREATE TABLE IF NOT EXISTS "{table}_default" PARTITION OF "{table}" DEFAULT'
+        )
+        existing = _existing_partitions(connection, table)
+        month = month_start(since) if since else current
+        while month <= last:
+            name = partition_name(table, month)
+            if name not in existing:
+                _create_partition(connection, table, column, name, month)
+                created.append(name)
+            month = next_month(month)
+    return created
+
+
+def maintain() -> list[str]:
+    """
+    Ejecutar `ensure_partitions` con su propio engine (sin pool): se usa desde el
+    maestro de gunicorn, donde no debe crearse el engine que heredarían los workers.
+    """
+    engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI), poolclass=NullPool)
+    try:
+        with engine.begin() as connection:
+            return ensure_partitions(
+                connection, months_ahead=settings.PARTITION_MONTHS_AHEAD
+            )
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for name in maintain():
+        logger.info("Partición creada: %s", name)
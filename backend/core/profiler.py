@@ -0,0 +1,159 @@
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from types import FrameType
+
+from core.config import settings
+
+# Hojas de pila que indican un hilo esperando trabajo (threadpool ocioso, event
+# loop en select, cola de correos...). Se descartan salvo que se pidan.
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+}
+
+
+class ProfilerBusy(Exception):
+    """Ya hay una captura en curso en este proceso."""
+
+
+@dataclass
+class Profile:
+    id: str
+    interval: float
+    include_idle: bool
+    started_at: float = field(default_factory=time.time)
+    duration: float = 0.0
+    samples: int = 0
+    running: bool = True
+    stacks: Counter[str] = field(default_factory=Counter)
+
+    def collapsed(self) -> str:
+        """
+        Pilas en formato "collapsed" (`marco;marco;marco N` por línea), el que
+        aceptan flamegraph.pl, speedscope e inferno.
+        """
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Profiler por muestreo de todos los hilos del proceso (event loop, threadpool,
+    pools propios), sin dependencias ni instrumentación de las funciones.
+
+    Un hilo propio lee `sys._current_frames()` cada `interval` segundos mientras
+    haya una captura activa; sin captura no hay hilo ni coste alguno. Solo se
+    admite una captura a la vez y ninguna dura más de `max_seconds`, así que el
+    coste está acotado a un recorrido de pilas por intervalo. Se guardan los
+    últimos `keep` resultados para consultarlos por id.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_seconds: float,
+        min_interval: float,
+        max_depth: int = 128,
+        keep: int = 20,
+    ) -> None:
+        self.max_seconds = max_seconds
+        self.min_interval = min_interval
+        self.max_depth = max_depth
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._active: Profile | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._results: OrderedDict[str, Profile] = OrderedDict()
+
+    # --- API pública -----------------------------------------------------
+
+    def start(self, *, interval: float, include_idle: bool = False) -> Profile:
+        """
+        Empezar una captura. Lanza ProfilerBusy si ya hay otra en curso.
+        """
+        profile = Profile(
+            id=uuid.uuid4().hex,
+            interval=max(interval, self.min_interval),
+            include_idle=include_idle,
+        )
+        with self._lock:
+            if self._active is not None:
+                raise ProfilerBusy("Ya hay una captura de perfil en curso")
+            self._active = profile
+            self._stop.clear()
+            self._results[profile.id] = profile
+            while len(self._results) > self.keep:
+                self._results.popitem(last=False)
+            self._thread = threading.Thread(
+                target=self._run, args=(profile,), name="sampling-profiler", daemon=True
+            )
+            self._thread.start()
+        return profile
+
+    def stop(self, profile: Profile) -> Profile:
+        with self._lock:
+            if self._active is not profile:
+                return profile
+            thread = self._thread
+            self._stop.set()
+        if thread is not None:
+            thread.join()
+        return profile
+
+    def get(self, profile_id: str) -> Profile | None:
+        with self._lock:
+            return self._results.get(profile_id)
+
+    # --- Hilo de muestreo ------------------------------------------------
+
+    def _run(self, profile: Profile) -> None:
+        own_ident = threading.get_ident()
+        start = time.perf_counter()
+        deadline = start + self.max_seconds
+        try:
+            while not self._stop.wait(profile.interval):
+                self._sample(profile, own_ident)
+                if time.perf_counter() >= deadline:
+                    break
+        finally:
+            profile.duration = time.perf_counter() - start
+            profile.running = False
+            with self._lock:
+                self._active = None
+                self._thread = None
+
+    def _sample(self, profile: Profile, own_ident: int) -> None:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            code = frame.f_code
+            if not profile.include_idle and (
+                (os.path.basename(code.co_filename), code.co_name) in _IDLE_LEAVES
+            ):
+                continue
+            labels: list[str] = []
+            current: FrameType | None = frame
+            while current is not None and len(labels) < self.max_depth:
+                labels.append(_frame_label(current))
+                current = current.f_back
+            labels.append(names.get(ident, f"thread-{ident}"))
+            profile.stacks[";".join(reversed(labels))] += 1
+        profile.samples += 1
+
+
+profiler = SamplingProfiler(
+    max_seconds=settings.PROFILER_MAX_SECONDS,
+    min_interval=settings.PROFILER_MIN_INTERVAL_MS / 1000,
+)
@@ -0,0 +1,186 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# Placeholders numerados que genera SQLAlchemy (%(id_1)s, %(id_1_3)s, :param_2...)
+_PARAM_SUFFIX = re.compile(r"(%\(\w+?)(_\d+)+(\)s)|(:\w+?)(_\d+)+\b")
+# Listas IN expandidas: "IN (%(a_1)s, %(a_2)s, ...)" -> "IN (...)"
+_IN_LIST = re.compile(r"IN \((?:\s*(?:%\(\w+\)s|\?|:\w+)\s*,?)+\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """
+    Forma normalizada de una sentencia SQL: agrupa las que solo difieren en los
+    parámetros o en el tamaño de una lista IN.
+    """
+    normalized = _WHITESPACE.sub(" ", statement).strip()
+    normalized = _PARAM_SUFFIX.sub(
+        lambda m: (m.group(1) or m.group(4)) + (m.group(3) or ""), normalized
+    )
+    return _IN_LIST.sub("IN (...)", normalized)
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    total_seconds: float = 0.0
+    fingerprints: Counter[str] = field(default_factory=Counter)
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.total_seconds += elapsed
+        self.fingerprints[fingerprint(statement)] += 1
+
+    def merge(self, other: "QueryStats") -> None:
+        self.count += other.count
+        self.total_seconds += other.total_seconds
+        self.fingerprints.update(other.fingerprints)
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """
+        Sentencias ejecutadas al menos `threshold` veces (candidatas a N+1).
+        """
+        return [(sql, n) for sql, n in self.fingerprints.most_common() if n >= threshold]
+
+
+# Estadísticas de la request (o del bloque `assert_max_queries`) en curso.
+# Los handlers `def` corren en el threadpool con una copia del contexto, pero el
+# objeto QueryStats es el mismo, así que sus consultas se acumulan aquí.
+_current_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+# Observadores que reciben las estadísticas de cada request al terminar
+_observers: list[Callable[[QueryStats], None]] = []
+_observers_lock = threading.Lock()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:  # type: ignore[no-untyped-def]
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:  # type: ignore[no-untyped-def]
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Registrar los hooks que miden cada consulta ejecutada con `engine`.
+    """
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def assert_max_queries(max_queries: int) -> Iterator[QueryStats]:
+    """
+    Helper para tests: falla si el bloque ejecuta más de `max_queries` consultas.
+    Cuenta las consultas hechas directamente en el bloque y las de las requests que
+    terminen mientras está activo (p. ej. con TestClient, que usa otro hilo).
+
+        with assert_max_queries(3):
+            client.get("/api/v1/ordenes/activas")
+    """
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+
+    with _observers_lock:
+        _observers.append(stats.merge)
+    try:
+        yield stats
+    finally:
+        with _observers_lock:
+            _observers.remove(stats.merge)
+        _current_stats.reset(token)
+
+    if stats.count > max_queries:
+        detail = "\n".join(f"  {n}x {sql}" for sql, n in stats.fingerprints.most_common(5))
+        raise AssertionError(
+            f"Se ejecutaron {stats.count} consultas (máximo {max_queries}):\n{detail}"
+        )
+
+
+class QueryStatsMiddleware:
+    """
+    Middleware ASGI que mide las consultas de cada request.
+
+    - Añade `Server-Timing: db;dur=<ms>;desc="<n> queries", app;dur=<ms>`.
+    - Registra en el log cada request, con WARNING si hay sentencias repetidas
+      `n_plus_one_threshold` veces o más (patrón N+1) y DEBUG en otro caso.
+    """
+
+    def __init__(self, app: ASGIApp, *, n_plus_one_threshold: int = 5) -> None:
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+        start = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                app_ms = (time.perf_counter() - start) * 1000
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={stats.total_seconds * 1000:.1f};desc="{stats.count} queries", '
+                    f"app;dur={app_ms:.1f}",
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            self._report(scope, stats, time.perf_counter() - start)
+
+    def _report(self, scope: Scope, stats: QueryStats, elapsed: float) -> None:
+        with _observers_lock:
+            observers = list(_observers)
+        for observer in observers:
+            observer(stats)
+
+        repeated = stats.repeated(self.n_plus_one_threshold)
+        data: dict[str, Any] = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "queries": stats.count,
+            "db_ms": round(stats.total_seconds * 1000, 1),
+            "total_ms": round(elapsed * 1000, 1),
+        }
+        if repeated:
+            data["repeated"] = [{"sql": sql, "count": n} for sql, n in repeated[:3]]
+            logger.warning(
+                f"Posible N+1 en {data['method']} {data['path']}: "
+                f"{repeated[0][1]}x {repeated[0][0][:200]}",
+                extra={"sql_stats": data},
+            )
+        else:
+            logger.debug(
+                f"{data['method']} {data['path']} queries={data['queries']} "
+                f"db_ms={data['db_ms']} total_ms={data['total_ms']}",
+                extra={"sql_stats": data},
+            )
@@ -0,0 +1,181 @@
+"""
+Lecturas desde la réplica (POSTGRES_REPLICA_SERVER) para listados e informes.
+
+Los endpoints que pueden leer de la réplica declaran `Depends(read_from_replica)`
+(app.routes.deps). La request sigue usando una sola sesión, con sus filtros por
+restaurante (core.tenant): `RoutingSession` manda sus SELECT a la réplica y todo
+lo demás al primario. Se lee del primario cuando:
+
+- no hay réplica, no responde o su retraso supera REPLICA_MAX_LAG_SECONDS. El
+  retraso se mide como mucho cada REPLICA_LAG_CHECK_SECONDS por proceso.
+- la sesión ya escribió: desde el primer flush o UPDATE/DELETE, todo va al primario.
+- el cliente acaba de escribir (read-your-writes). Tras cada request de escritura
+  correcta se le envía la hora en la cabecera `X-Ultima-Escritura` y en la
+  cookie `cf_escritura`; mientras la réplica pueda no tener esa escritura
+  (REPLICA_MAX_LAG_SECONDS + REPLICA_LAG_CHECK_SECONDS) sus lecturas van al
+  primario. El cliente devuelve la cabecera en sus requests (el cliente web lo
+  hace en app/src/lib/api.ts); la cookie solo llega si el cliente envía
+  credenciales, p. ej. en el mismo origen. La marca vive en el cliente, así
+  que funciona aunque la siguiente request la atienda otro worker.
+
+Para probarlo en local con dos PostgreSQL (primario y réplica en streaming):
+
+    docker compose --profile replica up db-primary db-replica
+    POSTGRES_SERVER=localhost POSTGRES_PORT=5433 \\
+    POSTGRES_REPLICA_SERVER=localhost POSTGRES_REPLICA_PORT=5434 ...
+"""
+import logging
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import Select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.config import settings
+from core.db import get_replica_engine
+from core.idempotency import MUTATING_METHODS
+
+logger = logging.getLogger(__name__)
+
+WRITE_COOKIE = "cf_escritura"
+WRITE_HEADER = "X-Ultima-Escritura"
+
+_USE_REPLICA = "use_replica"
+_WROTE = "wrote"
+
+# Segundos desde la última transacción aplicada; 0 si la réplica ya aplicó todo
+# lo recibido (sin escrituras en el primario no avanza pg_last_xact_replay_timestamp)
+_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+def read_your_writes_window() -> float:
+    """Segundos tras una escritura durante los que el cliente lee del primario."""
+    return settings.REPLICA_MAX_LAG_SECONDS + settings.REPLICA_LAG_CHECK_SECONDS
+
+
+class ReplicaMonitor:
+    """
+    Retraso de la réplica, medido como mucho cada `check_interval` segundos.
+    Si la consulta falla se considera no disponible hasta la siguiente medición.
+    """
+
+    def __init__(self, *, max_lag: float, check_interval: float) -> None:
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._lag: float | None = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    @property
+    def lag(self) -> float | None:
+        return self._lag
+
+    def _measure(self, engine: Engine) -> float | None:
+        if engine.dialect.name != "postgresql":
+            return 0.0
+        try:
+            with engine.connect() as connection:
+                lag = connection.execute(_LAG_SQL).scalar()
+        except SQLAlchemyError:
+            logger.warning("No se pudo medir el retraso de la réplica", exc_info=True)
+            return None
+        # NULL: la réplica todavía no aplicó ninguna transacción
+        return float(lag) if lag is not None else None
+
+    def healthy(self, engine: Engine) -> bool:
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            # Un solo hilo mide; los demás usan el último valor
+            if self._lock.acquire(blocking=False):
+                try:
+                    self._lag = self._measure(engine)
+                    self._checked_at = time.monotonic()
+                finally:
+                    self._lock.release()
+        return self._lag is not None and self._lag <= self.max_lag
+
+
+monitor = ReplicaMonitor(
+    max_lag=settings.REPLICA_MAX_LAG_SECONDS,
+    check_interval=settings.REPLICA_LAG_CHECK_SECONDS,
+)
+
+
+def recently_wrote(last_write: str | None, now: float | None = None) -> bool:
+    """True si la marca de escritura es de hace menos que la ventana de read-your-writes."""
+    if not last_write:
+        return False
+    try:
+        written_at = float(last_write)
+    except ValueError:
+        return False
+    return (now or time.time()) - written_at < read_your_writes_window()
+
+
+def use_replica(session: Session, *, last_write: str | None = None) -> bool:
+    """
+    Mandar los SELECT de `session` a la réplica si está disponible y el cliente
+    no acaba de escribir (`last_write`: valor de la cabecera o la cookie de
+    escritura).
+    Devuelve si se usará la réplica.
+    """
+    engine = get_replica_engine()
+    if engine is None or recently_wrote(last_write) or not monitor.healthy(engine):
+        return False
+    session.info[_USE_REPLICA] = True
+    return True
+
+
+class RoutingSession(Session):
+    """
+    Sesión de la aplicación: con `use_replica`, los SELECT van a la réplica
+    hasta que la sesión escribe; desde entonces todo va al primario.
+    """
+
+    def get_bind(self, mapper: Any = None, clause: Any = None, **kw: Any) -> Any:
+        if self.info.get(_USE_REPLICA) and not self.info.get(_WROTE):
+            if isinstance(clause, Select):
+                replica = get_replica_engine()
+                if replica is not None:
+                    return replica
+            else:
+                # Flush, UPDATE/DELETE en bloque o SQL de texto
+                self.info[_WROTE] = True
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+class ReadYourWritesMiddleware:
+    """
+    Middleware ASGI que marca con la cabecera y la cookie de escritura las
+    respuestas correctas (< 400) a POST, PUT, PATCH y DELETE.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in MUTATING_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_marker(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                written_at = f"{time.time():.3f}"
+                cookie = (
+                    f"{WRITE_COOKIE}={written_at}; Max-Age={int(read_your_writes_window()) + 1};"
+                    " Path=/; HttpOnly; SameSite=Lax"
+                )
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (WRITE_HEADER.lower().encode(), written_at.encode()),
+                    (b"set-cookie", cookie.encode()),
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_marker)
@@ -0,0 +1,73 @@
+import logging
+import threading
+import time
+import uuid
+from collections.abc import Callable, Iterable
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+
+class RevocationList:
+    """
+    Conjunto en memoria de sesiones revocadas, recargado periódicamente.
+
+    Un access token solo puede seguir vivo `window` después de emitirse, así que
+    basta con conocer las sesiones revocadas dentro de esa ventana. `loader` recibe
+    el instante de corte y devuelve los ids; se llama como mucho una vez cada
+    `refresh_seconds` por proceso. Las revocaciones hechas en este mismo proceso
+    se aplican al instante con `add`; en los demás workers tardan a lo sumo
+    `refresh_seconds` en verse.
+    """
+
+    def __init__(
+        self,
+        *,
+        loader: Callable[[datetime], Iterable[uuid.UUID]],
+        window: timedelta,
+        refresh_seconds: float,
+    ) -> None:
+        self.loader = loader
+        self.window = window
+        self.refresh_seconds = refresh_seconds
+        self._revoked: frozenset[uuid.UUID] = frozenset()
+        self._loaded_at: float | None = None
+        self._lock = threading.Lock()
+
+    def _refresh_if_stale(self) -> None:
+        now = time.monotonic()
+        if self._loaded_at is not None and now - self._loaded_at < self.refresh_seconds:
+            return
+        # Un solo hilo recarga; los demás siguen usando el conjunto anterior
+        if not self._lock.acquire(blocking=self._loaded_at is None):
+            return
+        try:
+            if self._loaded_at is not None and now - self._loaded_at < self.refresh_seconds:
+                return
+            try:
+                since = datetime.utcnow() - self.window
+                self._revoked = frozenset(self.loader(since))
+            except Exception:
+                logger.exception("No se pudo recargar la lista de revocación")
+                if self._loaded_at is None:
+                    raise
+            self._loaded_at = time.monotonic()
+        finally:
+            self._lock.release()
+
+    def is_revoked(self, session_id: uuid.UUID) -> bool:
+        self._refresh_if_stale()
+        return session_id in self._revoked
+
+    def add(self, session_ids: Iterable[uuid.UUID]) -> None:
+        """
+        Marcar sesiones como revocadas en este proceso sin esperar a la recarga.
+        """
+        with self._lock:
+            self._revoked = self._revoked | frozenset(session_ids)
+
+    def invalidate(self) -> None:
+        """
+        Forzar la recarga en la próxima validación.
+        """
+        self._loaded_at = None
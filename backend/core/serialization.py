@@ -0,0 +1,72 @@
+from collections.abc import Iterable
+from typing import Any
+
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import ColumnElement
+from sqlmodel import Session, SQLModel, select
+
+
+def public_columns(
+    public_model: type[SQLModel], table_model: type[SQLModel]
+) -> list[Any]:
+    """
+    Columnas de la tabla que corresponden a los campos del modelo público.
+    Así la consulta trae solo lo que se devuelve (p. ej. nunca `hashed_password`).
+    """
+    return [getattr(table_model, name) for name in public_model.model_fields]
+
+
+def select_columns(
+    public_model: type[SQLModel], table_model: type[SQLModel], fields: str | None
+) -> list[Any]:
+    """
+    Traducir el parámetro `fields` ("nombre,precio") a las columnas del SELECT.
+    Sin `fields` se devuelven todas las columnas públicas; el `id` siempre se incluye.
+    Lanza ValueError si se pide un campo que no es público.
+    """
+    if not fields:
+        return public_columns(public_model, table_model)
+
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    invalid = [name for name in requested if name not in public_model.model_fields]
+    if invalid:
+        raise ValueError(f"Campos no válidos: {', '.join(invalid)}")
+
+    names = dict.fromkeys(["id", *requested])
+    return [getattr(table_model, name) for name in names]
+
+
+def fetch_rows(
+    *,
+    session: Session,
+    columns: list[Any],
+    where: Iterable[ColumnElement[bool]] = (),
+    join: tuple[Any, ColumnElement[bool]] | None = None,
+    order_by: Iterable[Any] = (),
+    skip: int = 0,
+    limit: int | None = 100,
+) -> list[dict[str, Any]]:
+    """
+    Ejecutar un SELECT proyectado y devolver las filas como diccionarios planos.
+    No hidrata entidades ORM ni pasa por el identity map de la sesión.
+    `join` es un par (tabla, condición) para filtrar u ordenar por otra tabla.
+    """
+    statement = select(*columns)
+    if join is not None:
+        statement = statement.join(*join)
+    statement = statement.where(*where).order_by(*order_by).offset(skip)
+    if limit is not None:
+        statement = statement.limit(limit)
+    # execute y no exec: con una sola columna exec devolvería escalares sin nombre
+    result = session.execute(statement)
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+
+def list_response(*, data: list[dict[str, Any]], count: int) -> ORJSONResponse:
+    """
+    Respuesta `{data, count}` serializada directamente con orjson.
+    Al devolver un Response, FastAPI no vuelve a validar contra `response_model`,
+    que se mantiene en el router solo para el esquema OpenAPI.
+    """
+    return ORJSONResponse(content={"data": data, "count": count})
@@ -0,0 +1,88 @@
+import os
+import re
+import stat
+from pathlib import Path
+
+import anyio
+from starlette.datastructures import Headers, QueryParams
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from core.images import THUMBNAIL_WIDTHS, thumbnail_key
+
+# Nombres generados por el upload: sha256 del contenido, opcionalmente con el ancho
+HASHED_NAME = re.compile(r"^[0-9a-f]{64}(_\d+)?$")
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+DEFAULT_CACHE = "public, max-age=3600"
+# Respuesta de respaldo mientras la miniatura aún no existe: no debe quedar en caché
+FALLBACK_CACHE = "public, max-age=60"
+
+
+def variant_width(value: str | None) -> int | None:
+    """
+    Ancho de la miniatura más pequeña que cubre el `?w=` pedido, o None si se
+    debe servir el original (parámetro ausente, no numérico o mayor que todas).
+    """
+    if not value or not value.isdigit():
+        return None
+    for candidate in sorted(THUMBNAIL_WIDTHS):
+        if candidate >= int(value):
+            return candidate
+    return None
+
+
+def _variant_for(path: str, scope: Scope) -> str | None:
+    width = variant_width(QueryParams(scope.get("query_string", b"")).get("w"))
+    if width is None or not HASHED_NAME.match(Path(path).stem):
+        return None
+    return thumbnail_key(path, width)
+
+
+class UploadsStaticFiles(StaticFiles):
+    """
+    StaticFiles para `/uploads` pensado para muchas tablets pidiendo las mismas imágenes.
+
+    - Los archivos con nombre por hash de contenido se sirven con ETag fuerte
+      (el propio hash) y `Cache-Control: immutable` de un año.
+    - `?w=<ancho>` sirve la miniatura WebP más pequeña que lo cubre; si aún no se
+      generó, se devuelve el original con caché corta.
+    - If-None-Match / If-Modified-Since responden 304 sin abrir el archivo y los
+      Range se atienden con FileResponse (que usa `pathsend` si el servidor lo ofrece).
+    """
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        variant = _variant_for(path, scope)
+        if variant and scope["method"] in ("GET", "HEAD"):
+            full_path, stat_result = await anyio.to_thread.run_sync(
+                self.lookup_path, variant
+            )
+            if stat_result and stat.S_ISREG(stat_result.st_mode):
+                return self.file_response(full_path, stat_result, scope)
+        return await super().get_response(path, scope)
+
+    def file_response(
+        self,
+        full_path: os.PathLike | str,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+
+        served = Path(full_path)
+        expected = _variant_for(Path(scope["path"]).name, scope)
+        stem = served.stem
+        if not HASHED_NAME.match(stem):
+            response.headers["cache-control"] = DEFAULT_CACHE
+        elif expected and Path(expected).name != served.name:
+            response.headers["cache-control"] = FALLBACK_CACHE
+        else:
+            response.headers["etag"] = f'"{stem}"'
+            response.headers["cache-control"] = IMMUTABLE_CACHE
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -0,0 +1,325 @@
+import base64
+import logging
+import os
+import posixpath
+import shutil
+import time
+import uuid
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+import anyio
+from starlette.datastructures import QueryParams
+from starlette.responses import PlainTextResponse, RedirectResponse, Response
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from core.config import settings
+from core.images import THUMBNAIL_WIDTHS, thumbnail_key
+from core.staticfiles import (
+    FALLBACK_CACHE,
+    HASHED_NAME,
+    IMMUTABLE_CACHE,
+    UploadsStaticFiles,
+    variant_width,
+)
+
+logger = logging.getLogger(__name__)
+
+# Directorio de uploads por defecto para el driver local (backend/uploads)
+DEFAULT_UPLOAD_DIR = Path(__file__).parent.parent / "uploads"
+
+
+def validate_key(key: str) -> str:
+    """
+    Normalizar una clave relativa ("productos/{empresa_id}/{archivo}") y rechazar
+    rutas absolutas o con "..". Lanza ValueError si no es válida.
+    """
+    normalized = posixpath.normpath(key.lstrip("/"))
+    if normalized.startswith("..") or normalized in ("", ".") or "\\" in normalized:
+        raise ValueError("Ruta de archivo no válida")
+    return normalized
+
+
+def _is_hashed(key: str) -> bool:
+    return bool(HASHED_NAME.match(posixpath.splitext(posixpath.basename(key))[0]))
+
+
+class StorageBackend(ABC):
+    """
+    Almacenamiento de archivos subidos. Las claves son rutas relativas y la URL
+    pública de cada archivo es siempre `/uploads/{clave}`, sea cual sea el driver.
+    Los métodos son bloqueantes: desde handlers async se llaman con run_in_threadpool.
+    """
+
+    # Si el driver implementa `presigned_upload` (subidas directas del cliente)
+    supports_presigned_upload = False
+
+    @abstractmethod
+    def exists(self, key: str) -> bool: ...
+
+    @abstractmethod
+    def save_file(self, key: str, source: Path, content_type: str | None = None) -> None:
+        """
+        Guardar el archivo local `source` bajo `key` (se mueve o se copia).
+        """
+
+    @abstractmethod
+    def download(self, key: str, destination: Path) -> None: ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """
+        Eliminar `key`; no falla si no existe.
+        """
+
+    @abstractmethod
+    def asgi_app(self) -> ASGIApp:
+        """
+        Aplicación ASGI que se monta en `/uploads`.
+        """
+
+    def presigned_upload(
+        self, key: str, *, content_type: str, content_length: int, sha256_hex: str
+    ) -> dict[str, Any]:
+        """
+        Datos para que el cliente suba el archivo directamente al almacenamiento.
+        Solo se llama si `supports_presigned_upload`.
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def public_url(key: str) -> str:
+        return f"/uploads/{key}"
+
+
+class LocalStorage(StorageBackend):
+    """
+    Driver de disco local (un solo nodo o volumen compartido).
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def _path(self, key: str) -> Path:
+        return self.root / validate_key(key)
+
+    def exists(self, key: str) -> bool:
+        return self._path(key).is_file()
+
+    def save_file(self, key: str, source: Path, content_type: str | None = None) -> None:
+        target = self._path(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Copiar junto al destino y renombrar: nunca se sirve un archivo a medias
+        tmp = target.with_name(f".{uuid.uuid4()}.part")
+        shutil.move(source, tmp)
+        os.replace(tmp, target)
+
+    def download(self, key: str, destination: Path) -> None:
+        shutil.copyfile(self._path(key), destination)
+
+    def delete(self, key: str) -> None:
+        path = self._path(key)
+        path.unlink(missing_ok=True)
+        # Eliminar el directorio si quedó vacío
+        try:
+            path.parent.rmdir()
+        except OSError:
+            pass
+
+    def asgi_app(self) -> ASGIApp:
+        self.root.mkdir(parents=True, exist_ok=True)
+        return UploadsStaticFiles(directory=str(self.root))
+
+
+class S3Storage(StorageBackend):
+    """
+    Driver S3 compatible (AWS S3, MinIO, R2...). Requiere el extra `s3` (boto3).
+
+    `/uploads/{clave}` responde con una redirección al bucket: a `public_url` si
+    el bucket es público (o hay CDN delante) o a una URL GET prefirmada si no.
+    """
+
+    supports_presigned_upload = True
+
+    def __init__(
+        self,
+        *,
+        bucket: str,
+        endpoint_url: str | None,
+        region: str | None,
+        access_key_id: str | None,
+        secret_access_key: str | None,
+        public_url: str | None,
+        presign_expire_seconds: int,
+    ) -> None:
+        try:
+            import boto3
+            from botocore.config import Config
+        except ImportError as e:
+            raise RuntimeError(
+                "STORAGE_BACKEND=s3 requiere boto3 (instalar el extra 's3')"
+            ) from e
+
+        self.bucket = bucket
+        self.public_base_url = public_url.rstrip("/") if public_url else None
+        self.presign_expire_seconds = presign_expire_seconds
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+            config=Config(signature_version="s3v4", s3={"addressing_style": "path"}),
+        )
+
+    def exists(self, key: str) -> bool:
+        # Siempre se consulta el bucket: otro worker o réplica puede haber
+        # borrado el archivo, y la deduplicación de subidas depende de esto
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=validate_key(key))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+    def save_file(self, key: str, source: Path, content_type: str | None = None) -> None:
+        extra_args = {"CacheControl": IMMUTABLE_CACHE if _is_hashed(key) else "public, max-age=3600"}
+        if content_type:
+            extra_args["ContentType"] = content_type
+        self.client.upload_file(str(source), self.bucket, validate_key(key), ExtraArgs=extra_args)
+        source.unlink(missing_ok=True)
+
+    def download(self, key: str, destination: Path) -> None:
+        self.client.download_file(self.bucket, validate_key(key), str(destination))
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=validate_key(key))
+
+    def presigned_upload(
+        self, key: str, *, content_type: str, content_length: int, sha256_hex: str
+    ) -> dict[str, Any]:
+        """
+        URL PUT prefirmada. Tipo, tamaño y checksum SHA-256 van firmados, así que el
+        almacenamiento rechaza cualquier archivo distinto del anunciado.
+        """
+        checksum = base64.b64encode(bytes.fromhex(sha256_hex)).decode()
+        url = self.client.generate_presigned_url(
+            "put_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": validate_key(key),
+                "ContentType": content_type,
+                "ContentLength": content_length,
+                "ChecksumSHA256": checksum,
+                "CacheControl": IMMUTABLE_CACHE,
+            },
+            ExpiresIn=self.presign_expire_seconds,
+        )
+        return {
+            "method": "PUT",
+            "url": url,
+            "headers": {
+                "Content-Type": content_type,
+                "Content-Length": str(content_length),
+                "x-amz-checksum-sha256": checksum,
+                "Cache-Control": IMMUTABLE_CACHE,
+            },
+            "expires_in": self.presign_expire_seconds,
+        }
+
+    def download_url(self, key: str) -> str:
+        if self.public_base_url:
+            return f"{self.public_base_url}/{key}"
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": key},
+            ExpiresIn=self.presign_expire_seconds,
+        )
+
+    def asgi_app(self) -> ASGIApp:
+        return S3RedirectFiles(self)
+
+
+class S3RedirectFiles:
+    """
+    Montaje de `/uploads` para S3: redirige cada archivo (o su miniatura con `?w=`)
+    al bucket, sin que los bytes pasen por los workers de la API.
+
+    Las miniaturas que existen se recuerdan THUMBNAIL_TTL segundos para no hacer
+    un HEAD por cada imagen de un listado. Solo afecta a qué se redirige: si se
+    borró, el bucket responde 404 y a lo sumo hasta que caduque la entrada.
+    """
+
+    THUMBNAIL_TTL = 60.0
+
+    def __init__(self, storage: S3Storage) -> None:
+        self.storage = storage
+        self._thumbnails: dict[str, float] = {}
+
+    def _thumbnail_exists(self, key: str) -> bool:
+        now = time.monotonic()
+        if self._thumbnails.get(key, 0.0) > now:
+            return True
+        if not self.storage.exists(key):
+            self._thumbnails.pop(key, None)
+            return False
+        if len(self._thumbnails) >= 10000:
+            self._thumbnails = {k: t for k, t in self._thumbnails.items() if t > now}
+        self._thumbnails[key] = now + self.THUMBNAIL_TTL
+        return True
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        assert scope["type"] == "http"
+        response = await self.get_response(scope)
+        await response(scope, receive, send)
+
+    async def get_response(self, scope: Scope) -> Response:
+        if scope["method"] not in ("GET", "HEAD"):
+            return PlainTextResponse("Method Not Allowed", status_code=405)
+        route_path = scope["path"][len(scope.get("root_path", "")):]
+        try:
+            key = validate_key(route_path)
+        except ValueError:
+            return PlainTextResponse("Not Found", status_code=404)
+
+        cache_control = IMMUTABLE_CACHE if _is_hashed(key) else "public, max-age=3600"
+        width = variant_width(QueryParams(scope.get("query_string", b"")).get("w"))
+        if width and _is_hashed(key):
+            variant = thumbnail_key(key, width)
+            if await anyio.to_thread.run_sync(self._thumbnail_exists, variant):
+                key = variant
+            else:
+                cache_control = FALLBACK_CACHE
+
+        if not self.storage.public_base_url:
+            # La URL prefirmada caduca: la redirección no puede cachearse más que eso
+            cache_control = f"private, max-age={self.storage.presign_expire_seconds // 2}"
+        return RedirectResponse(
+            self.storage.download_url(key),
+            status_code=307,
+            headers={"cache-control": cache_control},
+        )
+
+
+@lru_cache
+def get_storage() -> StorageBackend:
+    """
+    Backend de almacenamiento configurado con STORAGE_BACKEND (uno por proceso).
+    """
+    if settings.STORAGE_BACKEND == "s3":
+        return S3Storage(
+            bucket=settings.S3_BUCKET,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            region=settings.S3_REGION,
+            access_key_id=settings.S3_ACCESS_KEY_ID,
+            secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+            public_url=settings.S3_PUBLIC_URL,
+            presign_expire_seconds=settings.PRESIGNED_URL_EXPIRE_SECONDS,
+        )
+    root = Path(settings.UPLOAD_DIR) if settings.UPLOAD_DIR else DEFAULT_UPLOAD_DIR
+    return LocalStorage(root)
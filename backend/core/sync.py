@@ -0,0 +1,155 @@
+"""
+Numeración de cambios para la sincronización incremental de la app móvil.
+
+Cada fila de una tabla sincronizada lleva un `change_seq`: NULL mientras tiene
+cambios sin confirmar y, al hacer commit, el siguiente valor de una secuencia
+global. Un cliente que ya tiene todo hasta la marca `N` solo necesita las filas
+con `change_seq > N` (y las lápidas de lo borrado desde entonces).
+
+La marca solo sirve si los números se hacen visibles en orden: si una
+transacción numerara con 10 y confirmara después de otra que numeró con 11, un
+cliente podría leer 11, guardar 11 como marca y no ver nunca el 10. Por eso la
+numeración se hace en el último momento del commit, con un advisory lock de
+transacción que se libera al confirmar: las transacciones que escriben en
+tablas sincronizadas confirman de una en una (solo ese tramo final) y los
+números quedan en orden de commit. Las lecturas no toman el lock.
+"""
+from typing import Any
+
+from sqlalchemy import event, func, select, update
+from sqlalchemy.orm import ORMExecuteState
+from sqlmodel import Session, SQLModel
+
+from models.company.mesarestaurante import MesaRestaurante
+from models.company.restaurante import Restaurante
+from models.company.tasaimpositiva import TasaImpositiva
+from models.product.categoria import Categoria
+from models.product.orden import Orden
+from models.product.ordenitem import OrdenItem
+from models.product.producto import Producto
+from models.sync import SYNC_SEQUENCE, SyncTombstone
+
+# Nombre en la API de sincronización -> tabla, en el orden en que el cliente
+# debe aplicar los cambios (las referencias primero)
+SYNCED_TABLES: dict[str, type[SQLModel]] = {
+    "restaurantes": Restaurante,
+    "tasas_impositivas": TasaImpositiva,
+    "categorias": Categoria,
+    "productos": Producto,
+    "mesas": MesaRestaurante,
+    "ordenes": Orden,
+    "orden_items": OrdenItem,
+}
+TABLE_NAMES = {model: name for name, model in SYNCED_TABLES.items()}
+
+# Clave del advisory lock que ordena la numeración (arbitraria, fija)
+_SYNC_LOCK_KEY = 0x5C_0001
+_PENDING = "sync_pending"
+
+
+def _tracked(model: type) -> bool:
+    return model in TABLE_NAMES or model is SyncTombstone
+
+
+def _mark(session: Session, model: type) -> None:
+    session.info.setdefault(_PENDING, set()).add(model)
+
+
+def _scope(session: Session, obj: SQLModel) -> tuple[Any, Any]:
+    """(restaurante_id, empresa_id) al que pertenece una fila, para su lápida."""
+    if isinstance(obj, Restaurante):
+        return obj.id, obj.empresa_id
+    if isinstance(obj, Producto):
+        return obj.restaurante_id, obj.empresa_id
+    if isinstance(obj, OrdenItem):
+        with session.no_autoflush:
+            orden = session.get(Orden, obj.orden_id)
+        return (orden.restaurante_id if orden else None), None
+    return getattr(obj, "restaurante_id", None), None
+
+
+def _before_flush(session: Session, flush_context: Any, instances: Any) -> None:
+    for obj in session.deleted:
+        if type(obj) in TABLE_NAMES:
+            restaurante_id, empresa_id = _scope(session, obj)
+            session.add(
+                SyncTombstone(
+                    tabla=TABLE_NAMES[type(obj)],
+                    registro_id=obj.id,
+                    restaurante_id=restaurante_id,
+                    empresa_id=empresa_id,
+                )
+            )
+    for obj in (*session.new, *session.dirty):
+        if _tracked(type(obj)):
+            _mark(session, type(obj))
+
+
+def _do_orm_execute(state: ORMExecuteState) -> None:
+    # UPDATE en bloque (p. ej. mover órdenes de mesa): `onupdate` ya pone
+    # change_seq a NULL, solo hay que recordar numerar antes del commit
+    if (state.is_update or state.is_delete) and state.bind_mapper is not None:
+        if _tracked(state.bind_mapper.class_):
+            _mark(state.session, state.bind_mapper.class_)
+
+
+def _assign_postgresql(session: Session, models: set[type]) -> None:
+    session.execute(select(func.pg_advisory_xact_lock(_SYNC_LOCK_KEY)))
+    for model in models:
+        table = model.__table__
+        session.execute(
+            update(table)
+            .where(table.c.change_seq.is_(None))
+            .values(change_seq=func.nextval(SYNC_SEQUENCE))
+        )
+
+
+def _assign_generic(session: Session, models: set[type]) -> None:
+    # Bases de datos sin secuencias (SQLite en tests y benchmarks): un solo
+    # escritor, basta con seguir a partir del máximo actual
+    current = max(
+        session.execute(select(func.max(model.__table__.c.change_seq))).scalar() or 0
+        for model in (*SYNCED_TABLES.values(), SyncTombstone)
+    )
+    for model in models:
+        table = model.__table__
+        ids = session.execute(
+            select(table.c.id).where(table.c.change_seq.is_(None))
+        ).scalars().all()
+        for row_id in ids:
+            current += 1
+            session.execute(
+                update(table).where(table.c.id == row_id).values(change_seq=current)
+            )
+
+
+def _before_commit(session: Session) -> None:
+    # before_commit corre antes del flush final del commit: se adelanta aquí para
+    # que lo que se escribe en él también quede numerado
+    session.flush()
+    models = session.info.pop(_PENDING, None)
+    if not models:
+        return
+    if session.get_bind().dialect.name == "postgresql":
+        _assign_postgresql(session, models)
+    else:
+        _assign_generic(session, models)
+
+
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING, None)
+
+
+def install_change_tracking() -> None:
+    """
+    Registrar los eventos de sesión que numeran los cambios y crean las lápidas.
+    Se aplica a todas las sesiones de SQLModel; llamarla más de una vez no tiene efecto.
+    """
+    for name, listener in (
+        ("before_flush", _before_flush),
+        ("do_orm_execute", _do_orm_execute),
+        ("before_commit", _before_commit),
+        ("after_rollback", _after_rollback),
+    ):
+        if not event.contains(Session, name, listener):
+            event.listen(Session, name, listener)
@@ -0,0 +1,146 @@
+"""
+Aislamiento por restaurante de las tablas operativas (órdenes, items, mesas,
+facturas, pagos, correcciones de factura y cierres de caja).
+
+`deps.get_tenant` resuelve una vez por request los restaurantes a los que tiene
+acceso el usuario y los deja en la sesión; desde ahí cada SELECT, UPDATE o
+DELETE del ORM sobre esas tablas lleva el filtro por `restaurante_id`, también
+los del crud que no reciben restaurante (`get_all_ordenes`, `session.get`, los
+conteos). Un registro de otro restaurante simplemente no existe para el
+usuario: los listados no lo incluyen y buscarlo por ID da 404.
+
+El filtro es siempre `restaurante_id = :id` (o `IN` con los restaurantes de la
+empresa), de modo que los índices compuestos que empiezan por `restaurante_id`
+limitan el recorrido a las filas del restaurante.
+"""
+import uuid
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import ColumnElement, event, false
+from sqlalchemy.orm import ORMExecuteState, with_loader_criteria
+from sqlmodel import Session, select
+
+from models.auth.users import UserPublic
+from models.bill.cierrecaja import CierreCaja
+from models.bill.correccionfactura import CorreccionFactura
+from models.bill.factura import Factura
+from models.bill.pagos import Pago
+from models.company.mesarestaurante import MesaRestaurante
+from models.company.restaurante import Restaurante
+from models.product.orden import Orden
+from models.product.ordenitem import OrdenItem
+
+_TENANT = "tenant_scope"
+
+
+@dataclass(frozen=True)
+class TenantScope:
+    """
+    Restaurantes visibles para el usuario de la request.
+    `restaurante_ids` es None para los superusuarios (sin restricción).
+    """
+
+    restaurante_ids: frozenset[uuid.UUID] | None
+
+    @property
+    def unrestricted(self) -> bool:
+        return self.restaurante_ids is None
+
+    def allows(self, restaurante_id: uuid.UUID | None) -> bool:
+        return self.restaurante_ids is None or restaurante_id in self.restaurante_ids
+
+    def restaurante_filter(self, column: Any) -> ColumnElement[bool]:
+        """Predicado `column` dentro de los restaurantes del usuario."""
+        assert self.restaurante_ids is not None
+        if not self.restaurante_ids:
+            return false()
+        if len(self.restaurante_ids) == 1:
+            return column == next(iter(self.restaurante_ids))
+        return column.in_(sorted(self.restaurante_ids))
+
+    def criteria(self) -> list[Any]:
+        orden = Orden.__table__
+        factura = Factura.__table__
+        return [
+            with_loader_criteria(Orden, self.restaurante_filter(Orden.restaurante_id)),
+            with_loader_criteria(
+                MesaRestaurante, self.restaurante_filter(MesaRestaurante.restaurante_id)
+            ),
+            with_loader_criteria(Factura, self.restaurante_filter(Factura.restaurante_id)),
+            with_loader_criteria(CierreCaja, self.restaurante_filter(CierreCaja.restaurante_id)),
+            # Items, pagos y correcciones no guardan el restaurante: se filtran
+            # por su orden / factura, que se resuelve con el índice por
+            # restaurante del padre
+            with_loader_criteria(
+                OrdenItem,
+                OrdenItem.orden_id.in_(
+                    select(orden.c.id).where(self.restaurante_filter(orden.c.restaurante_id))
+                ),
+            ),
+            with_loader_criteria(
+                Pago,
+                Pago.factura_id.in_(
+                    select(factura.c.id).where(self.restaurante_filter(factura.c.restaurante_id))
+                ),
+            ),
+            with_loader_criteria(
+                CorreccionFactura,
+                CorreccionFactura.factura_original_id.in_(
+                    select(factura.c.id).where(self.restaurante_filter(factura.c.restaurante_id))
+                ),
+            ),
+        ]
+
+
+UNRESTRICTED = TenantScope(restaurante_ids=None)
+
+
+def tenant_scope(*, session: Session, user: UserPublic) -> TenantScope:
+    """
+    Alcance de `user`: su restaurante o, si solo pertenece a una empresa, todos
+    los restaurantes de esa empresa. Sin ninguno de los dos no ve nada.
+    """
+    if user.is_superuser:
+        return UNRESTRICTED
+    if user.restaurante_id:
+        return TenantScope(restaurante_ids=frozenset({user.restaurante_id}))
+    if user.empresa_id:
+        ids = session.exec(
+            select(Restaurante.id).where(Restaurante.empresa_id == user.empresa_id)
+        ).all()
+        return TenantScope(restaurante_ids=frozenset(ids))
+    return TenantScope(restaurante_ids=frozenset())
+
+
+def use_tenant(session: Session, scope: TenantScope) -> None:
+    """Aplicar `scope` a todas las consultas siguientes de `session`."""
+    session.info[_TENANT] = scope
+
+
+def current_tenant(session: Session) -> TenantScope:
+    """
+    Alcance aplicado a `session` (sin restricción si no se fijó ninguno). Para
+    las consultas que el filtro automático no cubre, como las tablas de archivo.
+    """
+    return session.info.get(_TENANT) or UNRESTRICTED
+
+
+def _do_orm_execute(state: ORMExecuteState) -> None:
+    scope: TenantScope | None = state.session.info.get(_TENANT)
+    if scope is None or scope.unrestricted:
+        return
+    # Las cargas de relaciones y columnas heredan las opciones de la consulta original
+    if state.is_column_load or state.is_relationship_load:
+        return
+    if state.is_select or state.is_update or state.is_delete:
+        state.statement = state.statement.options(*scope.criteria())
+
+
+def install_tenant_filters() -> None:
+    """
+    Registrar el evento que añade los filtros por restaurante.
+    Se aplica a todas las sesiones de SQLModel; llamarla más de una vez no tiene efecto.
+    """
+    if not event.contains(Session, "do_orm_execute", _do_orm_execute):
+        event.listen(Session, "do_orm_execute", _do_orm_execute)
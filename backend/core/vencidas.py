@@ -0,0 +1,292 @@
+"""
+Conjunto de facturas vencidas sin pagar (models.bill.facturavencida).
+
+GET /facturas/vencidas/ lee la tabla `facturavencida` por restaurante y fecha de
+vencimiento en lugar de evaluar `fecha_vencimiento < ahora` sobre todas las
+facturas. El conjunto se mantiene de dos formas:
+
+- al crear o modificar una factura (`sincronizar_vencida`): entra si ya está
+  vencida y sale si se paga, se anula o cancela, o se le corre el vencimiento;
+- con el escaneo (`escanear`), que agrega las que vencieron desde la marca del
+  escaneo anterior (índice parcial de facturas sin pagar por vencimiento) y
+  quita las que se pagaron, anularon o cancelaron por otra vía. Cada escaneo revisa solo lo nuevo y el
+  propio conjunto, nunca todas las facturas.
+
+Una factura entra en el conjunto como mucho OVERDUE_SCAN_SECONDS después de
+vencer. El escaneo corre en un hilo de cada worker (`OverdueScanner`, ver
+app.main); la fila de la marca se bloquea con SKIP LOCKED, así que si otro
+worker está escaneando se salta la vuelta. También se puede programar con cron
+(sin recordatorios por correo):
+
+    python -m core.vencidas
+
+Con OVERDUE_REMINDERS, tras cada escaneo se pasan a `notify` las vencidas que
+todavía no tienen recordatorio y se marcan como avisadas. Las que ya estaban
+vencidas en el primer escaneo se dan por avisadas.
+"""
+import argparse
+import logging
+import threading
+import uuid
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import DateTime, create_engine, delete, exists, insert, literal, or_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import Session, col, select
+
+import models  # noqa: F401  registra todas las tablas en el metadata
+from core.config import settings
+from models.auth.users import User
+from models.bill.factura import ESTADOS_SIN_COBRO, Factura
+from models.bill.facturavencida import EscaneoVencidas, FacturaVencida
+
+logger = logging.getLogger(__name__)
+
+# Recordatorios por escaneo como mucho (la cola de correos tiene tamaño máximo)
+RECORDATORIOS_POR_ESCANEO = 200
+
+# Cada escaneo vuelve a mirar este margen antes de la marca: una factura que
+# vence justo mientras se escanea y se confirma después no se pierde
+SOLAPE = timedelta(minutes=5)
+
+
+@dataclass
+class RecordatorioVencida:
+    factura_id: uuid.UUID
+    numero_factura: str
+    total: float
+    fecha_vencimiento: datetime
+    email: str
+
+
+def es_vencida(factura: Factura, now: datetime) -> bool:
+    return (
+        factura.estado not in ESTADOS_SIN_COBRO
+        and factura.fecha_vencimiento is not None
+        and factura.fecha_vencimiento < now
+    )
+
+
+def _insert_ignore(session: Session) -> Any:
+    """INSERT en facturavencida que no falla si la factura ya está (otro worker)."""
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(FacturaVencida)
+    if dialect == "sqlite":
+        return sqlite.insert(FacturaVencida)
+    return insert(FacturaVencida)
+
+
+def sincronizar_vencida(*, session: Session, factura: Factura, now: datetime | None = None) -> None:
+    """
+    Poner o quitar `factura` del conjunto de vencidas según su estado y
+    vencimiento, en la transacción en curso (sin commit).
+    """
+    now = now or datetime.utcnow()
+    if es_vencida(factura, now):
+        session.flush()
+        statement = _insert_ignore(session).values(
+            factura_id=factura.id,
+            restaurante_id=factura.restaurante_id,
+            fecha_vencimiento=factura.fecha_vencimiento,
+            detectada_en=now,
+        )
+        if isinstance(statement, (postgresql.Insert, sqlite.Insert)):
+            statement = statement.on_conflict_do_update(
+                index_elements=["factura_id"],
+                set_={
+                    "restaurante_id": statement.excluded.restaurante_id,
+                    "fecha_vencimiento": statement.excluded.fecha_vencimiento,
+                },
+            )
+        session.execute(statement)
+    else:
+        session.execute(delete(FacturaVencida).where(col(FacturaVencida.factura_id) == factura.id))
+
+
+def escanear(*, session: Session, now: datetime | None = None) -> dict[str, int] | None:
+    """
+    Agregar al conjunto las facturas que vencieron desde el último escaneo y
+    quitar las que ya no están vencidas. Devuelve cuántas entraron y salieron,
+    o None si otro proceso está escaneando.
+    """
+    now = now or datetime.utcnow()
+    marca = session.exec(
+        select(EscaneoVencidas)
+        .where(EscaneoVencidas.id == 1)
+        .with_for_update(skip_locked=True)
+    ).first()
+    if marca is None:
+        if session.get(EscaneoVencidas, 1) is not None:
+            return None
+        marca = EscaneoVencidas(id=1)
+        session.add(marca)
+    # El primer escaneo revisa todas las vencidas (por el índice parcial); de las
+    # que ya estaban vencidas no se envía recordatorio
+    recordatorio = literal(now if marca.hasta is None else None, DateTime())
+
+    nuevas = (
+        select(
+            Factura.id,
+            Factura.restaurante_id,
+            Factura.fecha_vencimiento,
+            literal(now, DateTime()),
+            recordatorio,
+        )
+        .where(
+            col(Factura.estado).not_in(ESTADOS_SIN_COBRO),
+            col(Factura.fecha_vencimiento).is_not(None),
+            col(Factura.fecha_vencimiento) < now,
+            ~exists().where(FacturaVencida.factura_id == Factura.id),
+        )
+    )
+    if marca.hasta is not None:
+        nuevas = nuevas.where(col(Factura.fecha_vencimiento) >= marca.hasta - SOLAPE)
+    statement = _insert_ignore(session).from_select(
+        ["factura_id", "restaurante_id", "fecha_vencimiento", "detectada_en", "recordatorio_enviado_en"],
+        nuevas,
+    )
+    if isinstance(statement, (postgresql.Insert, sqlite.Insert)):
+        statement = statement.on_conflict_do_nothing(index_elements=["factura_id"])
+    agregadas = session.execute(statement).rowcount
+
+    # Pagadas, anuladas o canceladas (o con el vencimiento corrido) sin pasar
+    # por sincronizar_vencida
+    quitadas = session.execute(
+        delete(FacturaVencida).where(
+            exists().where(
+                Factura.id == FacturaVencida.factura_id,
+                or_(
+                    col(Factura.estado).in_(ESTADOS_SIN_COBRO),
+                    col(Factura.fecha_vencimiento).is_(None),
+                    col(Factura.fecha_vencimiento) >= now,
+                ),
+            )
+        )
+    ).rowcount
+
+    marca.hasta = now
+    session.add(marca)
+    session.commit()
+    return {"agregadas": agregadas, "quitadas": quitadas}
+
+
+def recordatorios_pendientes(
+    *, session: Session, limit: int = RECORDATORIOS_POR_ESCANEO
+) -> list[RecordatorioVencida]:
+    statement = (
+        select(
+            FacturaVencida.factura_id,
+            Factura.numero_factura,
+            Factura.total,
+            FacturaVencida.fecha_vencimiento,
+            User.email,
+        )
+        .join(Factura, col(Factura.id) == FacturaVencida.factura_id)
+        .join(User, col(User.id) == Factura.cliente_id)
+        .where(
+            col(FacturaVencida.recordatorio_enviado_en).is_(None),
+            # Por si se anuló o pagó después del último escaneo
+            col(Factura.estado).not_in(ESTADOS_SIN_COBRO),
+        )
+        .order_by(FacturaVencida.fecha_vencimiento)
+        .limit(limit)
+    )
+    return [RecordatorioVencida(*row) for row in session.exec(statement).all()]
+
+
+def enviar_recordatorios(
+    *,
+    session: Session,
+    notify: Callable[[list[RecordatorioVencida]], None],
+    now: datetime | None = None,
+) -> int:
+    """
+    Pasar a `notify` las vencidas sin recordatorio y marcarlas como avisadas.
+    Si `notify` falla no se marcan y se reintentan en el próximo escaneo.
+    """
+    pendientes = recordatorios_pendientes(session=session)
+    if not pendientes:
+        return 0
+    notify(pendientes)
+    session.execute(
+        update(FacturaVencida)
+        .where(col(FacturaVencida.factura_id).in_([r.factura_id for r in pendientes]))
+        .values(recordatorio_enviado_en=now or datetime.utcnow())
+    )
+    session.commit()
+    return len(pendientes)
+
+
+class OverdueScanner:
+    """
+    Hilo que ejecuta `escanear` cada `interval` segundos y, si se indica
+    `notify`, envía los recordatorios. Los errores se registran y se reintenta
+    en la siguiente vuelta.
+    """
+
+    def __init__(
+        self,
+        *,
+        engine: Callable[[], Engine],
+        interval: float,
+        notify: Callable[[list[RecordatorioVencida]], None] | None = None,
+    ) -> None:
+        self.engine = engine
+        self.interval = interval
+        self.notify = notify
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="overdue-scanner", daemon=True)
+        self._thread.start()
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_once(self) -> None:
+        with Session(self.engine()) as session:
+            resultado = escanear(session=session)
+            if resultado and (resultado["agregadas"] or resultado["quitadas"]):
+                logger.info("Facturas vencidas: %(agregadas)d nuevas, %(quitadas)d quitadas", resultado)
+            if resultado is not None and self.notify is not None:
+                enviar_recordatorios(session=session, notify=self.notify)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Error escaneando facturas vencidas")
+
+
+def main() -> None:
+    argparse.ArgumentParser(description="Actualizar el conjunto de facturas vencidas").parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI), poolclass=NullPool)
+    try:
+        with Session(engine) as session:
+            resultado = escanear(session=session)
+    finally:
+        engine.dispose()
+    if resultado is None:
+        logger.info("Otro proceso está escaneando las facturas vencidas")
+    else:
+        logger.info("Facturas vencidas: %(agregadas)d nuevas, %(quitadas)d quitadas", resultado)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Configuración de producción: gunicorn como gestor de procesos con workers uvicorn.
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+Todo se ajusta con variables de entorno (valores por defecto entre paréntesis):
+
+- WEB_CONCURRENCY: número de workers (CPUs disponibles, mínimo 2, máximo MAX_WORKERS).
+- MAX_WORKERS (8): tope cuando se calcula a partir de las CPUs. Cada worker abre
+  su propio pool de conexiones (DB_POOL_SIZE + DB_MAX_OVERFLOW).
+- PORT (8008), KEEP_ALIVE (5 s), GRACEFUL_TIMEOUT (30 s), TIMEOUT (60 s).
+- MAX_REQUESTS (0 = nunca): reciclar cada worker tras N requests, con jitter.
+- FORWARDED_ALLOW_IPS (127.0.0.1): proxies de los que se aceptan X-Forwarded-*.
+
+El tamaño del threadpool de cada worker (THREADPOOL_SIZE) se aplica al arrancar
+la app, ver `app.main.create_app`. Al arrancar, el maestro crea las particiones
+mensuales de los próximos PARTITION_MONTHS_AHEAD meses (core.partitions).
+"""
+import os
+import shutil
+import tempfile
+
+
+def _available_cpus() -> int:
+    try:
+        # Respeta el affinity del contenedor (docker --cpuset-cpus)
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _workers() -> int:
+    if os.environ.get("WEB_CONCURRENCY"):
+        return int(os.environ["WEB_CONCURRENCY"])
+    return min(max(_available_cpus(), 2), int(os.environ.get("MAX_WORKERS", "8")))
+
+
+# Métricas de Prometheus agregadas entre workers (core.metrics): debe definirse
+# antes de cargar la app, que con preload ocurre en el proceso maestro.
+if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="crossfood-metrics-")
+_metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8008')}"
+workers = _workers()
+worker_class = "uvicorn_worker.UvicornWorker"
+
+# La app se construye una vez en el maestro y los workers la heredan al hacer
+# fork: el código y los objetos de solo lectura (rutas, modelos, esquemas) se
+# comparten copy-on-write. El engine se crea con la primera request, ya en cada
+# worker, así que ninguna conexión cruza el fork.
+preload_app = True
+
+keepalive = int(os.environ.get("KEEP_ALIVE", "5"))
+# Al recibir SIGTERM los workers dejan de aceptar conexiones y tienen este margen
+# para terminar las requests en curso y los handlers de shutdown (cola de correos...)
+graceful_timeout = int(os.environ.get("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.environ.get("TIMEOUT", "60"))
+max_requests = int(os.environ.get("MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+forwarded_allow_ips = os.environ.get("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+# Heartbeat de los workers en memoria: en Docker /tmp puede ser un overlay lento
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+accesslog = "-"
+errorlog = "-"
+
+
+def on_starting(server) -> None:  # type: ignore[no-untyped-def]
+    # Archivos de métricas de una ejecución anterior con el mismo directorio
+    for name in os.listdir(_metrics_dir):
+        path = os.path.join(_metrics_dir, name)
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            os.unlink(path)
+
+
+def when_ready(server) -> None:  # type: ignore[no-untyped-def]
+    # Particiones mensuales de los próximos meses (core.partitions). Si la base de
+    # datos no responde se arranca igual: los INSERT caen en la partición DEFAULT
+    from core.partitions import maintain
+
+    try:
+        created = maintain()
+    except Exception:
+        server.log.exception("No se pudieron crear las particiones mensuales")
+        return
+    for name in created:
+        server.log.info("Partición creada: %s", name)
+
+
+def child_exit(server, worker) -> None:  # type: ignore[no-untyped-def]
+    from core.metrics import mark_process_dead
+
+    mark_process_dead(worker.pid)
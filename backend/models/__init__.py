@@ -1,5 +1,6 @@
 # Importar todos los modelos para que SQLModel los reconozca
 from models.auth.users import User, UserCreate, UserPublic, UserUpdate
+from models.auth.refreshtoken import RefreshToken
 from models.auth.rol import Rol, RolCreate, RolPublic, RolUpdate
 from models.auth.permiso import Permiso, PermisoCreate, PermisoPublic, PermisoUpdate
 from models.auth.roluser import RolUserBase, RolUserCreate, RolUserPublic, RolUserUpdate
@@ -12,11 +13,17 @@ from models.company.tasaimpositiva import TasaImpositiva, TasaImpositivaCreate,
 from models.product.categoria import Categoria, CategoriaCreate, CategoriaPublic, CategoriaUpdate, CategoriasPublic
 from models.product.orden import Orden, OrdenCreate, OrdenPublic, OrdenUpdate, OrdenesPublic
 from models.product.ordenitem import OrdenItem, OrdenItemCreate, OrdenItemPublic, OrdenItemUpdate, OrdenItemsPublic
-from models.product.producto import Producto, ProductoCreate, ProductoPublic, ProductoUpdate, ProductosPublic
+from models.product.producto import Producto, ProductoCreate, ProductoPublic, ProductoStock, ProductoUpdate, ProductosPublic
+from models.product.movimientostock import MovimientoStock, MovimientoStockPublic, MovimientosStockPublic, SnapshotStock
 from models.bill.factura import Factura, FacturaCreate, FacturaPublic, FacturaUpdate, FacturasPublic
 from models.bill.articulofactura import ArticuloFactura, ArticuloFacturaCreate, ArticuloFacturaPublic, ArticuloFacturaUpdate, ArticulosFacturaPublic
 from models.bill.pagos import Pago, PagoCreate, PagoPublic, PagoUpdate, PagosPublic
 from models.bill.correccionfactura import CorreccionFactura, CorreccionFacturaCreate, CorreccionFacturaPublic, CorreccionFacturaUpdate, CorreccionesFacturaPublic
+from models.bill.cierrecaja import CierreCaja, CierreCajaPublic, CierresCajaPublic
+from models.bill.facturavencida import EscaneoVencidas, FacturaVencida
+from models.sync import SyncBatch, SyncTable, SyncTombstone
+from models.idempotency import IdempotencyKey
+from models.archive import ARCHIVE_TABLES
 
 __all__ = [
     # Users
@@ -24,6 +31,8 @@ __all__ = [
     "UserCreate",
     "UserUpdate",
     "UserPublic",
+    # RefreshToken
+    "RefreshToken",
     # Roles
     "Rol",
     "RolCreate",
@@ -97,6 +106,12 @@ __all__ = [
     "ProductoUpdate",
     "ProductoPublic",
     "ProductosPublic",
+    "ProductoStock",
+    # MovimientoStock
+    "MovimientoStock",
+    "MovimientoStockPublic",
+    "MovimientosStockPublic",
+    "SnapshotStock",
     # Factura
     "Factura",
     "FacturaCreate",
@@ -121,4 +136,19 @@ __all__ = [
     "CorreccionFacturaUpdate",
     "CorreccionFacturaPublic",
     "CorreccionesFacturaPublic",
+    # CierreCaja
+    "CierreCaja",
+    "CierreCajaPublic",
+    "CierresCajaPublic",
+    # Facturas vencidas
+    "FacturaVencida",
+    "EscaneoVencidas",
+    # Sync
+    "SyncTombstone",
+    "SyncTable",
+    "SyncBatch",
+    # Idempotencia
+    "IdempotencyKey",
+    # Archivo
+    "ARCHIVE_TABLES",
 ]
@@ -0,0 +1,49 @@
+from typing import Any
+
+from sqlalchemy import Column, DateTime, Index, Table
+from sqlmodel import SQLModel
+
+from models.bill.articulofactura import ArticuloFactura
+from models.bill.factura import Factura
+from models.bill.pagos import Pago
+from models.product.orden import Orden
+from models.product.ordenitem import OrdenItem
+
+# Momento en que la fila pasó al archivo
+ARCHIVED_AT = "archivado_en"
+
+
+def archive_table(model: type[SQLModel], *indexes: Any) -> Table:
+    """
+    Tabla `<tabla>_archivo` con las mismas columnas que `model` (salvo
+    `change_seq`, que solo sirve en las tablas sincronizadas) más `archivado_en`.
+    No lleva claves foráneas: lo archivado no impide borrar productos o usuarios
+    y la tabla se llena con INSERT ... SELECT sin comprobaciones por fila.
+    """
+    source = model.__table__
+    name = f"{source.name}_archivo"
+    columns = [
+        Column(column.name, column.type, nullable=column.nullable, primary_key=column.name == "id")
+        for column in source.columns
+        if column.name != "change_seq"
+    ]
+    return Table(
+        name,
+        SQLModel.metadata,
+        *columns,
+        Column(ARCHIVED_AT, DateTime(), nullable=False),
+        *(Index(f"ix_{name}_{'_'.join(cols)}", *cols) for cols in indexes),
+    )
+
+
+# Modelo -> tabla de archivo, en el orden en que se mueven las filas (primero
+# las que referencian a las demás)
+ARCHIVE_TABLES: dict[type[SQLModel], Table] = {
+    ArticuloFactura: archive_table(ArticuloFactura, ("factura_id",)),
+    Pago: archive_table(Pago, ("factura_id",)),
+    Factura: archive_table(
+        Factura, ("numero_factura",), ("restaurante_id", "fecha"), ("orden_id",)
+    ),
+    OrdenItem: archive_table(OrdenItem, ("orden_id",)),
+    Orden: archive_table(Orden, ("restaurante_id", "fecha"), ("cliente_id",)),
+}
@@ -0,0 +1,20 @@
+import uuid
+from datetime import datetime
+
+from sqlmodel import Field, SQLModel
+
+
+class RefreshToken(SQLModel, table=True):
+    """
+    Sesión de refresh token. El `id` viaja en el access token como `sid` y el `jti`
+    cambia en cada rotación, así que un refresh token ya usado se detecta como reutilizado.
+    `user_id` no tiene FK para que las sesiones revocadas sobrevivan al borrado del
+    usuario hasta expirar (la lista de revocación se construye a partir de ellas).
+    """
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    user_id: uuid.UUID = Field(index=True)
+    jti: uuid.UUID = Field(default_factory=uuid.uuid4)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: datetime
+    revoked_at: datetime | None = Field(default=None, index=True)
@@ -82,11 +82,31 @@ class UsersPublic(SQLModel):
 class Token(SQLModel):
     access_token: str
     token_type: str = "bearer"
+    refresh_token: str | None = None
+    expires_in: int | None = None
+
+
+class RefreshTokenRequest(SQLModel):
+    refresh_token: str
 
 
 # Contents of JWT token
 class TokenPayload(SQLModel):
     sub: str | None = None
+    typ: str = "access"
+    sid: uuid.UUID | None = None
+
+
+# Claims del usuario embebidos en el access token (se validan sin ir a la BD)
+class AccessTokenPayload(TokenPayload):
+    sub: str
+    sid: uuid.UUID
+    email: str
+    full_name: str | None = None
+    is_active: bool = True
+    is_superuser: bool = False
+    restaurante_id: uuid.UUID | None = None
+    empresa_id: uuid.UUID | None = None
 
 
 class NewPassword(SQLModel):
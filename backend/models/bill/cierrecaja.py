@@ -0,0 +1,59 @@
+import uuid
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import JSON, UniqueConstraint, event
+from sqlmodel import Field, SQLModel
+
+class ResumenPagosMetodo(SQLModel):
+    monto: float
+    cantidad: int
+
+class CierreCajaBase(SQLModel):
+    restaurante_id: uuid.UUID = Field(foreign_key="restaurante.id")
+    numero: int  # correlativo por restaurante (número del informe Z)
+    desde: datetime  # el cierre cubre (desde, hasta]
+    hasta: datetime
+    cerrado_por: uuid.UUID | None = Field(default=None, foreign_key="user.id")
+    # Pagos cobrados y reembolsos registrados en el periodo
+    total_pagos: float = 0.0
+    cantidad_pagos: int = 0
+    total_reembolsos: float = 0.0
+    # Facturas emitidas en el periodo; el total no incluye anuladas ni canceladas
+    total_facturado: float = 0.0
+    # Correcciones aprobadas en el periodo
+    cantidad_correcciones: int = 0
+    monto_correcciones: float = 0.0
+
+class CierreCaja(CierreCajaBase, table=True):
+    """
+    Informe Z de un restaurante: los totales de un periodo de caja calculados una
+    sola vez al cerrar (core.cierrecaja). No se modifica ni se borra.
+    """
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    # metodo_pago -> {"monto", "cantidad"}
+    pagos_por_metodo: dict[str, Any] = Field(default_factory=dict, sa_type=JSON)
+    # estado -> cantidad de facturas
+    facturas_por_estado: dict[str, int] = Field(default_factory=dict, sa_type=JSON)
+    # tipo_correccion -> monto
+    correcciones_por_tipo: dict[str, float] = Field(default_factory=dict, sa_type=JSON)
+
+    # El último cierre de un restaurante (de donde arranca el siguiente) y los
+    # listados del historial se leen con este índice
+    __table_args__ = (UniqueConstraint("restaurante_id", "numero", name="uq_cierrecaja_numero"),)
+
+@event.listens_for(CierreCaja, "before_update")
+@event.listens_for(CierreCaja, "before_delete")
+def _cierre_inmutable(mapper: Any, connection: Any, target: CierreCaja) -> None:
+    raise ValueError("Los cierres de caja no se pueden modificar")
+
+class CierreCajaPublic(CierreCajaBase):
+    id: uuid.UUID
+    pagos_por_metodo: dict[str, ResumenPagosMetodo]
+    facturas_por_estado: dict[str, int]
+    correcciones_por_tipo: dict[str, float]
+
+class CierresCajaPublic(SQLModel):
+    data: list[CierreCajaPublic]
+    count: int
@@ -1,4 +1,5 @@
 import uuid
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 from datetime import datetime
 
@@ -13,6 +14,7 @@ class CorreccionFacturaBase(SQLModel):
     realizado_por: uuid.UUID = Field(foreign_key="user.id")
     aprobado_por: uuid.UUID | None = Field(default=None, foreign_key="user.id")
     estado: str = Field(default="pendiente")  # pendiente, aprobada, rechazada
+    fecha_aprobacion: datetime | None = None
 
 class CorreccionFacturaCreate(CorreccionFacturaBase):
     pass
@@ -28,6 +30,7 @@ class CorreccionFacturaUpdate(SQLModel):
     realizado_por: uuid.UUID | None = None
     aprobado_por: uuid.UUID | None = None
     estado: str | None = None
+    fecha_aprobacion: datetime | None = None
 
 class CorreccionFacturaEstadoUpdate(SQLModel):
     estado: str
@@ -36,9 +39,26 @@ class CorreccionFacturaEstadoUpdate(SQLModel):
 class CorreccionFactura(CorreccionFacturaBase, table=True):
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
 
+    # Correcciones aprobadas en el periodo de un cierre de caja
+    __table_args__ = (Index("ix_correccionfactura_fecha_aprobacion", "fecha_aprobacion"),)
+
 class CorreccionFacturaPublic(CorreccionFacturaBase):
     id: uuid.UUID
 
 class CorreccionesFacturaPublic(SQLModel):
     data: list[CorreccionFacturaPublic]
     count: int
+
+class CorreccionesFacturaAprobar(SQLModel):
+    correccion_ids: list[uuid.UUID] = Field(min_length=1, max_length=500)
+    aplicar_correccion: bool = True
+
+class AprobacionCorreccion(SQLModel):
+    id: uuid.UUID
+    aprobada: bool
+    detail: str | None = None
+    factura_correccion_id: uuid.UUID | None = None
+
+class AprobacionesCorreccionPublic(SQLModel):
+    data: list[AprobacionCorreccion]
+    aprobadas: int
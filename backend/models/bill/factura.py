@@ -1,7 +1,15 @@
 import uuid
+from sqlalchemy import Index, text
 from sqlmodel import Field, SQLModel
 from datetime import datetime
 
+# Estados en los que la factura ya no se cobra: no puede estar vencida
+ESTADOS_SIN_COBRO = ("pagada", "anulada", "cancelada")
+_PENDIENTE_CON_VENCIMIENTO = (
+    f"estado NOT IN ({', '.join(repr(e) for e in ESTADOS_SIN_COBRO)})"
+    " AND fecha_vencimiento IS NOT NULL"
+)
+
 class FacturaBase(SQLModel):
     numero_factura: str = Field(index=True, unique=True)
     fecha: datetime = Field(default_factory=datetime.utcnow)
@@ -9,7 +17,7 @@ class FacturaBase(SQLModel):
     impuestos: float
     total: float
     estado: str = Field(default="pendiente")  # pendiente, pagada, cancelada, anulada
-    tipo_factura: str = Field(default="venta")  # venta, compra
+    tipo_factura: str = Field(default="venta")  # venta, compra, nota_credito, nota_debito
     notas: str | None = None
     fecha_vencimiento: datetime | None = None
     orden_id: uuid.UUID | None = Field(default=None, foreign_key="orden.id")
@@ -41,6 +49,23 @@ class FacturaEstadoUpdate(SQLModel):
 class Factura(FacturaBase, table=True):
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
 
+    # Consultas por restaurante (core.tenant): listados por fecha y por estado.
+    # Las facturas se insertan en orden de fecha, así que para los rangos de
+    # fechas sin restaurante basta un índice BRIN (unos pocos KB por millones de filas).
+    # El escaneo de vencidas (core.vencidas) recorre por fecha de vencimiento solo
+    # las facturas sin pagar, que son pocas: índice parcial
+    __table_args__ = (
+        Index("ix_factura_restaurante_fecha", "restaurante_id", "fecha"),
+        Index("ix_factura_restaurante_estado", "restaurante_id", "estado"),
+        Index("ix_factura_fecha_brin", "fecha", postgresql_using="brin"),
+        Index(
+            "ix_factura_vencimiento_pendiente",
+            "fecha_vencimiento",
+            postgresql_where=text(_PENDIENTE_CON_VENCIMIENTO),
+            sqlite_where=text(_PENDIENTE_CON_VENCIMIENTO),
+        ),
+    )
+
 class FacturaPublic(FacturaBase):
     id: uuid.UUID
 
@@ -0,0 +1,31 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Index
+from sqlmodel import Field, SQLModel
+
+class FacturaVencida(SQLModel, table=True):
+    """
+    Factura vencida sin pagar (core.vencidas). El conjunto se mantiene al crear o
+    modificar facturas y con el escaneo periódico, y es lo que lee GET
+    /facturas/vencidas/ en lugar de recorrer las facturas.
+    """
+
+    factura_id: uuid.UUID = Field(foreign_key="factura.id", primary_key=True, ondelete="CASCADE")
+    restaurante_id: uuid.UUID
+    fecha_vencimiento: datetime
+    detectada_en: datetime = Field(default_factory=datetime.utcnow)
+    recordatorio_enviado_en: datetime | None = None
+
+    __table_args__ = (
+        Index("ix_facturavencida_restaurante", "restaurante_id", "fecha_vencimiento"),
+    )
+
+class EscaneoVencidas(SQLModel, table=True):
+    """
+    Marca del escaneo de vencidas: ya se revisaron las facturas que vencen hasta
+    `hasta`. Una sola fila (id = 1); NULL antes del primer escaneo.
+    """
+
+    id: int = Field(default=1, primary_key=True)
+    hasta: datetime | None = None
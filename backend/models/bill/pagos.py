@@ -1,7 +1,12 @@
 import uuid
+from typing import Any
+
+from sqlalchemy import Index, event, inspect
 from sqlmodel import Field, SQLModel
 from datetime import datetime
 
+from models.partitions import monthly_partitioned
+
 class PagoBase(SQLModel):
     monto: float
     fecha_pago: datetime = Field(default_factory=datetime.utcnow)
@@ -30,6 +35,38 @@ class PagoEstadoUpdate(SQLModel):
 
 class Pago(PagoBase, table=True):
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    # Particionada por mes de fecha_pago: la clave primaria de la tabla es
+    # (id, fecha_pago), pero para el ORM un pago se identifica solo por su id
+    fecha_pago: datetime = Field(default_factory=datetime.utcnow, primary_key=True)
+    # Cuándo el servidor registró el cobro y el reembolso. Los cierres de caja se
+    # arman con estas fechas y no con fecha_pago, que puede ser anterior (pagos
+    # sin conexión sincronizados tarde, reembolsos después del cierre)
+    cobrado_en: datetime | None = None
+    reembolsado_en: datetime | None = None
+
+    __table_args__ = (
+        Index("ix_pago_factura_fecha", "factura_id", "fecha_pago"),
+        Index("ix_pago_cobrado_en", "cobrado_en"),
+        Index("ix_pago_reembolsado_en", "reembolsado_en"),
+        monthly_partitioned("fecha_pago"),
+    )
+    __mapper_args__ = {"primary_key": ["id"]}
+
+def _registrar_estado(target: Pago) -> None:
+    now = datetime.utcnow()
+    if target.estado in ("completado", "reembolsado") and target.cobrado_en is None:
+        target.cobrado_en = now
+    if target.estado == "reembolsado":
+        target.reembolsado_en = now
+
+@event.listens_for(Pago, "before_insert")
+def _pago_insertado(mapper: Any, connection: Any, target: Pago) -> None:
+    _registrar_estado(target)
+
+@event.listens_for(Pago, "before_update")
+def _pago_actualizado(mapper: Any, connection: Any, target: Pago) -> None:
+    if inspect(target).attrs.estado.history.has_changes():
+        _registrar_estado(target)
 
 class PagoPublic(PagoBase):
     id: uuid.UUID
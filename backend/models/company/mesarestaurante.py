@@ -1,6 +1,9 @@
 import uuid
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
+from models.sync import change_seq_field, sync_indexes
+
 class MesaRestauranteBase(SQLModel):
     numero_mesa: int = Field(index=True)
     capacidad: int
@@ -22,6 +25,12 @@ class MesaRestauranteUpdate(SQLModel):
 
 class MesaRestaurante(MesaRestauranteBase, table=True):
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    change_seq: int | None = change_seq_field()
+
+    __table_args__ = (
+        *sync_indexes("mesarestaurante", "restaurante_id"),
+        Index("ix_mesarestaurante_restaurante_numero", "restaurante_id", "numero_mesa"),
+    )
 
 class MesaRestaurantePublic(MesaRestauranteBase):
     id: uuid.UUID
@@ -1,6 +1,9 @@
 import uuid
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
+from models.sync import change_seq_field, sync_indexes
+
 class RestauranteBase(SQLModel):
     nombre: str = Field(index=True)
     direccion: str | None = None
@@ -20,6 +23,12 @@ class RestauranteUpdate(SQLModel):
 
 class Restaurante(RestauranteBase, table=True):
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    change_seq: int | None = change_seq_field()
+
+    __table_args__ = (
+        *sync_indexes("restaurante"),
+        Index("ix_restaurante_empresa", "empresa_id"),
+    )
 
 class RestaurantePublic(RestauranteBase):
     id: uuid.UUID
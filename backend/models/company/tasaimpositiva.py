@@ -1,6 +1,8 @@
 import uuid
 from sqlmodel import Field, SQLModel
 
+from models.sync import change_seq_field, sync_indexes
+
 class TasaImpositivaBase(SQLModel):
     nombre: str = Field(index=True, unique=True)
     porcentaje: float
@@ -14,6 +16,9 @@ class TasaImpositivaUpdate(SQLModel):
 
 class TasaImpositiva(TasaImpositivaBase, table=True):
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    change_seq: int | None = change_seq_field()
+
+    __table_args__ = sync_indexes("tasaimpositiva")
 
 class TasaImpositivaPublic(TasaImpositivaBase):
     id: uuid.UUID
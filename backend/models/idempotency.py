@@ -0,0 +1,20 @@
+from datetime import datetime
+
+from sqlalchemy import LargeBinary
+from sqlmodel import Field, SQLModel
+
+
+class IdempotencyKey(SQLModel, table=True):
+    """
+    Respuesta de una operación hecha con `Idempotency-Key`, para devolverla tal
+    cual si el cliente reintenta. La fila se inserta en la misma transacción que
+    la operación, así que existe si y solo si la operación se aplicó.
+    `huella` identifica la operación (ruta y parámetros) para detectar la misma
+    clave usada en otra operación. Sin respuesta todavía = operación en curso.
+    """
+
+    key: str = Field(primary_key=True, max_length=64)
+    huella: str = Field(max_length=32)
+    status_code: int | None = None
+    response: bytes | None = Field(default=None, sa_type=LargeBinary)
+    expires_at: datetime = Field(index=True)
@@ -0,0 +1,16 @@
+from typing import Any
+
+# Clave en `Table.info` con la columna de particionado. Ver core.partitions
+MONTHLY_PARTITION = "monthly_partition"
+
+
+def monthly_partitioned(column: str) -> dict[str, Any]:
+    """
+    Opciones de tabla para particionarla por rango mensual de `column`
+    (PARTITION BY RANGE en PostgreSQL; en otras bases de datos es una tabla normal).
+    `column` debe formar parte de la clave primaria y de cualquier restricción UNIQUE.
+    """
+    return {
+        "postgresql_partition_by": f"RANGE ({column})",
+        "info": {MONTHLY_PARTITION: column},
+    }
@@ -2,6 +2,8 @@ import uuid
 from sqlmodel import Field, SQLModel
 from pydantic import field_validator
 
+from models.sync import change_seq_field, sync_indexes
+
 class categoriaBase(SQLModel):
     nombre: str = Field(index=True, max_length=100)
     descripcion: str | None = Field(default=None, max_length=255)
@@ -26,6 +28,9 @@ class CategoriaUpdate(SQLModel):
 
 class Categoria(categoriaBase, table=True):
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    change_seq: int | None = change_seq_field()
+
+    __table_args__ = sync_indexes("categoria", "restaurante_id")
 
 class CategoriaPublic(categoriaBase):
     id: uuid.UUID
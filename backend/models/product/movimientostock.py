@@ -0,0 +1,56 @@
+import uuid
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import BigInteger, Index, Integer, event
+from sqlmodel import Field, SQLModel
+
+# Tipos de movimiento: venta (negativo), devolucion (positivo), ajuste (cualquier
+# signo, incluido el stock inicial de un producto) y reposicion (positivo)
+TIPOS_MOVIMIENTO = ("venta", "devolucion", "ajuste", "reposicion")
+
+# BIGSERIAL en PostgreSQL; en SQLite solo INTEGER PRIMARY KEY es autoincremental
+_MovimientoId = BigInteger().with_variant(Integer(), "sqlite")
+
+class MovimientoStockBase(SQLModel):
+    producto_id: uuid.UUID = Field(foreign_key="producto.id", ondelete="CASCADE")
+    tipo: str  # venta, devolucion, ajuste, reposicion
+    cantidad: int  # variación del stock: negativa si sale mercadería
+    orden_id: uuid.UUID | None = None
+    notas: str | None = None
+    fecha: datetime = Field(default_factory=datetime.utcnow)
+
+class MovimientoStock(MovimientoStockBase, table=True):
+    """
+    Libro de movimientos de stock (app.routes.product.producto.crud.mover_stock).
+    Solo se agregan filas: el contador de cada producto (ProductoStock) es la suma
+    de sus movimientos y core.inventario guarda fotos periódicas de esa suma.
+    """
+
+    id: int | None = Field(default=None, primary_key=True, sa_type=_MovimientoId)
+
+    __table_args__ = (Index("ix_movimientostock_producto", "producto_id", "id"),)
+
+@event.listens_for(MovimientoStock, "before_update")
+@event.listens_for(MovimientoStock, "before_delete")
+def _movimiento_inmutable(mapper: Any, connection: Any, target: MovimientoStock) -> None:
+    raise ValueError("Los movimientos de stock no se pueden modificar")
+
+class MovimientoStockPublic(MovimientoStockBase):
+    id: int
+
+class MovimientosStockPublic(SQLModel):
+    data: list[MovimientoStockPublic]
+    count: int
+
+class SnapshotStock(SQLModel, table=True):
+    """
+    Stock de un producto tras el movimiento `movimiento_id` (core.inventario).
+    El stock en cualquier momento es la última foto anterior más los movimientos
+    que la siguen, sin sumar el libro desde el principio.
+    """
+
+    producto_id: uuid.UUID = Field(foreign_key="producto.id", primary_key=True, ondelete="CASCADE")
+    movimiento_id: int = Field(primary_key=True, sa_type=BigInteger)
+    stock: int
+    fecha: datetime = Field(default_factory=datetime.utcnow)
@@ -1,6 +1,9 @@
 import uuid
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
+from models.sync import change_seq_field, sync_indexes
+
 class OrdenBase(SQLModel):
     fecha: str
     total: float
@@ -26,6 +29,12 @@ class OrdenEstadoUpdate(SQLModel):
 
 class Orden(OrdenBase, table=True):
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    change_seq: int | None = change_seq_field()
+
+    __table_args__ = (
+        *sync_indexes("orden", "restaurante_id"),
+        Index("ix_orden_restaurante_estado", "restaurante_id", "estado"),
+    )
 
 class OrdenPublic(OrdenBase):
     id: uuid.UUID
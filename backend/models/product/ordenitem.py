@@ -1,6 +1,9 @@
 import uuid
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
+from models.sync import change_seq_field, sync_indexes
+
 class OrdenItemBase(SQLModel):
     orden_id: uuid.UUID = Field(foreign_key="orden.id")
     producto_id: uuid.UUID = Field(foreign_key="producto.id")
@@ -18,6 +21,12 @@ class OrdenItemUpdate(SQLModel):
 
 class OrdenItem(OrdenItemBase, table=True):
     id : uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    change_seq: int | None = change_seq_field()
+
+    __table_args__ = (
+        *sync_indexes("ordenitem"),
+        Index("ix_ordenitem_orden", "orden_id"),
+    )
 
 class OrdenItemPublic(OrdenItemBase):
     id: uuid.UUID
@@ -1,12 +1,15 @@
 import uuid
+from sqlalchemy import select
+from sqlalchemy.orm import column_property
 from sqlmodel import Field, SQLModel
 from pydantic import field_validator
 
+from models.sync import change_seq_field, sync_indexes
+
 class ProductoBase(SQLModel):
     nombre: str = Field(index=True, unique=True)
     descripcion: str | None = None
     precio: float
-    stock: int
     imagen: str | None = None
     empresa_id: uuid.UUID | None = Field(default=None, foreign_key="empresa.id")
     tasa_impositiva_id: uuid.UUID = Field(foreign_key="tasaimpositiva.id")
@@ -26,7 +29,7 @@ class ProductoBase(SQLModel):
         return v
 
 class ProductoCreate(ProductoBase):
-    pass
+    stock: int
 
 class ProductoUpdate(SQLModel):
     nombre: str
@@ -40,9 +43,33 @@ class ProductoUpdate(SQLModel):
 
 class Producto(ProductoBase, table=True):
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    change_seq: int | None = change_seq_field()
+
+    __table_args__ = sync_indexes("producto", "restaurante_id")
+
+class ProductoStock(SQLModel, table=True):
+    """
+    Contador de stock de un producto (app.routes.product.producto.crud.mover_stock).
+    Va en su propia tabla porque producto está sincronizada: cada venta sobre la
+    fila del producto la renumeraría en /sync y tomaría el lock de numeración
+    (core.sync). Se lee como `Producto.stock`.
+    """
+
+    producto_id: uuid.UUID = Field(foreign_key="producto.id", primary_key=True, ondelete="CASCADE")
+    stock: int = 0
+
+# Solo lectura: las consultas sobre producto traen el stock con una subconsulta
+# por clave primaria
+Producto.stock = column_property(
+    select(ProductoStock.stock)
+    .where(ProductoStock.producto_id == Producto.id)
+    .correlate_except(ProductoStock)
+    .scalar_subquery()
+)
 
 class ProductoPublic(ProductoBase):
     id: uuid.UUID
+    stock: int
 
 class ProductosPublic(SQLModel):
     data: list[ProductoPublic]
@@ -0,0 +1,102 @@
+import uuid
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import BigInteger, Index, null, text
+from sqlmodel import Field, SQLModel
+
+# Secuencia global de cambios (PostgreSQL). Ver core.sync
+SYNC_SEQUENCE = "sync_change_seq"
+
+
+def change_seq_field() -> Any:
+    """
+    Columna `change_seq` de las tablas sincronizadas con la app móvil.
+    Cualquier UPDATE la pone a NULL (también los `update()` en bloque) y al hacer
+    commit se le asigna el siguiente valor de la secuencia.
+    """
+    return Field(default=None, sa_type=BigInteger, sa_column_kwargs={"onupdate": null()})
+
+
+def sync_indexes(tabla: str, *scope: str) -> tuple[Index, ...]:
+    """
+    Índices de una tabla sincronizada: (scope..., change_seq) para leer los cambios
+    de un restaurante desde una marca, y uno parcial con las filas pendientes de
+    numerar, que es lo que se consulta en cada commit.
+    """
+    pendiente = text("change_seq IS NULL")
+    return (
+        Index(f"ix_{tabla}_sync", *scope, "change_seq"),
+        Index(
+            f"ix_{tabla}_sync_pendiente",
+            "id",
+            postgresql_where=pendiente,
+            sqlite_where=pendiente,
+        ),
+    )
+
+
+class SyncTombstone(SQLModel, table=True):
+    """
+    Registro borrado de una tabla sincronizada. Se crea en el mismo flush que el
+    DELETE y recibe su `change_seq` como cualquier otro cambio, así que el cliente
+    se entera del borrado en la misma descarga incremental.
+    """
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    tabla: str = Field(max_length=50)
+    registro_id: uuid.UUID
+    restaurante_id: uuid.UUID | None = None
+    empresa_id: uuid.UUID | None = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    change_seq: int | None = change_seq_field()
+
+    __table_args__ = sync_indexes("synctombstone", "restaurante_id")
+
+
+class SyncTable(SQLModel):
+    columns: list[str]
+    rows: list[list[Any]]
+
+
+class SyncBatch(SQLModel):
+    """
+    Lote de cambios. `next` es la marca para la siguiente llamada; si `has_more`
+    es verdadero hay más cambios pendientes y se debe pedir otro lote enseguida.
+    """
+
+    since: int
+    next: int
+    has_more: bool
+    changes: dict[str, SyncTable]
+    deleted: dict[str, list[uuid.UUID]]
+
+
+class ReplayOperation(SQLModel):
+    """
+    Operación encolada en el dispositivo: la misma petición que habría enviado
+    en línea. `path` es relativo a la API (p. ej. `/orden-items/` o
+    `/orden-items/{id}/cantidad?nueva_cantidad=3`). Un valor "$<key>" en `path`
+    o `body` se sustituye por el `id` devuelto por la operación anterior `key`.
+    """
+
+    key: str = Field(min_length=1, max_length=64)
+    method: str
+    path: str
+    body: Any | None = None
+
+
+class ReplayRequest(SQLModel):
+    operations: list[ReplayOperation]
+
+
+class ReplayResult(SQLModel):
+    key: str
+    status_code: int
+    body: Any | None = None
+    replayed: bool = False
+
+
+class ReplayResponse(SQLModel):
+    applied: int
+    results: list[ReplayResult]
@@ -0,0 +1,25 @@
+import os
+from collections.abc import Iterator
+
+import pytest
+
+# core.config exige estas variables; las pruebas usan SQLite en memoria
+os.environ.setdefault("PROJECT_NAME", "CrossFood")
+os.environ.setdefault("POSTGRES_SERVER", "localhost")
+os.environ.setdefault("POSTGRES_USER", "postgres")
+
+from sqlalchemy.pool import StaticPool  # noqa: E402
+from sqlmodel import Session, SQLModel, create_engine  # noqa: E402
+
+import models  # noqa: E402, F401  registra todas las tablas en el metadata
+
+
+@pytest.fixture
+def session() -> Iterator[Session]:
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session
+
+from app.routes.bill.pagos import crud as pagos_crud
+from core.cierrecaja import cerrar_caja
+from models.auth.users import User
+from models.bill.factura import Factura
+from models.bill.pagos import Pago, PagoCreate
+from models.company.empresa import Empresa
+from models.company.restaurante import Restaurante
+
+
+@pytest.fixture
+def factura(session: Session) -> Factura:
+    empresa = Empresa(nombre="E", direccion="-", ciudad="-", email="e@e.com")
+    session.add(empresa)
+    session.flush()
+    restaurante = Restaurante(nombre="R", empresa_id=empresa.id)
+    cliente = User(email="c@c.com", full_name="C", hashed_password="-")
+    session.add_all([restaurante, cliente])
+    session.flush()
+    factura = Factura(
+        numero_factura="F-1",
+        subtotal=100,
+        impuestos=0,
+        total=100,
+        cliente_id=cliente.id,
+        restaurante_id=restaurante.id,
+    )
+    session.add(factura)
+    session.commit()
+    return factura
+
+
+def _pagar(session: Session, factura: Factura, monto: float, **kwargs) -> Pago:
+    return pagos_crud.create_pago(
+        session=session,
+        pago_create=PagoCreate(
+            monto=monto, metodo_pago="efectivo", factura_id=factura.id, **kwargs
+        ),
+    )
+
+
+def test_reembolso_despues_del_cierre_entra_en_el_siguiente(
+    session: Session, factura: Factura
+) -> None:
+    pago = _pagar(session, factura, 40)
+    primero = cerrar_caja(session=session, restaurante_id=factura.restaurante_id)
+    assert primero.total_pagos == 40
+    assert primero.total_reembolsos == 0
+
+    # El pago conserva su fecha_pago, anterior al cierre
+    pagos_crud.update_estado_pago(session=session, pago_id=pago.id, nuevo_estado="reembolsado")
+    segundo = cerrar_caja(session=session, restaurante_id=factura.restaurante_id)
+    assert segundo.total_pagos == 0
+    assert segundo.total_reembolsos == 40
+
+
+def test_pago_sincronizado_tarde_entra_en_el_siguiente_cierre(
+    session: Session, factura: Factura
+) -> None:
+    cobrado_sin_conexion = datetime.utcnow() - timedelta(hours=2)
+    primero = cerrar_caja(session=session, restaurante_id=factura.restaurante_id)
+    assert primero.cantidad_pagos == 0
+
+    _pagar(session, factura, 25, fecha_pago=cobrado_sin_conexion)
+    segundo = cerrar_caja(session=session, restaurante_id=factura.restaurante_id)
+    assert segundo.total_pagos == 25
+    assert segundo.pagos_por_metodo["efectivo"] == {"monto": 25, "cantidad": 1}
+
+
+def test_cobro_y_reembolso_en_el_mismo_periodo(session: Session, factura: Factura) -> None:
+    pago = _pagar(session, factura, 30)
+    pagos_crud.update_estado_pago(session=session, pago_id=pago.id, nuevo_estado="reembolsado")
+    cierre = cerrar_caja(session=session, restaurante_id=factura.restaurante_id)
+    assert cierre.total_pagos == 30
+    assert cierre.total_reembolsos == 30
@@ -0,0 +1,86 @@
+import pytest
+from sqlmodel import Session
+
+from app.routes.product.producto import crud as productos_crud
+from core.inventario import verificar
+from core.sync import install_change_tracking
+from models.company.empresa import Empresa
+from models.company.restaurante import Restaurante
+from models.company.tasaimpositiva import TasaImpositiva
+from models.product.categoria import Categoria
+from models.product.movimientostock import MovimientoStock
+from models.product.producto import Producto, ProductoCreate, ProductoUpdate
+
+
+@pytest.fixture
+def producto(session: Session) -> Producto:
+    install_change_tracking()
+    empresa = Empresa(nombre="E", direccion="-", ciudad="-", email="e@e.com")
+    session.add(empresa)
+    session.flush()
+    restaurante = Restaurante(nombre="R", empresa_id=empresa.id)
+    tasa = TasaImpositiva(nombre="IVA", porcentaje=19)
+    session.add_all([restaurante, tasa])
+    session.flush()
+    categoria = Categoria(nombre="C", restaurante_id=restaurante.id)
+    session.add(categoria)
+    session.commit()
+    producto = productos_crud.create_producto(
+        session=session,
+        producto_create=ProductoCreate(
+            nombre="P",
+            precio=10,
+            stock=10,
+            tasa_impositiva_id=tasa.id,
+            categoria_id=categoria.id,
+            restaurante_id=restaurante.id,
+        ),
+    )
+    # En SQLite la numeración sigue desde el máximo: con un cambio posterior el
+    # producto no puede recibir de nuevo su mismo número
+    session.add(Categoria(nombre="C2", restaurante_id=restaurante.id))
+    session.commit()
+    session.refresh(producto)
+    return producto
+
+
+def _vender(session: Session, producto: Producto, cantidad: int) -> None:
+    productos_crud.mover_stock(
+        session=session,
+        movimientos=[MovimientoStock(producto_id=producto.id, tipo="venta", cantidad=-cantidad)],
+    )
+    session.commit()
+
+
+def test_venta_no_renumera_el_producto_en_sync(session: Session, producto: Producto) -> None:
+    change_seq = producto.change_seq
+    assert change_seq is not None
+
+    _vender(session, producto, 3)
+
+    session.refresh(producto)
+    assert producto.stock == 7
+    assert producto.change_seq == change_seq
+
+
+def test_cambio_de_datos_si_renumera_el_producto(session: Session, producto: Producto) -> None:
+    change_seq = producto.change_seq
+
+    producto = productos_crud.update_producto(
+        session=session,
+        db_producto=producto,
+        producto_in=ProductoUpdate(nombre="P2", precio=12, stock=4),
+    )
+
+    assert producto.stock == 4
+    assert producto.change_seq > change_seq
+
+
+def test_venta_sin_stock_no_mueve_el_contador(session: Session, producto: Producto) -> None:
+    with pytest.raises(ValueError, match="Stock insuficiente"):
+        _vender(session, producto, 11)
+    session.rollback()
+
+    session.refresh(producto)
+    assert producto.stock == 10
+    assert verificar(session=session) == []
@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session, select
+
+from app.routes.bill.correccionfactura import crud as correcciones_crud
+from app.routes.bill.factura import crud as facturas_crud
+from core.vencidas import enviar_recordatorios, escanear
+from models.auth.users import User
+from models.bill.correccionfactura import CorreccionFactura
+from models.bill.factura import Factura, FacturaCreate
+from models.bill.facturavencida import FacturaVencida
+from models.company.empresa import Empresa
+from models.company.restaurante import Restaurante
+
+
+@pytest.fixture
+def cliente(session: Session) -> User:
+    empresa = Empresa(nombre="E", direccion="-", ciudad="-", email="e@e.com")
+    session.add(empresa)
+    session.flush()
+    restaurante = Restaurante(nombre="R", empresa_id=empresa.id)
+    cliente = User(email="c@c.com", full_name="C", hashed_password="-")
+    session.add_all([restaurante, cliente])
+    session.commit()
+    session.info["restaurante_id"] = restaurante.id
+    return cliente
+
+
+def _factura(session: Session, cliente: User, numero: str, estado: str = "pendiente") -> Factura:
+    factura = Factura(
+        numero_factura=numero,
+        subtotal=10,
+        impuestos=0,
+        total=10,
+        estado=estado,
+        cliente_id=cliente.id,
+        restaurante_id=session.info["restaurante_id"],
+        fecha_vencimiento=datetime.utcnow() - timedelta(days=3),
+    )
+    session.add(factura)
+    session.commit()
+    return factura
+
+
+def _vencidas(session: Session) -> set[str]:
+    statement = select(Factura.numero_factura).join(
+        FacturaVencida, FacturaVencida.factura_id == Factura.id
+    )
+    return set(session.exec(statement).all())
+
+
+def test_anuladas_y_canceladas_no_estan_vencidas(session: Session, cliente: User) -> None:
+    for numero, estado in (("P", "pendiente"), ("A", "anulada"), ("C", "cancelada"), ("G", "pagada")):
+        _factura(session, cliente, numero, estado)
+    escanear(session=session)
+    assert _vencidas(session) == {"P"}
+
+
+def test_anular_con_correccion_la_quita_y_no_se_avisa(session: Session, cliente: User) -> None:
+    escanear(session=session)  # primer escaneo: marca de partida
+    # Creada ya vencida: entra al conjunto al crearla, con el recordatorio pendiente
+    factura = facturas_crud.create_factura(
+        session=session,
+        factura_create=FacturaCreate(
+            numero_factura="F",
+            subtotal=10,
+            impuestos=0,
+            total=10,
+            cliente_id=cliente.id,
+            restaurante_id=session.info["restaurante_id"],
+            fecha_vencimiento=datetime.utcnow() - timedelta(days=3),
+        ),
+    )
+    assert _vencidas(session) == {"F"}
+
+    correccion = CorreccionFactura(
+        motivo="error",
+        tipo_correccion="anulacion",
+        monto_correccion=10,
+        factura_original_id=factura.id,
+        realizado_por=cliente.id,
+    )
+    session.add(correccion)
+    session.commit()
+    correcciones_crud.aprobar_correccion(
+        session=session, correccion_id=correccion.id, aprobado_por=cliente.id
+    )
+    assert _vencidas(session) == set()
+
+    avisadas: list = []
+    assert enviar_recordatorios(session=session, notify=avisadas.extend) == 0
+
+
+def test_escaneo_quita_las_canceladas_por_otra_via(session: Session, cliente: User) -> None:
+    factura = _factura(session, cliente, "F")
+    escanear(session=session)
+    factura.estado = "cancelada"
+    session.add(factura)
+    session.commit()
+    assert escanear(session=session) == {"agregadas": 0, "quitadas": 1}
+    assert _vencidas(session) == set()
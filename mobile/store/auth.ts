@@ -1,6 +1,29 @@
 import { create } from "zustand";
 import AsyncStorage from "@react-native-async-storage/async-storage";
-import { apiFetch, apiFetchForm } from "@/lib/api";
+import { API_URL, apiFetch, apiFetchForm } from "@/lib/api";
+
+// Un access token vencido o revocado recibe 401, o 403 con este detalle
+const INVALID_CREDENTIALS = "Could not validate credentials";
+
+async function isAuthFailure(res: Response) {
+  if (res.status === 401) return true;
+  if (res.status !== 403) return false;
+  try {
+    const body = await res.clone().json();
+    return body?.detail === INVALID_CREDENTIALS;
+  } catch {
+    return false;
+  }
+}
+
+// El backend rota el refresh token y revoca la sesión si se reutiliza uno
+// viejo: las peticiones que fallan a la vez comparten una sola renovación
+let refreshInFlight: Promise<string | null> | null = null;
+
+async function saveTokens(accessToken: string, refreshToken?: string) {
+  await AsyncStorage.setItem("token", accessToken);
+  if (refreshToken) await AsyncStorage.setItem("refreshToken", refreshToken);
+}
 
 type AuthState = {
   userId: string | null;
@@ -13,9 +36,11 @@ type AuthState = {
   login: (username: string, password: string) => Promise<void>;
   logout: () => Promise<void>;
   restoreSession: () => Promise<boolean>;
+  refresh: () => Promise<string | null>;
+  authFetch: (endpoint: string, options?: RequestInit) => Promise<Response>;
 };
 
-export const useAuth = create<AuthState>((set) => ({
+export const useAuth = create<AuthState>((set, get) => ({
   userId: null,
   token: null,
   user: null,
@@ -74,7 +99,7 @@ export const useAuth = create<AuthState>((set) => ({
 
       const userJson = await userRes.json();
 
-      await AsyncStorage.setItem("token", accessToken);
+      await saveTokens(accessToken, tokenRes.refresh_token);
       await AsyncStorage.setItem("userId", userJson.id);
 
       set({
@@ -116,7 +141,7 @@ export const useAuth = create<AuthState>((set) => ({
 
       const userJson = await userRes.json();
 
-      await AsyncStorage.setItem("token", accessToken);
+      await saveTokens(accessToken, tokenRes.refresh_token);
       await AsyncStorage.setItem("userId", userJson.id);
 
       set({
@@ -132,44 +157,95 @@ export const useAuth = create<AuthState>((set) => ({
   },
 
   logout: async () => {
+    const token = get().token || (await AsyncStorage.getItem("token"));
+    if (token) {
+      // Revocar la sesión en el backend; si falla se cierra igual en el dispositivo
+      fetch(`${API_URL}/api/v1/logout`, {
+        method: "POST",
+        headers: { Authorization: `Bearer ${token}` },
+      }).catch(() => {});
+    }
     try {
-      await AsyncStorage.removeItem("token");
-      await AsyncStorage.removeItem("userId");
+      await AsyncStorage.multiRemove(["token", "refreshToken", "userId"]);
     } catch (e) {}
 
     set({ userId: null, token: null, user: null });
   },
 
+  refresh: () => {
+    if (!refreshInFlight) {
+      refreshInFlight = (async () => {
+        const refreshToken = await AsyncStorage.getItem("refreshToken");
+        if (!refreshToken) return null;
+        try {
+          const res = await fetch(`${API_URL}/api/v1/login/refresh-token`, {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({ refresh_token: refreshToken }),
+          });
+          if (!res.ok) return null;
+          const data = await res.json();
+          await saveTokens(data.access_token, data.refresh_token);
+          set({ token: data.access_token });
+          return data.access_token as string;
+        } catch {
+          return null;
+        }
+      })().finally(() => {
+        refreshInFlight = null;
+      });
+    }
+    return refreshInFlight;
+  },
+
+  // fetch autenticado: si el access token venció, lo renueva una vez y repite
+  // la petición; si la sesión terminó, cierra la sesión local
+  authFetch: async (endpoint, options = {}) => {
+    const url = `${API_URL}${endpoint}`.replace(/([^:]\/)\/+/g, "$1");
+    const send = (token: string | null) =>
+      fetch(url, {
+        ...options,
+        headers: {
+          "Content-Type": "application/json",
+          ...(options.headers || {}),
+          ...(token ? { Authorization: `Bearer ${token}` } : {}),
+        },
+      });
+
+    const token = get().token || (await AsyncStorage.getItem("token"));
+    const res = await send(token);
+    if (!(await isAuthFailure(res))) return res;
+
+    const renewed = await get().refresh();
+    if (!renewed) {
+      await get().logout();
+      return res;
+    }
+    return send(renewed);
+  },
+
   restoreSession: async () => {
     const token = await AsyncStorage.getItem("token");
     if (!token) return false;
 
     try {
-      const userRes = await fetch(
-        `${process.env.EXPO_PUBLIC_API_URL}/api/v1/login/test-token`,
-        {
-          method: "POST",
-          headers: {
-            Authorization: `Bearer ${token}`,
-            "Content-Type": "application/json",
-          },
-        }
-      );
+      const userRes = await get().authFetch("/api/v1/login/test-token", {
+        method: "POST",
+      });
 
       if (!userRes.ok) throw new Error("Token inválido");
 
       const userJson = await userRes.json();
 
       set({
-        token,
+        token: get().token || token,
         userId: userJson.id,
         user: userJson,
       });
 
       return true;
     } catch {
-      await AsyncStorage.removeItem("token");
-      await AsyncStorage.removeItem("userId");
+      await AsyncStorage.multiRemove(["token", "refreshToken", "userId"]);
       return false;
     }
   },